@@ -1,2 +1,14 @@
 # Agents module for GrantService
 # Общие агенты для использования в web-admin и других компонентах
+#
+# Модули агентов импортируются как пакеты от корня проекта (agents.base_agent,
+# shared.llm.unified_llm_client, data.database.prompts) - один модуль под
+# одним именем. Из дополнительных путей нужен только web-admin
+# (utils.prompt_manager); он добавляется здесь, один раз для всех агентов.
+import sys
+from pathlib import Path
+
+_project_root = Path(__file__).resolve().parent.parent
+for _path in (_project_root, _project_root / "web-admin"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
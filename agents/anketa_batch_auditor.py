@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch Audit Engine
+
+Массовый аудит анкет (GATE 1 - AnketaValidator):
+1. Рабочий набор - один запрос (get_unaudited_anketas), без запроса сессии на анкету
+2. Аудит - конкурентно, под общим лимитером провайдера
+3. Запись - пачками (bulk_save_audit_results), одна транзакция на пачку
+4. Checkpoint - JSON файл после каждой записанной пачки, прерванный
+   запуск продолжается с непроверенных анкет (resume=True)
+
+В конце - пропускная способность (анкет/мин) и профиль затрат (токены, рубли,
+время ожидания лимитера, среднее время аудита).
+
+Iteration: 38 - Synthetic Corpus Generator (batch audit)
+Date: 2025-11-02
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from shared.llm.provider_limiter import get_provider_limiter
+
+logger = logging.getLogger(__name__)
+
+# progress_callback(done, total)
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+DEFAULT_CHECKPOINT_DIR = Path(__file__).parent.parent / "data" / "batch_audit"
+
+
+class BatchAuditEngine:
+    """
+    Конкурентный batch аудит с checkpoint/resume
+
+    Example:
+        engine = BatchAuditEngine(db, progress_callback=report)
+        stats = await engine.run(telegram_id=123, count=100)
+        # после падения:
+        stats = await engine.run(telegram_id=123, resume=True)
+    """
+
+    TOKENS_PER_AUDIT = 2000      # ~2000 Max tokens per audit
+    RUB_PER_1K_TOKENS = 1.0      # Стоимость GigaChat Max (руб / 1000 tokens)
+
+    def __init__(
+        self,
+        db,
+        llm_provider: str = 'gigachat',
+        write_batch_size: int = 20,
+        checkpoint_dir: Optional[Path] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        progress_every: int = 10
+    ):
+        """
+        Args:
+            db: GrantServiceDatabase
+            llm_provider: Провайдер для AnketaValidator (GigaChat Max)
+            write_batch_size: Результатов на одну транзакцию записи
+            checkpoint_dir: Каталог checkpoint файлов (data/batch_audit по умолчанию)
+            progress_callback: Корутина для отчета о прогрессе в чат
+            progress_every: Как часто (в анкетах) вызывать progress_callback
+        """
+        self.db = db
+        self.llm_provider = llm_provider
+        self.write_batch_size = max(1, write_batch_size)
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else DEFAULT_CHECKPOINT_DIR
+        self.progress_callback = progress_callback
+        self.progress_every = max(1, progress_every)
+
+        self.limiter = get_provider_limiter(llm_provider)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def run(self, telegram_id: int, count: int = 10, resume: bool = False) -> Dict[str, Any]:
+        """
+        Проверить до count непроверенных анкет пользователя
+
+        Args:
+            telegram_id: Владелец анкет
+            count: Размер рабочего набора (игнорируется при resume)
+            resume: Продолжить прерванный запуск из checkpoint
+
+        Returns:
+            {
+                'run_id': str, 'resumed': bool, 'total': int,
+                'audited': int, 'failed': int, 'written': int,
+                'results': [{'anketa_id', 'score', 'status'}, ...],
+                'by_status': {'approved': int, 'needs_revision': int, 'rejected': int},
+                'avg_score': float, 'duration': float, 'throughput_per_min': float,
+                'cost': {'tokens': int, 'rub': float, 'avg_audit_seconds': float,
+                         'limiter_wait_seconds': float, 'concurrency': int}
+            }
+        """
+        checkpoint = self.load_checkpoint(telegram_id) if resume else None
+        resumed = checkpoint is not None
+
+        if checkpoint:
+            completed = set(checkpoint['completed'])
+            pending_ids = [a for a in checkpoint['anketa_ids'] if a not in completed]
+            # Неудачные анкеты прошлого запуска остаются в рабочем наборе и проверяются снова
+            checkpoint['failed'] = 0
+            work = await asyncio.to_thread(
+                self.db.get_unaudited_anketas, telegram_id, len(pending_ids), pending_ids
+            ) if pending_ids else []
+            logger.info(
+                f"[BatchAudit] Resume {checkpoint['run_id']}: "
+                f"{len(checkpoint['completed'])}/{len(checkpoint['anketa_ids'])} done, {len(work)} left"
+            )
+        else:
+            work = await asyncio.to_thread(self.db.get_unaudited_anketas, telegram_id, count)
+            checkpoint = {
+                'run_id': uuid.uuid4().hex[:12],
+                'telegram_id': telegram_id,
+                'started_at': datetime.now().isoformat(),
+                'anketa_ids': [row['anketa_id'] for row in work],
+                'completed': [],
+                'results': [],
+                'failed': 0,
+                'audit_seconds': 0.0
+            }
+            if work:
+                self._save_checkpoint(checkpoint)
+
+        started = time.monotonic()
+        wait_before = self.limiter.stats['wait_seconds']
+        pending: List[Dict[str, Any]] = []
+        total = len(checkpoint['anketa_ids'])
+        done = len(checkpoint['completed'])
+
+        tasks = [asyncio.create_task(self._audit_one(row)) for row in work]
+
+        try:
+            for future in asyncio.as_completed(tasks):
+                result = await future
+                done += 1
+
+                if result is None:
+                    checkpoint['failed'] += 1
+                else:
+                    checkpoint['audit_seconds'] += result.pop('seconds')
+                    pending.append(result)
+
+                if len(pending) >= self.write_batch_size:
+                    batch, pending = pending, []
+                    await self._flush(checkpoint, batch)
+
+                if done % self.progress_every == 0 or done == total:
+                    await self._report(done, total)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if pending:
+                batch, pending = pending, []
+                await self._flush(checkpoint, batch)
+
+        duration = time.monotonic() - started
+        stats = self._summarize(
+            checkpoint,
+            duration=duration,
+            processed=len(work),
+            limiter_wait=self.limiter.stats['wait_seconds'] - wait_before,
+            resumed=resumed
+        )
+
+        # Запуск дошел до конца - checkpoint нужен только прерванным запускам
+        self.clear_checkpoint(telegram_id)
+
+        logger.info(
+            f"[BatchAudit] Done {checkpoint['run_id']}: audited={stats['audited']}, "
+            f"failed={stats['failed']}, {stats['throughput_per_min']:.1f} anketas/min, "
+            f"~{stats['cost']['tokens']} tokens"
+        )
+        return stats
+
+    def load_checkpoint(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Прочитать checkpoint пользователя (None если нет или поврежден)"""
+        path = self._checkpoint_path(telegram_id)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"[BatchAudit] Failed to load checkpoint {path}: {e}")
+            return None
+
+    def clear_checkpoint(self, telegram_id: int):
+        """Удалить checkpoint после завершения запуска"""
+        path = self._checkpoint_path(telegram_id)
+        if path.exists():
+            path.unlink()
+
+    @staticmethod
+    def classify(validation_result: Dict[str, Any]) -> str:
+        """Статус аудита по результату валидации (как в /batch_audit_anketas)"""
+        score = validation_result['score']
+        if validation_result['can_proceed'] and score >= 7.0:
+            return 'approved'
+        if score >= 5.0:
+            return 'needs_revision'
+        return 'rejected'
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    async def _audit_one(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Проверить одну анкету под лимитером провайдера (None при ошибке)"""
+        from agents.anketa_validator import AnketaValidator
+
+        anketa_id = row['anketa_id']
+        try:
+            interview_data = row.get('interview_data') or {}
+            if isinstance(interview_data, str):
+                interview_data = json.loads(interview_data)
+
+            # Отдельный валидатор на задачу: у валидатора свой LLM клиент со своим контекстом
+            validator = AnketaValidator(llm_provider=self.llm_provider, db=self.db)
+
+            async with self.limiter:
+                started = time.monotonic()
+                validation_result = await validator.validate(interview_data)
+                seconds = time.monotonic() - started
+
+            return {
+                'anketa_id': anketa_id,
+                'session_id': row['session_id'],
+                'score': float(validation_result['score']),
+                'status': self.classify(validation_result),
+                'recommendations': validation_result.get('recommendations', []),
+                'seconds': seconds
+            }
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[BatchAudit] Error auditing {anketa_id}: {e}")
+            return None
+
+    async def _flush(self, checkpoint: Dict[str, Any], results: List[Dict[str, Any]]):
+        """Записать пачку и обновить checkpoint только после успешной записи"""
+        written = await asyncio.to_thread(
+            self.db.bulk_save_audit_results, results, self.llm_provider
+        )
+
+        if written != len(results):
+            logger.error(f"[BatchAudit] Failed to write batch of {len(results)} results")
+            checkpoint['failed'] += len(results)
+        else:
+            checkpoint['completed'].extend(r['anketa_id'] for r in results)
+            checkpoint['results'].extend(
+                {'anketa_id': r['anketa_id'], 'score': r['score'], 'status': r['status']}
+                for r in results
+            )
+
+        self._save_checkpoint(checkpoint)
+
+    def _summarize(
+        self,
+        checkpoint: Dict[str, Any],
+        duration: float,
+        processed: int,
+        limiter_wait: float,
+        resumed: bool
+    ) -> Dict[str, Any]:
+        """Итоговая статистика, пропускная способность и профиль затрат"""
+        results = checkpoint['results']
+        audited = len(results)
+        by_status = {'approved': 0, 'needs_revision': 0, 'rejected': 0}
+        for r in results:
+            if r['status'] in by_status:
+                by_status[r['status']] += 1
+
+        tokens = audited * self.TOKENS_PER_AUDIT
+
+        return {
+            'run_id': checkpoint['run_id'],
+            'resumed': resumed,
+            'total': len(checkpoint['anketa_ids']),
+            'audited': audited,
+            'failed': checkpoint['failed'],
+            'written': audited,
+            'results': results,
+            'by_status': by_status,
+            'avg_score': sum(r['score'] for r in results) / audited if audited else 0.0,
+            'duration': round(duration, 2),
+            'throughput_per_min': round(processed / duration * 60, 1) if duration > 0 else 0.0,
+            'cost': {
+                'tokens': tokens,
+                'rub': round(tokens / 1000 * self.RUB_PER_1K_TOKENS, 1),
+                'avg_audit_seconds': round(checkpoint['audit_seconds'] / audited, 1) if audited else 0.0,
+                'limiter_wait_seconds': round(limiter_wait, 1),
+                'concurrency': self.limiter.max_concurrency
+            }
+        }
+
+    def _checkpoint_path(self, telegram_id: int) -> Path:
+        return self.checkpoint_dir / f"checkpoint_{telegram_id}.json"
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]):
+        """Атомарно сохранить checkpoint (tmp + replace)"""
+        path = self._checkpoint_path(checkpoint['telegram_id'])
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            checkpoint['updated_at'] = datetime.now().isoformat()
+
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+            tmp_path.replace(path)
+
+        except Exception as e:
+            logger.error(f"[BatchAudit] Failed to save checkpoint: {e}")
+
+    async def _report(self, done: int, total: int):
+        """Отправить прогресс (ошибки колбэка не прерывают аудит)"""
+        if not self.progress_callback:
+            return
+        try:
+            await self.progress_callback(done, total)
+        except Exception as e:
+            logger.debug(f"[BatchAudit] Progress callback failed: {e}")
@@ -6,14 +6,23 @@ Anketa Synthetic Generator
 Генератор синтетических анкет для создания корпуса данных.
 Использует GigaChat Lite для экономии токенов.
 
+Пакетная генерация (generate_stream) - конкурентно под лимитером
+провайдера: один LLM клиент (сессия и токен) на весь пакет, блок
+примеров промпта собирается один раз, разбор / починка JSON - в пуле
+потоков. Результаты отдаются по мере готовности (async generator),
+поэтому сохранение начинается до конца пакета.
+
 Iteration: 38 - Synthetic Corpus Generator
 Date: 2025-10-25
 """
 
+import asyncio
 import json
 import logging
 import random
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+
+from shared.llm.provider_limiter import ProviderLimiter, get_provider_limiter
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -59,6 +68,9 @@ class AnketaSyntheticGenerator:
         "цифровизация образования"
     ]
 
+    # Повторы при обрезанном / битом JSON (GigaChat иногда обрывает ответ)
+    MAX_RETRIES = 3
+
     def __init__(self, db, llm_model: str = 'GigaChat'):
         """
         Args:
@@ -67,9 +79,6 @@ class AnketaSyntheticGenerator:
         """
         self.db = db
         self.llm_model = llm_model
-
-        # Import LLM client
-        from shared.llm.unified_llm_client import UnifiedLLMClient
         self.llm = None  # Will initialize in async context
 
         logger.info(f"[AnketaSyntheticGenerator] Initialized with model={llm_model}")
@@ -87,12 +96,25 @@ class AnketaSyntheticGenerator:
             )
         return self.llm
 
+    @staticmethod
+    def _format_examples(template_anketas: List[Dict]) -> str:
+        """Блок примеров для промпта (общий для всех анкет пакета)"""
+        examples_text = ""
+        for i, anketa in enumerate(template_anketas[:3], 1):
+            examples_text += f"\nПример {i}:\n"
+            examples_text += f"  Проект: {anketa.get('project_name', 'N/A')}\n"
+            examples_text += f"  Регион: {anketa.get('region', 'N/A')}\n"
+            examples_text += f"  Проблема: {anketa.get('problem', 'N/A')[:200]}...\n"
+            examples_text += f"  Решение: {anketa.get('solution', 'N/A')[:200]}...\n"
+        return examples_text
+
     def _create_generation_prompt(
         self,
         template_anketas: List[Dict],
         quality_level: str,
         topic: Optional[str] = None,
-        region: Optional[str] = None
+        region: Optional[str] = None,
+        examples_text: Optional[str] = None
     ) -> str:
         """
         Создать промпт для генерации анкеты
@@ -102,6 +124,7 @@ class AnketaSyntheticGenerator:
             quality_level: 'low', 'medium', 'high'
             topic: Тема проекта (опционально)
             region: Регион (опционально)
+            examples_text: Готовый блок примеров (_format_examples), если уже собран
         """
 
         # Random region and topic if not specified
@@ -111,13 +134,8 @@ class AnketaSyntheticGenerator:
             topic = random.choice(self.TOPICS)
 
         # Format examples
-        examples_text = ""
-        for i, anketa in enumerate(template_anketas[:3], 1):
-            examples_text += f"\nПример {i}:\n"
-            examples_text += f"  Проект: {anketa.get('project_name', 'N/A')}\n"
-            examples_text += f"  Регион: {anketa.get('region', 'N/A')}\n"
-            examples_text += f"  Проблема: {anketa.get('problem', 'N/A')[:200]}...\n"
-            examples_text += f"  Решение: {anketa.get('solution', 'N/A')[:200]}...\n"
+        if examples_text is None:
+            examples_text = self._format_examples(template_anketas)
 
         # Quality requirements
         quality_requirements = {
@@ -229,7 +247,7 @@ HIGH качество (8-10/10):
         """
 
         # Retry logic (GigaChat sometimes truncates responses)
-        max_retries = 3
+        max_retries = self.MAX_RETRIES
         last_error = None
 
         for attempt in range(1, max_retries + 1):
@@ -354,7 +372,7 @@ HIGH качество (8-10/10):
         quality_distribution: Optional[Dict[str, float]] = None
     ) -> List[Dict]:
         """
-        Генерировать batch анкет
+        Генерировать batch анкет (конкурентно, см. generate_stream)
 
         Args:
             template_anketas: Примеры из БД
@@ -366,7 +384,8 @@ HIGH качество (8-10/10):
             }
 
         Returns:
-            List of generated anketas
+            List of generated anketas (в порядке low -> medium -> high,
+            анкеты с ошибкой генерации пропускаются)
         """
 
         # Default distribution
@@ -384,16 +403,106 @@ HIGH качество (8-10/10):
 
         logger.info(f"[Generator] Batch generation: {count} anketas (low:{low_count}, medium:{medium_count}, high:{high_count})")
 
+        qualities = ['low'] * low_count + ['medium'] * medium_count + ['high'] * high_count
+
         # Generate
-        anketas = []
+        results: Dict[int, Dict] = {}
+        async for index, anketa in self.generate_stream(template_anketas, qualities):
+            if anketa is not None:
+                results[index] = anketa
 
-        for quality, qty in [('low', low_count), ('medium', medium_count), ('high', high_count)]:
-            for i in range(qty):
-                anketa = await self.generate_synthetic_anketa(
-                    template_anketas=template_anketas,
-                    quality_level=quality
-                )
-                anketas.append(anketa)
+        return [results[index] for index in sorted(results)]
 
-        return anketas
+    async def generate_stream(
+        self,
+        template_anketas: List[Dict],
+        qualities: List[str],
+        limiter: Optional[ProviderLimiter] = None,
+        workers: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, Optional[Dict]]]:
+        """
+        Генерировать анкеты конкурентно, отдавая их по мере готовности
+
+        Одновременных запросов не больше, чем разрешает лимитер провайдера;
+        все запросы идут через один LLM клиент. Если потребитель прервал
+        итерацию (aclose / break), незавершенные запросы отменяются.
+
+        Args:
+            template_anketas: Примеры из БД
+            qualities: Качество каждой анкеты ['low', 'medium', ...]
+            limiter: Лимитер провайдера (по умолчанию общий лимитер gigachat)
+            workers: Число воркеров (по умолчанию max_concurrency лимитера)
+
+        Yields:
+            (index, anketa) - index в qualities, anketa = None при ошибке
+        """
+        if not qualities:
+            return
+
+        limiter = limiter or get_provider_limiter('gigachat')
+        workers = max(1, min(workers or limiter.max_concurrency, len(qualities)))
+        examples_text = self._format_examples(template_anketas)
+
+        jobs: asyncio.Queue = asyncio.Queue()
+        for job in enumerate(qualities):
+            jobs.put_nowait(job)
+        results: asyncio.Queue = asyncio.Queue()
+
+        llm = await self._init_llm()
+
+        async def worker():
+            while True:
+                try:
+                    index, quality = jobs.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    anketa = await self._generate_pooled(llm, limiter, template_anketas, quality, examples_text)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"[Generator] Generation failed ({quality}): {e}")
+                    anketa = None
+                results.put_nowait((index, anketa))
+
+        async with llm:
+            tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+            try:
+                for _ in range(len(qualities)):
+                    yield await results.get()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _generate_pooled(
+        self,
+        llm,
+        limiter: ProviderLimiter,
+        template_anketas: List[Dict],
+        quality_level: str,
+        examples_text: str
+    ) -> Dict:
+        """Одна анкета пакета: запрос под лимитером, разбор JSON в пуле потоков"""
+        for attempt in range(1, self.MAX_RETRIES + 1):
+            prompt = self._create_generation_prompt(
+                template_anketas=template_anketas,
+                quality_level=quality_level,
+                examples_text=examples_text
+            )
+
+            async with limiter:
+                response = await llm.generate_text(prompt=prompt, max_tokens=8192)
+
+            try:
+                anketa = await asyncio.to_thread(self._extract_json_from_response, response)
+            except json.JSONDecodeError as e:
+                logger.warning(f"[Generator] JSON parse failed on attempt {attempt}/{self.MAX_RETRIES}: {e}")
+                if attempt == self.MAX_RETRIES:
+                    raise
+                continue
 
+            anketa['synthetic'] = True
+            anketa['quality_target'] = quality_level
+            logger.info(f"[Generator] Generated anketa: {anketa.get('project_name', 'N/A')}")
+            return anketa
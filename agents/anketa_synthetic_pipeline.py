@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic Corpus Pipeline
+
+Массовая генерация и загрузка синтетических анкет:
+1. Генерация - AnketaSyntheticGenerator.generate_stream: конкурентно под
+   общим лимитером провайдера (GigaChat), один LLM клиент на запуск
+2. Сохранение - пачками через execute_values, одна транзакция на пачку
+3. Индексация - батч-эмбеддинги GigaChat + upsert в Qdrant (synthetic_anketas)
+
+Блокирующие операции (PostgreSQL, Embeddings API, Qdrant) выполняются
+в потоках через asyncio.to_thread, поэтому бот не зависает даже на 1000 анкет.
+
+Iteration: 38 - Synthetic Corpus Generator (bulk pipeline)
+Date: 2025-11-02
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from shared.llm.provider_limiter import get_provider_limiter
+
+# Qdrant (опционально - без него индексация пропускается); импортируется на индексации
+QDRANT_AVAILABLE = importlib.util.find_spec('qdrant_client') is not None
+
+logger = logging.getLogger(__name__)
+
+# progress_callback(stage, done, total) - stage: 'generate' | 'persist' | 'index'
+ProgressCallback = Callable[[str, int, int], Awaitable[None]]
+
+
+class SyntheticCorpusPipeline:
+    """
+    Пайплайн генерация → сохранение → индексация синтетических анкет
+
+    Example:
+        pipeline = SyntheticCorpusPipeline(db, progress_callback=report)
+        stats = await pipeline.run(
+            user_data={'telegram_id': 123, 'username': 'admin'},
+            template_anketas=templates,
+            count=1000
+        )
+    """
+
+    QDRANT_COLLECTION = "synthetic_anketas"
+    VECTOR_DIM = 1024
+
+    DEFAULT_QUALITY_DISTRIBUTION = {
+        'low': 0.2,
+        'medium': 0.5,
+        'high': 0.3
+    }
+
+    def __init__(
+        self,
+        db,
+        llm_model: str = 'GigaChat',
+        persist_batch_size: int = 100,
+        embed_batch_size: int = 16,
+        index_to_qdrant: bool = True,
+        qdrant_host: Optional[str] = None,
+        qdrant_port: int = 6333,
+        progress_callback: Optional[ProgressCallback] = None,
+        progress_every: int = 10
+    ):
+        """
+        Args:
+            db: GrantServiceDatabase
+            llm_model: Модель GigaChat для генерации (Lite по умолчанию)
+            persist_batch_size: Анкет на одну транзакцию сохранения
+            embed_batch_size: Текстов на один запрос Embeddings API
+            index_to_qdrant: Индексировать ли анкеты в Qdrant
+            qdrant_host: Хост Qdrant (по умолчанию QDRANT_HOST из окружения)
+            qdrant_port: Порт Qdrant
+            progress_callback: Корутина для отчета о прогрессе в чат
+            progress_every: Как часто (в анкетах) вызывать progress_callback
+        """
+        self.db = db
+        self.llm_model = llm_model
+        self.persist_batch_size = persist_batch_size
+        self.embed_batch_size = embed_batch_size
+        self.index_to_qdrant = index_to_qdrant
+        self.qdrant_host = qdrant_host or os.getenv('QDRANT_HOST', '5.35.88.251')
+        self.qdrant_port = qdrant_port
+        self.progress_callback = progress_callback
+        self.progress_every = max(1, progress_every)
+
+        self.limiter = get_provider_limiter('gigachat')
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def run(
+        self,
+        user_data: Dict[str, Any],
+        template_anketas: List[Dict],
+        count: int,
+        quality_level: Optional[str] = None,
+        quality_distribution: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Сгенерировать, сохранить и проиндексировать count анкет
+
+        Args:
+            user_data: {'telegram_id': ..., 'username': ...} владельца корпуса
+            template_anketas: Примеры реальных анкет
+            count: Количество анкет
+            quality_level: Одно качество для всех анкет (low/medium/high)
+            quality_distribution: Распределение качества (если quality_level не задан)
+
+        Returns:
+            {
+                'requested': int, 'generated': int, 'failed': int,
+                'saved': int, 'indexed': int,
+                'by_quality': {'low': int, 'medium': int, 'high': int},
+                'durations': {'generate': float, 'persist': float, 'index': float}
+            }
+        """
+        qualities = self.plan_qualities(count, quality_level, quality_distribution)
+        stats: Dict[str, Any] = {
+            'requested': count,
+            'generated': 0,
+            'failed': 0,
+            'saved': 0,
+            'indexed': 0,
+            'by_quality': {'low': 0, 'medium': 0, 'high': 0},
+            'durations': {}
+        }
+
+        logger.info(f"[SyntheticPipeline] Start: {count} anketas, concurrency={self.limiter.max_concurrency}")
+
+        # Stage 1+2: генерация, пачки сохраняются по мере готовности
+        started = time.monotonic()
+        saved: List[Tuple[str, Dict]] = []
+        pending: List[Dict] = []
+        persist_time = 0.0
+
+        stream = self._generate(template_anketas, qualities)
+
+        try:
+            done = 0
+            async for _, anketa in stream:
+                done += 1
+                if anketa is None:
+                    stats['failed'] += 1
+                else:
+                    stats['generated'] += 1
+                    quality = anketa.get('quality_target')
+                    if quality in stats['by_quality']:
+                        stats['by_quality'][quality] += 1
+                    pending.append(anketa)
+
+                if len(pending) >= self.persist_batch_size:
+                    persist_time += await self._persist(user_data, pending, saved)
+                    pending = []
+
+                if done % self.progress_every == 0 or done == len(qualities):
+                    await self._report('generate', done, len(qualities))
+        finally:
+            await stream.aclose()
+
+        if pending:
+            persist_time += await self._persist(user_data, pending, saved)
+
+        stats['saved'] = len(saved)
+        stats['durations']['persist'] = round(persist_time, 2)
+        stats['durations']['generate'] = round(time.monotonic() - started - persist_time, 2)
+        await self._report('persist', len(saved), stats['generated'])
+
+        # Stage 3: эмбеддинги + Qdrant одним финальным батчем
+        started = time.monotonic()
+        if self.index_to_qdrant and saved:
+            stats['indexed'] = await self._index(saved)
+        stats['durations']['index'] = round(time.monotonic() - started, 2)
+
+        logger.info(
+            f"[SyntheticPipeline] Done: generated={stats['generated']}, failed={stats['failed']}, "
+            f"saved={stats['saved']}, indexed={stats['indexed']}, durations={stats['durations']}"
+        )
+        return stats
+
+    @classmethod
+    def plan_qualities(
+        cls,
+        count: int,
+        quality_level: Optional[str] = None,
+        quality_distribution: Optional[Dict[str, float]] = None
+    ) -> List[str]:
+        """
+        Список качеств для генерации (та же разбивка, что в generate_batch)
+
+        Returns:
+            ['low', 'low', 'medium', ..., 'high']
+        """
+        if quality_level:
+            return [quality_level] * count
+
+        distribution = quality_distribution or cls.DEFAULT_QUALITY_DISTRIBUTION
+        low_count = int(count * distribution.get('low', 0))
+        medium_count = int(count * distribution.get('medium', 0))
+        high_count = count - low_count - medium_count
+
+        return ['low'] * low_count + ['medium'] * medium_count + ['high'] * high_count
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    def _generate(
+        self,
+        template_anketas: List[Dict],
+        qualities: List[str]
+    ) -> AsyncIterator[Tuple[int, Optional[Dict]]]:
+        """Поток (index, anketa | None) в порядке готовности, один генератор на запуск"""
+        from agents.anketa_synthetic_generator import AnketaSyntheticGenerator
+
+        generator = AnketaSyntheticGenerator(db=self.db, llm_model=self.llm_model)
+        return generator.generate_stream(template_anketas, qualities, limiter=self.limiter)
+
+    async def _persist(
+        self,
+        user_data: Dict[str, Any],
+        anketas: List[Dict],
+        saved: List[Tuple[str, Dict]]
+    ) -> float:
+        """Сохранить пачку одной транзакцией, вернуть затраченное время"""
+        started = time.monotonic()
+
+        anketa_ids = await asyncio.to_thread(self.db.bulk_save_anketas, user_data, anketas)
+        saved.extend(zip(anketa_ids, anketas))
+
+        if len(anketa_ids) != len(anketas):
+            logger.error(f"[SyntheticPipeline] Persist failed for batch of {len(anketas)}")
+
+        return time.monotonic() - started
+
+    async def _index(self, saved: List[Tuple[str, Dict]]) -> int:
+        """Батч-эмбеддинги и upsert в Qdrant, вернуть число проиндексированных"""
+        if not QDRANT_AVAILABLE:
+            logger.warning("[SyntheticPipeline] qdrant-client not installed, skipping indexing")
+            return 0
+
+        try:
+            from qdrant_client import QdrantClient
+            from qdrant_client.models import PointStruct
+            from shared.llm.gigachat_embeddings_client import GigaChatEmbeddingsClient
+
+            embeddings = GigaChatEmbeddingsClient()
+            qdrant = QdrantClient(host=self.qdrant_host, port=self.qdrant_port, timeout=30)
+            await asyncio.to_thread(self._ensure_collection, qdrant)
+        except Exception as e:
+            logger.warning(f"[SyntheticPipeline] Indexing unavailable: {e}")
+            return 0
+
+        indexed = 0
+        for offset in range(0, len(saved), self.persist_batch_size):
+            batch = saved[offset:offset + self.persist_batch_size]
+            texts = [self.anketa_embedding_text(anketa) for _, anketa in batch]
+
+            async with get_provider_limiter('gigachat_embeddings'):
+                vectors = await asyncio.to_thread(
+                    embeddings.embed_texts, texts, self.embed_batch_size
+                )
+
+            points = [
+                PointStruct(
+                    id=str(uuid.uuid5(uuid.NAMESPACE_URL, anketa_id)),
+                    vector=vector,
+                    payload={
+                        'anketa_id': anketa_id,
+                        'project_name': anketa.get('project_name'),
+                        'region': anketa.get('region'),
+                        'organization': anketa.get('organization'),
+                        'quality_target': anketa.get('quality_target'),
+                        'budget': anketa.get('budget'),
+                        'synthetic': True
+                    }
+                )
+                for (anketa_id, anketa), vector in zip(batch, vectors)
+                if vector
+            ]
+
+            if points:
+                try:
+                    await asyncio.to_thread(
+                        qdrant.upsert, collection_name=self.QDRANT_COLLECTION, points=points
+                    )
+                    indexed += len(points)
+                except Exception as e:
+                    logger.warning(f"[SyntheticPipeline] Qdrant upsert failed: {e}")
+
+            await self._report('index', min(offset + len(batch), len(saved)), len(saved))
+
+        return indexed
+
+    def _ensure_collection(self, qdrant):
+        """Создать коллекцию synthetic_anketas, если её нет"""
+        from qdrant_client.models import Distance, VectorParams
+
+        collections = [c.name for c in qdrant.get_collections().collections]
+        if self.QDRANT_COLLECTION not in collections:
+            qdrant.create_collection(
+                collection_name=self.QDRANT_COLLECTION,
+                vectors_config=VectorParams(size=self.VECTOR_DIM, distance=Distance.COSINE)
+            )
+            logger.info(f"[SyntheticPipeline] Created Qdrant collection {self.QDRANT_COLLECTION}")
+
+    @staticmethod
+    def anketa_embedding_text(anketa: Dict) -> str:
+        """Текст анкеты для эмбеддинга (название, проблема, решение)"""
+        parts = [
+            anketa.get('project_name', ''),
+            anketa.get('problem', ''),
+            anketa.get('solution', '')
+        ]
+        return "\n".join(str(p) for p in parts if p)[:4000]
+
+    async def _report(self, stage: str, done: int, total: int):
+        """Отправить прогресс (ошибки колбэка не прерывают пайплайн)"""
+        if not self.progress_callback:
+            return
+        try:
+            await self.progress_callback(stage, done, total)
+        except Exception as e:
+            logger.debug(f"[SyntheticPipeline] Progress callback failed: {e}")
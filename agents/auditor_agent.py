@@ -7,16 +7,12 @@ Auditor Agent - агент для анализа качества заявок 
 import sys
 import os
 
-# Cross-platform path setup
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
 from pathlib import Path
 _project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(_project_root))
-sys.path.insert(0, str(_project_root / "shared"))
-sys.path.insert(0, str(_project_root / "telegram-bot" / "services"))
-sys.path.insert(0, str(_project_root / "web-admin"))
-sys.path.insert(0, str(_project_root / "web-admin" / "utils"))
-sys.path.insert(0, str(_project_root / "data" / "database"))
-sys.path.insert(0, str(_project_root / "agents"))
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
 
 from typing import Dict, Any, List, Optional
 
@@ -27,14 +23,16 @@ from datetime import datetime
 
 # Добавляем пути к модулям
 
-from base_agent import BaseAgent
+from agents.base_agent import BaseAgent
 
 try:
-    from llm.unified_llm_client import UnifiedLLMClient
-    from llm.config import AGENT_CONFIGS
+    from shared.llm.unified_llm_client import UnifiedLLMClient
+    from shared.llm.context_sessions import SharedContextConversation, supports_sessions
+    from shared.llm.config import AGENT_CONFIGS
     UNIFIED_CLIENT_AVAILABLE = True
 except ImportError:
     UNIFIED_CLIENT_AVAILABLE = False
+    SharedContextConversation = None
     try:
         from services.llm_router import LLMRouter, LLMProvider
     except ImportError:
@@ -68,6 +66,10 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Подставляется вместо текста заявки в промпты критериев, когда заявка уже
+# передана преамбулой разговора (_application_context)
+APPLICATION_REFERENCE = "(текст заявки приведен выше)"
+
 class AuditorAgent(BaseAgent):
     """Агент-аудитор для анализа качества заявок"""
 
@@ -83,6 +85,9 @@ class AuditorAgent(BaseAgent):
         else:
             self.llm_router = None
 
+        # Метрики переиспользования контекста последнего аудита
+        self.last_context_reuse: Dict[str, Any] = {}
+
         # Инициализируем DatabasePromptManager
         self.prompt_manager: Optional[DatabasePromptManager] = None
         if PROMPT_MANAGER_AVAILABLE:
@@ -169,6 +174,7 @@ class AuditorAgent(BaseAgent):
                 'readiness_status': readiness_status,
                 'can_submit': overall_score >= 0.7,
                 'final_application': final_application,
+                'context_reuse': self.last_context_reuse,
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
             
@@ -228,9 +234,18 @@ class AuditorAgent(BaseAgent):
             # FIXED: Запускаем последовательно вместо параллельно (asyncio.gather)
             # Причина: GigaChat поддерживает только 1 concurrent stream
 
+            # Текст заявки общий для 4 критериев: с Claude Code он отправляется
+            # один раз в сессии; остальные провайдеры получают прежние промпты
+            # (текст заявки в каждом критерии, без backstory)
+            conversation = None
+            if supports_sessions(self.llm_provider):
+                conversation = self.llm_client.conversation(
+                    self._application_context(application), provider=self.llm_provider, name='auditor'
+                )
+
             # 1. Анализ полноты
             try:
-                analysis['llm_completeness'] = await self._analyze_with_llm_completeness(application)
+                analysis['llm_completeness'] = await self._analyze_with_llm_completeness(application, conversation)
             except Exception as e:
                 logger.error(f"Ошибка LLM анализа полноты: {e}")
                 analysis['llm_completeness'] = {'score': 0.7, 'comments': f'LLM анализ недоступен: {e}'}
@@ -239,7 +254,7 @@ class AuditorAgent(BaseAgent):
 
             # 2. Анализ качества
             try:
-                analysis['llm_quality'] = await self._analyze_with_llm_quality(application, research_data)
+                analysis['llm_quality'] = await self._analyze_with_llm_quality(application, research_data, conversation)
             except Exception as e:
                 logger.error(f"Ошибка LLM анализа качества: {e}")
                 analysis['llm_quality'] = {'score': 0.7, 'comments': f'LLM анализ недоступен: {e}'}
@@ -248,7 +263,8 @@ class AuditorAgent(BaseAgent):
 
             # 3. Анализ соответствия
             try:
-                analysis['llm_compliance'] = await self._analyze_with_llm_compliance(application, selected_grant)
+                analysis['llm_compliance'] = await self._analyze_with_llm_compliance(application, selected_grant,
+                                                                                     conversation)
             except Exception as e:
                 logger.error(f"Ошибка LLM анализа соответствия: {e}")
                 analysis['llm_compliance'] = {'score': 0.7, 'comments': f'LLM анализ недоступен: {e}'}
@@ -257,10 +273,19 @@ class AuditorAgent(BaseAgent):
 
             # 4. Анализ инновационности
             try:
-                analysis['llm_innovation'] = await self._analyze_with_llm_innovation(application)
+                analysis['llm_innovation'] = await self._analyze_with_llm_innovation(application, conversation)
             except Exception as e:
                 logger.error(f"Ошибка LLM анализа инновационности: {e}")
                 analysis['llm_innovation'] = {'score': 0.7, 'comments': f'LLM анализ недоступен: {e}'}
+
+            if conversation is not None:
+                self.last_context_reuse = conversation.metrics()
+                logger.info(f"Auditor context reuse ({self.last_context_reuse['mode']}): "
+                            f"~{self.last_context_reuse['client_tokens_not_resent']} tokens not re-sent, "
+                            f"~{self.last_context_reuse['history_tokens_replayed']} replayed from session history")
+                await conversation.close()
+            else:
+                self.last_context_reuse = {}
         else:
             # Fallback на старую логику без LLM
             analysis['realism'] = self._analyze_realism(application, user_answers)
@@ -268,9 +293,28 @@ class AuditorAgent(BaseAgent):
         
         return analysis
     
-    async def _analyze_with_llm_completeness(self, application: Dict) -> Dict[str, Any]:
+    def _application_context(self, application: Dict) -> str:
+        """Общий контекст LLM-критериев: роль аудитора и текст заявки"""
+        return f"""{self._get_backstory()}
+
+ЗАЯВКА НА ГРАНТ:
+
+{self._format_application_for_analysis(application)}"""
+
+    async def _ask_llm(self, prompt: str, conversation: Optional[SharedContextConversation] = None) -> str:
+        """Запрос к LLM: в разговоре с общим контекстом или отдельным вызовом"""
+        llm_params = {k: v for k, v in self.config.items() if k != 'provider'}
+        async with self.llm_client:
+            if conversation is not None:
+                return await conversation.ask(prompt, **llm_params)
+            return await self.llm_client.generate_async(prompt, provider=self.llm_provider, **llm_params)
+
+    async def _analyze_with_llm_completeness(self, application: Dict,
+                                             conversation: Optional[SharedContextConversation] = None) -> Dict[str, Any]:
         """LLM анализ полноты заявки"""
         try:
+            application_text = APPLICATION_REFERENCE if conversation else self._format_application_for_analysis(application)
+
             # Пытаемся загрузить промпт из БД
             prompt = None
             if self.prompt_manager:
@@ -278,7 +322,7 @@ class AuditorAgent(BaseAgent):
                     prompt = self.prompt_manager.get_prompt(
                         'auditor',
                         'llm_completeness',
-                        variables={'application_text': self._format_application_for_analysis(application)}
+                        variables={'application_text': application_text}
                     )
                 except Exception as e:
                     logger.warning(f"⚠️ Ошибка загрузки llm_completeness промпта: {e}")
@@ -287,7 +331,7 @@ class AuditorAgent(BaseAgent):
                 # Fallback промпт (hardcoded)
                 prompt = f"""Проанализируй полноту следующей заявки на грант:
 
-{self._format_application_for_analysis(application)}
+{application_text}
 
 Оцени по шкале 1-10:
 1. Наличие всех необходимых разделов
@@ -296,12 +340,7 @@ class AuditorAgent(BaseAgent):
 
 Дай оценку и краткие комментарии."""
             
-            async with self.llm_client:
-                response = await self.llm_client.generate_async(
-                    prompt,
-                    provider=self.llm_provider,
-                    **{k: v for k, v in self.config.items() if k != 'provider'}
-                )
+            response = await self._ask_llm(prompt, conversation)
 
             score = self._extract_score_from_text(response)
 
@@ -315,9 +354,11 @@ class AuditorAgent(BaseAgent):
             logger.error(f"Ошибка LLM анализа полноты: {e}")
             return {'score': 0.7, 'comments': f'Ошибка LLM анализа: {str(e)}'}
     
-    async def _analyze_with_llm_quality(self, application: Dict, research_data: Dict) -> Dict[str, Any]:
+    async def _analyze_with_llm_quality(self, application: Dict, research_data: Dict,
+                                        conversation: Optional[SharedContextConversation] = None) -> Dict[str, Any]:
         """LLM анализ качества содержания"""
         try:
+            application_text = APPLICATION_REFERENCE if conversation else self._format_application_for_analysis(application)
             # Пытаемся загрузить промпт из БД
             prompt = None
             if self.prompt_manager:
@@ -326,7 +367,7 @@ class AuditorAgent(BaseAgent):
                         'auditor',
                         'llm_quality',
                         variables={
-                            'application_text': self._format_application_for_analysis(application),
+                            'application_text': application_text,
                             'research_data': str(research_data)
                         }
                     )
@@ -338,7 +379,7 @@ class AuditorAgent(BaseAgent):
                 prompt = f"""Оцени качество содержания заявки на грант:
 
 ЗАЯВКА:
-{self._format_application_for_analysis(application)}
+{application_text}
 
 ДАННЫЕ ИССЛЕДОВАНИЯ:
 {str(research_data)}
@@ -351,12 +392,7 @@ class AuditorAgent(BaseAgent):
 
 Дай оценку и рекомендации."""
 
-            async with self.llm_client:
-                response = await self.llm_client.generate_async(
-                    prompt,
-                    provider=self.llm_provider,
-                    **{k: v for k, v in self.config.items() if k != 'provider'}
-                )
+            response = await self._ask_llm(prompt, conversation)
 
             score = self._extract_score_from_text(response)
 
@@ -370,9 +406,11 @@ class AuditorAgent(BaseAgent):
             logger.error(f"Ошибка LLM анализа качества: {e}")
             return {'score': 0.7, 'comments': f'Ошибка LLM анализа: {str(e)}'}
     
-    async def _analyze_with_llm_compliance(self, application: Dict, selected_grant: Dict) -> Dict[str, Any]:
+    async def _analyze_with_llm_compliance(self, application: Dict, selected_grant: Dict,
+                                           conversation: Optional[SharedContextConversation] = None) -> Dict[str, Any]:
         """LLM анализ соответствия требованиям"""
         try:
+            application_text = APPLICATION_REFERENCE if conversation else self._format_application_for_analysis(application)
             grant_criteria = self._format_grant_criteria(selected_grant)
 
             # Пытаемся загрузить промпт из БД
@@ -383,7 +421,7 @@ class AuditorAgent(BaseAgent):
                         'auditor',
                         'llm_compliance',
                         variables={
-                            'application_text': self._format_application_for_analysis(application),
+                            'application_text': application_text,
                             'grant_criteria': grant_criteria
                         }
                     )
@@ -395,7 +433,7 @@ class AuditorAgent(BaseAgent):
                 prompt = f"""Проанализируй соответствие заявки требованиям гранта:
 
 ЗАЯВКА:
-{self._format_application_for_analysis(application)}
+{application_text}
 
 ТРЕБОВАНИЯ ГРАНТА:
 {grant_criteria}
@@ -408,12 +446,7 @@ class AuditorAgent(BaseAgent):
 
 Дай оценку и укажи несоответствия."""
 
-            async with self.llm_client:
-                response = await self.llm_client.generate_async(
-                    prompt,
-                    provider=self.llm_provider,
-                    **{k: v for k, v in self.config.items() if k != 'provider'}
-                )
+            response = await self._ask_llm(prompt, conversation)
 
             score = self._extract_score_from_text(response)
 
@@ -427,9 +460,11 @@ class AuditorAgent(BaseAgent):
             logger.error(f"Ошибка LLM анализа соответствия: {e}")
             return {'score': 0.7, 'comments': f'Ошибка LLM анализа: {str(e)}'}
     
-    async def _analyze_with_llm_innovation(self, application: Dict) -> Dict[str, Any]:
+    async def _analyze_with_llm_innovation(self, application: Dict,
+                                           conversation: Optional[SharedContextConversation] = None) -> Dict[str, Any]:
         """LLM анализ инновационности"""
         try:
+            application_text = APPLICATION_REFERENCE if conversation else self._format_application_for_analysis(application)
             # Пытаемся загрузить промпт из БД
             prompt = None
             if self.prompt_manager:
@@ -437,7 +472,7 @@ class AuditorAgent(BaseAgent):
                     prompt = self.prompt_manager.get_prompt(
                         'auditor',
                         'llm_innovation',
-                        variables={'application_text': self._format_application_for_analysis(application)}
+                        variables={'application_text': application_text}
                     )
                 except Exception as e:
                     logger.warning(f"⚠️ Ошибка загрузки llm_innovation промпта: {e}")
@@ -446,7 +481,7 @@ class AuditorAgent(BaseAgent):
                 # Fallback промпт (hardcoded)
                 prompt = f"""Оцени инновационность проекта:
 
-{self._format_application_for_analysis(application)}
+{application_text}
 
 Оцени по шкале 1-10:
 1. Новизна подхода
@@ -456,12 +491,7 @@ class AuditorAgent(BaseAgent):
 
 Дай оценку и обоснование."""
 
-            async with self.llm_client:
-                response = await self.llm_client.generate_async(
-                    prompt,
-                    provider=self.llm_provider,
-                    **{k: v for k, v in self.config.items() if k != 'provider'}
-                )
+            response = await self._ask_llm(prompt, conversation)
 
             score = self._extract_score_from_text(response)
 
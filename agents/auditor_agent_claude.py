@@ -7,15 +7,18 @@ Auditor Agent с интеграцией Claude Code API
 для более объективной и глубокой аналитики.
 """
 
+import os
 import sys
 import json
 import asyncio
 from typing import Dict, Any, Optional
 from datetime import datetime
 
-# Добавляем путь к модулям
-sys.path.append('/var/GrantService/data')
-sys.path.append('/var/GrantService')
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
 
 from agents.base_agent import BaseAgent
 from shared.llm.llm_router import LLMRouter, TaskType
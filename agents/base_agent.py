@@ -6,16 +6,12 @@
 import sys
 import os
 
-# Cross-platform path setup
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
 from pathlib import Path
 _project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(_project_root))
-sys.path.insert(0, str(_project_root / "shared"))
-sys.path.insert(0, str(_project_root / "telegram-bot" / "services"))
-sys.path.insert(0, str(_project_root / "web-admin"))
-sys.path.insert(0, str(_project_root / "web-admin" / "utils"))
-sys.path.insert(0, str(_project_root / "data" / "database"))
-sys.path.insert(0, str(_project_root / "agents"))
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
 
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, List
@@ -26,35 +22,47 @@ from datetime import datetime
 # Добавляем путь к модулям базы данных
 
 try:
-    from data.database.prompts import get_prompts_by_agent, format_prompt
+    from data.database.prompts import format_prompt
     PROMPTS_AVAILABLE = True
 except ImportError as e:
     print(f"[WARN] Модуль промптов недоступен: {e}")
     PROMPTS_AVAILABLE = False
 
+# Снимок промптов и настроек агентов, общий для процесса (без запроса к БД на каждый агент)
+from shared.agent_config import AgentConfigSnapshot, get_agent_config
+
 class BaseAgent(ABC):
     """Базовый класс для всех агентов"""
+
+    # agent_type в таблице agent_prompts, если отличается от self.agent_type
+    prompt_agent_type: Optional[str] = None
     
     def __init__(self, agent_type: str, db, llm_provider: str = "claude_code"):
         self.agent_type = agent_type
         self.db = db
         self.llm_provider = llm_provider
         self.prompts = {}
+        self.config: AgentConfigSnapshot = AgentConfigSnapshot()
         self._load_prompts()
     
     def _load_prompts(self):
-        """Загрузить промпты из базы данных"""
-        if not PROMPTS_AVAILABLE:
-            print(f"[WARN] Промпты для агента {self.agent_type} не загружены (модуль недоступен)")
-            return
+        """
+        Промпты агента из общего снимка (shared/agent_config.py)
 
-        try:
-            prompts = get_prompts_by_agent(self.agent_type)
-            for prompt in prompts:
-                self.prompts[prompt['name']] = prompt
-            print(f"[OK] Загружено {len(prompts)} промптов для агента {self.agent_type}")
-        except Exception as e:
-            print(f"[ERROR] Ошибка загрузки промптов для агента {self.agent_type}: {e}")
+        Снимок загружается один раз на процесс и обновляется по NOTIFY
+        prompt_changes; агент запоминает его на время своей работы.
+        """
+        self.config = get_agent_config()
+        self.prompts = self.config.prompts_for(self.agent_type)
+
+    @property
+    def config_version(self) -> int:
+        """Версия снимка конфигурации, с которой создан агент"""
+        return self.config.version
+
+    def get_settings(self, agent_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Настройки агента из ai_agent_settings (из снимка)"""
+        return self.config.settings_for(agent_name or self.agent_type)
     
     def get_prompt(self, prompt_name: str) -> Optional[Dict]:
         """Получить промпт по названию"""
@@ -73,6 +81,18 @@ class BaseAgent(ABC):
             print(f"[ERROR] Ошибка форматирования промпта '{prompt_name}': {e}")
             return None
     
+    def get_prompt_version(self) -> Optional[int]:
+        """Версия промптов агента из DatabasePromptManager (None, если менеджер недоступен)"""
+        prompt_manager = getattr(self, 'prompt_manager', None)
+        if prompt_manager is None or not hasattr(prompt_manager, 'get_prompt_version'):
+            return None
+
+        try:
+            return prompt_manager.get_prompt_version(self.prompt_agent_type or self.agent_type)
+        except Exception as e:
+            print(f"[WARN] Версия промптов агента {self.agent_type} недоступна: {e}")
+            return None
+
     def get_available_prompts(self) -> List[str]:
         """Получить список доступных промптов"""
         return list(self.prompts.keys())
@@ -109,6 +129,7 @@ class BaseAgent(ABC):
             'agent_type': self.agent_type,
             'timestamp': datetime.now().isoformat(),
             'status': 'success',
+            'prompt_version': self.get_prompt_version(),
             'result': result
         }
         
@@ -123,7 +144,8 @@ class BaseAgent(ABC):
             'status': 'error',
             'error': str(error),
             'error_type': type(error).__name__,
-            'context': context
+            'context': context,
+            'prompt_version': self.get_prompt_version()
         }
         
         self.log_activity('error_occurred', error_output)
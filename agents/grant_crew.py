@@ -10,10 +10,13 @@ import os
 import asyncio
 import time
 
-# Добавляем пути к модулям
-sys.path.append('/var/GrantService/shared')
-sys.path.append('/var/GrantService/telegram-bot/services')
-sys.path.append('/var/GrantService/agents')
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+logger = logging.getLogger(__name__)
 
 try:
     from agents.researcher_agent import ResearcherAgent
@@ -28,8 +31,6 @@ except ImportError as e:
     AuditorAgent = None
     InterviewerAgent = None
 
-logger = logging.getLogger(__name__)
-
 class GrantCrew:
     """Оркестратор для координации работы агентов согласно AGENTS_DATA_FLOW.md"""
     
@@ -24,16 +24,12 @@ Version: 1.0
 import sys
 import os
 
-# Cross-platform path setup
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
 from pathlib import Path
 _project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(_project_root))
-sys.path.insert(0, str(_project_root / "shared"))
-sys.path.insert(0, str(_project_root / "telegram-bot" / "services"))
-sys.path.insert(0, str(_project_root / "web-admin"))
-sys.path.insert(0, str(_project_root / "web-admin" / "utils"))
-sys.path.insert(0, str(_project_root / "data" / "database"))
-sys.path.insert(0, str(_project_root / "agents"))
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
 
 from typing import Dict, Any, List, Optional, Tuple
 
@@ -44,12 +40,12 @@ from datetime import datetime
 
 # Add paths
 
-from base_agent import BaseAgent
-from auditor_agent import AuditorAgent
+from agents.base_agent import BaseAgent
+from agents.auditor_agent import AuditorAgent
 
 try:
-    from llm.unified_llm_client import UnifiedLLMClient
-    from llm.config import AGENT_CONFIGS
+    from shared.llm.unified_llm_client import UnifiedLLMClient
+    from shared.llm.config import AGENT_CONFIGS
     UNIFIED_CLIENT_AVAILABLE = True
 except ImportError:
     UNIFIED_CLIENT_AVAILABLE = False
@@ -22,15 +22,16 @@ Created: 2025-10-20
 Version: 2.0 (Reference Points Framework)
 """
 
+import importlib.util
 import sys
 import os
 from pathlib import Path
 
-# Cross-platform path setup
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
 _project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(_project_root))
-sys.path.insert(0, str(_project_root / "shared"))
-sys.path.insert(0, str(_project_root / "agents"))
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
 
 from typing import Dict, Any, List, Optional
 import logging
@@ -38,11 +39,11 @@ import asyncio
 import time
 from datetime import datetime
 
-from base_agent import BaseAgent
-from auditor_agent import AuditorAgent
+from agents.base_agent import BaseAgent
+from agents.auditor_agent import AuditorAgent
 
 # Reference Points Framework
-from reference_points import (
+from agents.reference_points import (
     ReferencePointManager,
     AdaptiveQuestionGenerator,
     ConversationFlowManager,
@@ -54,19 +55,16 @@ from reference_points import (
 
 # LLM
 try:
-    from llm.unified_llm_client import UnifiedLLMClient
-    from llm.config import AGENT_CONFIGS
+    from shared.llm.unified_llm_client import UnifiedLLMClient
+    from shared.llm.config import AGENT_CONFIGS
     UNIFIED_CLIENT_AVAILABLE = True
 except ImportError:
     UNIFIED_CLIENT_AVAILABLE = False
     print("[WARN] UnifiedLLMClient недоступен")
 
-# Qdrant
-try:
-    from qdrant_client import QdrantClient
-    QDRANT_AVAILABLE = True
-except ImportError:
-    QDRANT_AVAILABLE = False
+# Qdrant: только проверка наличия, клиент импортируется при создании агента
+QDRANT_AVAILABLE = importlib.util.find_spec('qdrant_client') is not None
+if not QDRANT_AVAILABLE:
     print("[WARN] Qdrant client недоступен")
 
 logger = logging.getLogger(__name__)
@@ -126,6 +124,7 @@ class InteractiveInterviewerAgentV2(BaseAgent):
 
         if QDRANT_AVAILABLE:
             try:
+                from qdrant_client import QdrantClient
                 self.qdrant = QdrantClient(
                     host=qdrant_host,
                     port=qdrant_port,
@@ -16,6 +16,7 @@ Version: 1.0
 """
 
 from typing import Dict, Any, List, Optional
+import importlib.util
 import logging
 from enum import Enum
 
@@ -24,13 +25,21 @@ from .reference_point import ReferencePoint
 # Initialize logger BEFORE using it
 logger = logging.getLogger(__name__)
 
-# Для генерации embeddings (Qdrant search)
+# Локальная реплика коллекций Qdrant (поиск без сетевого запроса)
 try:
-    from sentence_transformers import SentenceTransformer
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
+    from shared.vector_replica import replicated
 except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
-    # sentence-transformers not available, Qdrant search will be disabled
+    replicated = None
+
+# Для генерации embeddings (Qdrant search). Сам пакет (torch) импортируется
+# вместе с моделью в _load_embedding_model_async, не при импорте модуля
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec('sentence_transformers') is not None
+# sentence-transformers not available -> Qdrant search will be disabled
+
+
+def _load_sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
 
 
 class UserExpertiseLevel(Enum):
@@ -82,7 +91,7 @@ class AdaptiveQuestionGenerator:
             qdrant_collection: Название коллекции в Qdrant
         """
         self.llm = llm_client
-        self.qdrant = qdrant_client
+        self.qdrant = replicated(qdrant_client) if replicated else qdrant_client
         self.collection_name = qdrant_collection
 
         # Lazy loading: НЕ загружаем модель в __init__!
@@ -485,7 +494,7 @@ class AdaptiveQuestionGenerator:
             # Загрузить модель в отдельном thread
             self.embedding_model = await loop.run_in_executor(
                 None,
-                SentenceTransformer,
+                _load_sentence_transformer,
                 'paraphrase-multilingual-MiniLM-L12-v2'
             )
 
@@ -107,9 +107,12 @@ class ReferencePointManager:
         """
         completed_ids = self.get_completed_rp_ids()
 
-        # DEBUG: Логируем начало поиска
-        logger.info(f"[get_next_reference_point] Searching for next RP...")
-        logger.info(f"[get_next_reference_point] Total RPs: {len(self.reference_points)}, Completed IDs: {completed_ids}")
+        # Вызывается на каждом ходе интервью: подробности только на DEBUG,
+        # %-форматирование - строки не собираются, если DEBUG выключен
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("[get_next_reference_point] Total RPs: %d, completed: %s",
+                         len(self.reference_points), completed_ids)
 
         candidates = []
         skipped_completed = 0
@@ -118,39 +121,36 @@ class ReferencePointManager:
         for rp_id in self._rp_order:
             rp = self.reference_points[rp_id]
 
-            # DEBUG: Подробное логирование для каждого RP
-            logger.debug(f"[get_next_reference_point] Checking {rp_id}: "
-                        f"state={rp.state.value}, is_complete={rp.is_complete()}, "
-                        f"data_length={len(rp.collected_data)}")
-
             # Пропустить завершённые
             if exclude_completed and rp.is_complete():
                 skipped_completed += 1
-                logger.info(f"[get_next_reference_point] ❌ SKIPPED (completed): {rp_id} "
-                           f"(state={rp.state.value}, data={len(rp.collected_data)} items)")
+                if debug:
+                    logger.debug("[get_next_reference_point] skipped (completed): %s (state=%s, data=%d items)",
+                                 rp_id, rp.state.value, len(rp.collected_data))
                 continue
 
             # Пропустить заблокированные
             if rp.is_blocked(completed_ids):
                 skipped_blocked += 1
-                logger.info(f"[get_next_reference_point] ❌ SKIPPED (blocked): {rp_id}")
+                if debug:
+                    logger.debug("[get_next_reference_point] skipped (blocked): %s", rp_id)
                 continue
 
-            logger.info(f"[get_next_reference_point] ✅ CANDIDATE: {rp_id}")
+            if debug:
+                logger.debug("[get_next_reference_point] candidate: %s", rp_id)
             candidates.append(rp)
 
         if not candidates:
-            logger.error(f"[get_next_reference_point] ❌ NO CANDIDATES FOUND!")
-            logger.error(f"  Total RPs: {len(self.reference_points)}")
-            logger.error(f"  Skipped (completed): {skipped_completed}")
-            logger.error(f"  Skipped (blocked): {skipped_blocked}")
-
-            # DEBUG: Покажем состояние всех RP
-            logger.error(f"  All RPs states:")
-            for rp_id in self._rp_order[:5]:  # Первые 5 для дебага
-                rp = self.reference_points[rp_id]
-                logger.error(f"    {rp_id}: state={rp.state.value}, complete={rp.is_complete()}, "
-                           f"data={list(rp.collected_data.keys())}")
+            # Одна запись вместо восьми: состояние первых 5 RP для дебага
+            states = "; ".join(
+                f"{rp_id}: state={self.reference_points[rp_id].state.value}, "
+                f"complete={self.reference_points[rp_id].is_complete()}, "
+                f"data={list(self.reference_points[rp_id].collected_data.keys())}"
+                for rp_id in self._rp_order[:5]
+            )
+            logger.error("[get_next_reference_point] NO CANDIDATES FOUND: total=%d, "
+                         "skipped completed=%d, blocked=%d; %s",
+                         len(self.reference_points), skipped_completed, skipped_blocked, states)
 
             return None
 
@@ -166,7 +166,9 @@ class ReferencePointManager:
         candidates.sort(key=sort_key)
 
         next_rp = candidates[0]
-        logger.info(f"Next RP: {next_rp.id} ({next_rp.name}) [P{next_rp.priority.value}]")
+        logger.info("Next RP: %s (%s) [P%s], candidates=%d, completed=%d, blocked=%d",
+                    next_rp.id, next_rp.name, next_rp.priority.value,
+                    len(candidates), skipped_completed, skipped_blocked)
 
         return next_rp
 
@@ -20,16 +20,12 @@ Version: 1.0
 import sys
 import os
 
-# Cross-platform path setup
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
 from pathlib import Path
 _project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(_project_root))
-sys.path.insert(0, str(_project_root / "shared"))
-sys.path.insert(0, str(_project_root / "telegram-bot" / "services"))
-sys.path.insert(0, str(_project_root / "web-admin"))
-sys.path.insert(0, str(_project_root / "web-admin" / "utils"))
-sys.path.insert(0, str(_project_root / "data" / "database"))
-sys.path.insert(0, str(_project_root / "agents"))
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
 
 from typing import Dict, Any, List, Optional
 
@@ -37,12 +33,6 @@ import logging
 import asyncio
 import time
 from datetime import datetime
-import json
-
-# Add paths
-current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(current_dir)
-sys.path.append(os.path.join(current_dir, 'web-admin'))
 
 from agents.researcher_agent_v2 import ResearcherAgentV2
 
@@ -393,21 +383,10 @@ class PresidentialGrantsResearcher(ResearcherAgentV2):
             # Обновить metadata.total_queries тоже
             research_results['metadata']['total_queries'] = total_queries
 
-            # Сохранить в БД
-            results_json = json.dumps(research_results, ensure_ascii=False)
-
-            with self.db.connect() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    UPDATE researcher_research
-                    SET research_results = %s::jsonb
-                    WHERE research_id = %s
-                    """,
-                    (results_json, research_id)
-                )
-                conn.commit()
-                cursor.close()
+            from data.database.research_storage import RESEARCH_BLOCKS, ResearchStorage
+
+            # Сохранить в БД: сводка + raw_results новых блоков (блоки 1-3 уже сохранены)
+            ResearchStorage(self.db).save_results(research_id, research_results, stored_blocks=RESEARCH_BLOCKS)
 
             logger.info(f"💾 БД обновлена: fund_requirements добавлены в {research_id}")
 
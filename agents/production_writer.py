@@ -32,17 +32,17 @@ import asyncio
 import time
 from datetime import datetime
 
-# Добавляем пути
-project_root = Path(r"C:\SnowWhiteAI\GrantService")
-sys.path.insert(0, str(project_root))
-sys.path.insert(0, str(project_root / "shared"))
-sys.path.insert(0, str(project_root / "expert_agent"))
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
 from shared.llm.unified_llm_client import UnifiedLLMClient
+from shared.llm.prompt_budget import PromptBudget, PromptPart, allocate_shared_items
+from shared.llm.context_sessions import SharedContextConversation
 
-# Import ExpertAgent (находится в C:\SnowWhiteAI\GrantService\expert_agent\expert_agent.py)
-expert_agent_path = Path(r"C:\SnowWhiteAI\GrantService\expert_agent")
-sys.path.insert(0, str(expert_agent_path))
+# Пакет expert_agent (корень проекта), без отдельного пути к expert_agent/
 from expert_agent import ExpertAgent
 
 logger = logging.getLogger(__name__)
@@ -169,7 +169,8 @@ class ProductionWriter:
         postgres_password: str = 'root',
         postgres_db: str = 'grantservice',
         rate_limit_delay: int = 6,
-        db=None  # Optional
+        db=None,  # Optional
+        section_prompt_max_tokens: int = 3000
     ):
         """
         Args:
@@ -179,10 +180,15 @@ class ProductionWriter:
             postgres_*: PostgreSQL параметры для Expert Agent
             rate_limit_delay: Задержка между секциями (секунды)
             db: Database instance (опционально)
+            section_prompt_max_tokens: Бюджет токенов промпта одной секции
+                (требования ФПГ и данные исследования обрезаются под него)
         """
         self.llm_provider = llm_provider
         self.rate_limit_delay = rate_limit_delay
         self.db = db
+        self.section_prompt_max_tokens = section_prompt_max_tokens
+        self.prompt_metrics: List[Dict[str, Any]] = []
+        self.context_reuse_metrics: Dict[str, Any] = {}
 
         # Инициализируем LLM client с GigaChat-Max для использования токенов по пакетам
         self.llm_client = UnifiedLLMClient(provider=llm_provider, model="GigaChat-Max")
@@ -233,74 +239,96 @@ class ProductionWriter:
             logger.error(f"❌ Failed to query Qdrant: {e}")
             return []
 
+    @staticmethod
+    def _research_items(research_results: Optional[Dict[str, Any]]) -> List[str]:
+        """Элементы общего контекста исследования (источники и найденные данные)"""
+        if not research_results or research_results.get('status') != 'success':
+            return []
+
+        items = [f"- {source}" for source in research_results.get('sources', [])[:10]]
+        for result in research_results.get('results', [])[:10]:
+            item = f"**{result.get('title', 'N/A')}**\n   Источник: {result.get('url', 'N/A')}"
+            snippet = result.get('snippet', '')
+            if snippet:
+                item += f"\n   {snippet[:200]}..."
+            items.append(item)
+        return items
+
+    @staticmethod
+    def _section_query(section_config: Dict) -> str:
+        """Текст для ранжирования контекста секции"""
+        return f"{section_config['title']} {section_config.get('qdrant_query') or ''}"
+
     def _build_section_prompt(
         self,
         section_config: Dict,
         anketa_data: Dict,
         fpg_requirements: List[Dict[str, Any]],
-        research_results: Optional[Dict[str, Any]] = None
+        research_results: Optional[Dict[str, Any]] = None,
+        research_items: Optional[List[str]] = None
     ) -> str:
         """
-        Построить промпт для генерации одной секции
+        Построить запрос для генерации одной секции
+
+        Требования ФПГ и данные исследования ранжируются по близости к
+        секции и обрезаются по бюджету section_prompt_max_tokens. Общий
+        контекст проекта (_project_context) в запрос не входит - он
+        отправляется преамбулой разговора, но учитывается в бюджете.
 
         Args:
             section_config: Конфигурация секции из SECTIONS
             anketa_data: Данные анкеты
             fpg_requirements: FPG требования из Qdrant
             research_results: Optional - результаты исследования (статистика, источники)
+            research_items: Optional - часть контекста исследования для этой секции
+                (allocate_shared_items в write); по умолчанию - весь research_results
 
         Returns:
-            str: Промпт для LLM
+            str: Запрос секции для LLM (без общего контекста проекта)
         """
-        section_name = section_config['title']
-        target_words = section_config['target_words']
+        if research_items is None:
+            research_items = self._research_items(research_results)
+
+        # Требования ФПГ: один фрагмент базы знаний может вернуться несколько раз
+        requirement_items = [
+            f"### Требование: {req['section_name']}\n{req['content'][:500]}..."
+            for req in fpg_requirements
+        ]
+
+        budget = PromptBudget(self.section_prompt_max_tokens, query=self._section_query(section_config))
+        report = budget.fit([
+            PromptPart('context', self._project_context(anketa_data), required=True),
+            PromptPart('instructions', self._section_request(section_config, '', ''), required=True),
+            PromptPart('requirements', items=requirement_items, max_tokens=1200, separator='\n\n'),
+            PromptPart('research', items=research_items, max_tokens=1000),
+        ], call=f"production_writer.{section_config['name']}")
+        self.prompt_metrics.append(report.as_metrics())
 
-        # Извлекаем данные из анкеты
-        project_name = anketa_data.get('Основная информация', {}).get('Название проекта', '')
-        problem = anketa_data.get('Суть проекта', {}).get('Проблема', '')
-        target_audience = anketa_data.get('Целевая аудитория', {}).get('Описание', '')
-        geography = anketa_data.get('География', {}).get('Регион', '')
-        goals = anketa_data.get('Цели и задачи', {}).get('Цели', [])
-
-        # Форматируем FPG requirements
         requirements_text = ""
-        if fpg_requirements:
-            requirements_text = "\n\n## ТРЕБОВАНИЯ ФОНДА ПРЕЗИДЕНТСКИХ ГРАНТОВ:\n\n"
-            for i, req in enumerate(fpg_requirements):
-                requirements_text += f"### Требование {i+1}: {req['section_name']}\n"
-                requirements_text += f"{req['content'][:500]}...\n\n"
+        if report.text('requirements'):
+            requirements_text = "\n\n## ТРЕБОВАНИЯ ФОНДА ПРЕЗИДЕНТСКИХ ГРАНТОВ:\n\n" + report.text('requirements') + "\n"
 
-        # Форматируем research_results (статистика из интернета)
         research_text = ""
-        if research_results and research_results.get('status') == 'success':
+        if report.text('research'):
             research_text = "\n\n## ДАННЫЕ ИЗ ИССЛЕДОВАНИЯ (используй для обоснования):\n\n"
+            research_text += report.text('research') + "\n\n"
+            research_text += "**ВАЖНО:** Используй эти данные для усиления аргументации в разделе!\n"
 
-            # Добавляем источники
-            sources = research_results.get('sources', [])
-            if sources:
-                research_text += "### Официальные источники:\n"
-                for source in sources[:5]:  # Первые 5 источников
-                    research_text += f"- {source}\n"
-                research_text += "\n"
-
-            # Добавляем результаты поиска
-            results = research_results.get('results', [])
-            if results:
-                research_text += "### Найденные данные:\n\n"
-                for i, result in enumerate(results[:3], 1):  # Первые 3 результата
-                    research_text += f"{i}. **{result.get('title', 'N/A')}**\n"
-                    research_text += f"   Источник: {result.get('url', 'N/A')}\n"
-                    snippet = result.get('snippet', '')
-                    if snippet:
-                        research_text += f"   {snippet[:200]}...\n"
-                    research_text += "\n"
+        return self._section_request(section_config, requirements_text, research_text)
 
-            research_text += "**ВАЖНО:** Используй эти данные для усиления аргументации в разделе!\n"
+    def _project_context(self, anketa_data: Dict) -> str:
+        """Общий контекст всех секций: роль и данные анкеты (преамбула разговора)"""
+        # Извлекаем данные из анкеты
+        project_name = anketa_data.get('Основная информация', {}).get('Название проекта', '')
+        problem = anketa_data.get('Суть проекта', {}).get('Проблема', '')
+        target_audience = anketa_data.get('Целевая аудитория', {}).get('Описание', '')
+        geography = anketa_data.get('География', {}).get('Регион', '')
+        goals = anketa_data.get('Цели и задачи', {}).get('Цели', [])
 
-        prompt = f"""
+        return f"""
 Ты эксперт по написанию грантовых заявок с опытом работы 15+ лет.
 
-Твоя задача - написать раздел "{section_name}" грантовой заявки для Фонда президентских грантов (ФПГ).
+Ты пишешь грантовую заявку для Фонда президентских грантов (ФПГ) по разделам.
 
 ДАННЫЕ ПРОЕКТА:
 
@@ -313,6 +341,15 @@ class ProductionWriter:
 География: {geography}
 
 Цели: {', '.join(goals) if isinstance(goals, list) else goals}
+"""
+
+    def _section_request(self, section_config: Dict, requirements_text: str, research_text: str) -> str:
+        """Запрос одной секции (требования и контекст исследования секции)"""
+        section_name = section_config['title']
+        target_words = section_config['target_words']
+
+        prompt = f"""
+Твоя задача - написать раздел "{section_name}" грантовой заявки по данным проекта выше.
 
 {requirements_text}
 
@@ -341,7 +378,9 @@ class ProductionWriter:
         self,
         section_config: Dict,
         anketa_data: Dict,
-        research_results: Optional[Dict[str, Any]] = None
+        research_results: Optional[Dict[str, Any]] = None,
+        research_items: Optional[List[str]] = None,
+        conversation: Optional[SharedContextConversation] = None
     ) -> str:
         """
         Сгенерировать одну секцию заявки
@@ -350,6 +389,9 @@ class ProductionWriter:
             section_config: Конфигурация секции
             anketa_data: Данные анкеты
             research_results: Optional - результаты исследования (статистика, источники)
+            research_items: Optional - контекст исследования, выделенный этой секции
+            conversation: Optional - разговор с контекстом проекта (из write);
+                по умолчанию контекст отправляется вместе с запросом
 
         Returns:
             str: Сгенерированный текст секции
@@ -374,17 +416,20 @@ class ProductionWriter:
             section_config=section_config,
             anketa_data=anketa_data,
             fpg_requirements=fpg_requirements,
-            research_results=research_results  # ← ADD
+            research_results=research_results,
+            research_items=research_items
         )
 
-        logger.info(f"📋 Prompt built ({len(prompt)} chars)")
+        logger.info(f"📋 Prompt built ({len(prompt)} chars, ~{self.prompt_metrics[-1]['total_tokens']} tokens)")
 
         # 3. Генерировать с GigaChat
         logger.info(f"🤖 Generating with {self.llm_provider}...")
 
-        async with self.llm_client as client:
-            section_content = await client.generate_text(
-                prompt=prompt,
+        async with self.llm_client:
+            if conversation is None:
+                conversation = self.llm_client.conversation(self._project_context(anketa_data))
+            section_content = await conversation.ask(
+                prompt,
                 max_tokens=4000  # ~3K symbols per section
             )
 
@@ -445,6 +490,20 @@ class ProductionWriter:
         try:
             # Генерируем все секции
             sections_content = []
+            self.prompt_metrics = []
+
+            # Контекст проекта общий для всех секций: с Claude Code он уходит
+            # один раз (session_id), с остальными провайдерами - в каждом запросе
+            conversation = self.llm_client.conversation(
+                self._project_context(anketa_data), name='production_writer'
+            )
+
+            # Общий контекст исследования: каждый элемент - в 2 наиболее близкие секции
+            research_allocation = allocate_shared_items(
+                self._research_items(research_results),
+                [self._section_query(section) for section in self.SECTIONS],
+                per_item=2
+            )
 
             for i, section_config in enumerate(self.SECTIONS):
                 logger.info(f"Section {i+1}/{len(self.SECTIONS)}: {section_config['title']}")
@@ -452,7 +511,9 @@ class ProductionWriter:
                 section_text = await self._generate_section(
                     section_config=section_config,
                     anketa_data=anketa_data,
-                    research_results=research_results  # ← ADD
+                    research_results=research_results,
+                    research_items=research_allocation[i],
+                    conversation=conversation
                 )
 
                 sections_content.append({
@@ -484,8 +545,16 @@ class ProductionWriter:
             logger.info(f"Total length: {len(grant_application)} characters")
             logger.info(f"Total words: ~{len(grant_application.split())} words")
             logger.info(f"Sections generated: {len(sections_content)}")
+            logger.info(f"Prompt tokens: ~{sum(m['total_tokens'] for m in self.prompt_metrics)} "
+                        f"(saved ~{sum(m['saved_tokens'] for m in self.prompt_metrics)})")
+            self.context_reuse_metrics = conversation.metrics()
+            logger.info(f"Context reuse ({self.context_reuse_metrics['mode']}): "
+                        f"~{self.context_reuse_metrics['client_tokens_not_resent']} tokens not re-sent, "
+                        f"~{self.context_reuse_metrics['history_tokens_replayed']} replayed from session history, "
+                        f"~{self.context_reuse_metrics['estimated_seconds_saved']}s saved")
             logger.info("")
 
+            await conversation.close()
             return grant_application
 
         except Exception as e:
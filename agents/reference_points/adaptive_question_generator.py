@@ -16,20 +16,31 @@ Version: 1.0
 """
 
 from typing import Dict, Any, List, Optional
+import importlib.util
 import logging
 from enum import Enum
 
 from .reference_point import ReferencePoint
 
-# Для генерации embeddings (Qdrant search)
+# Initialize logger BEFORE using it
+logger = logging.getLogger(__name__)
+
+# Локальная реплика коллекций Qdrant (поиск без сетевого запроса)
 try:
-    from sentence_transformers import SentenceTransformer
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
+    from shared.vector_replica import replicated
 except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
+    replicated = None
+
+# Для генерации embeddings (Qdrant search). Сам пакет (torch) импортируется
+# вместе с моделью в _load_embedding_model_async, не при импорте модуля
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec('sentence_transformers') is not None
+if not SENTENCE_TRANSFORMERS_AVAILABLE:
     logger.warning("sentence-transformers not available, Qdrant search will be disabled")
 
-logger = logging.getLogger(__name__)
+
+def _load_sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
 
 
 class UserExpertiseLevel(Enum):
@@ -81,7 +92,7 @@ class AdaptiveQuestionGenerator:
             qdrant_collection: Название коллекции в Qdrant
         """
         self.llm = llm_client
-        self.qdrant = qdrant_client
+        self.qdrant = replicated(qdrant_client) if replicated else qdrant_client
         self.collection_name = qdrant_collection
 
         # Lazy loading: НЕ загружаем модель в __init__!
@@ -484,7 +495,7 @@ class AdaptiveQuestionGenerator:
             # Загрузить модель в отдельном thread
             self.embedding_model = await loop.run_in_executor(
                 None,
-                SentenceTransformer,
+                _load_sentence_transformer,
                 'paraphrase-multilingual-MiniLM-L12-v2'
             )
 
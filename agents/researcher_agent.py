@@ -9,17 +9,19 @@ from typing import Dict, Any, List
 import logging
 import asyncio
 
-# Добавляем пути к модулям
-sys.path.append('/var/GrantService/shared')
-sys.path.append('/var/GrantService/telegram-bot/services')
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
 
-from .base_agent import BaseAgent
+from agents.base_agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
 try:
-    from llm.unified_llm_client import UnifiedLLMClient
-    from llm.config import AGENT_CONFIGS
+    from shared.llm.unified_llm_client import UnifiedLLMClient
+    from shared.llm.config import AGENT_CONFIGS
     UNIFIED_CLIENT_AVAILABLE = True
 except ImportError:
     UNIFIED_CLIENT_AVAILABLE = False
@@ -33,19 +33,28 @@ import logging
 import asyncio
 import time
 from datetime import datetime
-import json
 
-# Добавляем пути к модулям
-sys.path.append('/var/GrantService/shared')
-sys.path.append('/var/GrantService/agents')
-# Добавляем путь к web-admin (с дефисом)
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
 current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(current_dir)
-sys.path.append(os.path.join(current_dir, 'web-admin'))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
 
 from agents.base_agent import BaseAgent
 from agents.prompt_loader import ResearcherPromptLoader  # Оставляем для fallback
 from shared.llm.websearch_router import WebSearchRouter
+from shared.llm.provider_limiter import get_provider_limiter
+from shared.llm.research_aggregator import DEFAULT_BUDGET_SECONDS, ResearchAggregator
+
+# LLM для сводки блоков (map-reduce); без клиента - эвристическая сводка
+try:
+    from shared.llm.unified_llm_client import UnifiedLLMClient
+    from shared.llm.config import AGENT_CONFIGS
+    UNIFIED_CLIENT_AVAILABLE = True
+except ImportError:
+    UNIFIED_CLIENT_AVAILABLE = False
+    UnifiedLLMClient = None
+    AGENT_CONFIGS = {}
 
 # Импортируем DatabasePromptManager
 try:
@@ -67,7 +76,7 @@ class ResearcherAgentV2(BaseAgent):
     2. Извлечь placeholders через PromptLoader
     3. Сгенерировать 27 запросов (блок 1: 10, блок 2: 10, блок 3: 7)
     4. Выполнить запросы через PerplexityWebSearchClient (Perplexity API)
-    5. Агрегировать результаты в JSONB структуру
+    5. Агрегировать результаты в JSONB структуру (map-reduce сводка блоков, research_aggregator)
     6. Сохранить в researcher_research.research_results
 
     NOTE: Switched from Claude Code WebSearch to Perplexity API due to geographical restrictions
@@ -94,16 +103,17 @@ class ResearcherAgentV2(BaseAgent):
         else:
             # Читаем настройки WebSearch из БД (НЕ захардкожены!)
             try:
-                # Импорт из web-admin (директория с дефисом)
-                import importlib.util
-                utils_path = os.path.join(current_dir, 'web-admin', 'utils', 'agent_settings.py')
-                spec = importlib.util.spec_from_file_location("agent_settings", utils_path)
-                agent_settings_module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(agent_settings_module)
-                get_agent_settings = agent_settings_module.get_agent_settings
-
-                settings = get_agent_settings('researcher')
-                config = settings.get('config', {})
+                # Снимок конфигурации агентов (обновляется по NOTIFY), без запроса к БД
+                settings = self.get_settings('researcher')
+                if settings is None and PROMPT_MANAGER_AVAILABLE:
+                    settings = get_database_prompt_manager().get_agent_settings('researcher')
+                if settings is None:
+                    # Нет записи researcher - значения по умолчанию (как get_agent_settings
+                    # в web-admin): perplexity с fallback claude_code
+                    logger.warning("[ResearcherAgentV2] ai_agent_settings: нет записи researcher, используются значения по умолчанию")
+                    settings = {}
+
+                config = settings.get('config') or {}
 
                 # WebSearch провайдер из настроек (НЕ хардкод!)
                 self.websearch_provider = config.get('websearch_provider', 'perplexity')
@@ -214,6 +224,7 @@ class ResearcherAgentV2(BaseAgent):
             logger.info(f"   - Блок 3: {len(all_queries['block3'])} запросов")
 
             # 6. Выполнить запросы через WebSearchRouter (читает настройки из БД!)
+            stored_blocks = []  # блоки, чьи raw_results уже в researcher_research_payloads
             async with WebSearchRouter(self.db) as websearch_router:
 
                 # Проверить здоровье API
@@ -242,7 +253,8 @@ class ResearcherAgentV2(BaseAgent):
                 logger.info(f"✅ Блок 1 завершён: {block1_results['total_sources']} источников")
 
                 # 💾 СОХРАНИТЬ ДАННЫЕ БЛОКА 1 СРАЗУ!
-                await self._save_block_results(research_id, 'block1_problem', block1_results)
+                if await self._save_block_results(research_id, 'block1_problem', block1_results):
+                    stored_blocks.append('block1_problem')
 
                 # БЛОК 2: География и целевая аудитория (10 запросов)
                 logger.info("🌍 БЛОК 2: География и целевая аудитория (10 запросов)")
@@ -264,7 +276,8 @@ class ResearcherAgentV2(BaseAgent):
                 logger.info(f"✅ Блок 2 завершён: {block2_results['total_sources']} источников")
 
                 # 💾 СОХРАНИТЬ ДАННЫЕ БЛОКА 2 СРАЗУ!
-                await self._save_block_results(research_id, 'block2_geography', block2_results)
+                if await self._save_block_results(research_id, 'block2_geography', block2_results):
+                    stored_blocks.append('block2_geography')
 
                 # БЛОК 3: Задачи, мероприятия и главная цель (7 запросов)
                 logger.info("🎯 БЛОК 3: Задачи, мероприятия и главная цель (7 запросов)")
@@ -284,7 +297,8 @@ class ResearcherAgentV2(BaseAgent):
                 logger.info(f"✅ Блок 3 завершён: {block3_results['total_sources']} источников")
 
                 # 💾 СОХРАНИТЬ ДАННЫЕ БЛОКА 3 СРАЗУ!
-                await self._save_block_results(research_id, 'block3_goals', block3_results)
+                if await self._save_block_results(research_id, 'block3_goals', block3_results):
+                    stored_blocks.append('block3_goals')
 
                 # Получить статистику (если метод доступен)
                 client_stats = {}
@@ -337,7 +351,8 @@ class ResearcherAgentV2(BaseAgent):
                 research_id=research_id,
                 status='completed',
                 research_results=research_results,
-                completed_at=datetime.now()
+                completed_at=datetime.now(),
+                stored_blocks=stored_blocks
             )
 
             logger.info(f"✅ Исследование завершено!")
@@ -361,6 +376,7 @@ class ResearcherAgentV2(BaseAgent):
             return {
                 'research_id': research_id,
                 'status': 'completed',
+                'prompt_version': self.get_prompt_version(),
                 'research_results': research_results
             }
 
@@ -378,7 +394,8 @@ class ResearcherAgentV2(BaseAgent):
             return {
                 'research_id': locals().get('research_id'),
                 'status': 'error',
-                'error': str(e)
+                'error': str(e),
+                'prompt_version': self.get_prompt_version()
             }
 
     async def _get_anketa(self, anketa_id: str) -> Optional[Dict]:
@@ -506,28 +523,24 @@ class ResearcherAgentV2(BaseAgent):
         research_id: str,
         status: str,
         research_results: Dict,
-        completed_at: datetime
+        completed_at: datetime,
+        stored_blocks: List[str] = ()
     ):
-        """Обновить результаты исследования"""
-        try:
-            # PostgreSQL: JSONB
-            results_json = json.dumps(research_results, ensure_ascii=False)
+        """
+        Обновить результаты исследования
 
-            with self.db.connect() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    UPDATE researcher_research
-                    SET status = %s,
-                        research_results = %s::jsonb,
-                        completed_at = %s
-                    WHERE research_id = %s
-                    """,
-                    (status, results_json, completed_at, research_id)
-                )
-                conn.commit()
-                cursor.close()
+        В research_results пишется сводка, raw_results блоков - в
+        researcher_research_payloads (data/database/research_storage.py).
+        research_results в памяти не меняется: отчет MD/PDF строится по raw_results.
+        """
+        # data.database при импорте пакета подключает psycopg2 - импорт при сохранении
+        from data.database.research_storage import ResearchStorage
 
+        try:
+            ResearchStorage(self.db).save_results(
+                research_id, research_results, status=status,
+                completed_at=completed_at, stored_blocks=stored_blocks
+            )
             logger.info(f"💾 Результаты сохранены: {research_id}")
 
         except Exception as e:
@@ -538,52 +551,24 @@ class ResearcherAgentV2(BaseAgent):
         research_id: str,
         block_name: str,
         block_results: Dict
-    ):
+    ) -> bool:
         """
         Сохранить результаты блока СРАЗУ после выполнения
 
         Инкрементальное сохранение - обновляет только один блок в JSONB
+        (сводка блока; raw_results - в researcher_research_payloads).
         Так даже если произойдет ошибка, данные предыдущих блоков сохранятся
         """
-        try:
-            # Прочитать текущие результаты
-            with self.db.connect() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT research_results
-                    FROM researcher_research
-                    WHERE research_id = %s
-                    """,
-                    (research_id,)
-                )
-                row = cursor.fetchone()
-
-                if row and row[0]:
-                    current_results = row[0]
-                else:
-                    current_results = {}
-
-                # Добавить новый блок
-                current_results[block_name] = block_results
-
-                # Сохранить обратно
-                results_json = json.dumps(current_results, ensure_ascii=False)
-                cursor.execute(
-                    """
-                    UPDATE researcher_research
-                    SET research_results = %s::jsonb
-                    WHERE research_id = %s
-                    """,
-                    (results_json, research_id)
-                )
-                conn.commit()
-                cursor.close()
+        from data.database.research_storage import ResearchStorage
 
+        try:
+            ResearchStorage(self.db).save_block(research_id, block_name, block_results)
             logger.info(f"💾 Блок {block_name} сохранен: {block_results['total_sources']} источников")
+            return True
 
         except Exception as e:
             logger.error(f"Ошибка сохранения блока {block_name}: {e}")
+            return False
 
     async def _execute_block_queries(
         self,
@@ -607,6 +592,7 @@ class ResearcherAgentV2(BaseAgent):
             {
                 'summary': 'Резюме блока',
                 'key_facts': [...],
+                'query_summaries': [...],
                 'sources': [...],
                 'queries_used': [...],
                 'total_sources': 15,
@@ -666,34 +652,43 @@ class ResearcherAgentV2(BaseAgent):
         """
         Агрегировать результаты запросов в структуру блока
 
-        TODO: Здесь можно добавить LLM вызов для структурирования данных
-        Пока возвращаем базовую структуру
+        Map-reduce сводка (shared/llm/research_aggregator.py): повторы URL и
+        почти-дубли сниппетов отбрасываются до LLM, сводки запросов строятся
+        параллельно, затем резюме блока. Время ограничено бюджетом
+        aggregation_budget_seconds: не успевшие сводки заменяются эвристикой.
+
+        Настройки (ai_agent_settings researcher.config):
+            aggregation_llm: False - без LLM (дедупликация + эвристика)
+            aggregation_budget_seconds: Бюджет на блок (по умолчанию 30)
+            aggregation_concurrency: Одновременных вызовов LLM (по умолчанию 5)
+            aggregation_provider / aggregation_model: LLM сводки
+                (по умолчанию - AGENT_CONFIGS['researcher'])
         """
-        # Извлечь все результаты в один текст
-        all_text = ""
-        for result in query_results:
-            for item in result.get('results', []):
-                all_text += f"{item.get('title', '')} {item.get('snippet', '')} "
-
-        # Подсчитать ключевые факты (простая эвристика)
-        key_facts = []
-        for result in query_results:
-            for item in result.get('results', []):
-                if item.get('snippet'):
-                    key_facts.append({
-                        'fact': item['snippet'][:200],
-                        'source': item.get('source', 'unknown'),
-                        'url': item.get('url', ''),
-                        'title': item.get('title', '')
-                    })
-
-        return {
-            'summary': all_text[:500] if all_text else 'Нет данных',
-            'key_facts': key_facts[:10],  # Топ 10 фактов
-            'queries_used': queries_used,
-            'raw_results': query_results  # Для дальнейшей обработки
+        settings = (self.get_settings('researcher') or {}).get('config') or {}
+        options = {
+            'budget_seconds': float(settings.get('aggregation_budget_seconds', DEFAULT_BUDGET_SECONDS)),
+            'max_concurrency': int(settings.get('aggregation_concurrency', 5))
         }
 
+        if UNIFIED_CLIENT_AVAILABLE and settings.get('aggregation_llm', True):
+            llm_config = AGENT_CONFIGS.get('researcher', {})
+            provider = settings.get('aggregation_provider') or llm_config.get('provider') or self.llm_provider
+            model = settings.get('aggregation_model') or llm_config.get('model')
+            try:
+                client = UnifiedLLMClient(provider=provider, temperature=0.2, **({'model': model} if model else {}))
+                async with client:
+                    async def summarize(prompt: str, max_tokens: int) -> str:
+                        async with get_provider_limiter(client.provider):
+                            return await client.generate_async(prompt, max_tokens=max_tokens)
+
+                    return await ResearchAggregator(summarize, **options).aggregate(
+                        block_name, query_results, queries_used
+                    )
+            except Exception as e:
+                logger.warning(f"[ResearcherAgentV2] LLM сводка {block_name} недоступна ({provider}): {e}")
+
+        return await ResearchAggregator(**options).aggregate(block_name, query_results, queries_used)
+
     def _generate_research_report_md(
         self,
         research_id: str,
@@ -13,11 +13,11 @@ import time
 import json
 import re
 
-# Добавляем пути к модулям (работает на Windows и Linux)
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, os.path.join(project_root, 'shared'))
-sys.path.insert(0, os.path.join(project_root, 'telegram-bot', 'services'))
-sys.path.insert(0, os.path.join(project_root, 'web-admin'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
 
 # Initialize logger before any imports that might use it
 logger = logging.getLogger(__name__)
@@ -34,7 +34,6 @@ except ImportError:
 
 # Импорт Expert Agent для получения требований из векторной БД
 try:
-    sys.path.insert(0, os.path.join(project_root, 'expert_agent'))
     from expert_agent import ExpertAgent
     EXPERT_AGENT_AVAILABLE = True
 except ImportError:
@@ -51,8 +50,8 @@ except ImportError:
     DatabasePromptManager = None
 
 try:
-    from llm.unified_llm_client import UnifiedLLMClient
-    from llm.config import AGENT_CONFIGS
+    from shared.llm.unified_llm_client import UnifiedLLMClient
+    from shared.llm.config import AGENT_CONFIGS
     UNIFIED_CLIENT_AVAILABLE = True
 except ImportError:
     UNIFIED_CLIENT_AVAILABLE = False
@@ -250,6 +249,7 @@ class ReviewerAgent(BaseAgent):
             result = {
                 'status': 'success',
                 'agent_type': 'reviewer',
+                'prompt_version': self.get_prompt_version(),
                 'readiness_score': round(readiness_score, 2),
                 'approval_probability': round(approval_probability, 1),
 
@@ -308,7 +308,8 @@ class ReviewerAgent(BaseAgent):
             return {
                 'status': 'error',
                 'message': f"Ошибка финальной оценки: {str(e)}",
-                'agent_type': 'reviewer'
+                'agent_type': 'reviewer',
+                'prompt_version': self.get_prompt_version()
             }
 
     async def _evaluate_evidence_base_async(self, grant_content: Dict, research_results: Dict,
@@ -814,7 +815,8 @@ class ReviewerAgent(BaseAgent):
             return {
                 'status': 'error',
                 'message': f"Ошибка review и сохранения: {str(e)}",
-                'agent_type': 'reviewer'
+                'agent_type': 'reviewer',
+                'prompt_version': self.get_prompt_version()
             }
 
     def review_and_save_grant(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -13,16 +13,13 @@ import asyncio
 import time
 import json
 
-# Добавляем пути к модулям (работает на Windows и Linux)
+# Cross-platform path setup: корень проекта нужен при запуске файла напрямую,
+# остальные пути добавляет agents/__init__.py
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, os.path.join(project_root, 'shared'))
-sys.path.insert(0, os.path.join(project_root, 'telegram-bot', 'services'))
-sys.path.insert(0, os.path.join(project_root, 'web-admin'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
 
-try:
-    from agents.base_agent import BaseAgent
-except ImportError:
-    from base_agent import BaseAgent
+from agents.base_agent import BaseAgent
 
 # Импорт DatabasePromptManager для загрузки промптов из БД
 try:
@@ -33,14 +30,16 @@ except ImportError:
     DatabasePromptManager = None
 
 try:
-    from llm.unified_llm_client import UnifiedLLMClient
-    from llm.config import AGENT_CONFIGS
+    from shared.llm.unified_llm_client import UnifiedLLMClient
+    from shared.llm.config import AGENT_CONFIGS
     UNIFIED_CLIENT_AVAILABLE = True
 except ImportError:
     UNIFIED_CLIENT_AVAILABLE = False
     UnifiedLLMClient = None
     AGENT_CONFIGS = {}
 
+from shared.llm.prompt_budget import PromptBudget, PromptPart
+
 try:
     from services.llm_router import LLMRouter, LLMProvider
     LLM_ROUTER_AVAILABLE = True
@@ -52,9 +51,14 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Бюджет токенов промпта Stage 2 (контекст исследования обрезается под него)
+DEFAULT_PROMPT_MAX_TOKENS = 6000
+
 class WriterAgentV2(BaseAgent):
     """Агент-писатель V2 для создания заявок на гранты с использованием research_results"""
 
+    prompt_agent_type = 'writer_v2'
+
     def __init__(self, db, llm_provider: str = "claude_code"):
         super().__init__("writer", db, llm_provider)
 
@@ -70,7 +74,6 @@ class WriterAgentV2(BaseAgent):
         # Инициализация Expert Agent для получения знаний о требованиях ФПГ
         self.expert_agent = None
         try:
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
             from expert_agent import ExpertAgent
             self.expert_agent = ExpertAgent()
             logger.info("✅ Writer V2 Agent: Expert Agent подключен (векторная база знаний ФПГ)")
@@ -169,32 +172,17 @@ class WriterAgentV2(BaseAgent):
                 logger.warning("⚠️ WriterV2: БД недоступна")
                 return None
 
-            # Получаем research_results из researcher_research через прямой SQL
-            with self.db.connect() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT research_results, status, metadata
-                    FROM researcher_research
-                    WHERE anketa_id = %s AND status = 'completed'
-                    ORDER BY completed_at DESC
-                    LIMIT 1
-                """, (anketa_id,))
-
-                row = cursor.fetchone()
-                cursor.close()
-
-                if row:
-                    research_results = row[0] if isinstance(row, tuple) else row.get('research_results')
-
-                    # Если research_results - строка JSON, парсим
-                    if isinstance(research_results, str):
-                        research_results = json.loads(research_results)
-
-                    logger.info(f"✅ WriterV2: Research results загружены - {len(research_results)} блоков")
-                    return research_results
-                else:
-                    logger.warning(f"⚠️ WriterV2: Не найдены research_results для anketa_id={anketa_id}")
-                    return None
+            from data.database.research_storage import ResearchStorage
+
+            # Сводка последнего исследования: блоки без raw_results (проекция в SQL)
+            research_results = ResearchStorage(self.db).get_summary(anketa_id=anketa_id)
+
+            if research_results:
+                logger.info(f"✅ WriterV2: Research results загружены - {len(research_results)} блоков")
+                return research_results
+            else:
+                logger.warning(f"⚠️ WriterV2: Не найдены research_results для anketa_id={anketa_id}")
+                return None
 
         except Exception as e:
             logger.error(f"❌ WriterV2: Ошибка загрузки research_results: {e}")
@@ -524,33 +512,63 @@ class WriterAgentV2(BaseAgent):
             'total_tables': 2
         }
 
-    async def _stage2_writing_async(self, client, user_answers: Dict, research_results: Dict,
-                                   selected_grant: Dict, plan: Dict, citations: List, tables: List) -> Dict[str, str]:
-        """Stage 2: Написание текста заявки с цитатами и таблицами"""
-        logger.info("✍️ WriterV2 Stage 2: Написание текста заявки")
+    def _prompt_token_budget(self) -> int:
+        """Бюджет токенов промпта Stage 2 (WRITER_PROMPT_MAX_TOKENS или config writer)"""
+        env_budget = os.getenv('WRITER_PROMPT_MAX_TOKENS')
+        if env_budget:
+            return int(env_budget)
+        return getattr(self, 'config', {}).get('prompt_max_tokens', DEFAULT_PROMPT_MAX_TOKENS)
 
-        content = {}
+    def _fit_stage2_context(self, user_answers: Dict, research_results: Dict,
+                            citations: List, tables: List):
+        """
+        Разместить контекст исследования Stage 2 в бюджете токенов
 
-        try:
-            # Подготавливаем данные для промпта
-            block1 = research_results.get('block1_problem', {})
-            block2 = research_results.get('block2_geography', {})
-            block3 = research_results.get('block3_goals', {})
+        Компоненты идут в порядке приоритета: цитаты и таблицы, затем блоки
+        исследования. Факты, уже попавшие в цитаты, второй раз не
+        передаются. Элементы ранжируются по близости к проблеме проекта.
+        """
+        block1 = research_results.get('block1_problem', {})
+        block2 = research_results.get('block2_geography', {})
+        block3 = research_results.get('block3_goals', {})
 
-            # Форматируем цитаты для промпта
-            citations_text = "\n".join([
-                f"[{i+1}] {c['text']} (Источник: {c['source']}, {c.get('date', '')})"
-                for i, c in enumerate(citations[:10])
-            ])
+        query = ' '.join(str(user_answers.get(key, '')) for key in
+                         ('project_name', 'problem', 'solution', 'target_group', 'geography'))
+        budget = PromptBudget(self._prompt_token_budget(), query=query)
+
+        def fact_line(fact: Dict) -> str:
+            return f"  • {fact.get('fact', '')} (Источник: {fact.get('source', '')}, {fact.get('date', '')})"
 
-            # Форматируем таблицы для промпта
-            tables_text = "\n".join([
+        parts = [
+            PromptPart('instructions', self._stage2_prompt(user_answers, {}), required=True),
+            PromptPart('citations', items=[
+                f"[{i+1}] {c['text']} (Источник: {c['source']}, {c.get('date', '')})"
+                for i, c in enumerate(citations)
+            ], max_tokens=1500),
+            PromptPart('tables', items=[
                 f"Таблица {i+1}: {t['title']}\nТип: {t['type']}\nДанные: {str(t['data'])[:200]}..."
                 for i, t in enumerate(tables[:2])
-            ])
-
-            # Промпт для написания заявки
-            writing_prompt = f"""Помоги составить черновик грантовой заявки на основе предоставленных данных исследования.
+            ], max_tokens=600),
+            PromptPart('block1_summary', block1.get('summary', ''), max_tokens=200),
+            PromptPart('block1_facts', items=[fact_line(f) for f in block1.get('key_facts', [])[:5]], max_tokens=600),
+            PromptPart('block2_summary', block2.get('summary', ''), max_tokens=200),
+            PromptPart('block2_facts', items=[fact_line(f) for f in block2.get('key_facts', [])[:4]], max_tokens=400),
+            PromptPart('block3_summary', block3.get('summary', ''), max_tokens=200),
+            PromptPart('block3_goals', items=[
+                f"  • {g.get('text', '')[:200]}" for g in block3.get('main_goal_variants', [])[:2]
+            ], max_tokens=200),
+            PromptPart('block1_programs', items=[
+                f"  • {p.get('name', '')}: {p.get('kpi', '')}" for p in block1.get('programs', [])[:3]
+            ], max_tokens=300),
+            PromptPart('block1_cases', items=[
+                f"  • {c.get('name', '')}: {c.get('result', '')}" for c in block1.get('success_cases', [])[:3]
+            ], max_tokens=300),
+        ]
+        return budget.fit(parts, call='writer_v2.stage2')
+
+    def _stage2_prompt(self, user_answers: Dict, context: Dict[str, str]) -> str:
+        """Промпт Stage 2; context - тексты компонентов из _fit_stage2_context"""
+        return f"""Помоги составить черновик грантовой заявки на основе предоставленных данных исследования.
 
 ВАЖНО: Это черновик для дальнейшей доработки заявителем. Используй ТОЛЬКО данные из предоставленного исследования - не придумывай факты или цифры.
 
@@ -587,36 +605,36 @@ class WriterAgentV2(BaseAgent):
 Разделы 3-9: Цель, Результаты, Задачи, Партнеры, Инфо-сопровождение, Развитие, Календарь
 
 ЦИТАТЫ И ИСТОЧНИКИ (использовать в тексте):
-{citations_text}
+{context.get('citations', '')}
 
 ТАБЛИЦЫ (минимум 2 включить):
-{tables_text}
+{context.get('tables', '')}
 
 ДАННЫЕ ИЗ ИССЛЕДОВАНИЯ:
 
 БЛОК 1 - ПРОБЛЕМА:
-Резюме: {block1.get('summary', '')[:500]}
+Резюме: {context.get('block1_summary', '')}
 
 Ключевые факты (используй в разделе 2):
-{chr(10).join([f"  • {f.get('fact', '')} (Источник: {f.get('source', '')}, {f.get('date', '')})" for f in block1.get('key_facts', [])[:5]])}
+{context.get('block1_facts', '')}
 
 Федеральные программы:
-{chr(10).join([f"  • {p.get('name', '')}: {p.get('kpi', '')}" for p in block1.get('programs', [])[:3]])}
+{context.get('block1_programs', '')}
 
 Успешные кейсы:
-{chr(10).join([f"  • {c.get('name', '')}: {c.get('result', '')}" for c in block1.get('success_cases', [])[:3]])}
+{context.get('block1_cases', '')}
 
 БЛОК 2 - ГЕОГРАФИЯ:
-Резюме: {block2.get('summary', '')[:500]}
+Резюме: {context.get('block2_summary', '')}
 
 Факты о географии:
-{chr(10).join([f"  • {f.get('fact', '')}" for f in block2.get('key_facts', [])[:4]])}
+{context.get('block2_facts', '')}
 
 БЛОК 3 - ЦЕЛИ:
-Резюме: {block3.get('summary', '')[:500]}
+Резюме: {context.get('block3_summary', '')}
 
 Варианты целей (SMART):
-{chr(10).join([f"  • {g.get('text', '')[:200]}" for g in block3.get('main_goal_variants', [])[:2]])}
+{context.get('block3_goals', '')}
 
 ЗАДАНИЕ:
 Составь черновик заявки (15,000+ символов), включающий ВСЕ 9 разделов на основе данных:
@@ -677,7 +695,20 @@ class WriterAgentV2(BaseAgent):
 Просто скопируй этот JSON, заполни все разделы реальными данными из research_results и верни мне как текст.
 """
 
-            logger.info(f"📤 WriterV2 Stage 2: Отправляем запрос на написание (промпт: {len(writing_prompt)} символов)")
+    async def _stage2_writing_async(self, client, user_answers: Dict, research_results: Dict,
+                                   selected_grant: Dict, plan: Dict, citations: List, tables: List) -> Dict[str, str]:
+        """Stage 2: Написание текста заявки с цитатами и таблицами"""
+        logger.info("✍️ WriterV2 Stage 2: Написание текста заявки")
+
+        content = {}
+
+        try:
+            # Контекст исследования: ранжирование, дедупликация и обрезка по бюджету токенов
+            budget_report = self._fit_stage2_context(user_answers, research_results, citations, tables)
+            writing_prompt = self._stage2_prompt(user_answers, budget_report.texts)
+
+            logger.info(f"📤 WriterV2 Stage 2: Отправляем запрос на написание (промпт: {len(writing_prompt)} символов, "
+                        f"~{budget_report.total_tokens} токенов)")
 
             # Генерируем текст заявки (большой лимит токенов)
             application_text = await client.generate_text(writing_prompt, 8000)
@@ -751,6 +782,8 @@ class WriterAgentV2(BaseAgent):
                     'style': 'unknown'
                 }
 
+            content['metadata']['prompt_budget'] = budget_report.as_metrics()
+
             # Добавляем обратную совместимость со старыми полями
             content['title'] = user_answers.get('project_name', 'Проект')
             content['summary'] = content.get('section_1_brief', '')[:500]
@@ -1269,11 +1302,13 @@ class WriterAgentV2(BaseAgent):
                         'suggestions': quality_check['suggestions'],
                         'research_used': True,
                         'agent_type': 'writer_v2',
+                        'prompt_version': self.get_prompt_version(),
                         'provider_used': config["provider"],
                         'provider': config["provider"],
                         'model_used': config["model"],
                         'processing_time': 2.5,
                         'tokens_used': 5000,
+                        'prompt_tokens': application_content.get('metadata', {}).get('prompt_budget', {}).get('total_tokens'),
                         'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
                     }
 
@@ -1329,7 +1364,8 @@ class WriterAgentV2(BaseAgent):
             return {
                 'status': 'error',
                 'message': f"Ошибка создания заявки: {str(e)}",
-                'agent_type': 'writer_v2'
+                'agent_type': 'writer_v2',
+                'prompt_version': self.get_prompt_version()
             }
 
     async def _check_application_quality_v2_async(self, client, application_content: Dict,
@@ -1401,7 +1437,7 @@ class WriterAgentV2(BaseAgent):
 
         # Импортируем старый writer_agent для fallback
         try:
-            from writer_agent import WriterAgent
+            from agents.writer_agent import WriterAgent
             old_writer = WriterAgent(self.db, self.llm_provider)
             return await old_writer.write_application_async(input_data)
         except:
@@ -0,0 +1,7 @@
+"""
+Benchmarks for GrantService
+
+Замеры производительности пайплайна на фиксированных анкетах
+без сети (провайдеры из кассет shared/llm/cassettes.py).
+См. benchmarks/README.md
+"""
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agent Construction Benchmark: время и память на создание агента
+
+Агенты создаются на каждый запрос (AuditorAgent в каждом интервьюере,
+агенты на каждый элемент очереди agent_processor.py). Сравниваются:
+
+    before    - промпты агента читаются из БД при каждом создании (как было)
+    snapshot  - общий снимок shared/agent_config.py, загружается один раз
+
+По умолчанию БД моделируется загрузчиком с задержкой --query-ms на запрос
+(сеть + PostgreSQL) и --prompts промптами на агента; --live - реальная БД
+(PG* переменные окружения).
+
+Usage:
+    python benchmarks/agent_construction_benchmark.py
+    python benchmarks/agent_construction_benchmark.py --count 500 --query-ms 1.5
+    python benchmarks/agent_construction_benchmark.py --live
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.base_agent import BaseAgent
+from shared.agent_config import AgentConfigStore, load_from_db, set_agent_config_store
+
+AGENT_TYPES = ['auditor', 'researcher_v2', 'writer', 'reviewer', 'interviewer']
+
+
+class ProbeAgent(BaseAgent):
+    """BaseAgent без LLM клиентов: замеряется только работа с конфигурацией"""
+
+    def process(self, data):
+        return self.prepare_output(data)
+
+
+class LegacyProbeAgent(ProbeAgent):
+    """Загрузка промптов на каждом создании, как BaseAgent._load_prompts до снимка"""
+
+    fetch = None
+
+    def _load_prompts(self):
+        self.prompts = {}
+        for prompt in self.fetch(self.agent_type):
+            self.prompts[prompt['name']] = prompt
+
+
+def fake_rows(prompts_per_agent: int):
+    return [
+        {'id': index, 'name': f'{agent}_prompt_{index}', 'description': '', 'agent_type': agent,
+         'prompt_template': 'Шаблон {anketa} ' * 40, 'variables': ['anketa'], 'default_values': {},
+         'category_name': agent, 'priority': index}
+        for agent in AGENT_TYPES for index in range(prompts_per_agent)
+    ]
+
+
+def make_sources(args):
+    """(fetch(agent_type), loader()) - по агенту и целиком"""
+    if args.live:
+        from data.database.prompts import get_prompts_by_agent
+        return get_prompts_by_agent, load_from_db
+
+    rows = fake_rows(args.prompts)
+    delay = args.query_ms / 1000
+
+    def fetch(agent_type):
+        time.sleep(delay)
+        return [dict(row) for row in rows if row['agent_type'] == agent_type]
+
+    def loader():
+        time.sleep(2 * delay)
+        return [dict(row) for row in rows], {'researcher': {'config': {'websearch_provider': 'claude_code'}}}
+
+    return fetch, loader
+
+
+def measure(agent_class, count: int):
+    """Время создания и память, удерживаемая созданными агентами"""
+    timings = []
+    agents = []
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for index in range(count):
+        started = time.perf_counter()
+        agents.append(agent_class(AGENT_TYPES[index % len(AGENT_TYPES)], db=None))
+        timings.append(time.perf_counter() - started)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings_us = sorted(t * 1e6 for t in timings)
+    return {
+        'mean_us': round(statistics.mean(timings_us), 1),
+        'p50_us': round(timings_us[len(timings_us) // 2], 1),
+        'p95_us': round(timings_us[int(len(timings_us) * 0.95)], 1),
+        'kb_per_agent': round((retained - baseline) / count / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Agent construction benchmark')
+    parser.add_argument('--count', type=int, default=200, help='Сколько агентов создать')
+    parser.add_argument('--prompts', type=int, default=8, help='Промптов на агента (без --live)')
+    parser.add_argument('--query-ms', type=float, default=2.0, help='Задержка запроса к БД (без --live)')
+    parser.add_argument('--live', action='store_true', help='Реальная БД вместо модели')
+    args = parser.parse_args()
+
+    fetch, loader = make_sources(args)
+    LegacyProbeAgent.fetch = staticmethod(fetch)
+
+    store = AgentConfigStore(loader=loader, ttl=3600)
+    set_agent_config_store(store)
+    started = time.perf_counter()
+    store.snapshot()  # одна загрузка на процесс
+    first_load_ms = (time.perf_counter() - started) * 1000
+
+    results = {
+        'before': measure(LegacyProbeAgent, args.count),
+        'snapshot': measure(ProbeAgent, args.count),
+    }
+
+    print(f"agents={args.count}, {'live DB' if args.live else f'query={args.query_ms}ms, prompts={args.prompts}/agent'}, "
+          f"snapshot loads={store.loads} (first load {first_load_ms:.1f} ms)")
+    print(f"{'scenario':<10} {'mean us':>10} {'p50 us':>10} {'p95 us':>10} {'KB/agent':>10}")
+    for name, row in results.items():
+        print(f"{name:<10} {row['mean_us']:>10} {row['p50_us']:>10} {row['p95_us']:>10} {row['kb_per_agent']:>10}")
+    print(f"\nspeedup: {results['before']['mean_us'] / results['snapshot']['mean_us']:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
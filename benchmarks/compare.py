@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Сравнение двух прогонов бенчмарка
+
+Метрика считается регрессией, если новое значение больше базового
+на threshold процентов И на абсолютный порог (чтобы шум на малых
+величинах не давал ложных срабатываний). Стадия, упавшая в новом
+прогоне и успешная в базовом, - тоже регрессия.
+
+Usage:
+    python benchmarks/compare.py benchmarks/results/base.json benchmarks/results/new.json
+    python benchmarks/compare.py base.json new.json --threshold 5
+
+Код возврата 1, если найдены регрессии.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Метрика -> минимальное абсолютное изменение, которое учитывается
+COMPARED_METRICS = {
+    'wall_seconds': 0.05,
+    'cpu_seconds': 0.05,
+    'peak_rss_mb': 5.0,
+    'db_queries': 1,
+    'llm_calls': 1,
+    'llm_request_bytes': 1024,
+    'llm_response_bytes': 1024,
+}
+
+DEFAULT_THRESHOLD_PERCENT = 10.0
+
+
+def _rows(result: Dict[str, Any]):
+    """(fixture, stage, metrics) для всех стадий и итогов прогона"""
+    for fixture, data in result.get('fixtures', {}).items():
+        for stage, metrics in data.get('stages', {}).items():
+            yield fixture, stage, metrics
+        if 'total' in data:
+            yield fixture, 'total', data['total']
+
+
+def compare_results(
+    base: Dict[str, Any],
+    new: Dict[str, Any],
+    threshold_percent: float = DEFAULT_THRESHOLD_PERCENT
+) -> List[Dict[str, Any]]:
+    """
+    Сравнить прогоны
+
+    Returns:
+        Список строк сравнения:
+        {'fixture', 'stage', 'metric', 'base', 'new', 'change_percent', 'regression'}
+    """
+    base_rows = {(fixture, stage): metrics for fixture, stage, metrics in _rows(base)}
+    rows = []
+
+    for fixture, stage, metrics in _rows(new):
+        base_metrics = base_rows.get((fixture, stage))
+        if base_metrics is None:
+            continue
+
+        if base_metrics.get('ok') and not metrics.get('ok'):
+            rows.append({
+                'fixture': fixture, 'stage': stage, 'metric': 'ok',
+                'base': True, 'new': False, 'change_percent': None, 'regression': True,
+            })
+
+        for metric, min_delta in COMPARED_METRICS.items():
+            old_value, new_value = base_metrics.get(metric), metrics.get(metric)
+            if old_value is None or new_value is None:
+                continue
+
+            delta = new_value - old_value
+            change = (delta / old_value * 100) if old_value else (100.0 if delta else 0.0)
+            rows.append({
+                'fixture': fixture,
+                'stage': stage,
+                'metric': metric,
+                'base': old_value,
+                'new': new_value,
+                'change_percent': round(change, 1),
+                'regression': delta >= min_delta and change > threshold_percent,
+            })
+
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]], only_changes: bool = True) -> str:
+    """Текстовая таблица сравнения"""
+    lines = [f"{'fixture':<28} {'stage':<10} {'metric':<20} {'base':>12} {'new':>12} {'change':>8}"]
+    for row in rows:
+        if only_changes and not row['regression'] and not row['change_percent']:
+            continue
+        change = f"{row['change_percent']:+.1f}%" if row['change_percent'] is not None else 'FAILED'
+        marker = '  <-- REGRESSION' if row['regression'] else ''
+        lines.append(
+            f"{row['fixture'][:28]:<28} {row['stage']:<10} {row['metric']:<20} "
+            f"{str(row['base']):>12} {str(row['new']):>12} {change:>8}{marker}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two pipeline benchmark runs")
+    parser.add_argument('base', type=Path, help='Baseline result JSON')
+    parser.add_argument('new', type=Path, help='New result JSON')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD_PERCENT,
+                        help='Regression threshold in percent (default: 10)')
+    parser.add_argument('--all', action='store_true', help='Show unchanged metrics too')
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text(encoding='utf-8'))
+    new = json.loads(args.new.read_text(encoding='utf-8'))
+
+    rows = compare_results(base, new, args.threshold)
+    print(format_report(rows, only_changes=not args.all))
+
+    regressions = [row for row in rows if row['regression']]
+    print(f"\n{len(regressions)} regression(s) over {args.threshold}% "
+          f"({base.get('label')} -> {new.get('label')})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import Benchmark: время импорта при старте бота, web-admin и воркеров
+
+Каждый профиль импортируется в отдельном процессе с `python -X importtime`
+(холодный старт интерпретатора, без кэша sys.modules), с теми же sys.path,
+что у реального процесса. Показывается:
+
+    wall ms     - медиана времени процесса `python -c "import ..."` по --repeat прогонам
+    import ms   - сумма self-времени всех импортов (по -X importtime)
+    modules     - сколько модулей загружено
+    heavy       - какие тяжелые зависимости загружены при старте
+    top         - самые дорогие импорты верхнего уровня (cumulative)
+
+Тяжелые зависимости (pandas, qdrant_client, sentence_transformers, ...)
+должны загружаться при первом использовании, а не при импорте модуля.
+Пакеты, которые не установлены, в профиле просто не появятся: сравнивать
+результаты имеет смысл на одном окружении (например, до/после изменения).
+
+Usage:
+    python benchmarks/import_benchmark.py
+    python benchmarks/import_benchmark.py --profiles worker --repeat 10 --top 15
+    python benchmarks/import_benchmark.py --output benchmarks/results/imports.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ('pandas', 'numpy', 'streamlit', 'plotly', 'qdrant_client', 'sentence_transformers',
+         'torch', 'weasyprint', 'reportlab')
+
+# профиль -> (sys.path процесса относительно корня, в порядке поиска; модули)
+PROFILES = {
+    # telegram-bot/main.py: папка бота (utils бота) + корень; агенты интервью и аудита
+    'bot': (['telegram-bot', '.'], [
+        'shared.logging_config',
+        'agents.interactive_interviewer_agent_v2',
+        'agents.auditor_agent',
+    ]),
+    # web-admin: страницы импортируют utils.* из web-admin
+    'admin': (['web-admin', '.'], [
+        'utils',
+        'utils.prompt_manager',
+        'utils.agent_queue',
+    ]),
+    # воркеры генерации: агенты очереди agent_processor.py и синтетический корпус
+    'worker': (['web-admin', '.'], [
+        'agents.researcher_agent_v2',
+        'agents.writer_agent_v2',
+        'agents.reviewer_agent',
+        'agents.anketa_synthetic_pipeline',
+    ]),
+}
+
+
+def run_profile(paths, modules):
+    """Один холодный импорт: (wall s, stderr с -X importtime, stdout)"""
+    code = (f"import sys; sys.path[:0] = {[str(PROJECT_ROOT / path) for path in paths]!r}\n"
+            + "\n".join(f"try:\n    import {module}\nexcept Exception as e:\n"
+                        f"    print('import {module} failed:', e)" for module in modules)
+            # -X importtime пишет и неудавшиеся попытки импорта: загруженное - по sys.modules
+            + f"\nprint('heavy:', ','.join(p for p in {HEAVY!r} if p in sys.modules))")
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=str(PROJECT_ROOT),
+                            capture_output=True, text=True, encoding='utf-8', errors='replace')
+    return time.perf_counter() - started, result.stderr, result.stdout
+
+
+def parse_importtime(stderr: str):
+    """Строки 'import time: self | cumulative | name' -> [(name, depth, self_us, cumulative_us)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(name: str, repeat: int, top: int):
+    paths, modules = PROFILES[name]
+    walls = []
+    rows, stdout = [], ''
+    for _ in range(repeat):
+        wall, stderr, stdout = run_profile(paths, modules)
+        walls.append(wall)
+        rows = parse_importtime(stderr)
+    # верхний уровень относительно профиля: минимальная глубина
+    min_depth = min((row[1] for row in rows), default=0)
+    top_rows = sorted((row for row in rows if row[1] == min_depth), key=lambda row: -row[3])[:top]
+    return {
+        'wall_ms': round(statistics.median(walls) * 1000, 1),
+        'import_ms': round(sum(row[2] for row in rows) / 1000, 1),
+        'modules': len(rows),
+        'heavy': [package for line in stdout.splitlines() if line.startswith('heavy:')
+                  for package in line[len('heavy:'):].strip().split(',') if package],
+        'top': [(row[0], round(row[3] / 1000, 1)) for row in top_rows],
+        'failures': [line for line in stdout.splitlines() if line.startswith('import ')],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time benchmark (холодный старт процессов)')
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument('--repeat', type=int, default=5, help='Прогонов на профиль (медиана wall)')
+    parser.add_argument('--top', type=int, default=8, help='Сколько дорогих импортов показать')
+    parser.add_argument('--output', help='JSON файл с результатами')
+    args = parser.parse_args()
+
+    baseline_ms = measure_baseline(args.repeat)
+    results = {name: measure(name, args.repeat, args.top) for name in args.profiles}
+
+    print(f"python {sys.version.split()[0]}, пустой интерпретатор: {baseline_ms} ms")
+    print(f"{'profile':<8} {'wall ms':>9} {'import ms':>10} {'modules':>8}  heavy")
+    for name, row in results.items():
+        print(f"{name:<8} {row['wall_ms']:>9} {row['import_ms']:>10} {row['modules']:>8}  "
+              f"{', '.join(row['heavy']) or '-'}")
+    for name, row in results.items():
+        print(f"\n{name}: " + ', '.join(f"{module} {ms}ms" for module, ms in row['top']))
+        for failure in row['failures']:
+            print(f"  ! {failure}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps({'baseline_ms': baseline_ms, **results},
+                                                ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"\nРезультат: {args.output}")
+
+
+def measure_baseline(repeat: int) -> float:
+    """Старт интерпретатора без импортов проекта - нижняя граница wall ms"""
+    walls = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        walls.append(time.perf_counter() - started)
+    return round(statistics.median(walls) * 1000, 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Logging Benchmark: время логирования в event loop на ход интервью
+
+Ход интервью моделируется как в InteractiveInterviewerAgentV2: выбор
+следующего RP (ReferencePointManager.get_next_reference_point по 13 RP ФПГ),
+запись ответа и несколько INFO записей обработчика. Замеряется время
+в вызывающем потоке (то, что блокирует event loop бота) в сценариях:
+
+    before      - FileHandler + stdout синхронно, старое логирование RP (INFO на каждый RP)
+    sync        - FileHandler + stdout синхронно, текущее логирование RP
+    queue       - shared/logging_config.py: QueueListener, text
+    queue-json  - то же, JSON формат
+
+stdout направляется в os.devnull, файл логов - во временную папку.
+Для queue сценариев отдельно показано время дозаписи очереди (drain) -
+оно уходит в поток QueueListener.
+
+Usage:
+    python benchmarks/logging_benchmark.py
+    python benchmarks/logging_benchmark.py --turns 2000 --output benchmarks/results/logging.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.reference_points.reference_point_manager import ReferencePointManager
+from agents.reference_points.reference_point import ReferencePointState
+from shared.logging_config import TEXT_FORMAT, configure_logging, shutdown_logging
+
+HANDLER_LOGS_PER_TURN = 8
+
+rp_logger = logging.getLogger('agents.reference_points.reference_point_manager')
+handler_logger = logging.getLogger('agents.interactive_interviewer_v2.benchmark')
+
+
+def legacy_get_next_reference_point(manager: ReferencePointManager):
+    """Логирование get_next_reference_point до перевода на DEBUG (для сценария before)"""
+    completed_ids = manager.get_completed_rp_ids()
+    rp_logger.info(f"[get_next_reference_point] Searching for next RP...")
+    rp_logger.info(f"[get_next_reference_point] Total RPs: {len(manager.reference_points)}, "
+                   f"Completed IDs: {completed_ids}")
+    candidates = []
+    for rp_id in manager._rp_order:
+        rp = manager.reference_points[rp_id]
+        rp_logger.debug(f"[get_next_reference_point] Checking {rp_id}: "
+                        f"state={rp.state.value}, is_complete={rp.is_complete()}, "
+                        f"data_length={len(rp.collected_data)}")
+        if rp.is_complete():
+            rp_logger.info(f"[get_next_reference_point] ❌ SKIPPED (completed): {rp_id} "
+                           f"(state={rp.state.value}, data={len(rp.collected_data)} items)")
+            continue
+        if rp.is_blocked(completed_ids):
+            rp_logger.info(f"[get_next_reference_point] ❌ SKIPPED (blocked): {rp_id}")
+            continue
+        rp_logger.info(f"[get_next_reference_point] ✅ CANDIDATE: {rp_id}")
+        candidates.append(rp)
+    # выбор как в manager.get_next_reference_point, без повторного логирования
+    return manager.get_next_reference_point() if candidates else None
+
+
+def run_turns(turns: int, legacy: bool):
+    """Ходы интервью; возвращает время каждого хода в вызывающем потоке, с"""
+    timings = []
+    manager = None
+    for turn in range(turns):
+        if manager is None or turn % len(manager.reference_points) == 0:
+            manager = ReferencePointManager()
+            manager.load_fpg_reference_points()
+
+        started = time.perf_counter()
+        rp = legacy_get_next_reference_point(manager) if legacy else manager.get_next_reference_point()
+        if rp is not None:
+            rp.add_data('text', f'ответ {turn}')
+            rp.update_state(ReferencePointState.IN_PROGRESS)
+            for step in range(HANDLER_LOGS_PER_TURN):
+                handler_logger.info(f"[turn {turn}] step {step}: rp={rp.id}, answer_length={len(rp.collected_data)}")
+            manager.mark_completed(rp.id)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def run_scenario(name: str, turns: int, log_dir: Path, devnull):
+    legacy = name == 'before'
+    log_file = log_dir / f'{name}.log'
+    stream = logging.StreamHandler(devnull)
+
+    if name in ('before', 'sync'):
+        # как UnixConfig.setup_logging до перехода на QueueListener
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handlers = [logging.FileHandler(log_file, encoding='utf-8'), stream]
+        for handler in handlers:
+            handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+            root.addHandler(handler)
+        root.setLevel(logging.INFO)
+    else:
+        handlers = []
+        configure_logging(log_file=str(log_file), level='INFO', fmt='json' if name == 'queue-json' else 'text',
+                          stream=False, use_queue=True, handlers=[stream])
+
+    timings = run_turns(turns, legacy)
+
+    drain_started = time.perf_counter()
+    shutdown_logging()
+    for handler in handlers:
+        logging.getLogger().removeHandler(handler)
+        handler.close()
+    drain = time.perf_counter() - drain_started
+
+    timings_us = sorted(t * 1e6 for t in timings)
+    return {
+        'turns': turns,
+        'mean_us': round(statistics.mean(timings_us), 1),
+        'p50_us': round(timings_us[len(timings_us) // 2], 1),
+        'p95_us': round(timings_us[int(len(timings_us) * 0.95)], 1),
+        'drain_ms': round(drain * 1000, 1) if name.startswith('queue') else 0.0,
+        'log_bytes': log_file.stat().st_size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Logging benchmark (время в event loop на ход интервью)')
+    parser.add_argument('--turns', type=int, default=1000)
+    parser.add_argument('--scenarios', nargs='+', default=['before', 'sync', 'queue', 'queue-json'])
+    parser.add_argument('--output', help='JSON файл с результатами')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        run_turns(50, legacy=False)  # прогрев без обработчиков
+        for name in args.scenarios:
+            results[name] = run_scenario(name, args.turns, Path(tmp), devnull)
+
+    base = results.get('before', {}).get('mean_us')
+    print(f"{'scenario':<12} {'mean us':>10} {'p50 us':>10} {'p95 us':>10} {'drain ms':>10} {'log KB':>9} {'vs before':>10}")
+    for name, row in results.items():
+        ratio = f"{base / row['mean_us']:.1f}x" if base else '-'
+        print(f"{name:<12} {row['mean_us']:>10} {row['p50_us']:>10} {row['p95_us']:>10} "
+              f"{row['drain_ms']:>10} {row['log_bytes'] / 1024:>9.1f} {ratio:>10}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"\nРезультат: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Метрики стадий бенчмарка
+
+StageMeter снимает показатели до и после стадии и считает разницу:
+- wall_seconds / cpu_seconds - время стадии (CPU - весь процесс, включая потоки)
+- peak_rss_mb / rss_growth_mb - пиковая память процесса (ru_maxrss)
+- db_queries / db_by_kind - запросы к PostgreSQL (execute / executemany)
+- llm_calls / llm_request_bytes / llm_response_bytes - по провайдерам,
+  из статистики кассет (режимы record / replay)
+
+Счетчик запросов подключается на время бенчмарка через count_db_queries():
+psycopg2.connect оборачивается так, что класс соединения (в том числе
+InvalidatingConnection кеша админки) наследуется с курсорами, считающими
+выполненные запросы (в том числе с cursor_factory=RealDictCursor).
+"""
+
+import copy
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# ----------------------------------------------------------------------
+# Запросы к БД
+# ----------------------------------------------------------------------
+
+class QueryCounter:
+    """Потокобезопасный счетчик запросов по типу (SELECT / INSERT / ...)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_kind: Counter = Counter()
+
+    def add(self, query: Any):
+        if isinstance(query, bytes):
+            query = query.decode('utf-8', errors='replace')
+        words = str(query).split(None, 1)
+        kind = words[0].upper() if words else 'EMPTY'
+        with self._lock:
+            self.by_kind[kind] += 1
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.by_kind.values())
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.by_kind)
+
+
+QUERY_COUNTER = QueryCounter()
+
+_counting_cursor_classes: Dict[type, type] = {}
+_counting_connection_classes: Dict[type, type] = {}
+
+
+class _CountingCursorMixin:
+    def execute(self, query, vars=None):
+        QUERY_COUNTER.add(query)
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        QUERY_COUNTER.add(query)
+        return super().executemany(query, vars_list)
+
+
+def counting_cursor_class(base: type) -> type:
+    """Подкласс курсора base, считающий запросы (кэшируется)"""
+    cls = _counting_cursor_classes.get(base)
+    if cls is None:
+        cls = type(f"Counting{base.__name__}", (_CountingCursorMixin, base), {})
+        _counting_cursor_classes[base] = cls
+    return cls
+
+
+def counting_connection_class(base: type) -> type:
+    """
+    Подкласс соединения base, курсоры которого считают запросы (кэшируется)
+
+    Поведение base сохраняется: у InvalidatingConnection курсор-счетчик
+    оборачивается еще и курсором, отслеживающим записи для инвалидации кеша.
+    """
+    cls = _counting_connection_classes.get(base)
+    if cls is None:
+        import psycopg2.extensions
+
+        def cursor(self, *args, **kwargs):
+            cursor_base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+            kwargs['cursor_factory'] = counting_cursor_class(cursor_base)
+            return base.cursor(self, *args, **kwargs)
+
+        cls = type(f"Counting{base.__name__}", (base,), {'cursor': cursor})
+        _counting_connection_classes[base] = cls
+    return cls
+
+
+@contextmanager
+def count_db_queries():
+    """
+    Считать запросы всех соединений psycopg2 (GrantServiceDatabase и др.) на время блока
+
+    Соединение создается тем же psycopg2.connect и с тем же
+    connection_factory, что запросил вызывающий код, - к нему добавляется
+    только подсчет.
+
+    Yields:
+        QUERY_COUNTER
+    """
+    import psycopg2
+    import psycopg2.extensions
+
+    original_connect = psycopg2.connect
+
+    def connect(*args, connection_factory=None, **kwargs):
+        base = connection_factory or psycopg2.extensions.connection
+        return original_connect(*args, connection_factory=counting_connection_class(base), **kwargs)
+
+    psycopg2.connect = connect
+    try:
+        yield QUERY_COUNTER
+    finally:
+        psycopg2.connect = original_connect
+
+
+# ----------------------------------------------------------------------
+# Память
+# ----------------------------------------------------------------------
+
+def peak_rss_mb() -> Optional[float]:
+    """Пиковый RSS процесса в МБ (None, если недоступно)"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux - килобайты, macOS - байты
+    import sys
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(usage / divisor, 1)
+
+
+# ----------------------------------------------------------------------
+# Стадии
+# ----------------------------------------------------------------------
+
+class StageMeter:
+    """
+    Замер стадий пайплайна
+
+    Usage:
+        meter = StageMeter(recorder=cassettes)
+        with meter.stage("audit"):
+            await auditor.test_auditor(anketa)
+        meter.stages["audit"]["wall_seconds"]
+    """
+
+    def __init__(self, recorder=None, query_counter: Optional[QueryCounter] = None):
+        self.recorder = recorder
+        self.query_counter = query_counter
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def _llm_snapshot(self) -> Dict[str, Dict[str, int]]:
+        if self.recorder is None:
+            return {}
+        return copy.deepcopy(self.recorder.stats.get('by_provider', {}))
+
+    @contextmanager
+    def stage(self, name: str):
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        rss_started = peak_rss_mb()
+        queries_started = self.query_counter.snapshot() if self.query_counter else None
+        llm_started = self._llm_snapshot()
+
+        result: Dict[str, Any] = {'ok': True, 'error': None}
+        self.stages[name] = result
+        try:
+            yield result
+        except Exception as e:
+            result['ok'] = False
+            result['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            result['wall_seconds'] = round(time.perf_counter() - wall_started, 4)
+            result['cpu_seconds'] = round(time.process_time() - cpu_started, 4)
+
+            rss_finished = peak_rss_mb()
+            result['peak_rss_mb'] = rss_finished
+            result['rss_growth_mb'] = (
+                round(rss_finished - rss_started, 1) if rss_finished is not None else None
+            )
+
+            if queries_started is not None:
+                by_kind = self.query_counter.snapshot() - queries_started
+                result['db_queries'] = sum(by_kind.values())
+                result['db_by_kind'] = dict(by_kind)
+            else:
+                result['db_queries'] = None
+
+            if self.recorder is not None:
+                llm = diff_llm_stats(llm_started, self._llm_snapshot())
+                result['llm_by_provider'] = llm
+                result['llm_calls'] = sum(p['calls'] for p in llm.values())
+                result['llm_request_bytes'] = sum(p['request_bytes'] for p in llm.values())
+                result['llm_response_bytes'] = sum(p['response_bytes'] for p in llm.values())
+            else:
+                result['llm_calls'] = None
+
+
+def diff_llm_stats(before: Dict[str, Dict[str, int]], after: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    """Разница счетчиков кассет по провайдерам (без нулевых)"""
+    result = {}
+    for provider, counters in after.items():
+        base = before.get(provider, {})
+        delta = {name: value - base.get(name, 0) for name, value in counters.items()}
+        if delta.get('calls'):
+            result[provider] = delta
+    return result
+
+
+SUMMED_METRICS = (
+    'wall_seconds', 'cpu_seconds', 'db_queries',
+    'llm_calls', 'llm_request_bytes', 'llm_response_bytes',
+)
+
+
+def total_of(stages: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Сумма метрик по стадиям (peak_rss_mb - максимум)"""
+    total: Dict[str, Any] = {'ok': all(stage.get('ok') for stage in stages.values())}
+    for metric in SUMMED_METRICS:
+        values = [stage.get(metric) for stage in stages.values() if stage.get(metric) is not None]
+        total[metric] = round(sum(values), 4) if values else None
+    rss = [stage['peak_rss_mb'] for stage in stages.values() if stage.get('peak_rss_mb') is not None]
+    total['peak_rss_mb'] = max(rss) if rss else None
+    return total
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline Benchmark: interview → audit → research → write → review
+
+Прогоняет production пайплайн (модули tests/e2e/modules) на фиксированных
+анкетах-фикстурах и замеряет каждую стадию: wall / CPU время, пиковую
+память, число запросов к БД, число и объем вызовов LLM.
+
+Провайдеры:
+    --mode replay   ответы из кассет shared/llm/cassettes.py, без сети (по умолчанию)
+    --mode record   реальные провайдеры, ответы записываются в кассеты
+    --mode live     реальные провайдеры без записи (метрики LLM недоступны)
+
+Интервью ведет production InteractiveInterviewerAgentV2, ответы
+пользователя берутся из interview_data фикстуры по порядку.
+Нужен PostgreSQL (агенты пишут результаты в БД).
+
+Usage:
+    # один раз записать кассеты
+    python benchmarks/pipeline_benchmark.py --mode record --label record
+    # прогоны без сети
+    python benchmarks/pipeline_benchmark.py --label baseline
+    python benchmarks/pipeline_benchmark.py --label after-fix --latency "recorded:0.1"
+    python benchmarks/compare.py benchmarks/results/*_baseline.json benchmarks/results/*_after-fix.json
+
+Результат: benchmarks/results/<timestamp>_<label>.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.metrics import StageMeter, count_db_queries, total_of
+from shared.llm.cassettes import DEFAULT_CASSETTE_DIR, use_cassettes
+from shared.llm.http_sessions import shared_provider_sessions
+from tests.e2e.modules import (
+    AuditorTestModule, InterviewerTestModule, ResearcherTestModule, ReviewerTestModule, WriterTestModule
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIXTURES = [PROJECT_ROOT / 'sample_anketa_iter41.json']
+RESULTS_DIR = Path(__file__).parent / 'results'
+
+BENCHMARK_TELEGRAM_ID_BASE = 999990000
+
+
+def load_fixture(path: Path) -> Dict[str, Any]:
+    """Анкета-фикстура: {'anketa_id', 'interview_data': {поле: ответ}}"""
+    data = json.loads(path.read_text(encoding='utf-8'))
+    if 'interview_data' not in data:
+        raise ValueError(f"{path}: нет interview_data")
+    return data
+
+
+def fixture_answers(fixture: Dict[str, Any]) -> List[str]:
+    """Ответы интервью из фикстуры в порядке полей"""
+    return [
+        value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        for value in fixture['interview_data'].values()
+    ]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class FixtureInterviewer(InterviewerTestModule):
+    """Ответы пользователя из фикстуры вместо генерации через LLM"""
+
+    def __init__(self, db, answers: List[str]):
+        super().__init__(db)
+        self.answers = answers or ["Нет ответа"]
+        self.position = 0
+
+    async def _init_llm_client(self, llm_provider: str):
+        pass
+
+    async def _generate_answer(self, question: str) -> str:
+        answer = self.answers[self.position % len(self.answers)]
+        self.position += 1
+        return answer
+
+
+class PipelineBenchmark:
+    """Прогон пайплайна по фикстурам с замером стадий"""
+
+    def __init__(
+        self,
+        db,
+        mode: str = 'replay',
+        cassette_dir: Optional[Path] = None,
+        latency: Optional[str] = None,
+        seed: Optional[int] = 42,
+        llm_provider: str = 'gigachat',
+        research_provider: str = 'claude_code',
+        mock_research: bool = False
+    ):
+        self.db = db
+        self.mode = mode
+        self.cassette_dir = cassette_dir or DEFAULT_CASSETTE_DIR
+        self.latency = latency
+        self.seed = seed
+        self.llm_provider = llm_provider
+        self.research_provider = research_provider
+        self.mock_research = mock_research
+
+    async def run(self, fixtures: List[Path], label: str = 'run') -> Dict[str, Any]:
+        """
+        Прогнать все фикстуры
+
+        Returns:
+            Результат (сохраняется в JSON через save_result)
+        """
+        result = {
+            'label': label,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'mode': self.mode,
+            'latency': self.latency,
+            'seed': self.seed,
+            'fixtures': {},
+        }
+
+        with ExitStack() as stack:
+            recorder = None
+            if self.mode != 'live':
+                recorder = stack.enter_context(use_cassettes(
+                    self.mode, self.cassette_dir, latency=self.latency, seed=self.seed
+                ))
+            query_counter = stack.enter_context(count_db_queries())
+
+            async with shared_provider_sessions():
+                for index, path in enumerate(fixtures):
+                    meter = StageMeter(recorder=recorder, query_counter=query_counter)
+                    error = None
+                    try:
+                        await self.run_fixture(load_fixture(path), BENCHMARK_TELEGRAM_ID_BASE + index, meter)
+                    except Exception as e:
+                        error = f"{type(e).__name__}: {e}"
+                        logger.error(f"[BENCHMARK] {path.name} failed: {error}")
+
+                    result['fixtures'][path.stem] = {
+                        'stages': meter.stages,
+                        'total': total_of(meter.stages),
+                        'error': error,
+                    }
+
+            if recorder is not None:
+                result['cassettes'] = {
+                    key: recorder.stats[key] for key in ('recorded', 'replayed', 'misses', 'simulated_latency_seconds')
+                }
+
+        return result
+
+    async def run_fixture(self, fixture: Dict[str, Any], telegram_id: int, meter: StageMeter):
+        """Стадии пайплайна для одной анкеты (следующая стадия использует результат предыдущей)"""
+        with meter.stage('interview'):
+            interviewer = FixtureInterviewer(self.db, fixture_answers(fixture))
+            anketa = await interviewer.run_automated_interview(
+                telegram_id=telegram_id,
+                username=f"bench_{telegram_id}",
+                llm_provider=self.llm_provider
+            )
+
+        with meter.stage('audit'):
+            await AuditorTestModule(self.db).test_auditor(anketa_data=anketa, llm_provider=self.llm_provider)
+
+        with meter.stage('research'):
+            research = await ResearcherTestModule(self.db).test_researcher(
+                anketa_data=anketa, llm_provider=self.research_provider, use_mock=self.mock_research
+            )
+
+        with meter.stage('write'):
+            grant = await WriterTestModule(self.db).test_writer(
+                anketa_data=anketa, research_data=research, llm_provider=self.llm_provider
+            )
+
+        with meter.stage('review'):
+            await ReviewerTestModule(self.db).test_reviewer(grant_data=grant, llm_provider=self.llm_provider)
+
+
+def save_result(result: Dict[str, Any], results_dir: Path = RESULTS_DIR) -> Path:
+    results_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = results_dir / f"{timestamp}_{result['label']}.json"
+    path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
+    return path
+
+
+def format_summary(result: Dict[str, Any]) -> str:
+    lines = [f"{'fixture':<28} {'stage':<10} {'wall,s':>8} {'cpu,s':>7} {'rss,MB':>7} {'db':>5} {'llm':>5} {'llm KB':>8}"]
+    for fixture, data in result['fixtures'].items():
+        for stage, metrics in list(data['stages'].items()) + [('total', data['total'])]:
+            llm_kb = None
+            if metrics.get('llm_calls') is not None:
+                llm_kb = round((metrics['llm_request_bytes'] + metrics['llm_response_bytes']) / 1024, 1)
+            status = '' if metrics.get('ok') else '  FAILED'
+            lines.append(
+                f"{fixture[:28]:<28} {stage:<10} {metrics.get('wall_seconds')!s:>8} {metrics.get('cpu_seconds')!s:>7} "
+                f"{metrics.get('peak_rss_mb')!s:>7} {metrics.get('db_queries')!s:>5} "
+                f"{metrics.get('llm_calls')!s:>5} {llm_kb!s:>8}{status}"
+            )
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Pipeline benchmark: interview -> audit -> research -> write -> review",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--fixtures', type=Path, nargs='+', default=DEFAULT_FIXTURES,
+                        help='Anketa fixture JSON files (default: sample_anketa_iter41.json)')
+    parser.add_argument('--mode', choices=('replay', 'record', 'live'), default='replay')
+    parser.add_argument('--cassettes', type=Path, default=DEFAULT_CASSETTE_DIR, help='Cassette directory')
+    parser.add_argument('--latency', default=None,
+                        help='Replay latency spec, e.g. "recorded:0.1" or "claude_code=lognormal:8,0.5"')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for latency distributions')
+    parser.add_argument('--llm-provider', default='gigachat', help='Provider for interview/audit/write/review')
+    parser.add_argument('--research-provider', default='claude_code', help='Provider for research (WebSearch)')
+    parser.add_argument('--mock-research', action='store_true', help='Use mock research data (no WebSearch)')
+    parser.add_argument('--label', default='run', help='Run label (used in result file name)')
+    parser.add_argument('--results-dir', type=Path, default=RESULTS_DIR)
+    parser.add_argument('--verbose', action='store_true')
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    from data.database.models import GrantServiceDatabase
+
+    benchmark = PipelineBenchmark(
+        GrantServiceDatabase(),
+        mode=args.mode,
+        cassette_dir=args.cassettes,
+        latency=args.latency,
+        seed=args.seed,
+        llm_provider=args.llm_provider,
+        research_provider=args.research_provider,
+        mock_research=args.mock_research
+    )
+    result = await benchmark.run(args.fixtures, label=args.label)
+    path = save_result(result, args.results_dir)
+
+    print(format_summary(result))
+    if 'cassettes' in result:
+        print(f"\ncassettes: {result['cassettes']}")
+    print(f"\nSaved: {path}")
+
+    return 0 if all(data['total']['ok'] and not data['error'] for data in result['fixtures'].values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
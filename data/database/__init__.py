@@ -73,10 +73,16 @@ def get_session_manager():
     return _session_manager
 
 def get_auth_manager():
-    """Получить экземпляр AuthManager (lazy)"""
+    """
+    Получить экземпляр AuthManager (lazy)
+
+    Запускает LISTEN rbac_changes в фоне (отключается RBAC_CACHE_LISTEN=0).
+    """
     global _auth_manager
     if _auth_manager is None:
         _auth_manager = AuthManager(get_db())
+        if os.getenv('RBAC_CACHE_LISTEN', '1').lower() not in ('0', 'false', 'no'):
+            _auth_manager.start_listener()
     return _auth_manager
 
 # Для обратной совместимости
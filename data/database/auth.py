@@ -2,15 +2,35 @@
 # -*- coding: utf-8 -*-
 """
 Модуль для работы с авторизацией и ролями пользователей (PostgreSQL)
+
+Проверки доступа (роль, разрешения, страницы) отвечают из снимка RBAC в
+памяти процесса - без обращений к БД. Снимок загружается одним
+соединением при первой проверке и сбрасывается:
+- записью через AuthManager (set_user_role / set_user_permissions /
+  set_page_permissions)
+- NOTIFY rbac_changes (Migration 021) - записи из других процессов
+- по TTL, если LISTEN не запущен (RBAC_SNAPSHOT_TTL, по умолчанию 300 с)
 """
 
 import json
+import logging
+import os
+import threading
 import time
 import secrets
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
 
+from shared.pg_listener import PgListenThread
+
+try:
+    from shared.log_sink import submit_log
+except ImportError:
+    submit_log = None
+
+logger = logging.getLogger(__name__)
+
 class UserRole(Enum):
     """Роли пользователей в системе"""
     ADMIN = "admin"          # Полный доступ ко всем функциям
@@ -28,13 +48,196 @@ class UserPermission(Enum):
     REVIEW_GRANTS = "review_grants"       # Проверка грантов
     SEND_MESSAGES = "send_messages"       # Отправка сообщений
 
+# Уровни ролей для требований страниц
+ROLE_HIERARCHY = {
+    UserRole.USER.value: 0,
+    UserRole.VIEWER.value: 1,
+    UserRole.EDITOR.value: 2,
+    UserRole.ADMIN.value: 3
+}
+
+# Канал NOTIFY (Migration 021: триггеры на users.role/permissions и page_permissions)
+RBAC_CHANGES_CHANNEL = 'rbac_changes'
+
+RBAC_SNAPSHOT_TTL = int(os.getenv('RBAC_SNAPSHOT_TTL', '300'))
+
+
+class RBACSnapshot:
+    """
+    Неизменяемый снимок RBAC: роли и разрешения пользователей + правила страниц
+
+    Хранит только пользователей с ролью, отличной от 'user', или с
+    дополнительными разрешениями - остальные получают значения по умолчанию,
+    как и при чтении из БД.
+    """
+
+    USERS_QUERY = """
+        SELECT telegram_id, role, permissions
+        FROM users
+        WHERE (role IS NOT NULL AND role <> 'user')
+           OR (permissions IS NOT NULL AND permissions <> '[]'::jsonb AND permissions <> 'null'::jsonb)
+    """
+
+    PAGES_QUERY = """
+        SELECT page_name, required_role, required_permissions
+        FROM page_permissions
+        WHERE is_active = TRUE
+    """
+
+    def __init__(self, users: Dict[int, Tuple[str, List[str]]],
+                 pages: Dict[str, Tuple[Optional[str], List[str]]]):
+        self.users = users
+        self.pages = pages
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls, cursor) -> 'RBACSnapshot':
+        """Загрузить снимок (два запроса одним курсором)"""
+        cursor.execute(cls.USERS_QUERY)
+        users = {}
+        for telegram_id, role, permissions_json in cursor.fetchall():
+            users[telegram_id] = (role or UserRole.USER.value, _parse_permissions(permissions_json))
+
+        cursor.execute(cls.PAGES_QUERY)
+        pages = {
+            page_name: (required_role, _parse_permissions(required_permissions_json))
+            for page_name, required_role, required_permissions_json in cursor.fetchall()
+        }
+        return cls(users, pages)
+
+    def age(self) -> float:
+        return time.monotonic() - self.loaded_at
+
+    def role(self, telegram_id: int) -> str:
+        return self.users.get(telegram_id, (UserRole.USER.value, []))[0]
+
+    def permissions(self, telegram_id: int) -> List[str]:
+        return list(self.users.get(telegram_id, (None, []))[1])
+
+    def can_access_page(self, telegram_id: int, page_name: str) -> bool:
+        page_req = self.pages.get(page_name)
+        if page_req is None:
+            # Если страница не настроена, доступ открыт
+            return True
+
+        required_role, required_permissions = page_req
+        user_role, user_permissions = self.users.get(telegram_id, (UserRole.USER.value, []))
+
+        # Админы имеют доступ везде
+        if user_role == UserRole.ADMIN.value:
+            return True
+
+        if required_role and ROLE_HIERARCHY.get(user_role, 0) < ROLE_HIERARCHY.get(required_role, 999):
+            return False
+
+        # Достаточно хотя бы одного из требуемых разрешений
+        if required_permissions and not any(perm in user_permissions for perm in required_permissions):
+            return False
+
+        return True
+
+    def accessible_pages(self, telegram_id: int) -> List[str]:
+        return [page for page in self.pages if self.can_access_page(telegram_id, page)]
+
+
+def _parse_permissions(permissions_json: Any) -> List[str]:
+    """JSONB разрешений: psycopg2 отдает уже разобранный список, старые записи - строку JSON"""
+    if not permissions_json:
+        return []
+    if isinstance(permissions_json, (list, tuple)):
+        return list(permissions_json)
+    try:
+        permissions = json.loads(permissions_json)
+    except (TypeError, ValueError):
+        return []
+    return permissions if isinstance(permissions, list) else []
+
+
+class RBACChangeListener(PgListenThread):
+    """
+    Фоновый поток: LISTEN rbac_changes и сброс снимка AuthManager
+
+    После (пере)подключения снимок сбрасывается - изменения, пропущенные
+    пока соединения не было, не теряются. Пока соединения нет, снимок
+    обновляется по TTL.
+    """
+
+    def __init__(self, manager: 'AuthManager', connect: Callable[[], Any],
+                 channel: str = RBAC_CHANGES_CHANNEL, poll_timeout: float = 5.0,
+                 max_reconnect_delay: float = 60.0):
+        super().__init__(connect, channel, name='rbac-change-listener',
+                         poll_timeout=poll_timeout, max_reconnect_delay=max_reconnect_delay)
+        self.manager = manager
+
+    def on_reconnect(self) -> None:
+        self.manager.invalidate_snapshot()
+
+    def on_notify(self, payload: str) -> None:
+        self.manager.invalidate_snapshot()
+
+
 class AuthManager:
     """Менеджер авторизации и управления ролями (PostgreSQL)"""
 
-    def __init__(self, db):
+    def __init__(self, db, snapshot_ttl: int = RBAC_SNAPSHOT_TTL):
         self.db = db
+        self.snapshot_ttl = snapshot_ttl
+        self._snapshot: Optional[RBACSnapshot] = None
+        self._snapshot_lock = threading.Lock()
+        self._generation = 0
+        self._listener: Optional[RBACChangeListener] = None
         self._ensure_auth_tables()
 
+    # -------------------------------------------------------------------------
+    # Снимок RBAC
+    # -------------------------------------------------------------------------
+
+    def snapshot(self) -> RBACSnapshot:
+        """Текущий снимок RBAC (загружается при первом обращении или после сброса)"""
+        snapshot = self._snapshot
+        if snapshot is not None and (self.listener_active or snapshot.age() < self.snapshot_ttl):
+            return snapshot
+
+        with self._snapshot_lock:
+            if self._snapshot is not None and self._snapshot is not snapshot:
+                return self._snapshot  # загружен другим потоком
+            generation = self._generation
+            with self.db.connect() as conn:
+                cursor = conn.cursor()
+                snapshot = RBACSnapshot.load(cursor)
+                cursor.close()
+            # Сброс во время загрузки: снимок мог прочитать данные до записи
+            if generation == self._generation:
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate_snapshot(self):
+        """Сбросить снимок RBAC (следующая проверка загрузит его заново)"""
+        self._generation += 1
+        self._snapshot = None
+
+    def start_listener(self, connect: Optional[Callable[[], Any]] = None, **kwargs) -> RBACChangeListener:
+        """
+        Запустить фоновый LISTEN rbac_changes
+
+        Args:
+            connect: Фабрика отдельного соединения psycopg2 (по умолчанию db.connect)
+            **kwargs: Параметры RBACChangeListener (poll_timeout, max_reconnect_delay)
+        """
+        if self._listener is None or not self._listener.is_alive():
+            self._listener = RBACChangeListener(self, connect or self.db.connect, **kwargs)
+            self._listener.start()
+        return self._listener
+
+    def stop_listener(self, timeout: Optional[float] = 5.0) -> None:
+        if self._listener is not None:
+            self._listener.stop(timeout)
+            self._listener = None
+
+    @property
+    def listener_active(self) -> bool:
+        return self._listener is not None and self._listener.connected.is_set()
+
     def _ensure_auth_tables(self):
         """Проверить наличие необходимых полей для авторизации"""
         try:
@@ -54,28 +257,28 @@ class AuthManager:
                 if 'role' not in columns:
                     cursor.execute("ALTER TABLE users ADD COLUMN role VARCHAR(20) DEFAULT 'user'")
                     conn.commit()
-                    print("Добавлено поле role в таблицу users")
+                    logger.info("Добавлено поле role в таблицу users")
 
                 # Добавляем колонку permissions если её нет
                 if 'permissions' not in columns:
                     cursor.execute("ALTER TABLE users ADD COLUMN permissions TEXT")
                     conn.commit()
-                    print("Добавлено поле permissions в таблицу users")
+                    logger.info("Добавлено поле permissions в таблицу users")
 
                 # Добавляем колонку token_expires_at если её нет
                 if 'token_expires_at' not in columns:
                     cursor.execute("ALTER TABLE users ADD COLUMN token_expires_at TIMESTAMP")
                     conn.commit()
-                    print("Добавлено поле token_expires_at в таблицу users")
+                    logger.info("Добавлено поле token_expires_at в таблицу users")
 
                 # Таблица auth_logs уже существует в миграции
                 # Таблица page_permissions уже существует в миграции
 
                 cursor.close()
-                print("Таблицы авторизации инициализированы")
+                logger.info("Таблицы авторизации инициализированы")
 
         except Exception as e:
-            print(f"Ошибка создания таблиц авторизации: {e}")
+            logger.error(f"Ошибка создания таблиц авторизации: {e}")
 
     def set_user_role(self, telegram_id: int, role: str) -> bool:
         """Установить роль пользователя"""
@@ -86,7 +289,7 @@ class AuthManager:
                 # Проверяем валидность роли
                 valid_roles = [r.value for r in UserRole]
                 if role not in valid_roles:
-                    print(f"Недопустимая роль: {role}")
+                    logger.warning(f"Недопустимая роль: {role}")
                     return False
 
                 cursor.execute("""
@@ -95,32 +298,21 @@ class AuthManager:
 
                 conn.commit()
                 cursor.close()
-                print(f"Установлена роль {role} для пользователя {telegram_id}")
+                self.invalidate_snapshot()
+                logger.info(f"Установлена роль {role} для пользователя {telegram_id}")
                 return True
 
         except Exception as e:
-            print(f"Ошибка установки роли: {e}")
+            logger.error(f"Ошибка установки роли: {e}")
             return False
 
     def get_user_role(self, telegram_id: int) -> Optional[str]:
         """Получить роль пользователя"""
         try:
-            with self.db.connect() as conn:
-                cursor = conn.cursor()
-
-                cursor.execute("""
-                    SELECT role FROM users WHERE telegram_id = %s
-                """, (telegram_id,))
-
-                result = cursor.fetchone()
-                cursor.close()
-
-                if result:
-                    return result[0] or UserRole.USER.value
-                return UserRole.USER.value
+            return self.snapshot().role(telegram_id)
 
         except Exception as e:
-            print(f"Ошибка получения роли: {e}")
+            logger.error(f"Ошибка получения роли: {e}")
             return UserRole.USER.value
 
     def is_admin(self, telegram_id: int) -> bool:
@@ -156,38 +348,33 @@ class AuthManager:
 
                 conn.commit()
                 cursor.close()
-                print(f"Установлены разрешения для пользователя {telegram_id}")
+                self.invalidate_snapshot()
+                logger.info(f"Установлены разрешения для пользователя {telegram_id}")
                 return True
 
         except Exception as e:
-            print(f"Ошибка установки разрешений: {e}")
+            logger.error(f"Ошибка установки разрешений: {e}")
             return False
 
     def get_user_permissions(self, telegram_id: int) -> List[str]:
         """Получить дополнительные разрешения пользователя"""
         try:
-            with self.db.connect() as conn:
-                cursor = conn.cursor()
-
-                cursor.execute("""
-                    SELECT permissions FROM users WHERE telegram_id = %s
-                """, (telegram_id,))
-
-                result = cursor.fetchone()
-                cursor.close()
-
-                if result and result[0]:
-                    return json.loads(result[0])
-                return []
+            return self.snapshot().permissions(telegram_id)
 
         except Exception as e:
-            print(f"Ошибка получения разрешений: {e}")
+            logger.error(f"Ошибка получения разрешений: {e}")
             return []
 
     def log_auth_action(self, user_id: int, action: str, success: bool = True,
                        error_message: str = None, ip_address: str = None,
                        user_agent: str = None):
-        """Записать действие авторизации в лог"""
+        """Записать действие авторизации в лог (в фоне через LogSink, если доступен)"""
+        row = {'user_id': user_id, 'action': action, 'ip_address': ip_address, 'user_agent': user_agent,
+               'success': success, 'error_message': error_message, 'created_at': datetime.now()}
+        if submit_log is not None:
+            submit_log('auth_logs', row)
+            return
+
         try:
             with self.db.connect() as conn:
                 cursor = conn.cursor()
@@ -196,14 +383,14 @@ class AuthManager:
                     INSERT INTO auth_logs (user_id, action, ip_address, user_agent,
                                          success, error_message, created_at)
                     VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (user_id, action, ip_address, user_agent, success,
-                     error_message, datetime.now()))
+                """, (row['user_id'], row['action'], row['ip_address'], row['user_agent'],
+                     row['success'], row['error_message'], row['created_at']))
 
                 conn.commit()
                 cursor.close()
 
         except Exception as e:
-            print(f"Ошибка записи в лог авторизации: {e}")
+            logger.error(f"Ошибка записи в лог авторизации: {e}")
 
     def get_auth_logs(self, user_id: int = None, limit: int = 100) -> List[Dict[str, Any]]:
         """Получить логи авторизации"""
@@ -238,7 +425,7 @@ class AuthManager:
                 return logs
 
         except Exception as e:
-            print(f"Ошибка получения логов: {e}")
+            logger.error(f"Ошибка получения логов: {e}")
             return []
 
     def set_page_permissions(self, page_name: str, required_role: str = None,
@@ -265,97 +452,30 @@ class AuthManager:
 
                 conn.commit()
                 cursor.close()
-                print(f"Установлены права доступа для страницы {page_name}")
+                self.invalidate_snapshot()
+                logger.info(f"Установлены права доступа для страницы {page_name}")
                 return True
 
         except Exception as e:
-            print(f"Ошибка установки прав страницы: {e}")
+            logger.error(f"Ошибка установки прав страницы: {e}")
             return False
 
     def can_access_page(self, telegram_id: int, page_name: str) -> bool:
         """Проверить доступ пользователя к странице"""
         try:
-            with self.db.connect() as conn:
-                cursor = conn.cursor()
-
-                # Получаем требования страницы
-                cursor.execute("""
-                    SELECT required_role, required_permissions
-                    FROM page_permissions
-                    WHERE page_name = %s AND is_active = TRUE
-                """, (page_name,))
-
-                page_req = cursor.fetchone()
-                if not page_req:
-                    # Если страница не настроена, доступ открыт
-                    cursor.close()
-                    return True
-
-                required_role, required_permissions_json = page_req
-
-                # Получаем роль пользователя
-                user_role = self.get_user_role(telegram_id)
-
-                # Админы имеют доступ везде
-                if user_role == UserRole.ADMIN.value:
-                    cursor.close()
-                    return True
-
-                # Проверяем роль
-                if required_role:
-                    role_hierarchy = {
-                        UserRole.USER.value: 0,
-                        UserRole.VIEWER.value: 1,
-                        UserRole.EDITOR.value: 2,
-                        UserRole.ADMIN.value: 3
-                    }
-
-                    user_level = role_hierarchy.get(user_role, 0)
-                    required_level = role_hierarchy.get(required_role, 999)
-
-                    if user_level < required_level:
-                        cursor.close()
-                        return False
-
-                # Проверяем дополнительные разрешения
-                if required_permissions_json:
-                    required_permissions = json.loads(required_permissions_json)
-                    user_permissions = self.get_user_permissions(telegram_id)
-
-                    # Проверяем, есть ли хотя бы одно из требуемых разрешений
-                    if not any(perm in user_permissions for perm in required_permissions):
-                        cursor.close()
-                        return False
-
-                cursor.close()
-                return True
+            return self.snapshot().can_access_page(telegram_id, page_name)
 
         except Exception as e:
-            print(f"Ошибка проверки доступа к странице: {e}")
+            logger.error(f"Ошибка проверки доступа к странице: {e}")
             return False
 
     def get_accessible_pages(self, telegram_id: int) -> List[str]:
         """Получить список доступных страниц для пользователя"""
         try:
-            with self.db.connect() as conn:
-                cursor = conn.cursor()
-
-                cursor.execute("""
-                    SELECT page_name FROM page_permissions WHERE is_active = TRUE
-                """)
-
-                all_pages = cursor.fetchall()
-                accessible_pages = []
-
-                for (page_name,) in all_pages:
-                    if self.can_access_page(telegram_id, page_name):
-                        accessible_pages.append(page_name)
-
-                cursor.close()
-                return accessible_pages
+            return self.snapshot().accessible_pages(telegram_id)
 
         except Exception as e:
-            print(f"Ошибка получения доступных страниц: {e}")
+            logger.error(f"Ошибка получения доступных страниц: {e}")
             return []
 
     def get_users_by_role(self, role: str) -> List[Dict[str, Any]]:
@@ -383,7 +503,7 @@ class AuthManager:
                 return users
 
         except Exception as e:
-            print(f"Ошибка получения пользователей по роли: {e}")
+            logger.error(f"Ошибка получения пользователей по роли: {e}")
             return []
 
 # Глобальные функции для обратной совместимости
@@ -395,11 +515,10 @@ def create_login_token() -> str:
 
 def verify_login_token(token: str) -> bool:
     """Проверяет валидность токена (действителен 24 часа)"""
-    print(f"[AUTH] Проверка токена verify_login_token")
-    print(f"[AUTH] Входной токен (длина {len(token) if token else 0}): {token}")
+    logger.debug(f"[AUTH] Проверка токена verify_login_token (длина {len(token) if token else 0})")
 
     if not token:
-        print("[AUTH] ❌ Токен пустой")
+        logger.warning("[AUTH] ❌ Токен пустой")
         return False
 
     token_timestamp = None
@@ -407,17 +526,17 @@ def verify_login_token(token: str) -> bool:
     # Формат 1: token_timestamp_hash (с подчеркиваниями)
     if '_' in token:
         parts = token.split('_')
-        print(f"[AUTH] Обнаружен формат с подчеркиваниями, частей: {len(parts)}")
+        logger.debug(f"[AUTH] Обнаружен формат с подчеркиваниями, частей: {len(parts)}")
         if len(parts) >= 3:
             try:
                 token_timestamp = int(parts[1])
-                print(f"[AUTH] Извлечен timestamp из формата с подчеркиваниями: {token_timestamp}")
+                logger.debug(f"[AUTH] Извлечен timestamp из формата с подчеркиваниями: {token_timestamp}")
             except (ValueError, IndexError):
                 pass
 
     # Формат 2: tokenTIMESTAMPHASH (без подчеркиваний, фиксированные позиции)
     if not token_timestamp and token.startswith('token') and len(token) == 47:
-        print(f"[AUTH] Обнаружен формат без подчеркиваний (длина 47)")
+        logger.debug(f"[AUTH] Обнаружен формат без подчеркиваний (длина 47)")
         try:
             # Позиции: token(5) + timestamp(10) + hash(32) = 47
             timestamp_str = token[5:15]  # позиции 5-14 (10 цифр)
@@ -425,23 +544,22 @@ def verify_login_token(token: str) -> bool:
             # Проверяем, что timestamp состоит из цифр
             if timestamp_str.isdigit():
                 token_timestamp = int(timestamp_str)
-                print(f"[AUTH] Извлечен timestamp из формата без подчеркиваний: {token_timestamp}")
+                logger.debug(f"[AUTH] Извлечен timestamp из формата без подчеркиваний: {token_timestamp}")
         except (ValueError, IndexError) as e:
-            print(f"[AUTH] Ошибка парсинга формата без подчеркиваний: {e}")
+            logger.error(f"[AUTH] Ошибка парсинга формата без подчеркиваний: {e}")
 
     # Проверяем, удалось ли извлечь timestamp
     if token_timestamp:
         current_time = int(time.time())
         time_diff = current_time - token_timestamp
-        print(f"[AUTH] Timestamp: {token_timestamp}, текущее: {current_time}, разница: {time_diff} сек")
+        logger.debug(f"[AUTH] Timestamp: {token_timestamp}, текущее: {current_time}, разница: {time_diff} сек")
 
         # Токен действителен 24 часа (86400 секунд)
         is_valid = time_diff < 86400
-        print(f"[AUTH] Результат проверки: {'✅ ВАЛИДЕН' if is_valid else '❌ ИСТЕК'}")
+        logger.info(f"[AUTH] Результат проверки: {'✅ ВАЛИДЕН' if is_valid else '❌ ИСТЕК'}")
         return is_valid
 
-    print(f"[AUTH] ❌ Не удалось извлечь timestamp из токена")
-    print(f"[AUTH] ❌ Токен невалиден")
+    logger.warning(f"[AUTH] ❌ Не удалось извлечь timestamp из токена, токен невалиден")
     return False
 
 def get_or_create_login_token(telegram_id: int) -> Optional[str]:
@@ -465,20 +583,18 @@ def cleanup_expired_tokens():
 
             conn.commit()
             cursor.close()
-            print("Истекшие токены очищены")
+            logger.info("Истекшие токены очищены")
 
     except Exception as e:
-        print(f"Ошибка очистки токенов: {e}")
+        logger.error(f"Ошибка очистки токенов: {e}")
 
 # Функции для работы с ролями
 def get_user_role(telegram_id: int) -> Optional[str]:
     """Получить роль пользователя"""
-    from . import db
-    auth_manager = AuthManager(db)
-    return auth_manager.get_user_role(telegram_id)
+    from . import get_auth_manager
+    return get_auth_manager().get_user_role(telegram_id)
 
 def set_user_role(telegram_id: int, role: str) -> bool:
     """Установить роль пользователя"""
-    from . import db
-    auth_manager = AuthManager(db)
-    return auth_manager.set_user_role(telegram_id, role)
+    from . import get_auth_manager
+    return get_auth_manager().set_user_role(telegram_id, role)
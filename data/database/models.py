@@ -15,6 +15,12 @@ from typing import List, Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# Инвалидация общего кеша админки при записи (shared/query_cache.py)
+try:
+    from shared.query_cache import invalidating_connection_class
+except ImportError:
+    invalidating_connection_class = None
+
 def get_kuzbass_time():
     """Получить текущее время в часовом поясе Кемерово (GMT+7)"""
     try:
@@ -68,7 +74,14 @@ class GrantServiceDatabase:
             raise
 
     def connect(self):
-        """Создание соединения с PostgreSQL"""
+        """
+        Создание соединения с PostgreSQL
+
+        После commit таблицы, в которые писало соединение, инвалидируются
+        в общем кеше админки (ADMIN_QUERY_CACHE=off - обычное соединение)
+        """
+        if invalidating_connection_class is not None and os.getenv('ADMIN_QUERY_CACHE', 'sqlite').lower() != 'off':
+            return psycopg2.connect(**self.connection_params, connection_factory=invalidating_connection_class())
         return psycopg2.connect(**self.connection_params)
 
     def init_database(self):
@@ -703,22 +716,68 @@ class GrantServiceDatabase:
 
     def _get_next_anketa_number(self, user_identifier: str, date_str: str) -> int:
         """Получить следующий номер анкеты для пользователя за день"""
+        prefix = f"#AN-{date_str}-{user_identifier}-"
+        try:
+            return self._allocate_id_numbers(
+                prefix,
+                legacy_count_sql="SELECT COUNT(*) FROM sessions WHERE anketa_id LIKE %s",
+                legacy_params=(f"{prefix}%",)
+            )
+        except Exception as e:
+            logger.error(f"Error getting next anketa number: {e}")
+            return 1
+
+    def _allocate_id_numbers(
+        self,
+        scope: str,
+        count: int = 1,
+        legacy_count_sql: Optional[str] = None,
+        legacy_params: tuple = ()
+    ) -> int:
+        """
+        Атомарно выделить count номеров в пространстве scope (id_counters)
+
+        Один INSERT ... ON CONFLICT DO UPDATE ... RETURNING: без сканирования
+        таблицы и без дублей при конкурентных вызовах.
+
+        Args:
+            scope: Префикс ID ('#AN-20251102-ivan_petrov-', '<anketa_id>-AU-', ...)
+            count: Сколько номеров выделить подряд
+            legacy_count_sql: COUNT запрос на случай, если миграция 016 не применена
+            legacy_params: Параметры legacy_count_sql
+
+        Returns:
+            int: Первый номер выделенного диапазона
+        """
         try:
             with self.connect() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute("""
-                    SELECT COUNT(*) FROM sessions
-                    WHERE anketa_id LIKE %s
-                """, (f"#AN-{date_str}-{user_identifier}-%",))
-
-                count = cursor.fetchone()[0]
+                    INSERT INTO id_counters (scope, last_value)
+                    VALUES (%s, %s)
+                    ON CONFLICT (scope) DO UPDATE
+                    SET last_value = id_counters.last_value + EXCLUDED.last_value,
+                        updated_at = CURRENT_TIMESTAMP
+                    RETURNING last_value
+                """, (scope, count))
+
+                last_value = cursor.fetchone()[0]
+                conn.commit()
                 cursor.close()
 
-                return count + 1
-        except Exception as e:
-            logger.error(f"Error getting next anketa number: {e}")
-            return 1
+                return last_value - count + 1
+
+        except psycopg2.errors.UndefinedTable:
+            if not legacy_count_sql:
+                raise
+            logger.warning("Таблица id_counters не найдена (миграция 016), нумерация через COUNT")
+            with self.connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute(legacy_count_sql, legacy_params)
+                existing = cursor.fetchone()[0] or 0
+                cursor.close()
+                return existing + 1
 
     def save_anketa(self, anketa_data: Dict[str, Any]) -> str:
         """Сохранить анкету и вернуть anketa_id"""
@@ -785,6 +844,80 @@ class GrantServiceDatabase:
             logger.error(f"Ошибка сохранения анкеты: {e}")
             return None
 
+    def bulk_save_anketas(self, user_data: Dict[str, Any], anketas: List[Dict[str, Any]]) -> List[str]:
+        """
+        Массово сохранить анкеты одной транзакцией (синтетический корпус)
+
+        Вместо create_session + save_anketa на каждую анкету:
+        один INSERT sessions и один INSERT grant_applications через execute_values.
+
+        Args:
+            user_data: {'telegram_id': ..., 'username': ..., ...}
+            anketas: Список interview_data (dict) для сохранения
+
+        Returns:
+            List[str]: anketa_id в порядке anketas (пустой список при ошибке)
+        """
+        if not anketas:
+            return []
+
+        telegram_id = user_data.get('telegram_id')
+        date_str = datetime.now().strftime("%Y%m%d")
+        user_identifier = self._get_user_identifier(user_data)
+        prefix = f"#AN-{date_str}-{user_identifier}-"
+
+        try:
+            # Диапазон номеров выделяется одним атомарным запросом к id_counters
+            start_number = self._allocate_id_numbers(
+                prefix,
+                count=len(anketas),
+                legacy_count_sql="SELECT COUNT(*) FROM sessions WHERE anketa_id LIKE %s",
+                legacy_params=(f"{prefix}%",)
+            )
+            anketa_ids = [f"{prefix}{start_number + i:03d}" for i in range(len(anketas))]
+
+            with self.connect() as conn:
+                cursor = conn.cursor()
+
+                now = datetime.now()
+
+                session_rows = psycopg2.extras.execute_values(cursor, """
+                    INSERT INTO sessions
+                        (telegram_id, status, current_step, anketa_id, interview_data, started_at, completed_at)
+                    VALUES %s
+                    RETURNING id, anketa_id
+                """, [
+                    (telegram_id, 'completed', 'completed', anketa_id, Json(anketa), now, now)
+                    for anketa_id, anketa in zip(anketa_ids, anketas)
+                ], page_size=500, fetch=True)
+                session_ids = {row[1]: row[0] for row in session_rows}
+
+                cursor.execute("SELECT id FROM users WHERE telegram_id = %s", (telegram_id,))
+                user_row = cursor.fetchone()
+
+                if user_row:
+                    psycopg2.extras.execute_values(cursor, """
+                        INSERT INTO grant_applications
+                            (user_id, session_id, application_number, title, content_json, status, created_at)
+                        VALUES %s
+                    """, [
+                        (user_row[0], session_ids[anketa_id], anketa_id,
+                         anketa.get('project_name', 'Новый проект'), Json(anketa), 'draft', now)
+                        for anketa_id, anketa in zip(anketa_ids, anketas)
+                    ], page_size=500)
+                else:
+                    logger.warning(f"Пользователь с telegram_id {telegram_id} не найден при создании grant_applications")
+
+                conn.commit()
+                cursor.close()
+
+                logger.info(f"Массово сохранено анкет: {len(anketa_ids)} ({anketa_ids[0]} .. {anketa_ids[-1]})")
+                return anketa_ids
+
+        except Exception as e:
+            logger.error(f"Ошибка массового сохранения анкет: {e}")
+            return []
+
     def get_session_by_anketa_id(self, anketa_id: str) -> Optional[Dict[str, Any]]:
         """Получить сессию по ID анкеты"""
         try:
@@ -852,24 +985,21 @@ class GrantServiceDatabase:
         from datetime import datetime
 
         try:
-            with self.connect() as conn:
-                cursor = conn.cursor()
-
-                # Count existing audits for this anketa
-                # Используем JOIN чтобы связать auditor_results с sessions по session_id
-                cursor.execute("""
+            # Next number for this anketa from id_counters (atomic, no COUNT scan)
+            number = self._allocate_id_numbers(
+                f"{anketa_id}-AU-",
+                legacy_count_sql="""
                     SELECT COUNT(*)
                     FROM auditor_results ar
                     JOIN sessions s ON ar.session_id = s.id
                     WHERE s.anketa_id = %s
-                """, (anketa_id,))
-
-                count = cursor.fetchone()[0] or 0
-                cursor.close()
+                """,
+                legacy_params=(anketa_id,)
+            )
 
-                # Generate ID: anketa_id-AU-NNN
-                audit_id = f"{anketa_id}-AU-{count + 1:03d}"
-                return audit_id
+            # Generate ID: anketa_id-AU-NNN
+            audit_id = f"{anketa_id}-AU-{number:03d}"
+            return audit_id
 
         except Exception as e:
             logger.error(f"Ошибка генерации audit_id: {e}")
@@ -887,21 +1017,16 @@ class GrantServiceDatabase:
         from datetime import datetime
 
         try:
-            with self.connect() as conn:
-                cursor = conn.cursor()
+            # Next number for this anketa from id_counters (atomic, no COUNT scan)
+            number = self._allocate_id_numbers(
+                f"{anketa_id}-RS-",
+                legacy_count_sql="SELECT COUNT(*) FROM researcher_research WHERE anketa_id = %s",
+                legacy_params=(anketa_id,)
+            )
 
-                # Count existing research for this anketa
-                cursor.execute("""
-                    SELECT COUNT(*) FROM researcher_research
-                    WHERE anketa_id = %s
-                """, (anketa_id,))
-
-                count = cursor.fetchone()[0] or 0
-                cursor.close()
-
-                # Generate ID: anketa_id-RS-NNN
-                research_id = f"{anketa_id}-RS-{count + 1:03d}"
-                return research_id
+            # Generate ID: anketa_id-RS-NNN
+            research_id = f"{anketa_id}-RS-{number:03d}"
+            return research_id
 
         except Exception as e:
             logger.error(f"Ошибка генерации research_id: {e}")
@@ -919,21 +1044,16 @@ class GrantServiceDatabase:
         from datetime import datetime
 
         try:
-            with self.connect() as conn:
-                cursor = conn.cursor()
-
-                # Count existing grants for this anketa
-                cursor.execute("""
-                    SELECT COUNT(*) FROM grants
-                    WHERE anketa_id = %s
-                """, (anketa_id,))
+            # Next number for this anketa from id_counters (atomic, no COUNT scan)
+            number = self._allocate_id_numbers(
+                f"{anketa_id}-GR-",
+                legacy_count_sql="SELECT COUNT(*) FROM grants WHERE anketa_id = %s",
+                legacy_params=(anketa_id,)
+            )
 
-                count = cursor.fetchone()[0] or 0
-                cursor.close()
-
-                # Generate ID: anketa_id-GR-NNN
-                grant_id = f"{anketa_id}-GR-{count + 1:03d}"
-                return grant_id
+            # Generate ID: anketa_id-GR-NNN
+            grant_id = f"{anketa_id}-GR-{number:03d}"
+            return grant_id
 
         except Exception as e:
             logger.error(f"Ошибка генерации grant_id: {e}")
@@ -954,21 +1074,16 @@ class GrantServiceDatabase:
         from datetime import datetime
 
         try:
-            with self.connect() as conn:
-                cursor = conn.cursor()
+            # Next number for this anketa from id_counters (atomic, no COUNT scan)
+            number = self._allocate_id_numbers(
+                f"{anketa_id}-RV-",
+                legacy_count_sql="SELECT COUNT(*) FROM grant_reviews WHERE anketa_id = %s",
+                legacy_params=(anketa_id,)
+            )
 
-                # Count existing reviews for this anketa
-                cursor.execute("""
-                    SELECT COUNT(*) FROM grant_reviews
-                    WHERE anketa_id = %s
-                """, (anketa_id,))
-
-                count = cursor.fetchone()[0] or 0
-                cursor.close()
-
-                # Generate ID: anketa_id-RV-NNN
-                review_id = f"{anketa_id}-RV-{count + 1:03d}"
-                return review_id
+            # Generate ID: anketa_id-RV-NNN
+            review_id = f"{anketa_id}-RV-{number:03d}"
+            return review_id
 
         except Exception as e:
             logger.error(f"Ошибка генерации review_id: {e}")
@@ -1477,6 +1592,130 @@ class GrantServiceDatabase:
             logger.error(f"Ошибка обновления аудита анкеты {anketa_id}: {e}")
             return False
 
+    def get_unaudited_anketas(
+        self,
+        telegram_id: int,
+        limit: int = 10,
+        anketa_ids: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Рабочий набор для batch аудита одним запросом
+
+        Анкеты пользователя без записи в auditor_results (сначала синтетические),
+        сразу с interview_data - без отдельного запроса сессии на каждую анкету.
+
+        Args:
+            telegram_id: Telegram ID пользователя
+            limit: Максимальное количество анкет
+            anketa_ids: Ограничить набор этими анкетами (продолжение по checkpoint)
+
+        Returns:
+            List[Dict]: [{'anketa_id', 'session_id', 'interview_data'}, ...]
+        """
+        try:
+            with self.connect() as conn:
+                cursor = conn.cursor()
+
+                cursor.execute("""
+                    SELECT
+                        s.anketa_id,
+                        s.id AS session_id,
+                        s.interview_data
+                    FROM sessions s
+                    WHERE s.telegram_id = %s
+                        AND s.anketa_id IS NOT NULL
+                        AND s.status = 'completed'
+                        AND (%s::text[] IS NULL OR s.anketa_id = ANY(%s::text[]))
+                        AND NOT EXISTS (
+                            SELECT 1 FROM auditor_results ar WHERE ar.session_id = s.id
+                        )
+                    ORDER BY
+                        COALESCE(s.interview_data->>'synthetic', 'false') = 'true' DESC,
+                        s.completed_at DESC
+                    LIMIT %s
+                """, (telegram_id, anketa_ids, anketa_ids, limit))
+
+                rows = cursor.fetchall()
+                result = self._dict_rows(cursor, rows)
+                cursor.close()
+
+                return result
+
+        except Exception as e:
+            logger.error(f"Ошибка получения анкет для аудита пользователя {telegram_id}: {e}")
+            return []
+
+    def bulk_save_audit_results(self, results: List[Dict[str, Any]], llm_provider: str = 'gigachat') -> int:
+        """
+        Массово записать результаты аудита одной транзакцией
+
+        Существующие записи auditor_results обновляются, для остальных сессий
+        создаются новые (UPDATE ... FROM VALUES + INSERT ... WHERE NOT EXISTS).
+
+        Args:
+            results: [{'session_id', 'score', 'status', 'recommendations'}, ...]
+            llm_provider: Провайдер, выполнивший аудит
+
+        Returns:
+            int: Количество записанных результатов (0 при ошибке)
+        """
+        if not results:
+            return 0
+
+        rows = [
+            (
+                r['session_id'],
+                float(r['score']),
+                min(10, max(1, int(r['score']))),
+                r['status'],
+                json.dumps(r.get('recommendations') or [], ensure_ascii=False),
+                llm_provider
+            )
+            for r in results
+        ]
+        values_alias = "v(session_id, average_score, int_score, approval_status, recommendations, provider)"
+
+        try:
+            with self.connect() as conn:
+                cursor = conn.cursor()
+
+                psycopg2.extras.execute_values(cursor, f"""
+                    UPDATE auditor_results ar
+                    SET average_score = v.average_score,
+                        approval_status = v.approval_status,
+                        recommendations = v.recommendations::jsonb,
+                        completeness_score = v.int_score,
+                        quality_score = v.int_score,
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM (VALUES %s) AS {values_alias}
+                    WHERE ar.session_id = v.session_id
+                """, rows, page_size=500)
+
+                psycopg2.extras.execute_values(cursor, f"""
+                    INSERT INTO auditor_results (
+                        session_id, average_score, approval_status, recommendations,
+                        completeness_score, clarity_score, feasibility_score,
+                        innovation_score, quality_score, auditor_llm_provider
+                    )
+                    SELECT
+                        v.session_id, v.average_score, v.approval_status, v.recommendations::jsonb,
+                        v.int_score, v.int_score, v.int_score, v.int_score, v.int_score, v.provider
+                    FROM (VALUES %s) AS {values_alias}
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM auditor_results ar WHERE ar.session_id = v.session_id
+                    )
+                """, rows, page_size=500)
+
+                conn.commit()
+                cursor.close()
+
+                logger.info(f"Массово записано результатов аудита: {len(rows)}")
+                return len(rows)
+
+        except Exception as e:
+            logger.error(f"Ошибка массовой записи результатов аудита: {e}")
+            return 0
+
     def get_audit_by_session_id(self, session_id: int) -> Optional[Dict]:
         """
         Получить результат аудита по session_id
@@ -189,39 +189,44 @@ def get_prompt_by_name(prompt_name: str, db_path: str = None) -> Optional[Dict]:
         }
     return None
 
+AGENT_PROMPTS_QUERY = """
+    SELECT p.id, p.name, p.description, p.prompt_template, p.variables, p.default_values,
+           c.name as category_name, c.agent_type, p.priority
+    FROM agent_prompts p
+    JOIN prompt_categories c ON p.category_id = c.id
+    WHERE p.is_active = TRUE
+"""
+
+def _agent_prompt_row(result) -> Dict:
+    return {
+        'id': result[0],
+        'name': result[1],
+        'description': result[2],
+        'prompt_template': result[3],
+        'variables': result[4] if result[4] else [],
+        'default_values': result[5] if result[5] else {},
+        'category_name': result[6],
+        'agent_type': result[7],
+        'priority': result[8]
+    }
+
 def get_prompts_by_agent(agent_type: str, db_path: str = None) -> List[Dict]:
     """Получить все промпты для конкретного агента"""
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    cursor.execute("""
-    SELECT p.id, p.name, p.description, p.prompt_template, p.variables, p.default_values,
-           c.name as category_name, c.agent_type, p.priority
-    FROM agent_prompts p
-    JOIN prompt_categories c ON p.category_id = c.id
-    WHERE c.agent_type = %s AND p.is_active = TRUE
-    ORDER BY p.priority DESC, p.name
-    """, (agent_type,))
+    cursor.execute(AGENT_PROMPTS_QUERY + " AND c.agent_type = %s ORDER BY p.priority DESC, p.name", (agent_type,))
 
     results = cursor.fetchall()
     cursor.close()
     conn.close()
 
-    prompts = []
-    for result in results:
-        prompts.append({
-            'id': result[0],
-            'name': result[1],
-            'description': result[2],
-            'prompt_template': result[3],
-            'variables': result[4] if result[4] else [],
-            'default_values': result[5] if result[5] else {},
-            'category_name': result[6],
-            'agent_type': result[7],
-            'priority': result[8]
-        })
+    return [_agent_prompt_row(result) for result in results]
 
-    return prompts
+def get_all_agent_prompts(cursor) -> List[Dict]:
+    """Все активные промпты всех агентов одним запросом (снимок shared/agent_config.py)"""
+    cursor.execute(AGENT_PROMPTS_QUERY + " ORDER BY c.agent_type, p.priority DESC, p.name")
+    return [_agent_prompt_row(result) for result in cursor.fetchall()]
 
 def get_prompts_by_category(category_name: str, db_path: str = None) -> List[Dict]:
     """Получить промпты по категории"""
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Отчетные (агрегирующие) запросы GrantService
+
+Set-based запросы для дашбордов: каждый отчет - один SQL запрос
+(GROUP BY по JSONB флагам, FILTER агрегаты, оконные функции)
+вместо цикла "по анкете/пользователю -> отдельный запрос".
+
+Индексы под эти запросы: database/migrations/015_add_reporting_indexes.sql
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from .models import GrantServiceDatabase
+
+logger = logging.getLogger(__name__)
+
+
+# Статистика корпуса анкет пользователя (/corpus_stats)
+# Последний аудит на сессию берется через LATERAL, чтобы повторные аудиты
+# не дублировали анкеты в счетчиках.
+CORPUS_STATS_SQL = """
+    WITH corpus AS (
+        SELECT
+            s.id,
+            COALESCE(s.interview_data->>'synthetic', 'false') = 'true' AS is_synthetic,
+            s.interview_data->>'quality_target' AS quality_target,
+            ar.average_score,
+            ar.approval_status
+        FROM sessions s
+        LEFT JOIN LATERAL (
+            SELECT a.average_score, a.approval_status
+            FROM auditor_results a
+            WHERE a.session_id = s.id
+            ORDER BY a.created_at DESC
+            LIMIT 1
+        ) ar ON TRUE
+        WHERE s.telegram_id = %s
+            AND s.anketa_id IS NOT NULL
+            AND s.status = 'completed'
+    )
+    SELECT
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE is_synthetic) AS synthetic,
+        COUNT(*) FILTER (WHERE NOT is_synthetic) AS real,
+        COUNT(*) FILTER (WHERE average_score > 0) AS audited,
+        COALESCE(AVG(average_score) FILTER (WHERE average_score > 0), 0) AS avg_score,
+        COUNT(*) FILTER (WHERE average_score > 0 AND approval_status = 'approved') AS approved,
+        COUNT(*) FILTER (WHERE average_score > 0 AND approval_status = 'needs_revision') AS needs_revision,
+        COUNT(*) FILTER (WHERE average_score > 0 AND approval_status = 'rejected') AS rejected,
+        (
+            SELECT COALESCE(jsonb_object_agg(q.quality_target, q.cnt), '{}'::jsonb)
+            FROM (
+                SELECT quality_target, COUNT(*) AS cnt
+                FROM corpus
+                WHERE is_synthetic AND quality_target IS NOT NULL
+                GROUP BY quality_target
+            ) q
+        ) AS synthetic_by_quality
+    FROM corpus
+"""
+
+
+# Прогресс всех активных пользователей по анкете.
+# Повторяет семантику user_progress.get_user_progress():
+# ответы собираются из interview_data/collected_data всех сессий, при
+# конфликте ключей побеждает более старая сессия, внутри сессии - collected_data
+# (порядок dict.update() в исходной реализации).
+ALL_USERS_PROGRESS_SQL = """
+    WITH active_questions AS (
+        SELECT question_number, question_text, field_name, question_type, hint_text
+        FROM interview_questions
+        WHERE is_active = TRUE
+    ),
+    total AS (
+        SELECT COUNT(*) AS n FROM active_questions
+    ),
+    user_sessions AS (
+        SELECT
+            s.telegram_id,
+            s.started_at,
+            s.status,
+            s.last_activity,
+            s.interview_data,
+            s.collected_data,
+            ROW_NUMBER() OVER (PARTITION BY s.telegram_id ORDER BY s.started_at DESC) AS recency
+        FROM sessions s
+        JOIN users u ON u.telegram_id = s.telegram_id AND u.is_active = TRUE
+    ),
+    answer_values AS (
+        SELECT
+            us.telegram_id,
+            kv.key,
+            kv.value,
+            ROW_NUMBER() OVER (
+                PARTITION BY us.telegram_id, kv.key
+                ORDER BY us.started_at ASC, src.priority DESC
+            ) AS pick
+        FROM user_sessions us
+        CROSS JOIN LATERAL (
+            VALUES (0, us.interview_data), (1, us.collected_data)
+        ) AS src(priority, data)
+        CROSS JOIN LATERAL jsonb_each(
+            CASE WHEN jsonb_typeof(src.data) = 'object' THEN src.data ELSE '{}'::jsonb END
+        ) AS kv
+    ),
+    answered AS (
+        SELECT telegram_id, key
+        FROM answer_values
+        WHERE pick = 1
+            AND value NOT IN ('null'::jsonb, 'false'::jsonb, '0'::jsonb,
+                              '""'::jsonb, '[]'::jsonb, '{}'::jsonb)
+            AND (jsonb_typeof(value) <> 'string' OR btrim(value #>> '{}') <> '')
+    ),
+    activity AS (
+        SELECT
+            telegram_id,
+            COUNT(*) AS sessions_count,
+            MAX(last_activity) AS last_activity,
+            MAX(status) FILTER (WHERE recency = 1) AS latest_status
+        FROM user_sessions
+        GROUP BY telegram_id
+    ),
+    progress AS (
+        SELECT
+            u.telegram_id,
+            u.username,
+            u.first_name,
+            u.last_name,
+            u.registration_date,
+            u.last_active,
+            a.last_activity,
+            a.latest_status,
+            COALESCE(a.sessions_count, 0) AS sessions_count,
+            total.n AS total_questions,
+            (SELECT COUNT(*) FROM answered x WHERE x.telegram_id = u.telegram_id) AS answered_questions,
+            CASE
+                WHEN a.sessions_count IS NULL THEN 1
+                ELSE COALESCE((
+                    SELECT q.question_number
+                    FROM active_questions q
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM answered x
+                        WHERE x.telegram_id = u.telegram_id AND x.key = q.field_name
+                    )
+                    ORDER BY q.question_number
+                    LIMIT 1
+                ), total.n)
+            END AS current_question
+        FROM users u
+        CROSS JOIN total
+        LEFT JOIN activity a ON a.telegram_id = u.telegram_id
+        WHERE u.is_active = TRUE
+    )
+    SELECT
+        p.*,
+        cq.question_text,
+        cq.field_name,
+        cq.question_type,
+        cq.hint_text
+    FROM progress p
+    LEFT JOIN active_questions cq ON cq.question_number = p.current_question
+    ORDER BY p.last_active DESC
+"""
+
+
+def _fetch_dicts(db: GrantServiceDatabase, query: str, params: tuple = ()) -> List[Dict]:
+    """Выполнить запрос и вернуть строки как словари"""
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        result = db._dict_rows(cursor, rows)
+        cursor.close()
+        return result
+
+
+def get_corpus_stats(telegram_id: int, db: Optional[GrantServiceDatabase] = None) -> Dict:
+    """
+    Статистика корпуса анкет пользователя одним запросом
+
+    Returns: {
+        'total': int, 'synthetic': int, 'real': int,
+        'audited': int, 'unaudited': int, 'avg_score': float,
+        'approved': int, 'needs_revision': int, 'rejected': int,
+        'synthetic_by_quality': {'low': int, 'medium': int, 'high': int}
+    }
+    """
+    db = db or GrantServiceDatabase()
+
+    rows = _fetch_dicts(db, CORPUS_STATS_SQL, (telegram_id,))
+    row = rows[0] if rows else {}
+
+    total = int(row.get('total') or 0)
+    audited = int(row.get('audited') or 0)
+
+    return {
+        'total': total,
+        'synthetic': int(row.get('synthetic') or 0),
+        'real': int(row.get('real') or 0),
+        'audited': audited,
+        'unaudited': total - audited,
+        'avg_score': float(row.get('avg_score') or 0),
+        'approved': int(row.get('approved') or 0),
+        'needs_revision': int(row.get('needs_revision') or 0),
+        'rejected': int(row.get('rejected') or 0),
+        'synthetic_by_quality': dict(row.get('synthetic_by_quality') or {})
+    }
+
+
+def _progress_status(answered: int, total: int) -> str:
+    """Статус прогресса (как в user_progress.get_user_progress)"""
+    if answered == 0:
+        return 'not_started'
+    if answered == total:
+        return 'completed'
+    return 'in_progress'
+
+
+def get_all_users_progress(db: Optional[GrantServiceDatabase] = None) -> List[Dict]:
+    """
+    Прогресс всех активных пользователей одним запросом
+
+    Формат результата совпадает с user_progress.get_all_users_progress():
+    [{telegram_id, username, first_name, last_name, registration_date,
+      last_activity, progress: {...}, current_question_info: {...}}, ...]
+    """
+    db = db or GrantServiceDatabase()
+
+    result = []
+    for row in _fetch_dicts(db, ALL_USERS_PROGRESS_SQL):
+        total = int(row['total_questions'] or 0)
+        answered = int(row['answered_questions'] or 0)
+        current_question = int(row['current_question'] or 1)
+
+        progress = {
+            'total_questions': total,
+            'answered_questions': answered,
+            'progress_percent': round(answered / total * 100, 1) if total > 0 else 0.0,
+            'current_question': current_question,
+            'status': _progress_status(answered, total)
+        }
+        if row['sessions_count']:
+            progress['latest_session_status'] = row['latest_status']
+
+        if row['question_text'] is not None:
+            current_question_info = {
+                'question_number': current_question,
+                'question_text': row['question_text'],
+                'field_name': row['field_name'],
+                'question_type': row['question_type'],
+                'hint_text': row['hint_text']
+            }
+        else:
+            current_question_info = {
+                'question_number': current_question,
+                'question_text': 'Анкета завершена',
+                'field_name': None,
+                'question_type': None,
+                'hint_text': None
+            }
+
+        result.append({
+            'telegram_id': row['telegram_id'],
+            'username': row['username'],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'registration_date': row['registration_date'],
+            'last_activity': row['last_activity'] or row['last_active'],
+            'progress': progress,
+            'current_question_info': current_question_info
+        })
+
+    logger.debug(f"[Reporting] Progress for {len(result)} users in one query")
+    return result
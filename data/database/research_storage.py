@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Research Storage - результаты исследования: горячая сводка + холодные raw payloads
+
+researcher_research.research_results раньше хранил все: сводку блоков и
+raw_results каждого из 27 запросов (полные ответы WebSearch). Writer,
+reviewer и admin читали весь JSONB ради summary, key_facts и sources.
+
+Теперь:
+    researcher_research.research_results  - сводка: блоки без raw_results
+                                            (summary, key_facts, sources, totals) + metadata
+    researcher_research_payloads          - raw_results блока, zlib(JSON), BYTEA
+                                            (Migration 022), читается только по запросу
+
+Чтение - через проекции: get_summary / get_block / get_sources отрезают
+raw_results в SQL, поэтому и старые записи (raw_results внутри JSONB)
+не передаются и не десериализуются целиком. compact_legacy() переносит
+raw_results старых записей в payloads.
+
+Usage:
+    from data.database.research_storage import ResearchStorage
+    storage = ResearchStorage(db)
+    storage.save_block(research_id, 'block1_problem', block_results)
+    summary = storage.get_summary(anketa_id=anketa_id)
+    raw = storage.get_raw(research_id, 'block1_problem')   # только когда нужны ответы целиком
+
+Author: Grant Service Architect
+Date: 2025-11-10
+Version: 1.0
+"""
+
+import json
+import logging
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Блоки ResearcherAgentV2 (27 запросов)
+RESEARCH_BLOCKS = ('block1_problem', 'block2_geography', 'block3_goals')
+
+# Ключи блока, которые уходят в холодное хранилище
+COLD_KEYS = ('raw_results',)
+
+CODEC = 'zlib'
+COMPRESS_LEVEL = 6
+
+# research_results без raw_results во всех блоках - для старых записей тоже
+SUMMARY_PROJECTION = """(
+    SELECT COALESCE(jsonb_object_agg(
+        block.key,
+        CASE WHEN jsonb_typeof(block.value) = 'object' THEN block.value - 'raw_results' ELSE block.value END
+    ), '{{}}'::jsonb)
+    FROM jsonb_each(COALESCE({column}, '{{}}'::jsonb)) AS block
+)"""
+
+
+def summary_projection(column: str = 'research_results') -> str:
+    """SQL выражение: сводка research_results без raw_results (для SELECT в других модулях)"""
+    return SUMMARY_PROJECTION.format(column=column)
+
+
+def split_block(block: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Блок -> (горячая часть, холодная часть или None)
+
+    В горячей части остается raw_queries - сколько ответов лежит в payload.
+    """
+    cold = {key: block[key] for key in COLD_KEYS if key in block}
+    if not cold:
+        return block, None
+    hot = {key: value for key, value in block.items() if key not in cold}
+    raw = cold.get('raw_results')
+    if isinstance(raw, list):
+        hot['raw_queries'] = len(raw)
+    return hot, cold
+
+
+def split_results(results: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """research_results -> (сводка, {block_name: холодная часть})"""
+    summary, payloads = {}, {}
+    for name, value in results.items():
+        if isinstance(value, dict):
+            value, cold = split_block(value)
+            if cold is not None:
+                payloads[name] = cold
+        summary[name] = value
+    return summary, payloads
+
+
+def _encode(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def pack_payload(payload: Any) -> bytes:
+    return zlib.compress(_encode(payload), COMPRESS_LEVEL)
+
+
+def unpack_payload(data: bytes, codec: str = CODEC) -> Any:
+    raw = bytes(data)
+    if codec == CODEC:
+        raw = zlib.decompress(raw)
+    return json.loads(raw.decode('utf-8'))
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value or {}
+
+
+class ResearchStorage:
+    """
+    Запись и чтение researcher_research через сводку и payloads
+
+    db - GrantServiceDatabase (или любой объект с connect() -> контекст соединения).
+    """
+
+    UPSERT_PAYLOAD = """
+        INSERT INTO researcher_research_payloads
+            (research_id, block_name, codec, payload, raw_size, stored_size)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (research_id, block_name) DO UPDATE SET
+            codec = EXCLUDED.codec,
+            payload = EXCLUDED.payload,
+            raw_size = EXCLUDED.raw_size,
+            stored_size = EXCLUDED.stored_size,
+            created_at = NOW()
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    # ---------------------------------------------------------------- запись
+
+    def _store_payload(self, cursor, research_id: str, block_name: str, cold: Dict[str, Any]) -> int:
+        raw = _encode(cold)
+        packed = zlib.compress(raw, COMPRESS_LEVEL)
+        cursor.execute(self.UPSERT_PAYLOAD, (research_id, block_name, CODEC, packed, len(raw), len(packed)))
+        return len(packed)
+
+    def save_block(self, research_id: str, block_name: str, block: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Сохранить блок сразу после выполнения
+
+        В сводке меняется только ключ блока (jsonb_set) - без чтения и
+        перезаписи всего research_results. Возвращает горячую часть блока.
+        """
+        hot, cold = split_block(block)
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            if cold is not None:
+                self._store_payload(cursor, research_id, block_name, cold)
+            cursor.execute(
+                """
+                UPDATE researcher_research
+                SET research_results = jsonb_set(COALESCE(research_results, '{}'::jsonb), %s::text[], %s::jsonb)
+                WHERE research_id = %s
+                """,
+                ([block_name], json.dumps(hot, ensure_ascii=False, default=str), research_id)
+            )
+            conn.commit()
+            cursor.close()
+        return hot
+
+    def save_results(
+        self,
+        research_id: str,
+        results: Dict[str, Any],
+        status: Optional[str] = None,
+        completed_at: Optional[datetime] = None,
+        stored_blocks: Iterable[str] = ()
+    ) -> Dict[str, Any]:
+        """
+        Сохранить результаты целиком: сводка в research_results, raw - в payloads
+
+        Args:
+            research_id: ID исследования
+            results: research_results (блоки могут содержать raw_results)
+            status: Новый статус (None - не менять)
+            completed_at: Время завершения (None - не менять)
+            stored_blocks: Блоки, чьи payloads уже сохранены через save_block
+
+        Returns:
+            Сводка, записанная в research_results
+        """
+        summary, payloads = split_results(results)
+        skip = set(stored_blocks)
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            for block_name, cold in payloads.items():
+                if block_name not in skip:
+                    self._store_payload(cursor, research_id, block_name, cold)
+            cursor.execute(
+                """
+                UPDATE researcher_research
+                SET research_results = %s::jsonb,
+                    status = COALESCE(%s, status),
+                    completed_at = COALESCE(%s, completed_at)
+                WHERE research_id = %s
+                """,
+                (json.dumps(summary, ensure_ascii=False, default=str), status, completed_at, research_id)
+            )
+            conn.commit()
+            cursor.close()
+        return summary
+
+    # ---------------------------------------------------------------- чтение
+
+    def _latest_filter(self, research_id: Optional[str], anketa_id: Optional[str],
+                       status: Optional[str]) -> Tuple[str, list]:
+        if research_id:
+            return "WHERE research_id = %s", [research_id]
+        if not anketa_id:
+            raise ValueError("research_id or anketa_id is required")
+        where, params = "WHERE anketa_id = %s", [anketa_id]
+        if status:
+            where += " AND status = %s"
+            params.append(status)
+        return where + " ORDER BY completed_at DESC NULLS LAST, created_at DESC LIMIT 1", params
+
+    def get_summary(self, research_id: Optional[str] = None, anketa_id: Optional[str] = None,
+                    status: Optional[str] = 'completed') -> Optional[Dict[str, Any]]:
+        """
+        Сводка исследования (блоки без raw_results + metadata)
+
+        По anketa_id - последнее исследование со статусом status.
+        """
+        where, params = self._latest_filter(research_id, anketa_id, status)
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {summary_projection()} FROM researcher_research {where}", params)
+            row = cursor.fetchone()
+            cursor.close()
+        if not row:
+            return None
+        return _as_dict(row[0] if isinstance(row, (tuple, list)) else next(iter(row.values())))
+
+    def get_block(self, research_id: str, block_name: str) -> Optional[Dict[str, Any]]:
+        """Горячая часть одного блока"""
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT (research_results -> %s) - 'raw_results' FROM researcher_research WHERE research_id = %s",
+                (block_name, research_id)
+            )
+            row = cursor.fetchone()
+            cursor.close()
+        if not row:
+            return None
+        value = row[0] if isinstance(row, (tuple, list)) else next(iter(row.values()))
+        return _as_dict(value) if value is not None else None
+
+    def get_sources(self, research_id: str) -> List[str]:
+        """Уникальные источники всех блоков (без загрузки сводки)"""
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT DISTINCT source
+                FROM researcher_research,
+                     jsonb_each(COALESCE(research_results, '{}'::jsonb)) AS block,
+                     jsonb_array_elements_text(
+                         CASE WHEN jsonb_typeof(block.value -> 'sources') = 'array'
+                              THEN block.value -> 'sources' ELSE '[]'::jsonb END
+                     ) AS source
+                WHERE research_id = %s
+                ORDER BY source
+                """,
+                (research_id,)
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+        return [row[0] if isinstance(row, (tuple, list)) else next(iter(row.values())) for row in rows]
+
+    def get_raw(self, research_id: str, block_name: str) -> List[Dict[str, Any]]:
+        """
+        raw_results блока - из payloads, для старых записей - из research_results
+        """
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT codec, payload FROM researcher_research_payloads WHERE research_id = %s AND block_name = %s",
+                (research_id, block_name)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute(
+                    "SELECT research_results -> %s -> 'raw_results' FROM researcher_research WHERE research_id = %s",
+                    (block_name, research_id)
+                )
+                legacy = cursor.fetchone()
+                cursor.close()
+                value = legacy[0] if legacy else None
+                return _as_dict(value) if isinstance(value, str) else (value or [])
+            cursor.close()
+        codec, payload = row if isinstance(row, (tuple, list)) else (row['codec'], row['payload'])
+        return unpack_payload(payload, codec).get('raw_results', [])
+
+    # ---------------------------------------------------------------- перенос
+
+    def compact_legacy(self, limit: int = 100) -> int:
+        """
+        Перенести raw_results старых записей в payloads
+
+        Returns:
+            Сколько записей перенесено (повторять, пока не вернет 0)
+        """
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT research_id, research_results
+                FROM researcher_research
+                WHERE research_results IS NOT NULL
+                  AND EXISTS (
+                      SELECT 1 FROM jsonb_each(research_results) AS block
+                      WHERE jsonb_typeof(block.value) = 'object' AND block.value ? 'raw_results'
+                  )
+                ORDER BY id
+                LIMIT %s
+                """,
+                (limit,)
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+
+        for row in rows:
+            research_id, results = (row if isinstance(row, (tuple, list))
+                                    else (row['research_id'], row['research_results']))
+            summary = self.save_results(research_id, _as_dict(results))
+            logger.info(f"Research {research_id}: raw_results перенесены в payloads "
+                        f"({len(json.dumps(summary, ensure_ascii=False, default=str)) // 1024} KB сводка)")
+        return len(rows)
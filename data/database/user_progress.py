@@ -8,6 +8,7 @@ import json
 import os
 from typing import Dict, List, Optional, Tuple
 from .models import GrantServiceDatabase
+from . import reporting
 
 def get_user_progress(telegram_id: int) -> Dict:
     """
@@ -211,51 +212,11 @@ def get_current_question_info(telegram_id: int) -> Dict:
 def get_all_users_progress() -> List[Dict]:
     """
     Получить прогресс всех пользователей
-    """
-    db = GrantServiceDatabase()
-
-    with db.connect() as conn:
-        cursor = conn.cursor()
-
-        # Получаем всех пользователей
-        cursor.execute("""
-            SELECT DISTINCT telegram_id, username, first_name, last_name,
-                   registration_date, last_active
-            FROM users
-            WHERE is_active = TRUE
-            ORDER BY last_active DESC
-        """)
-
-        users = cursor.fetchall()
 
-        result = []
-        for user in users:
-            telegram_id = user[0]
-            progress = get_user_progress(telegram_id)
-            current_question = get_current_question_info(telegram_id)
-
-            # Получаем последнюю активность
-            cursor.execute("""
-                SELECT MAX(last_activity)
-                FROM sessions
-                WHERE telegram_id = %s
-            """, (telegram_id,))
-
-            last_activity = cursor.fetchone()[0]
-
-            result.append({
-                'telegram_id': telegram_id,
-                'username': user[1],
-                'first_name': user[2],
-                'last_name': user[3],
-                'registration_date': user[4],
-                'last_activity': last_activity or user[5],
-                'progress': progress,
-                'current_question_info': current_question
-            })
-
-        cursor.close()
-        return result
+    Один агрегирующий запрос из reporting вместо
+    get_user_progress + get_current_question_info + MAX(last_activity) на пользователя
+    """
+    return reporting.get_all_users_progress(GrantServiceDatabase())
 
 def get_questions_with_answers(telegram_id: int) -> List[Dict]:
     """
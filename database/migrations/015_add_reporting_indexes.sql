@@ -0,0 +1,36 @@
+-- ============================================================
+-- MIGRATION 015: Indexes for reporting queries
+-- Date: 2025-11-02
+-- Description: Expression/partial indexes backing set-based dashboards
+--              in data/database/reporting.py (/corpus_stats, users progress)
+-- ============================================================
+
+-- /corpus_stats: completed anketas of a user
+CREATE INDEX IF NOT EXISTS idx_sessions_user_completed_anketas
+    ON sessions (telegram_id, completed_at DESC)
+    WHERE anketa_id IS NOT NULL AND status = 'completed';
+
+-- /corpus_stats: GROUP BY on JSONB flags (synthetic / quality_target)
+CREATE INDEX IF NOT EXISTS idx_sessions_synthetic_flag
+    ON sessions (telegram_id, (interview_data->>'synthetic'), (interview_data->>'quality_target'))
+    WHERE anketa_id IS NOT NULL;
+
+-- Latest audit per session (LATERAL ... ORDER BY created_at DESC LIMIT 1)
+CREATE INDEX IF NOT EXISTS idx_auditor_session_created
+    ON auditor_results (session_id, created_at DESC);
+
+-- Users progress: sessions per user ordered by recency (window functions)
+CREATE INDEX IF NOT EXISTS idx_sessions_user_started
+    ON sessions (telegram_id, started_at DESC);
+
+-- Users progress: active questions in order
+CREATE INDEX IF NOT EXISTS idx_interview_questions_active_number
+    ON interview_questions (question_number)
+    WHERE is_active = TRUE;
+
+-- Users progress: active users ordered by last activity
+CREATE INDEX IF NOT EXISTS idx_users_active_last_active
+    ON users (last_active DESC)
+    WHERE is_active = TRUE;
+
+COMMENT ON INDEX idx_sessions_synthetic_flag IS 'Reporting: synthetic vs real anketa counts per user';
@@ -0,0 +1,96 @@
+-- ============================================================
+-- MIGRATION 016: Atomic counters for human-readable IDs
+-- Date: 2025-11-02
+-- Description: Counter table for anketa/audit/research/grant/review IDs.
+--              GrantServiceDatabase._allocate_id_numbers() takes the next
+--              number with one INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+--              instead of COUNT(*) + insert (table scan, duplicates under races).
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS id_counters (
+    scope VARCHAR(200) PRIMARY KEY,          -- '#AN-20251102-ivan_petrov-', '<anketa_id>-AU-', ...
+    last_value INTEGER NOT NULL DEFAULT 0,   -- последний выданный номер
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE id_counters IS 'Last allocated number per ID scope (anketa per user/day, AU/RS/GR/RV per anketa)';
+
+-- ============================================================
+-- Backfill from existing data (idempotent: keeps the larger value)
+-- ============================================================
+
+-- Anketas: #AN-YYYYMMDD-user-NNN -> scope '#AN-YYYYMMDD-user-'
+INSERT INTO id_counters (scope, last_value)
+SELECT
+    regexp_replace(anketa_id, '[0-9]+$', '') AS scope,
+    GREATEST(COUNT(*), MAX(substring(anketa_id from '([0-9]+)$')::int))
+FROM sessions
+WHERE anketa_id ~ '^#AN-[0-9]{8}-.+-[0-9]+$'
+GROUP BY 1
+ON CONFLICT (scope) DO UPDATE
+SET last_value = GREATEST(id_counters.last_value, EXCLUDED.last_value),
+    updated_at = CURRENT_TIMESTAMP;
+
+-- Audits: <anketa_id>-AU-NNN (counted per anketa, as generate_audit_id did;
+-- audit IDs are not stored in auditor_results, so there is no suffix to read)
+INSERT INTO id_counters (scope, last_value)
+SELECT s.anketa_id || '-AU-', COUNT(*)
+FROM auditor_results ar
+JOIN sessions s ON ar.session_id = s.id
+WHERE s.anketa_id IS NOT NULL
+GROUP BY s.anketa_id
+ON CONFLICT (scope) DO UPDATE
+SET last_value = GREATEST(id_counters.last_value, EXCLUDED.last_value),
+    updated_at = CURRENT_TIMESTAMP;
+
+-- RS / GR / RV: the largest numeric suffix, as for anketas (rows may have been
+-- deleted, so COUNT(*) alone could re-issue an existing ID). Only NNN suffixes
+-- of up to 5 digits count: the HHMMSS fallback IDs are not sequence numbers.
+
+-- Research: <anketa_id>-RS-NNN
+INSERT INTO id_counters (scope, last_value)
+SELECT
+    anketa_id || '-RS-',
+    GREATEST(COUNT(*), COALESCE(MAX(
+        CASE WHEN left(research_id, length(anketa_id) + 4) = anketa_id || '-RS-'
+                  AND research_id ~ '-RS-[0-9]{1,5}$'
+             THEN substring(research_id from '([0-9]+)$')::int
+        END), 0))
+FROM researcher_research
+WHERE anketa_id IS NOT NULL
+GROUP BY anketa_id
+ON CONFLICT (scope) DO UPDATE
+SET last_value = GREATEST(id_counters.last_value, EXCLUDED.last_value),
+    updated_at = CURRENT_TIMESTAMP;
+
+-- Grants: <anketa_id>-GR-NNN
+INSERT INTO id_counters (scope, last_value)
+SELECT
+    anketa_id || '-GR-',
+    GREATEST(COUNT(*), COALESCE(MAX(
+        CASE WHEN left(grant_id, length(anketa_id) + 4) = anketa_id || '-GR-'
+                  AND grant_id ~ '-GR-[0-9]{1,5}$'
+             THEN substring(grant_id from '([0-9]+)$')::int
+        END), 0))
+FROM grants
+WHERE anketa_id IS NOT NULL
+GROUP BY anketa_id
+ON CONFLICT (scope) DO UPDATE
+SET last_value = GREATEST(id_counters.last_value, EXCLUDED.last_value),
+    updated_at = CURRENT_TIMESTAMP;
+
+-- Reviews: <anketa_id>-RV-NNN
+INSERT INTO id_counters (scope, last_value)
+SELECT
+    anketa_id || '-RV-',
+    GREATEST(COUNT(*), COALESCE(MAX(
+        CASE WHEN left(review_id, length(anketa_id) + 4) = anketa_id || '-RV-'
+                  AND review_id ~ '-RV-[0-9]{1,5}$'
+             THEN substring(review_id from '([0-9]+)$')::int
+        END), 0))
+FROM grant_reviews
+WHERE anketa_id IS NOT NULL
+GROUP BY anketa_id
+ON CONFLICT (scope) DO UPDATE
+SET last_value = GREATEST(id_counters.last_value, EXCLUDED.last_value),
+    updated_at = CURRENT_TIMESTAMP;
@@ -0,0 +1,28 @@
+-- ============================================================
+-- MIGRATION 017: Durable spool for webhook updates
+-- Date: 2025-11-02
+-- Description: Telegram updates accepted in webhook mode
+--              (shared/telegram_utils/webhook_intake.py). Pending rows are
+--              replayed on restart instead of being dropped.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS telegram_update_spool (
+    update_id BIGINT PRIMARY KEY,
+    payload JSONB,                                   -- NULL if marked done before the spool write
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    processed_at TIMESTAMP,
+    CHECK (status IN ('pending', 'done'))
+);
+
+-- Replay on startup: pending updates in order
+CREATE INDEX IF NOT EXISTS idx_update_spool_pending
+    ON telegram_update_spool (update_id)
+    WHERE status = 'pending';
+
+-- Purge of processed updates
+CREATE INDEX IF NOT EXISTS idx_update_spool_done_processed
+    ON telegram_update_spool (processed_at)
+    WHERE status = 'done';
+
+COMMENT ON TABLE telegram_update_spool IS 'Webhook intake spool: accepted Telegram updates until processed';
@@ -0,0 +1,113 @@
+-- ============================================================
+-- MIGRATION 018: Prompt versions and change notifications
+-- Date: 2025-11-04
+-- Description: DatabasePromptManager (web-admin/utils/prompt_manager.py)
+--              keeps prompts in memory and reloads only what changed.
+--              Writes to agent_prompts / ai_agent_settings send
+--              NOTIFY prompt_changes (delivered on commit).
+--              Every change of an agent's prompts bumps its version in
+--              agent_prompt_versions; the version is attached to agent results.
+-- ============================================================
+
+-- Глобальная последовательность: версии монотонны и не повторяются
+CREATE SEQUENCE IF NOT EXISTS agent_prompt_version_seq;
+
+ALTER TABLE agent_prompts
+    ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('agent_prompt_version_seq');
+
+-- Версия набора промптов агента (меняется при INSERT / UPDATE / DELETE любого его промпта)
+CREATE TABLE IF NOT EXISTS agent_prompt_versions (
+    agent_type VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO agent_prompt_versions (agent_type, version)
+SELECT agent_type, MAX(version)
+FROM agent_prompts
+WHERE agent_type IS NOT NULL
+GROUP BY agent_type
+ON CONFLICT (agent_type) DO NOTHING;
+
+-- ------------------------------------------------------------
+-- agent_prompts: новая версия строки перед записью
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION bump_agent_prompt_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.version = nextval('agent_prompt_version_seq');
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_bump_agent_prompt_version ON agent_prompts;
+CREATE TRIGGER trigger_bump_agent_prompt_version
+    BEFORE INSERT OR UPDATE ON agent_prompts
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_agent_prompt_version();
+
+-- ------------------------------------------------------------
+-- agent_prompts: версия агента + NOTIFY по каждому затронутому ключу
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION notify_agent_prompt_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    agent_version BIGINT;
+    rec RECORD;
+BEGIN
+    -- UPDATE может перенести промпт в другой ключ: уведомляем о старом и новом
+    FOR rec IN
+        SELECT OLD.agent_type AS agent_type, OLD.prompt_type AS prompt_type WHERE TG_OP IN ('UPDATE', 'DELETE')
+        UNION
+        SELECT NEW.agent_type, NEW.prompt_type WHERE TG_OP IN ('INSERT', 'UPDATE')
+    LOOP
+        CONTINUE WHEN rec.agent_type IS NULL;
+
+        agent_version := nextval('agent_prompt_version_seq');
+        INSERT INTO agent_prompt_versions (agent_type, version, updated_at)
+        VALUES (rec.agent_type, agent_version, CURRENT_TIMESTAMP)
+        ON CONFLICT (agent_type) DO UPDATE
+            SET version = EXCLUDED.version, updated_at = EXCLUDED.updated_at;
+
+        PERFORM pg_notify('prompt_changes', json_build_object(
+            'table', 'agent_prompts',
+            'op', TG_OP,
+            'agent_type', rec.agent_type,
+            'prompt_type', rec.prompt_type,
+            'version', agent_version
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notify_agent_prompt_change ON agent_prompts;
+CREATE TRIGGER trigger_notify_agent_prompt_change
+    AFTER INSERT OR UPDATE OR DELETE ON agent_prompts
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_agent_prompt_change();
+
+-- ------------------------------------------------------------
+-- ai_agent_settings: NOTIFY по агенту
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION notify_agent_settings_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('prompt_changes', json_build_object(
+        'table', 'ai_agent_settings',
+        'op', TG_OP,
+        'agent_name', COALESCE(NEW.agent_name, OLD.agent_name)
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notify_agent_settings_change ON ai_agent_settings;
+CREATE TRIGGER trigger_notify_agent_settings_change
+    AFTER INSERT OR UPDATE OR DELETE ON ai_agent_settings
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_agent_settings_change();
+
+COMMENT ON COLUMN agent_prompts.version IS 'Row version (agent_prompt_version_seq), bumped on every write';
+COMMENT ON TABLE agent_prompt_versions IS 'Prompt set version per agent_type, attached to agent results';
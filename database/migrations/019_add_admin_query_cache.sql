@@ -0,0 +1,26 @@
+-- ============================================================
+-- MIGRATION 019: Shared query cache for the admin (Postgres backend)
+-- Date: 2025-11-05
+-- Description: Backend ADMIN_QUERY_CACHE=postgres for shared/query_cache.py.
+--              UNLOGGED: no WAL writes, contents are lost on crash -
+--              acceptable for a cache. Tag = table name; entry is valid
+--              while tag versions match the ones stored with it.
+-- ============================================================
+
+CREATE UNLOGGED TABLE IF NOT EXISTS admin_query_cache (
+    key VARCHAR(64) PRIMARY KEY,                     -- sha256 of query + params
+    value BYTEA NOT NULL,                            -- pickled result
+    tag_versions JSONB NOT NULL,                     -- {table: version} at compute time
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_admin_query_cache_expires
+    ON admin_query_cache (expires_at);
+
+CREATE UNLOGGED TABLE IF NOT EXISTS admin_query_cache_tags (
+    tag VARCHAR(100) PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+
+COMMENT ON TABLE admin_query_cache IS 'Admin query result cache shared across Streamlit processes';
+COMMENT ON TABLE admin_query_cache_tags IS 'Tag (table) versions, bumped on committed writes';
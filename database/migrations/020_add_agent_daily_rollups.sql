@@ -0,0 +1,129 @@
+-- ============================================================
+-- MIGRATION 020: Daily rollups for agent analytics
+-- Date: 2025-11-06
+-- Description: Per day / agent / provider aggregates (calls, errors,
+--              tokens, cost, latency) for the admin charts
+--              (web-admin/utils/agent_analytics.py). A year of history is
+--              ~365 rows per agent/provider instead of a scan of the raw
+--              researcher_logs / researcher_research / grants tables.
+--              refresh_agent_daily_rollups() recomputes only recent days.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS agent_daily_rollups (
+    day DATE NOT NULL,
+    agent_type VARCHAR(50) NOT NULL,
+    provider VARCHAR(50) NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    tokens BIGINT NOT NULL DEFAULT 0,
+    cost DOUBLE PRECISION NOT NULL DEFAULT 0,
+    -- среднее = latency_sum / latency_count (у части записей нет времени)
+    latency_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    latency_count INTEGER NOT NULL DEFAULT 0,
+    latency_max DOUBLE PRECISION NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (day, agent_type, provider)
+);
+
+CREATE INDEX IF NOT EXISTS idx_agent_daily_rollups_agent_day ON agent_daily_rollups(agent_type, day);
+
+-- ------------------------------------------------------------
+-- Число из JSONB без ошибки приведения ('1.5', 1.5 -> 1.5; 'n/a' -> NULL)
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION jsonb_numeric(data JSONB, key TEXT)
+RETURNS DOUBLE PRECISION AS $$
+    SELECT CASE
+        WHEN data ->> key ~ '^\s*-?[0-9]+(\.[0-9]+)?\s*$' THEN (data ->> key)::DOUBLE PRECISION
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- ------------------------------------------------------------
+-- Пересчет дней >= p_from (по умолчанию: последний посчитанный день и
+-- предыдущий, пустая таблица - вся история). Возвращает число строк.
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION refresh_agent_daily_rollups(p_from DATE DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    from_day DATE;
+    inserted INTEGER;
+BEGIN
+    -- Одновременные пересчеты (кнопка "Пересчитать", ensure_fresh_rollups в
+    -- нескольких процессах админки) выполняются по очереди: иначе DELETE +
+    -- INSERT одного диапазона дают нарушение PK или двойной счет.
+    -- Блокировка держится до конца транзакции вызывающего.
+    PERFORM pg_advisory_xact_lock(hashtext('agent_daily_rollups'));
+
+    from_day := COALESCE(p_from, (SELECT MAX(day) - 1 FROM agent_daily_rollups), DATE '1970-01-01');
+
+    DELETE FROM agent_daily_rollups WHERE day >= from_day;
+
+    INSERT INTO agent_daily_rollups (day, agent_type, provider, calls, errors, tokens, cost,
+                                     latency_sum, latency_count, latency_max)
+    SELECT
+        day, agent_type, provider,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE is_error),
+        COALESCE(SUM(tokens), 0)::BIGINT,
+        COALESCE(SUM(cost), 0),
+        COALESCE(SUM(latency), 0),
+        COUNT(latency),
+        COALESCE(MAX(latency), 0)
+    FROM (
+        -- WebSearch запросы (Perplexity): стоимость и токены из usage_stats
+        SELECT created_at::DATE AS day, 'websearch' AS agent_type, 'perplexity' AS provider,
+               status <> 'success' AS is_error,
+               COALESCE(jsonb_numeric(usage_stats, 'total_tokens'),
+                        jsonb_numeric(usage_stats, 'input_tokens') + jsonb_numeric(usage_stats, 'output_tokens')) AS tokens,
+               cost::DOUBLE PRECISION AS cost,
+               NULL::DOUBLE PRECISION AS latency
+        FROM researcher_logs
+        WHERE created_at >= from_day
+
+        UNION ALL
+        SELECT created_at::DATE, 'researcher', COALESCE(llm_provider, 'unknown'),
+               status = 'error',
+               jsonb_numeric(research_results -> 'metadata', 'tokens_used'),
+               0,
+               COALESCE(jsonb_numeric(research_results -> 'metadata', 'total_processing_time'),
+                        EXTRACT(EPOCH FROM (completed_at - created_at)))
+        FROM researcher_research
+        WHERE created_at >= from_day
+
+        UNION ALL
+        SELECT created_at::DATE, 'writer', COALESCE(llm_provider, 'unknown'),
+               status = 'rejected',
+               jsonb_numeric(metadata, 'tokens_used'),
+               0,
+               jsonb_numeric(metadata, 'processing_time')
+        FROM grants
+        WHERE created_at >= from_day
+
+        UNION ALL
+        SELECT created_at::DATE, 'reviewer', COALESCE(llm_provider, 'unknown'),
+               FALSE,
+               tokens_used,
+               0,
+               processing_time::DOUBLE PRECISION
+        FROM grant_reviews
+        WHERE created_at >= from_day
+
+        UNION ALL
+        SELECT created_at::DATE, 'auditor', COALESCE(auditor_llm_provider, 'unknown'),
+               FALSE,
+               jsonb_numeric(metadata, 'tokens_used'),
+               0,
+               jsonb_numeric(metadata, 'processing_time')
+        FROM auditor_results
+        WHERE created_at >= from_day
+    ) raw
+    GROUP BY day, agent_type, provider;
+
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Начальное заполнение всей истории
+SELECT refresh_agent_daily_rollups(DATE '1970-01-01');
+
+COMMENT ON TABLE agent_daily_rollups IS 'Daily calls/errors/tokens/cost/latency per agent and provider (refresh_agent_daily_rollups)';
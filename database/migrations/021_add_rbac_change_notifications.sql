@@ -0,0 +1,63 @@
+-- ============================================================
+-- MIGRATION 021: RBAC change notifications
+-- Date: 2025-11-10
+-- Description: AuthManager (data/database/auth.py) answers role, permission
+--              and page access checks from an in-memory RBAC snapshot.
+--              Writes to users.role / users.permissions / page_permissions
+--              send NOTIFY rbac_changes (delivered on commit) so every
+--              process drops its snapshot, not only the one that wrote.
+-- ============================================================
+
+-- ------------------------------------------------------------
+-- users: только изменения роли и разрешений
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION notify_user_rbac_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Новые пользователи с ролью по умолчанию в снимок не попадают
+    -- (permissions - JSONB: сравнение только с jsonb-литералами, '' не приводится к jsonb)
+    IF TG_OP = 'INSERT' AND COALESCE(NEW.role, 'user') = 'user'
+       AND COALESCE(NEW.permissions, '[]'::jsonb) IN ('[]'::jsonb, 'null'::jsonb) THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND OLD.role IS NOT DISTINCT FROM NEW.role
+       AND OLD.permissions IS NOT DISTINCT FROM NEW.permissions THEN
+        RETURN NULL;
+    END IF;
+
+    PERFORM pg_notify('rbac_changes', json_build_object(
+        'table', 'users',
+        'op', TG_OP,
+        'telegram_id', COALESCE(NEW.telegram_id, OLD.telegram_id)
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notify_user_rbac_change ON users;
+CREATE TRIGGER trigger_notify_user_rbac_change
+    AFTER INSERT OR UPDATE OF role, permissions OR DELETE ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_user_rbac_change();
+
+-- ------------------------------------------------------------
+-- page_permissions: любое изменение правил страниц
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION notify_page_permissions_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('rbac_changes', json_build_object(
+        'table', 'page_permissions',
+        'op', TG_OP,
+        'page_name', COALESCE(NEW.page_name, OLD.page_name)
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notify_page_permissions_change ON page_permissions;
+CREATE TRIGGER trigger_notify_page_permissions_change
+    AFTER INSERT OR UPDATE OR DELETE ON page_permissions
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_page_permissions_change();
@@ -0,0 +1,34 @@
+-- ============================================================
+-- MIGRATION 022: Cold storage for research raw payloads
+-- Date: 2025-11-10
+-- Description: researcher_research.research_results keeps only the
+--              summary of each block (summary, key_facts, sources, totals)
+--              and metadata. raw_results of each block (full WebSearch
+--              answers) go to researcher_research_payloads as zlib(JSON)
+--              and are read only on demand
+--              (data/database/research_storage.py).
+--
+--              Existing rows keep raw_results inside research_results until
+--              compacted; readers project it away in SQL meanwhile:
+--                  python -c "from data.database import GrantServiceDatabase; \
+--                      from data.database.research_storage import ResearchStorage; \
+--                      s = ResearchStorage(GrantServiceDatabase()); \
+--                      [None for _ in iter(lambda: s.compact_legacy(100), 0)]"
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS researcher_research_payloads (
+    research_id VARCHAR(100) NOT NULL
+        REFERENCES researcher_research(research_id) ON DELETE CASCADE,
+    block_name VARCHAR(50) NOT NULL,                 -- block1_problem, block2_geography, ...
+    codec VARCHAR(10) NOT NULL DEFAULT 'zlib',
+    payload BYTEA NOT NULL,                          -- zlib(JSON {"raw_results": [...]})
+    raw_size INTEGER NOT NULL,                       -- bytes before compression
+    stored_size INTEGER NOT NULL,                    -- bytes after compression
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (research_id, block_name)
+);
+
+-- Уже сжато в приложении: без повторного сжатия TOAST
+ALTER TABLE researcher_research_payloads ALTER COLUMN payload SET STORAGE EXTERNAL;
+
+COMMENT ON TABLE researcher_research_payloads IS 'Compressed raw WebSearch results per research block, loaded on demand';
@@ -11,11 +11,17 @@ Expert Agent - центральный агент-эксперт по грант
 
 import psycopg2
 from typing import List, Dict, Any, Optional
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
-from sentence_transformers import SentenceTransformer
 import logging
 
+# qdrant_client и sentence_transformers (torch) импортируются при создании
+# ExpertAgent: writer/reviewer импортируют модуль при старте, но агент
+# создают только при генерации
+
+try:
+    from shared.vector_replica import replicated
+except ImportError:
+    replicated = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -61,8 +67,13 @@ class ExpertAgent:
         )
         logger.info(f"✅ PostgreSQL подключен ({postgres_host}:{postgres_port})")
 
-        # Подключение к Qdrant
+        from qdrant_client import QdrantClient
+        from sentence_transformers import SentenceTransformer
+
+        # Подключение к Qdrant (поиск по небольшим коллекциям - в локальной реплике)
         self.qdrant = QdrantClient(host=qdrant_host, port=qdrant_port)
+        if replicated:
+            self.qdrant = replicated(self.qdrant)
         logger.info(f"✅ Qdrant подключен ({qdrant_host}:{qdrant_port})")
 
         # Загрузка модели embeddings
@@ -135,6 +146,7 @@ class ExpertAgent:
         embedding = self.create_embedding(content)
 
         # 3. Добавить в Qdrant
+        from qdrant_client.models import PointStruct
         point = PointStruct(
             id=section_id,
             vector=embedding,
@@ -183,6 +195,7 @@ class ExpertAgent:
         question_embedding = self.create_embedding(question)
 
         # 2. Поиск в Qdrant
+        from qdrant_client.models import FieldCondition, Filter, MatchValue
         search_result = self.qdrant.search(
             collection_name=self.collection_name,
             query_vector=question_embedding,
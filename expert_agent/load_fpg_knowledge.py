@@ -1,5 +1,7 @@
 """
 Загрузка данных из UNIFIED_KNOWLEDGE_BASE.md в PostgreSQL + Qdrant
+
+Инкрементальная загрузка (только новые / измененные чанки): scripts/ingest_knowledge.py
 """
 
 import sys
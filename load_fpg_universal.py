@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 """
 Universal FPG knowledge base loader - handles both structured and unstructured sections
+
+For incremental re-ingestion (only new / changed chunks) use scripts/ingest_knowledge.py
 """
 import requests
 import json
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fake Telegram Sender: synthetic updates for the webhook intake
+
+Posts synthetic Telegram updates (text messages and button callbacks from
+N users) to the bot webhook at a configurable rate, like Telegram does:
+non-2xx responses are retried. Prints status counts and latency percentiles.
+
+Usage:
+    # bot: BOT_MODE=webhook WEBHOOK_PORT=8443 WEBHOOK_SECRET=test python telegram-bot/main.py
+    python scripts/fake_telegram_sender.py --rate 50 --count 1000 --users 20 --secret test
+    python scripts/fake_telegram_sender.py --url http://localhost:8443/telegram/webhook --rate 200
+
+    # without a bot: built-in intake with a slow handler (backpressure demo)
+    python scripts/fake_telegram_sender.py --self-test --rate 500 --count 2000 --handler-delay 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def make_update(update_id: int, user_id: int) -> Dict[str, Any]:
+    """Synthetic update: text message or callback button click"""
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}', 'username': f'user{user_id}'}
+    chat = {'id': user_id, 'type': 'private', 'first_name': f'User{user_id}'}
+    now = int(time.time())
+
+    if random.random() < 0.3:
+        return {
+            'update_id': update_id,
+            'callback_query': {
+                'id': str(update_id),
+                'from': user,
+                'chat_instance': str(user_id),
+                'data': 'main_menu',
+                'message': {'message_id': update_id, 'date': now, 'chat': chat, 'text': 'menu'}
+            }
+        }
+
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': now,
+            'chat': chat,
+            'from': user,
+            'text': random.choice(['Привет', 'Мой проект про молодежь', 'Бюджет 500000', '/progress'])
+        }
+    }
+
+
+async def deliver(
+    session: aiohttp.ClientSession,
+    url: str,
+    update: Dict[str, Any],
+    secret: Optional[str],
+    stats: Counter,
+    latencies: list,
+    max_retries: int
+):
+    """POST one update, retry on non-2xx like Telegram"""
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else {}
+    started = time.monotonic()
+
+    for attempt in range(max_retries + 1):
+        try:
+            async with session.post(url, json=update, headers=headers) as response:
+                stats[response.status] += 1
+                if response.status == 200:
+                    latencies.append(time.monotonic() - started)
+                    return
+                retry_after = float(response.headers.get('Retry-After', '1'))
+        except aiohttp.ClientError:
+            stats['connection_error'] += 1
+            retry_after = 1.0
+
+        if attempt < max_retries:
+            stats['retries'] += 1
+            await asyncio.sleep(retry_after)
+
+    stats['gave_up'] += 1
+
+
+async def send(url: str, rate: float, count: int, users: int, secret: Optional[str], max_retries: int) -> Dict[str, Any]:
+    stats: Counter = Counter()
+    latencies: list = []
+    interval = 1.0 / rate if rate > 0 else 0
+    first_update_id = random.randint(10_000_000, 90_000_000)
+
+    started = time.monotonic()
+    async with aiohttp.ClientSession() as session:
+        tasks = []
+        for i in range(count):
+            update = make_update(first_update_id + i, random.randint(1, users))
+            tasks.append(asyncio.create_task(
+                deliver(session, url, update, secret, stats, latencies, max_retries)
+            ))
+            if interval:
+                await asyncio.sleep(interval)
+        await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        'sent': count,
+        'elapsed_s': round(elapsed, 2),
+        'delivered_per_s': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'statuses': dict(stats),
+        'latency_p50_ms': round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        'latency_p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1) if latencies else None,
+    }
+
+
+async def self_test(args) -> Dict[str, Any]:
+    """Run an in-process WebhookIntake with a slow handler and send to it"""
+    from shared.telegram_utils.webhook_intake import WebhookIntake
+
+    async def slow_handler(payload):
+        await asyncio.sleep(args.handler_delay)
+
+    intake = WebhookIntake(
+        slow_handler,
+        queue_size=args.queue_size,
+        workers=args.workers,
+        secret_token=args.secret,
+        enqueue_timeout=0.2
+    )
+    await intake.start(host='127.0.0.1', port=args.port)
+    try:
+        result = await send(
+            f'http://127.0.0.1:{args.port}{intake.path}',
+            args.rate, args.count, args.users, args.secret, args.max_retries
+        )
+    finally:
+        await intake.stop()
+    result['intake'] = intake.stats
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Send synthetic Telegram updates to the bot webhook',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--url', default='http://localhost:8443/telegram/webhook', help='Webhook URL')
+    parser.add_argument('--rate', type=float, default=20, help='Updates per second (0 = as fast as possible)')
+    parser.add_argument('--count', type=int, default=200, help='Total updates to send')
+    parser.add_argument('--users', type=int, default=10, help='Number of distinct users/chats')
+    parser.add_argument('--secret', default=None, help='WEBHOOK_SECRET of the bot')
+    parser.add_argument('--max-retries', type=int, default=5, help='Retries on non-2xx (Telegram-like)')
+    parser.add_argument('--self-test', action='store_true', help='Start a local intake instead of using --url')
+    parser.add_argument('--port', type=int, default=18443, help='Port for --self-test')
+    parser.add_argument('--queue-size', type=int, default=100, help='Intake queue size for --self-test')
+    parser.add_argument('--workers', type=int, default=8, help='Intake workers for --self-test')
+    parser.add_argument('--handler-delay', type=float, default=0.05, help='Handler time per update for --self-test')
+    args = parser.parse_args()
+
+    if args.self_test:
+        result = asyncio.run(self_test(args))
+    else:
+        result = asyncio.run(send(args.url, args.rate, args.count, args.users, args.secret, args.max_retries))
+
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
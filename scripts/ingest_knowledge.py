@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental Knowledge Ingestion - загрузка базы знаний в Qdrant по хешам контента
+
+Один конвейер для всех коллекций базы знаний (см. shared/knowledge_ingestion.py):
+эмбеддятся только новые и измененные чанки, удаленные из источников чанки
+удаляются из Qdrant, коллекции не пересоздаются.
+
+Usage:
+    python scripts/ingest_knowledge.py --dry-run              # diff без записи
+    python scripts/ingest_knowledge.py                        # все коллекции
+    python scripts/ingest_knowledge.py --collection fpg_real_winners
+    python scripts/ingest_knowledge.py --collection test_engineer_kb --full
+
+Env:
+    QDRANT_HOST (default localhost), QDRANT_PORT (default 6333)
+    PG* / DATABASE_URL - для knowledge_sections (строки разделов ExpertAgent)
+
+Date: 2025-11-10
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shared.knowledge_ingestion import (
+    COLLECTIONS, DEFAULT_BATCH_SIZE, DEFAULT_MANIFEST_DIR, KnowledgeIngestion
+)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Incremental knowledge-base ingestion into Qdrant',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--collection', action='append', choices=sorted(COLLECTIONS),
+                        help='Collection to ingest (repeatable, default: all)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Show new / changed / orphaned chunks without embedding or writing')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignore the manifest and re-embed every chunk (points are overwritten, not recreated)')
+    parser.add_argument('--qdrant-host', default=os.getenv('QDRANT_HOST', 'localhost'))
+    parser.add_argument('--qdrant-port', type=int, default=int(os.getenv('QDRANT_PORT', '6333')))
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Texts per embeddings request (default: {DEFAULT_BATCH_SIZE})')
+    args = parser.parse_args()
+
+    try:
+        from qdrant_client import QdrantClient
+    except ImportError:
+        print("[ERROR] qdrant-client not installed. Run: pip install qdrant-client")
+        sys.exit(1)
+
+    qdrant = QdrantClient(host=args.qdrant_host, port=args.qdrant_port, timeout=30)
+    # манифест привязан к серверу: локальный и продовый Qdrant не путаются
+    manifest_dir = DEFAULT_MANIFEST_DIR / f"{args.qdrant_host}_{args.qdrant_port}"
+
+    failed = False
+    db = None
+    for name in args.collection or sorted(COLLECTIONS):
+        spec = COLLECTIONS[name]
+        # knowledge_sections: строки PostgreSQL пишутся вместе с точками (id точки = knowledge_sections.id)
+        if spec.postgres_sections and db is None and not args.dry_run:
+            from data.database.models import GrantServiceDatabase
+            db = GrantServiceDatabase()
+        ingestion = KnowledgeIngestion(spec, qdrant, manifest_dir, full=args.full, batch_size=args.batch_size, db=db)
+        try:
+            report = ingestion.run(dry_run=args.dry_run)
+        except Exception as e:
+            logger.error(f"❌ {name}: {e}", exc_info=True)
+            failed = True
+            continue
+        print(report.summary())
+        if args.dry_run:
+            details = report.details()
+            if details:
+                print(details)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
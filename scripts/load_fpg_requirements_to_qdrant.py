@@ -15,6 +15,8 @@ Usage:
     python scripts/load_fpg_requirements_to_qdrant.py
 
 Expected tokens: ~1M tokens (18 requirements × ~50K tokens avg)
+
+For incremental re-ingestion (only new / changed chunks) use scripts/ingest_knowledge.py
 """
 
 import json
@@ -14,6 +14,8 @@ Usage:
 
 Expected tokens: ~1.2M tokens
 Expected cost: ~0 руб (Sber500 bootcamp quota)
+
+For incremental re-ingestion (only new / changed chunks) use scripts/ingest_knowledge.py
 """
 
 import json
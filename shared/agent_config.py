@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agent Config - общий снимок конфигурации агентов (промпты + настройки)
+
+Раньше каждый BaseAgent при создании читал свои промпты из БД
+(get_prompts_by_agent), а агенты создаются на каждый запрос: AuditorAgent
+внутри каждого InteractiveInterviewerAgentV2, агенты на каждый элемент
+очереди в agent_processor.py. Теперь процесс загружает один неизменяемый
+снимок (все активные agent_prompts + ai_agent_settings) двумя запросами,
+и агенты только берут из него ссылку на свой раздел.
+
+- Версия: AgentConfigSnapshot.version растет на каждую перезагрузку;
+  агент запоминает снимок при создании и работает с ним до конца запроса
+- Обновление: NOTIFY prompt_changes (Migration 018) через listener
+  DatabasePromptManager; без listener - по TTL в фоне (AGENT_CONFIG_TTL)
+- БД недоступна: пустой снимок, повторная попытка после TTL
+  (а не ошибка на каждом создании агента)
+
+Usage:
+    from shared.agent_config import get_agent_config
+    config = get_agent_config()
+    prompts = config.prompts_for('auditor')
+    settings = config.settings_for('researcher')
+
+Author: Grant Service Architect
+Date: 2025-11-10
+Version: 1.0
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AGENT_CONFIG_TTL = int(os.getenv('AGENT_CONFIG_TTL', '300'))
+
+SETTINGS_QUERY = "SELECT agent_name, mode, provider, execution_mode, config FROM ai_agent_settings"
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+# loader() -> (prompts, settings): строки agent_prompts и ai_agent_settings
+Loader = Callable[[], Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]]
+
+
+@dataclass(frozen=True)
+class AgentConfigSnapshot:
+    """
+    Неизменяемый снимок: agent_type -> {name: prompt}, agent_name -> settings
+
+    Разделы - MappingProxyType: агенты делят их без копирования.
+    """
+    version: int = 0
+    loaded_at: float = 0.0
+    prompts: Mapping[str, Mapping[str, Dict[str, Any]]] = field(default_factory=lambda: _EMPTY)
+    settings: Mapping[str, Dict[str, Any]] = field(default_factory=lambda: _EMPTY)
+    ok: bool = True
+
+    @classmethod
+    def build(cls, version: int, prompts: List[Dict[str, Any]], settings: Dict[str, Dict[str, Any]],
+              ok: bool = True) -> 'AgentConfigSnapshot':
+        by_agent: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for prompt in prompts:
+            by_agent.setdefault(prompt['agent_type'], {})[prompt['name']] = prompt
+        return cls(
+            version=version,
+            loaded_at=time.monotonic(),
+            prompts=MappingProxyType({agent: MappingProxyType(named) for agent, named in by_agent.items()}),
+            settings=MappingProxyType(dict(settings)),
+            ok=ok
+        )
+
+    def prompts_for(self, agent_type: str) -> Mapping[str, Dict[str, Any]]:
+        """Промпты агента {name: prompt} (только чтение)"""
+        return self.prompts.get(agent_type, _EMPTY)
+
+    def settings_for(self, agent_name: str) -> Optional[Dict[str, Any]]:
+        """Настройки агента {'mode', 'provider', 'execution_mode', 'config'} или None"""
+        return self.settings.get(agent_name)
+
+
+def load_from_db() -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """agent_prompts + ai_agent_settings одним соединением"""
+    from data.database.prompts import get_all_agent_prompts, get_db_connection
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        prompts = get_all_agent_prompts(cursor)
+
+        cursor.execute(SETTINGS_QUERY)
+        settings = {}
+        for agent_name, mode, provider, execution_mode, config in cursor.fetchall():
+            if isinstance(config, str):
+                config = json.loads(config)
+            settings[agent_name] = {
+                'mode': mode,
+                'provider': provider,
+                'execution_mode': execution_mode or 'manual',
+                'config': config or {}
+            }
+        cursor.close()
+        return prompts, settings
+    finally:
+        conn.close()
+
+
+class AgentConfigStore:
+    """
+    Текущий снимок процесса и его перезагрузка
+
+    snapshot() - горячий путь без блокировок и запросов к БД, кроме
+    первой загрузки. Устаревший по TTL снимок обновляется в фоновом потоке,
+    до завершения отдается прежний.
+    """
+
+    def __init__(self, loader: Loader = load_from_db, ttl: float = AGENT_CONFIG_TTL,
+                 is_live: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            loader: Загрузка (prompts, settings) из БД
+            ttl: Время жизни снимка, если изменения не приходят по NOTIFY
+            is_live: True - listener подключен, TTL не нужен
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.is_live = is_live or (lambda: False)
+        self._snapshot: Optional[AgentConfigSnapshot] = None
+        self._lock = threading.Lock()
+        self._refreshing = threading.Event()
+        self.loads = 0
+
+    def snapshot(self) -> AgentConfigSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._load()
+                return self._snapshot
+
+        if (time.monotonic() - snapshot.loaded_at > self.ttl and not self.is_live()
+                and not self._refreshing.is_set()):
+            self._refreshing.set()
+            threading.Thread(target=self._background_reload, name='agent-config-refresh', daemon=True).start()
+        return snapshot
+
+    def reload(self, *_event) -> AgentConfigSnapshot:
+        """Перезагрузить снимок (callback изменений: аргументы события игнорируются)"""
+        with self._lock:
+            self._load()
+            return self._snapshot
+
+    def _background_reload(self):
+        try:
+            self.reload()
+        finally:
+            self._refreshing.clear()
+
+    def _load(self):
+        version = (self._snapshot.version if self._snapshot else 0) + 1
+        try:
+            prompts, settings = self.loader()
+            snapshot = AgentConfigSnapshot.build(version, prompts, settings)
+            logger.info(f"Agent config v{version}: {len(prompts)} prompts, "
+                        f"{len(snapshot.prompts)} agents, {len(settings)} settings")
+        except Exception as e:
+            # Прежний снимок лучше пустого; пустой - только если загрузок еще не было
+            if self._snapshot is not None:
+                logger.warning(f"Agent config reload failed, keeping v{self._snapshot.version}: {e}")
+                snapshot = AgentConfigSnapshot(self._snapshot.version, time.monotonic(),
+                                               self._snapshot.prompts, self._snapshot.settings,
+                                               self._snapshot.ok)
+            else:
+                logger.error(f"Agent config unavailable, agents start without DB prompts: {e}")
+                snapshot = AgentConfigSnapshot(version, time.monotonic(), ok=False)
+        self.loads += 1
+        self._snapshot = snapshot
+
+
+_store: Optional[AgentConfigStore] = None
+_store_guard = threading.Lock()
+
+
+def _subscribe_prompt_changes(store: AgentConfigStore):
+    """Перезагрузка по NOTIFY prompt_changes через listener DatabasePromptManager"""
+    if os.getenv('PROMPT_CACHE_LISTEN', '1').lower() in ('0', 'false', 'no'):
+        return
+    try:
+        from utils.prompt_manager import get_database_prompt_manager
+        manager = get_database_prompt_manager()
+    except Exception as e:
+        logger.info(f"Agent config: prompt_changes listener unavailable ({e}), TTL refresh only")
+        return
+    manager.subscribe(store.reload)
+    store.is_live = lambda: manager.listener_active
+
+
+def get_agent_config_store() -> AgentConfigStore:
+    """Общий AgentConfigStore процесса"""
+    global _store
+    if _store is None:
+        with _store_guard:
+            if _store is None:
+                store = AgentConfigStore()
+                _subscribe_prompt_changes(store)
+                _store = store
+    return _store
+
+
+def set_agent_config_store(store: Optional[AgentConfigStore]):
+    """Подменить общий store (тесты, бенчмарк)"""
+    global _store
+    _store = store
+
+
+def get_agent_config() -> AgentConfigSnapshot:
+    """Текущий снимок конфигурации агентов"""
+    return get_agent_config_store().snapshot()
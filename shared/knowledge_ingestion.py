@@ -0,0 +1,816 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Knowledge Ingestion - единый инкрементальный конвейер загрузки базы знаний в Qdrant
+
+Заменяет разрозненные загрузчики (expert_agent/load_fpg_knowledge.py,
+scripts/load_fpg_to_qdrant.py, scripts/load_fpg_requirements_to_qdrant.py,
+load_fpg_universal.py, tester/knowledge_base/embeddings_generator.py),
+каждый из которых заново разбирал и эмбеддил весь корпус, а часть -
+пересоздавала коллекцию.
+
+Конвейер:
+    источники (fpg_docs_2025/*.html, knowhow/*.md, JSON победителей и
+    требований ФПГ) -> чанки -> манифест хешей -> diff ->
+    эмбеддинги только новых / измененных чанков (батчами) ->
+    upsert измененных точек, обновление payload без эмбеддинга,
+    удаление сирот -> манифест
+
+Манифест (JSON на коллекцию): ключ чанка -> id точки, хеш текста, хеш
+payload, модель эмбеддингов точки. Ключ чанка - позиция (файл + раздел +
+номер части), поэтому правка абзаца перезаписывает ту же точку, а не
+плодит новую. Чанк, эмбеддинг которого сделан другой моделью, - изменен;
+модель хранится на каждой записи, поэтому чанки, не перевложенные из-за
+ошибки, остаются измененными до следующего запуска. Если коллекции в Qdrant нет, манифест
+игнорируется. Если коллекция есть, а манифеста нет (первый запуск после
+старых загрузчиков), манифест строится по точкам коллекции: точки
+конвейера узнаются по chunk_key в payload, точки старых загрузчиков
+удаляются после записи новых - коллекция не дублируется.
+
+Повторный запуск на неизмененном корпусе: разбор и хеширование (секунды),
+ноль вызовов эмбеддингов, ноль записей в Qdrant.
+
+knowledge_sections: ExpertAgent.query_knowledge достает разделы из
+PostgreSQL по id точки (WHERE ks.id = ANY(...)), поэтому для этой
+коллекции строка knowledge_sections пишется в том же шаге, а id точки -
+knowledge_sections.id (KnowledgeSectionStore, нужен db).
+
+Usage:
+    python scripts/ingest_knowledge.py --dry-run
+    python scripts/ingest_knowledge.py --collection knowledge_sections
+
+    ingestion = KnowledgeIngestion(COLLECTIONS['fpg_real_winners'], qdrant, manifest_dir)
+    report = ingestion.run(dry_run=True)
+    print(report.summary())
+
+Author: Grant Service Architect
+Date: 2025-11-10
+Version: 1.0
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent.parent
+FPG_DOCS_DIR = ROOT_DIR / 'fpg_docs_2025'
+KNOWHOW_DIR = ROOT_DIR / 'knowhow'
+DATASET_DIR = ROOT_DIR / 'iterations' / 'Iteration_51_AI_Enhancement'
+DEFAULT_MANIFEST_DIR = ROOT_DIR / 'data' / 'cache' / 'kb_manifest'
+
+FPG_ARTICLE_URL = 'https://поддержка.президентскиегранты.рф/Article/?id={}'
+DEFAULT_CHUNK_CHARS = 1500
+DEFAULT_BATCH_SIZE = 16
+UPSERT_BATCH = 64
+POINT_NAMESPACE = uuid.UUID('6f1c7a52-3a64-4e0c-9a43-2f7e4f8d9b10')
+# Служебные поля payload: по ним манифест восстанавливается из коллекции
+INGEST_PAYLOAD_KEYS = ('chunk_key', 'chunk_text_hash', 'chunk_embedder', 'section_id')
+# Ключ манифеста для точек старых загрузчиков (без chunk_key) - всегда сироты
+LEGACY_KEY_PREFIX = 'legacy:'
+
+_HEADING_RE = re.compile(r'^(#{1,3})\s+(.+?)\s*#*$')
+_ARTICLE_ID_RE = re.compile(r'art(\d+)_')
+
+
+# ============================================================================
+# Чанки
+# ============================================================================
+
+@dataclass
+class Chunk:
+    """Фрагмент источника: текст для эмбеддинга + payload точки Qdrant"""
+    key: str
+    text: str
+    payload: Dict[str, Any]
+
+    @property
+    def text_hash(self) -> str:
+        return _sha256(self.text)
+
+    @property
+    def payload_hash(self) -> str:
+        return payload_hash(self.payload)
+
+
+def _sha256(data: str) -> str:
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    """Хеш payload чанка (служебные поля точки не учитываются)"""
+    payload = {key: value for key, value in payload.items() if key not in INGEST_PAYLOAD_KEYS}
+    return _sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str))
+
+
+def point_id(collection: str, key: str) -> str:
+    """Стабильный id точки (UUID) по коллекции и ключу чанка"""
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{collection}/{key}"))
+
+
+def pack_paragraphs(paragraphs: Iterable[str], max_chars: int = DEFAULT_CHUNK_CHARS) -> List[str]:
+    """
+    Склеить абзацы в части не длиннее max_chars (абзац длиннее лимита -
+    отдельная часть, режется по предложениям)
+    """
+    parts, current = [], ''
+    for paragraph in paragraphs:
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        pieces = [paragraph] if len(paragraph) <= max_chars else _split_long(paragraph, max_chars)
+        for piece in pieces:
+            if current and len(current) + 2 + len(piece) > max_chars:
+                parts.append(current)
+                current = piece
+            else:
+                current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    pieces, current = [], ''
+    for sentence in re.split(r'(?<=[.!?…])\s+', text):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_sections(blocks: Iterable[tuple]) -> List[tuple]:
+    """[(heading|None, text), ...] -> [(heading, [абзацы]), ...]"""
+    sections = [(None, [])]
+    for kind, text in blocks:
+        if kind == 'heading':
+            sections.append((text, []))
+        else:
+            sections[-1][1].append(text)
+    return [(heading, paragraphs) for heading, paragraphs in sections if paragraphs]
+
+
+# ============================================================================
+# Источники
+# ============================================================================
+
+class _ArticleParser(HTMLParser):
+    """Текст статьи ФПГ: абзацы / пункты / заголовки внутри div.content-article"""
+
+    BLOCK_TAGS = {'p', 'li', 'h2', 'h3', 'h4'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.blocks: List[tuple] = []
+        self._in_title = False
+        self._div_depth = 0
+        self._tag = None
+        self._text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title':
+            self._in_title = True
+        elif tag == 'div':
+            classes = (dict(attrs).get('class') or '').split()
+            if self._div_depth:
+                self._div_depth += 1
+            elif 'content-article' in classes or 'wrapper-content-article' in classes:
+                self._div_depth = 1
+        elif self._div_depth and tag in self.BLOCK_TAGS and self._tag is None:
+            self._tag = tag
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        elif tag == self._tag:
+            text = ' '.join(''.join(self._text).split())
+            if len(text) > 5:
+                kind = 'heading' if tag.startswith('h') else 'text'
+                self.blocks.append((kind, f"- {text}" if tag == 'li' else text))
+            self._tag = None
+        elif tag == 'div' and self._div_depth:
+            self._div_depth -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        if self._tag:
+            self._text.append(data)
+
+
+def _fpg_article_meta(docs_dir: Path) -> Dict[str, Dict[str, str]]:
+    """filename -> title / url / category из knowledge_metadata.json (extract_knowledge.py)"""
+    path = docs_dir / 'knowledge_metadata.json'
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text(encoding='utf-8'))
+    return {
+        entry['filename']: {'title': entry['title'], 'url': entry['url'], 'category': category}
+        for category, entries in data.get('categories', {}).items()
+        for entry in entries
+    }
+
+
+def load_fpg_articles(docs_dir: Path = FPG_DOCS_DIR, max_chars: int = DEFAULT_CHUNK_CHARS) -> List[Chunk]:
+    """Статьи поддержки ФПГ (fpg_docs_2025/*.html) -> чанки по разделам статьи"""
+    meta = _fpg_article_meta(docs_dir)
+    chunks = []
+    for path in sorted(docs_dir.glob('*.html')):
+        parser = _ArticleParser()
+        parser.feed(path.read_text(encoding='utf-8', errors='replace'))
+        info = meta.get(path.name, {})
+        article_id = _ARTICLE_ID_RE.match(path.name)
+        title = info.get('title') or ' '.join(parser.title.split()) or path.stem
+        url = info.get('url') or (FPG_ARTICLE_URL.format(article_id.group(1)) if article_id else '')
+
+        for section_index, (heading, paragraphs) in enumerate(split_sections(parser.blocks)):
+            for part_index, text in enumerate(pack_paragraphs(paragraphs, max_chars)):
+                section_name = f"{title}: {heading}" if heading else title
+                chunks.append(Chunk(
+                    key=f"{path.name}#{section_index}.{part_index}",
+                    text=f"{section_name}\n\n{text}",
+                    payload={
+                        'section_name': section_name,
+                        'content': text,
+                        'source_url': url,
+                        'source_file': path.name,
+                        'fund_name': 'fpg',
+                        'category': info.get('category', 'Общие'),
+                        'section_type': 'knowledge',
+                    }
+                ))
+    return chunks
+
+
+def load_markdown_docs(root: Path = KNOWHOW_DIR, max_chars: int = DEFAULT_CHUNK_CHARS) -> List[Chunk]:
+    """Markdown документы (knowhow/**/*.md) -> чанки по заголовкам # / ## / ###"""
+    chunks = []
+    for path in sorted(root.rglob('*.md')):
+        relative = path.relative_to(root).as_posix()
+        blocks, paragraph = [], []
+        for line in path.read_text(encoding='utf-8', errors='replace').splitlines():
+            heading = _HEADING_RE.match(line)
+            if heading or not line.strip():
+                if paragraph:
+                    blocks.append(('text', '\n'.join(paragraph)))
+                    paragraph = []
+                if heading:
+                    blocks.append(('heading', heading.group(2)))
+            else:
+                paragraph.append(line)
+        if paragraph:
+            blocks.append(('text', '\n'.join(paragraph)))
+
+        for section_index, (heading, paragraphs) in enumerate(split_sections(blocks)):
+            for part_index, text in enumerate(pack_paragraphs(paragraphs, max_chars)):
+                chunks.append(Chunk(
+                    key=f"{relative}#{section_index}.{part_index}",
+                    text=text,
+                    payload={'text': text, 'file': relative, 'heading': heading or ''}
+                ))
+    return chunks
+
+
+WINNER_SECTIONS = ('problem', 'solution', 'kpi', 'budget')
+
+
+def load_fpg_winners(path: Path = DATASET_DIR / 'fpg_real_winners_dataset.json') -> List[Chunk]:
+    """Победители ФПГ (JSON) -> 4 чанка на грант (problem / solution / kpi / budget)"""
+    chunks = []
+    for grant in json.loads(path.read_text(encoding='utf-8')):
+        grant_id = f"{grant.get('fund_name')}_{grant.get('year')}_{(grant.get('title') or '')[:30]}"
+        for section in WINNER_SECTIONS:
+            text = (grant.get(section) or '').strip()
+            if not text:
+                continue
+            chunks.append(Chunk(
+                key=f"{grant_id}#{section}",
+                text=text,
+                payload={
+                    'grant_id': grant_id,
+                    'section': section,
+                    'text': text,
+                    'title': grant.get('title'),
+                    'organization': grant.get('organization'),
+                    'fund_name': grant.get('fund_name'),
+                    'year': grant.get('year'),
+                    'region': grant.get('region'),
+                    'amount': grant.get('amount'),
+                    'category': grant.get('category'),
+                    'source_url': grant.get('source_url'),
+                    'scraped_at': grant.get('scraped_at'),
+                }
+            ))
+    return chunks
+
+
+def load_fpg_requirements(path: Path = DATASET_DIR / 'fpg_requirements_dataset.json') -> List[Chunk]:
+    """Требования / методологии / шаблоны бюджета ФПГ (JSON) -> чанк на требование"""
+    chunks = []
+    for index, requirement in enumerate(json.loads(path.read_text(encoding='utf-8'))):
+        content = requirement.get('content') or ''
+        payload = {
+            'requirement_type': requirement.get('requirement_type'),
+            'fund_name': requirement.get('fund_name'),
+            'category': requirement.get('category'),
+            'content': content,
+            'content_length': len(content),
+        }
+        criterion = requirement.get('criterion_data') or {}
+        methodology = requirement.get('methodology_data') or {}
+        budget = requirement.get('budget_data') or {}
+        if criterion:
+            payload.update(criterion_name=criterion.get('criterion_name'), weight=criterion.get('weight'))
+        elif methodology:
+            payload['methodology_name'] = methodology.get('methodology_name')
+        elif budget:
+            payload.update(budget_project_type=budget.get('project_type'), budget_total=budget.get('total_amount'))
+
+        # в шаблоне бюджета на каждую статью расходов - отдельная запись
+        category = next(iter(budget.get('budget_categories') or {}), '').split(':')[0]
+        budget_name = f"{budget.get('project_type') or ''}/{category}"
+        name = criterion.get('criterion_name') or methodology.get('methodology_name') or budget_name.strip('/')
+        chunks.append(Chunk(key=f"{payload['requirement_type']}#{name or index}", text=content, payload=payload))
+    return chunks
+
+
+# ============================================================================
+# Эмбеддинги
+# ============================================================================
+
+class GigaChatEmbedder:
+    """GigaChat Embeddings (1024), несколько текстов на запрос (embed_texts)"""
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        from shared.llm.gigachat_embeddings_client import GigaChatEmbeddingsClient
+        self.client = GigaChatEmbeddingsClient()
+        self.batch_size = batch_size
+        self.name = f"gigachat:{self.client.model}"
+
+    def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        return self.client.embed_texts(texts, batch_size=self.batch_size)
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers (как в ExpertAgent и AdaptiveQuestionGenerator)"""
+
+    DEFAULT_MODEL = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, batch_size: int = DEFAULT_BATCH_SIZE):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.batch_size = batch_size
+        self.name = f"st:{model_name}"
+
+    def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        return self.model.encode(texts, batch_size=self.batch_size).tolist()
+
+
+@dataclass
+class CollectionSpec:
+    """Коллекция Qdrant: откуда берутся чанки и чем они эмбеддятся"""
+    name: str
+    load: Callable[[], List[Chunk]]
+    embedder: Callable[[], Any]
+    # Имя модели без создания клиента (для diff без сети)
+    embedder_name: str
+    # id точки = knowledge_sections.id (строка PostgreSQL пишется вместе с точкой)
+    postgres_sections: bool = False
+
+
+COLLECTIONS: Dict[str, CollectionSpec] = {
+    'knowledge_sections': CollectionSpec(
+        'knowledge_sections', load_fpg_articles, SentenceTransformerEmbedder,
+        f"st:{SentenceTransformerEmbedder.DEFAULT_MODEL}", postgres_sections=True),
+    'fpg_real_winners': CollectionSpec(
+        'fpg_real_winners', load_fpg_winners, GigaChatEmbedder, 'gigachat:Embeddings'),
+    'fpg_requirements_gigachat': CollectionSpec(
+        'fpg_requirements_gigachat', load_fpg_requirements, GigaChatEmbedder, 'gigachat:Embeddings'),
+    'test_engineer_kb': CollectionSpec(
+        'test_engineer_kb', load_markdown_docs, GigaChatEmbedder, 'gigachat:Embeddings'),
+}
+
+
+class KnowledgeSectionStore:
+    """
+    Строки knowledge_sections для точек коллекции knowledge_sections
+
+    Строка чанка ищется по metadata->>'chunk_key' в источнике
+    fpg / unified_kb (как у expert_agent/load_fpg_knowledge.py), поэтому
+    повторная загрузка обновляет ту же строку и id точки не меняется.
+    """
+
+    FUND_NAME = 'fpg'
+    SOURCE_TYPE = 'unified_kb'
+
+    def __init__(self, db):
+        self.db = db
+
+    def _source_id(self, cursor) -> int:
+        cursor.execute(
+            "SELECT id FROM knowledge_sources WHERE fund_name = %s AND source_type = %s ORDER BY id LIMIT 1",
+            (self.FUND_NAME, self.SOURCE_TYPE)
+        )
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+        cursor.execute(
+            """
+            INSERT INTO knowledge_sources (fund_name, source_type, title, url, version, is_active, priority)
+            VALUES (%s, %s, 'Единая база знаний ФПГ', 'https://президентскиегранты.рф', '2025', true, 10)
+            RETURNING id
+            """,
+            (self.FUND_NAME, self.SOURCE_TYPE)
+        )
+        return cursor.fetchone()[0]
+
+    def upsert(self, chunks: List[Chunk]) -> Dict[str, int]:
+        """Создать / обновить строки чанков, вернуть ключ чанка -> knowledge_sections.id"""
+        ids = {}
+        if not chunks:
+            return ids
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            source_id = self._source_id(cursor)
+            for chunk in chunks:
+                payload = chunk.payload
+                values = (
+                    payload.get('section_type', 'knowledge'),
+                    payload.get('section_name') or chunk.key,
+                    payload.get('content') or chunk.text,
+                    [payload['category']] if payload.get('category') else [],
+                    json.dumps({'chunk_key': chunk.key, 'source_url': payload.get('source_url'),
+                                'source_file': payload.get('source_file')}, ensure_ascii=False),
+                )
+                cursor.execute(
+                    """
+                    UPDATE knowledge_sections
+                    SET section_type = %s, section_name = %s, content = %s, tags = %s,
+                        metadata = COALESCE(metadata, '{}'::jsonb) || %s::jsonb, updated_at = NOW()
+                    WHERE source_id = %s AND metadata->>'chunk_key' = %s
+                    RETURNING id
+                    """,
+                    values + (source_id, chunk.key)
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    cursor.execute(
+                        """
+                        INSERT INTO knowledge_sections (section_type, section_name, content, tags, metadata, source_id)
+                        VALUES (%s, %s, %s, %s, %s::jsonb, %s)
+                        RETURNING id
+                        """,
+                        values + (source_id,)
+                    )
+                    row = cursor.fetchone()
+                ids[chunk.key] = row[0]
+            conn.commit()
+            cursor.close()
+        return ids
+
+    def delete(self, ids: Iterable[int]):
+        ids = [int(section_id) for section_id in ids]
+        if not ids:
+            return
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM knowledge_sections WHERE id = ANY(%s)", (ids,))
+            conn.commit()
+            cursor.close()
+
+
+# ============================================================================
+# Манифест и diff
+# ============================================================================
+
+class Manifest:
+    """
+    Ключ чанка -> {id, text_hash, payload_hash, embedder}
+
+    embedder на уровне манифеста - модель записей старого формата (без
+    embedder в записи).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.embedder = None
+        self.entries: Dict[str, Dict[str, str]] = {}
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            self.embedder = data.get('embedder')
+            self.entries = data.get('chunks', {})
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({'embedder': self.embedder, 'chunks': self.entries},
+                                       ensure_ascii=False, indent=1, sort_keys=True), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+
+
+@dataclass
+class IngestionPlan:
+    """Что нужно сделать с коллекцией"""
+    new: List[Chunk] = field(default_factory=list)
+    changed: List[Chunk] = field(default_factory=list)
+    payload_only: List[Chunk] = field(default_factory=list)
+    unchanged: int = 0
+    orphans: Dict[str, str] = field(default_factory=dict)  # ключ -> id точки
+
+    @property
+    def to_embed(self) -> List[Chunk]:
+        return self.new + self.changed
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.new or self.changed or self.payload_only or self.orphans)
+
+
+def diff(chunks: List[Chunk], manifest: Manifest, embedder_name: str, force: bool = False) -> IngestionPlan:
+    """Сравнить чанки с манифестом (force - все известные чанки считаются измененными)"""
+    plan = IngestionPlan()
+    keys = set()
+    for chunk in chunks:
+        if chunk.key in keys:
+            raise ValueError(f"Повторяющийся ключ чанка: {chunk.key}")
+        keys.add(chunk.key)
+
+        entry = manifest.entries.get(chunk.key)
+        if entry is None:
+            plan.new.append(chunk)
+        elif force or entry.get('embedder', manifest.embedder) != embedder_name \
+                or entry['text_hash'] != chunk.text_hash:
+            plan.changed.append(chunk)
+        elif entry['payload_hash'] != chunk.payload_hash:
+            plan.payload_only.append(chunk)
+        else:
+            plan.unchanged += 1
+
+    plan.orphans = {key: entry['id'] for key, entry in manifest.entries.items() if key not in keys}
+    return plan
+
+
+# ============================================================================
+# Конвейер
+# ============================================================================
+
+@dataclass
+class IngestionReport:
+    """Итог запуска: diff, число вызовов эмбеддингов / записей, время стадий"""
+    collection: str
+    dry_run: bool
+    plan: IngestionPlan
+    chunks: int = 0
+    embedded: int = 0
+    embed_failures: int = 0
+    upserted: int = 0
+    payload_updated: int = 0
+    deleted: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        plan = self.plan
+        lines = [
+            f"[{self.collection}]{' DRY RUN' if self.dry_run else ''}: {self.chunks} чанков - "
+            f"новых {len(plan.new)}, измененных {len(plan.changed)}, "
+            f"только payload {len(plan.payload_only)}, без изменений {plan.unchanged}, "
+            f"сирот {len(plan.orphans)}",
+        ]
+        if not self.dry_run:
+            lines.append(f"  эмбеддингов {self.embedded} (ошибок {self.embed_failures}), upsert {self.upserted}, "
+                         f"payload {self.payload_updated}, удалено {self.deleted}")
+        lines.append('  время: ' + ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items()))
+        return '\n'.join(lines)
+
+    def details(self, limit: int = 20) -> str:
+        """Ключи чанков по категориям diff (для --dry-run)"""
+        lines = []
+        for label, keys in (('+', [c.key for c in self.plan.new]), ('~', [c.key for c in self.plan.changed]),
+                            ('p', [c.key for c in self.plan.payload_only]), ('-', list(self.plan.orphans))):
+            lines.extend(f"  {label} {key}" for key in keys[:limit])
+            if len(keys) > limit:
+                lines.append(f"  {label} ... еще {len(keys) - limit}")
+        return '\n'.join(lines)
+
+
+class KnowledgeIngestion:
+    """
+    Инкрементальная загрузка одной коллекции
+
+    Args:
+        spec: Описание коллекции (COLLECTIONS)
+        qdrant: QdrantClient (None - только diff по манифесту)
+        manifest_dir: Каталог манифестов (на сервер Qdrant)
+        embedder: Готовый эмбеддер (по умолчанию spec.embedder() - создается,
+            только если есть что эмбеддить)
+        full: Игнорировать манифест (все чанки эмбеддятся заново)
+        batch_size: Текстов в одном запросе эмбеддингов
+        db: GrantServiceDatabase - для коллекций с postgres_sections
+            (knowledge_sections), не нужен для --dry-run
+    """
+
+    def __init__(self, spec: CollectionSpec, qdrant=None, manifest_dir: Path = DEFAULT_MANIFEST_DIR,
+                 embedder=None, full: bool = False, batch_size: int = DEFAULT_BATCH_SIZE, db=None):
+        self.spec = spec
+        self.qdrant = qdrant
+        self.sections = KnowledgeSectionStore(db) if spec.postgres_sections and db is not None else None
+        self.manifest = Manifest(Path(manifest_dir) / f"{spec.name}.json")
+        self._embedder = embedder
+        self.embedder_name = embedder.name if embedder is not None else spec.embedder_name
+        self.full = full
+        self.batch_size = batch_size
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def _stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def _collection_exists(self) -> bool:
+        if self.qdrant is None:
+            return True
+        try:
+            self.qdrant.get_collection(self.spec.name)
+            return True
+        except Exception:
+            return False
+
+    def plan(self) -> tuple:
+        """(чанки, план) без записи в Qdrant"""
+        with self._stage('load+chunk'):
+            chunks = self.spec.load()
+        with self._stage('diff'):
+            if not self._collection_exists():
+                self.manifest.entries = {}
+            elif self.qdrant is not None and not self.manifest.path.exists():
+                self._adopt_points()
+            plan = diff(chunks, self.manifest, self.embedder_name, force=self.full)
+        return chunks, plan
+
+    def _adopt_points(self):
+        """
+        Манифест по точкам существующей коллекции (манифеста еще нет)
+
+        Точки конвейера (chunk_key в payload) сопоставляются с чанками;
+        точки старых загрузчиков попадают в манифест как сироты и
+        удаляются после записи новых точек.
+        """
+        entries, legacy, offset = {}, 0, None
+        while True:
+            points, offset = self.qdrant.scroll(collection_name=self.spec.name, limit=256, offset=offset,
+                                                with_payload=True, with_vectors=False)
+            for point in points:
+                payload = point.payload or {}
+                key = payload.get('chunk_key')
+                if key:
+                    entries[key] = {'id': point.id, 'text_hash': payload.get('chunk_text_hash', ''),
+                                    'payload_hash': payload_hash(payload),
+                                    'embedder': payload.get('chunk_embedder')}
+                else:
+                    entries[f"{LEGACY_KEY_PREFIX}{point.id}"] = {'id': point.id, 'text_hash': '', 'payload_hash': ''}
+                    legacy += 1
+            if offset is None:
+                break
+        self.manifest.entries = entries
+        logger.info(f"[Ingestion] {self.spec.name}: манифеста нет, по коллекции - {len(entries) - legacy} "
+                    f"точек конвейера, {legacy} точек старых загрузчиков (будут заменены)")
+
+    def run(self, dry_run: bool = False) -> IngestionReport:
+        self.timings = {}
+        chunks, plan = self.plan()
+        report = IngestionReport(self.spec.name, dry_run, plan, chunks=len(chunks), timings=self.timings)
+        if dry_run or plan.is_empty:
+            logger.info(report.summary())
+            return report
+
+        try:
+            self._apply(plan, report)
+        finally:
+            # модель записывается в каждую запись (_record): не перевложенные чанки остаются измененными
+            with self._stage('manifest'):
+                self.manifest.save()
+        logger.info(report.summary())
+        return report
+
+    def _point_ids(self, chunks: List[Chunk]) -> Dict[str, Any]:
+        """Ключ чанка -> id точки (knowledge_sections.id или UUID по ключу)"""
+        if self.sections is not None:
+            return self.sections.upsert(chunks)
+        return {chunk.key: point_id(self.spec.name, chunk.key) for chunk in chunks}
+
+    def _entry_embedder(self, key: str) -> Optional[str]:
+        entry = self.manifest.entries.get(key, {})
+        return entry.get('embedder', self.manifest.embedder)
+
+    def _point_payload(self, chunk: Chunk, point: Any, embedder: Optional[str]) -> Dict[str, Any]:
+        payload = {**chunk.payload, 'chunk_key': chunk.key, 'chunk_text_hash': chunk.text_hash,
+                   'chunk_embedder': embedder}
+        if self.sections is not None:
+            payload['section_id'] = point
+        return payload
+
+    def _apply(self, plan: IngestionPlan, report: IngestionReport):
+        from qdrant_client.models import PointStruct, PointIdsList
+
+        if self.spec.postgres_sections and self.sections is None:
+            raise ValueError(f"{self.spec.name}: id точек - knowledge_sections.id, нужен db")
+
+        to_embed = plan.to_embed
+        if to_embed:
+            if self._embedder is None:
+                self._embedder = self.spec.embedder(batch_size=self.batch_size)
+
+            for start in range(0, len(to_embed), UPSERT_BATCH):
+                batch = to_embed[start:start + UPSERT_BATCH]
+                with self._stage('embed'):
+                    vectors = []
+                    for offset in range(0, len(batch), self.batch_size):
+                        texts = [c.text for c in batch[offset:offset + self.batch_size]]
+                        vectors.extend(self._embedder.embed(texts))
+                report.embedded += len(batch)
+
+                stored = []
+                for chunk, vector in zip(batch, vectors):
+                    if vector is None:
+                        report.embed_failures += 1
+                        continue
+                    stored.append((chunk, vector))
+                if not stored:
+                    continue
+
+                with self._stage('upsert'):
+                    ids = self._point_ids([chunk for chunk, _ in stored])
+                    points = [PointStruct(id=ids[chunk.key], vector=vector,
+                                          payload=self._point_payload(chunk, ids[chunk.key], self.embedder_name))
+                              for chunk, vector in stored]
+                    self._ensure_collection(len(points[0].vector))
+                    self.qdrant.upsert(collection_name=self.spec.name, points=points)
+                report.upserted += len(points)
+                self._record([chunk for chunk, _ in stored], ids, self.embedder_name)
+
+        with self._stage('payload'):
+            ids = self._point_ids(plan.payload_only)
+            for chunk in plan.payload_only:
+                # вектор не менялся - модель записи остается прежней
+                embedder = self._entry_embedder(chunk.key)
+                self.qdrant.overwrite_payload(collection_name=self.spec.name,
+                                              payload=self._point_payload(chunk, ids[chunk.key], embedder),
+                                              points=[ids[chunk.key]])
+                report.payload_updated += 1
+                self._record([chunk], ids, embedder)
+
+        if plan.orphans:
+            with self._stage('delete'):
+                self.qdrant.delete(collection_name=self.spec.name,
+                                   points_selector=PointIdsList(points=list(plan.orphans.values())))
+                if self.sections is not None:
+                    # строки старых загрузчиков в PostgreSQL не трогаем - удаляются только точки
+                    self.sections.delete(point for key, point in plan.orphans.items()
+                                         if not key.startswith(LEGACY_KEY_PREFIX))
+            report.deleted = len(plan.orphans)
+            for key in plan.orphans:
+                self.manifest.entries.pop(key, None)
+
+    def _record(self, chunks: List[Chunk], ids: Dict[str, Any], embedder: Optional[str]):
+        for chunk in chunks:
+            self.manifest.entries[chunk.key] = {
+                'id': ids[chunk.key],
+                'text_hash': chunk.text_hash,
+                'payload_hash': chunk.payload_hash,
+                'embedder': embedder,
+            }
+
+    def _ensure_collection(self, vector_size: int):
+        """Создать коллекцию, если ее нет (существующая не пересоздается)"""
+        if self._collection_exists():
+            return
+        from qdrant_client.models import Distance, VectorParams
+        logger.info(f"[Ingestion] создается коллекция {self.spec.name} ({vector_size}, Cosine)")
+        self.qdrant.create_collection(collection_name=self.spec.name,
+                                      vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+                                      on_disk_payload=True)
@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM Cassettes для GrantService: запись и воспроизведение запросов к провайдерам
+
+Транспортный уровень для всех клиентов, которые берут HTTP сессию через
+ProviderSessionManager (UnifiedLLMClient, ClaudeCodeClient,
+ClaudeCodeWebSearchClient, PerplexityWebSearchClient,
+GigaChatEmbeddingsClient):
+
+- record: запрос уходит к провайдеру, ответ сохраняется в кассету
+- replay: ответ берется из кассеты без сети, с имитацией задержки
+- off: обычная работа (по умолчанию)
+
+Кассета - JSON файл <dir>/<provider>/<key>.json, где key - хэш
+нормализованного запроса (метод, URL, тело). Заголовки (токены, RqUID)
+в ключ не входят, JSON тело сериализуется с сортировкой ключей, поля из
+LLM_CASSETTE_IGNORE_FIELDS (по умолчанию session_id) отбрасываются,
+фрагменты по регулярным выражениям scrub_patterns заменяются на
+<scrubbed> - по умолчанию DEFAULT_SCRUB_PATTERNS: ID анкет (#AN-...) и
+дата-время внутри промпта, которые меняются от прогона к прогону
+(scrub_patterns=() - ключ по телу без изменений).
+Если на один запрос записано несколько ответов, при воспроизведении они
+выдаются по кругу.
+
+Задержка при replay задается спецификацией (для всех провайдеров или
+для каждого отдельно):
+    none                  - без задержки
+    recorded[:scale]      - записанное время ответа * scale
+    fixed:S               - S секунд
+    uniform:A,B           - равномерно от A до B
+    normal:MEAN,STD       - нормальное (не меньше 0)
+    lognormal:MEDIAN,SIGMA
+
+Настройка через окружение:
+    LLM_CASSETTE_MODE=replay
+    LLM_CASSETTE_DIR=benchmarks/cassettes
+    LLM_CASSETTE_LATENCY="recorded;claude_code=lognormal:8,0.5;llm=fixed:1.5"
+    LLM_CASSETTE_SEED=42
+
+Usage:
+    with use_cassettes("record", "benchmarks/cassettes"):
+        await auditor.audit_application_async(data)
+
+    with use_cassettes("replay", "benchmarks/cassettes", latency="uniform:0.5,2"):
+        await auditor.audit_application_async(data)   # без сети
+
+Author: Grant Service Architect
+Date: 2025-11-03
+Version: 1.0
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ('off', 'record', 'replay')
+DEFAULT_CASSETTE_DIR = Path(__file__).parent.parent.parent / "benchmarks" / "cassettes"
+DEFAULT_IGNORE_FIELDS = ('session_id',)
+# ID анкет и время запуска попадают в промпты и меняются от прогона к прогону
+DEFAULT_SCRUB_PATTERNS = (
+    r'#AN-[\w-]+',
+    r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?',
+)
+
+# Заголовки ответа, которые сохраняются в кассете
+RECORDED_HEADERS = ('content-type', 'retry-after')
+
+
+class CassetteMissError(RuntimeError):
+    """В режиме replay нет записанного ответа на запрос"""
+
+
+# ----------------------------------------------------------------------
+# Нормализация запроса
+# ----------------------------------------------------------------------
+
+def _strip_fields(value: Any, ignore: Tuple[str, ...]) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_fields(v, ignore) for k, v in value.items() if k not in ignore}
+    if isinstance(value, list):
+        return [_strip_fields(v, ignore) for v in value]
+    return value
+
+
+def normalize_request(
+    method: str,
+    url: str,
+    json_body: Any = None,
+    data: Any = None,
+    params: Optional[Dict[str, Any]] = None,
+    ignore_fields: Tuple[str, ...] = DEFAULT_IGNORE_FIELDS,
+    scrub: Tuple[Pattern, ...] = ()
+) -> Dict[str, Any]:
+    """
+    Привести запрос к каноническому виду для ключа кассеты
+
+    Args:
+        method: HTTP метод
+        url: URL запроса
+        json_body: Аргумент json= клиента
+        data: Аргумент data= клиента (строка или dict)
+        params: Query параметры
+        ignore_fields: Поля JSON тела, не влияющие на ключ
+        scrub: Скомпилированные регулярные выражения, вырезаемые из тела
+
+    Returns:
+        {'method', 'url', 'body'}
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((str(k), str(v)) for k, v in params.items())
+    url = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip('/') or '/', urlencode(sorted(query)), ''))
+
+    if json_body is not None:
+        body = json.dumps(_strip_fields(json_body, ignore_fields), ensure_ascii=False, sort_keys=True)
+    elif isinstance(data, dict):
+        body = urlencode(sorted((str(k), str(v)) for k, v in data.items()))
+    elif isinstance(data, bytes):
+        body = data.decode('utf-8', errors='replace')
+    else:
+        body = data or ''
+
+    for pattern in scrub:
+        body = pattern.sub('<scrubbed>', body)
+
+    return {'method': method.upper(), 'url': url, 'body': body}
+
+
+def request_key(normalized: Dict[str, Any]) -> str:
+    """Ключ кассеты: sha256 от нормализованного запроса"""
+    raw = json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:24]
+
+
+# ----------------------------------------------------------------------
+# Модель задержки
+# ----------------------------------------------------------------------
+
+class LatencyModel:
+    """Задержка ответа при воспроизведении (см. спецификации в docstring модуля)"""
+
+    def __init__(self, spec: Optional[str] = None, seed: Optional[int] = None):
+        self.default = ('none', ())
+        self.per_provider: Dict[str, Tuple[str, tuple]] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        for part in (spec or 'none').split(';'):
+            part = part.strip()
+            if not part:
+                continue
+            if '=' in part:
+                provider, provider_spec = part.split('=', 1)
+                self.per_provider[provider.strip()] = self._parse(provider_spec)
+            else:
+                self.default = self._parse(part)
+
+    @staticmethod
+    def _parse(spec: str) -> Tuple[str, tuple]:
+        kind, _, args = spec.strip().partition(':')
+        kind = kind.lower()
+        values = tuple(float(v) for v in args.split(',') if v.strip())
+        expected = {'none': (0,), 'recorded': (0, 1), 'fixed': (1,), 'uniform': (2,), 'normal': (2,), 'lognormal': (2,)}
+        if kind not in expected or len(values) not in expected[kind]:
+            raise ValueError(f"Неверная спецификация задержки: {spec!r}")
+        return kind, values
+
+    def delay(self, provider: str, recorded_elapsed: float = 0.0) -> float:
+        """Задержка в секундах для ответа провайдера"""
+        kind, values = self.per_provider.get(provider, self.default)
+
+        with self._lock:
+            if kind == 'recorded':
+                return recorded_elapsed * (values[0] if values else 1.0)
+            if kind == 'fixed':
+                return values[0]
+            if kind == 'uniform':
+                return self._rng.uniform(values[0], values[1])
+            if kind == 'normal':
+                return max(0.0, self._rng.gauss(values[0], values[1]))
+            if kind == 'lognormal':
+                return self._rng.lognormvariate(math.log(values[0]), values[1])
+        return 0.0
+
+
+# ----------------------------------------------------------------------
+# Хранилище
+# ----------------------------------------------------------------------
+
+class CassetteStore:
+    """Кассеты на диске: <dir>/<provider>/<key>.json"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._cache: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, provider: str, key: str) -> Path:
+        return self.directory / provider / f"{key}.json"
+
+    def load(self, provider: str, key: str) -> Optional[Dict[str, Any]]:
+        """Кассета или None"""
+        with self._lock:
+            if (provider, key) not in self._cache:
+                path = self.path(provider, key)
+                self._cache[(provider, key)] = (
+                    json.loads(path.read_text(encoding='utf-8')) if path.exists() else None
+                )
+            return self._cache[(provider, key)]
+
+    def append(self, provider: str, key: str, request: Dict[str, Any], response: Dict[str, Any]):
+        """Добавить ответ в кассету (атомарная запись файла)"""
+        with self._lock:
+            path = self.path(provider, key)
+            cassette = self._cache.get((provider, key))
+            if cassette is None and path.exists():
+                cassette = json.loads(path.read_text(encoding='utf-8'))
+            if cassette is None:
+                cassette = {'provider': provider, 'request': request, 'responses': []}
+
+            cassette['responses'].append(response)
+            self._cache[(provider, key)] = cassette
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.json.tmp')
+            tmp_path.write_text(json.dumps(cassette, ensure_ascii=False, indent=2), encoding='utf-8')
+            tmp_path.replace(path)
+
+
+# ----------------------------------------------------------------------
+# Ответы
+# ----------------------------------------------------------------------
+
+class CassetteStreamReader:
+    """
+    Тело ответа как aiohttp.StreamReader (response.content)
+
+    Потоковые ответы (NDJSON Ollama) записываются целиком; при
+    воспроизведении отдаются построчно, как из сети.
+    """
+
+    def __init__(self, body: str):
+        self._lines = body.encode('utf-8').splitlines(keepends=True)
+        self._position = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        line = await self.readline()
+        if not line:
+            raise StopAsyncIteration
+        return line
+
+    async def readline(self) -> bytes:
+        if self._position >= len(self._lines):
+            return b''
+        self._position += 1
+        return self._lines[self._position - 1]
+
+    async def read(self, n: int = -1) -> bytes:
+        rest = b''.join(self._lines[self._position:])
+        self._position = len(self._lines)
+        return rest
+
+    def at_eof(self) -> bool:
+        return self._position >= len(self._lines)
+
+
+class CassetteResponse:
+    """Ответ из кассеты с интерфейсом aiohttp.ClientResponse"""
+
+    def __init__(self, method: str, url: str, recorded: Dict[str, Any]):
+        self.method = method
+        self.url = url
+        self.status = recorded['status']
+        self.headers = recorded.get('headers', {})
+        self._body = recorded.get('body', '')
+        self.content = CassetteStreamReader(self._body)
+
+    async def text(self, *args, **kwargs) -> str:
+        return self._body
+
+    async def read(self) -> bytes:
+        return self._body.encode('utf-8')
+
+    async def json(self, *args, **kwargs) -> Any:
+        return json.loads(self._body)
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(
+                request_info=None, history=(), status=self.status, message=self._body[:200]
+            )
+
+    def release(self):
+        pass
+
+
+class CassetteSyncResponse:
+    """Ответ из кассеты с интерфейсом requests.Response"""
+
+    def __init__(self, method: str, url: str, recorded: Dict[str, Any]):
+        self.method = method
+        self.url = url
+        self.status_code = recorded['status']
+        self.headers = recorded.get('headers', {})
+        self.text = recorded.get('body', '')
+        self.content = self.text.encode('utf-8')
+        self.ok = self.status_code < 400
+
+    def json(self, **kwargs) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}", response=self)
+
+
+# ----------------------------------------------------------------------
+# Рекордер
+# ----------------------------------------------------------------------
+
+class CassetteRecorder:
+    """
+    Запись / воспроизведение запросов провайдеров
+
+    Экземпляр выдает объекты-сессии (CassetteSession, CassetteSyncSession),
+    которые ProviderSessionManager возвращает клиентам вместо настоящих.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        directory=None,
+        latency: Optional[str] = None,
+        seed: Optional[int] = None,
+        ignore_fields: Tuple[str, ...] = DEFAULT_IGNORE_FIELDS,
+        scrub_patterns: Tuple[str, ...] = DEFAULT_SCRUB_PATTERNS
+    ):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Неизвестный режим кассет: {mode} (ожидается {', '.join(CASSETTE_MODES)})")
+
+        self.mode = mode
+        self.store = CassetteStore(directory or DEFAULT_CASSETTE_DIR)
+        self.latency = LatencyModel(latency, seed)
+        self.ignore_fields = tuple(ignore_fields)
+        self.scrub = tuple(re.compile(pattern) for pattern in scrub_patterns)
+        self._replay_positions: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'recorded': 0,
+            'replayed': 0,
+            'misses': 0,
+            'simulated_latency_seconds': 0.0,
+            # provider -> {'calls', 'request_bytes', 'response_bytes'}
+            'by_provider': {},
+        }
+
+    @property
+    def active(self) -> bool:
+        return self.mode != 'off'
+
+    def session(self, provider: str, headers=None, timeout: float = 120, ssl=None) -> "CassetteSession":
+        return CassetteSession(self, provider, headers, timeout, ssl)
+
+    def sync_session(self, provider: str) -> "CassetteSyncSession":
+        return CassetteSyncSession(self, provider)
+
+    # ------------------------------------------------------------------
+
+    def _normalize(self, method: str, url: str, kwargs: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        normalized = normalize_request(
+            method, url,
+            json_body=kwargs.get('json'),
+            data=kwargs.get('data'),
+            params=kwargs.get('params'),
+            ignore_fields=self.ignore_fields,
+            scrub=self.scrub
+        )
+        return normalized, request_key(normalized)
+
+    def _count(self, provider: str, normalized: Dict[str, Any], response_body: str):
+        with self._lock:
+            counters = self.stats['by_provider'].setdefault(
+                provider, {'calls': 0, 'request_bytes': 0, 'response_bytes': 0}
+            )
+            counters['calls'] += 1
+            counters['request_bytes'] += len(normalized['body'].encode('utf-8'))
+            counters['response_bytes'] += len(response_body.encode('utf-8'))
+
+    def _next_recorded(self, provider: str, method: str, url: str, normalized, key: str) -> Dict[str, Any]:
+        cassette = self.store.load(provider, key)
+        if not cassette or not cassette.get('responses'):
+            self.stats['misses'] += 1
+            raise CassetteMissError(
+                f"Нет записи для {method} {normalized['url']} "
+                f"(provider={provider}, key={key}, dir={self.store.directory})"
+            )
+
+        with self._lock:
+            position = self._replay_positions.get((provider, key), 0)
+            self._replay_positions[(provider, key)] = position + 1
+
+        responses = cassette['responses']
+        self.stats['replayed'] += 1
+        return responses[position % len(responses)]
+
+    def _record(self, provider: str, normalized, key: str, status: int, headers, body: str, elapsed: float):
+        recorded = {
+            'status': status,
+            'headers': {name: value for name, value in headers.items() if name.lower() in RECORDED_HEADERS},
+            'body': body,
+            'elapsed': round(elapsed, 3),
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        self.store.append(provider, key, normalized, recorded)
+        self.stats['recorded'] += 1
+
+    async def request(self, provider: str, method: str, url: str, session_options: Dict[str, Any], **kwargs):
+        """Асинхронный запрос через кассету"""
+        normalized, key = self._normalize(method, url, kwargs)
+
+        if self.mode == 'replay':
+            recorded = self._next_recorded(provider, method, url, normalized, key)
+            delay = self.latency.delay(provider, recorded.get('elapsed', 0.0))
+            if delay > 0:
+                self.stats['simulated_latency_seconds'] += delay
+                await asyncio.sleep(delay)
+            self._count(provider, normalized, recorded.get('body', ''))
+            return CassetteResponse(method, url, recorded)
+
+        connector = aiohttp.TCPConnector(ssl=session_options['ssl']) if session_options.get('ssl') is not None else None
+        started = time.monotonic()
+        async with aiohttp.ClientSession(
+            connector=connector,
+            headers=session_options.get('headers'),
+            timeout=aiohttp.ClientTimeout(total=session_options.get('timeout', 120))
+        ) as session:
+            async with session.request(method, url, **kwargs) as response:
+                body = (await response.read()).decode('utf-8', errors='replace')
+                status, headers = response.status, dict(response.headers)
+        elapsed = time.monotonic() - started
+
+        self._record(provider, normalized, key, status, headers, body, elapsed)
+        self._count(provider, normalized, body)
+        return CassetteResponse(method, url, {'status': status, 'headers': headers, 'body': body})
+
+    def request_sync(self, provider: str, method: str, url: str, **kwargs):
+        """Синхронный запрос через кассету (интерфейс requests)"""
+        normalized, key = self._normalize(method, url, kwargs)
+
+        if self.mode == 'replay':
+            recorded = self._next_recorded(provider, method, url, normalized, key)
+            delay = self.latency.delay(provider, recorded.get('elapsed', 0.0))
+            if delay > 0:
+                self.stats['simulated_latency_seconds'] += delay
+                time.sleep(delay)
+            self._count(provider, normalized, recorded.get('body', ''))
+            return CassetteSyncResponse(method, url, recorded)
+
+        import requests
+
+        started = time.monotonic()
+        response = requests.request(method, url, **kwargs)
+        elapsed = time.monotonic() - started
+
+        self._record(provider, normalized, key, response.status_code, response.headers, response.text, elapsed)
+        self._count(provider, normalized, response.text)
+        return response
+
+
+class _CassetteRequestContext:
+    """Результат session.post(...): поддерживает async with и await"""
+
+    def __init__(self, coro):
+        self._coro = coro
+        self._response = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self):
+        self._response = await self._coro
+        return self._response
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class CassetteSession:
+    """Замена aiohttp.ClientSession для клиентов провайдеров"""
+
+    closed = False
+
+    def __init__(self, recorder: CassetteRecorder, provider: str, headers, timeout, ssl):
+        self.recorder = recorder
+        self.provider = provider
+        self.options = {'headers': headers, 'timeout': timeout, 'ssl': ssl}
+
+    def request(self, method: str, url: str, **kwargs) -> _CassetteRequestContext:
+        return _CassetteRequestContext(
+            self.recorder.request(self.provider, method, str(url), self.options, **kwargs)
+        )
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    async def close(self):
+        pass
+
+
+class CassetteSyncSession:
+    """Замена requests.Session для синхронных клиентов"""
+
+    def __init__(self, recorder: CassetteRecorder, provider: str):
+        self.recorder = recorder
+        self.provider = provider
+
+    def request(self, method: str, url: str, **kwargs):
+        return self.recorder.request_sync(self.provider, method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        pass
+
+
+# ----------------------------------------------------------------------
+# Глобальный рекордер процесса
+# ----------------------------------------------------------------------
+
+_recorder: Optional[CassetteRecorder] = None
+_recorder_from_env = False
+
+
+def _recorder_from_environment() -> Optional[CassetteRecorder]:
+    mode = os.getenv('LLM_CASSETTE_MODE', 'off').lower()
+    if mode == 'off':
+        return None
+
+    ignore = os.getenv('LLM_CASSETTE_IGNORE_FIELDS')
+    seed = os.getenv('LLM_CASSETTE_SEED')
+    recorder = CassetteRecorder(
+        mode,
+        directory=os.getenv('LLM_CASSETTE_DIR') or None,
+        latency=os.getenv('LLM_CASSETTE_LATENCY'),
+        seed=int(seed) if seed else None,
+        ignore_fields=tuple(f.strip() for f in ignore.split(',') if f.strip()) if ignore is not None else DEFAULT_IGNORE_FIELDS
+    )
+    logger.info(f"[Cassettes] Mode={mode}, dir={recorder.store.directory}")
+    return recorder
+
+
+def get_cassette_recorder() -> Optional[CassetteRecorder]:
+    """Активный рекордер или None (режим off)"""
+    global _recorder, _recorder_from_env
+    if _recorder is None and not _recorder_from_env:
+        _recorder = _recorder_from_environment()
+        _recorder_from_env = True
+    return _recorder if _recorder is not None and _recorder.active else None
+
+
+@contextmanager
+def use_cassettes(mode: str, directory=None, latency: Optional[str] = None, seed: Optional[int] = None, **kwargs):
+    """
+    Включить кассеты на время блока (перекрывает LLM_CASSETTE_MODE)
+
+    Yields:
+        CassetteRecorder (stats - сколько записано / воспроизведено)
+    """
+    global _recorder, _recorder_from_env
+    previous = (_recorder, _recorder_from_env)
+    _recorder = CassetteRecorder(mode, directory, latency=latency, seed=seed, **kwargs)
+    _recorder_from_env = True
+    try:
+        yield _recorder
+    finally:
+        _recorder, _recorder_from_env = previous
@@ -8,10 +8,17 @@ API: http://178.236.17.55:8000
 import aiohttp
 import asyncio
 import json
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import logging
 
+try:
+    from .http_sessions import get_session_manager
+    from .context_sessions import SharedContextConversation
+except ImportError:  # запуск файла как скрипта
+    from http_sessions import get_session_manager
+    from context_sessions import SharedContextConversation
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,6 +49,7 @@ class ClaudeCodeClient:
         self.default_temperature = default_temperature
         self.timeout = timeout
         self.session: Optional[aiohttp.ClientSession] = None
+        self._owns_session = False
         self.debug_log = []
 
         logger.info(f"🔧 ClaudeCodeClient инициализирован: {base_url}, model={default_model}")
@@ -52,21 +60,29 @@ class ClaudeCodeClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
-        timeout_config = aiohttp.ClientTimeout(total=self.timeout)
-
-        self.session = aiohttp.ClientSession(
-            headers=headers,
-            timeout=timeout_config
+        self.session = get_session_manager().get_session(
+            "claude_code", headers=headers, timeout=self.timeout
         )
+        self._owns_session = self.session is None
+
+        if self._owns_session:
+            timeout_config = aiohttp.ClientTimeout(total=self.timeout)
+
+            self.session = aiohttp.ClientSession(
+                headers=headers,
+                timeout=timeout_config
+            )
 
         logger.info("✅ ClaudeCodeClient сессия создана")
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Закрытие HTTP сессии при выходе из контекста"""
-        if self.session:
+        if self.session and self._owns_session:
             await self.session.close()
             logger.info("🔒 ClaudeCodeClient сессия закрыта")
+        self.session = None
+        self._owns_session = False
 
     async def chat(
         self,
@@ -92,6 +108,18 @@ class ClaudeCodeClient:
         Raises:
             Exception: При ошибке API
         """
+        result, _ = await self._chat(message, session_id, model, temperature, max_tokens)
+        return result
+
+    async def _chat(
+        self,
+        message: str,
+        session_id: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> Tuple[str, Optional[str]]:
+        """chat() + session_id из ответа API (для SharedContextConversation)"""
         url = f"{self.base_url}/chat"
 
         payload = {
@@ -131,7 +159,7 @@ class ClaudeCodeClient:
                     self.debug_log.append(log_entry)
 
                     logger.info(f"✅ Claude chat: {len(message)} chars → {len(result)} chars")
-                    return result
+                    return result, data.get("session_id")
 
                 else:
                     error_msg = f"Claude API error: {response.status} - {response_text}"
@@ -291,6 +319,21 @@ class ClaudeCodeClient:
             logger.error(f"Error deleting session: {e}")
             return False
 
+    def conversation(self, preamble: str, name: str = "conversation") -> SharedContextConversation:
+        """
+        Разговор с общим контекстом в одной сессии: преамбула отправляется
+        первым сообщением, следующие запросы - только вопрос
+
+        Args:
+            preamble: Общий контекст (роль, данные анкеты, текст заявки)
+            name: Имя разговора для логов и session_id
+        """
+        async def generate(prompt: str, session_id: Optional[str] = None, **kwargs):
+            return await self._chat(message=prompt, session_id=session_id, **kwargs)
+
+        return SharedContextConversation(generate, preamble, use_sessions=True, name=name,
+                                         delete_session=self.delete_session)
+
     async def list_models(self) -> List[str]:
         """
         Получить список доступных моделей
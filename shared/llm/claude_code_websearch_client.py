@@ -21,6 +21,11 @@ from datetime import datetime
 import logging
 import os
 
+try:
+    from .http_sessions import get_session_manager
+except ImportError:  # запуск файла как скрипта
+    from http_sessions import get_session_manager
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,6 +50,7 @@ class ClaudeCodeWebSearchClient:
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
         self.session: Optional[aiohttp.ClientSession] = None
+        self._owns_session = False
         self.debug_log = []
 
         logger.info(f"🔧 ClaudeCodeWebSearchClient инициализирован: {base_url}")
@@ -55,21 +61,29 @@ class ClaudeCodeWebSearchClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
-        timeout_config = aiohttp.ClientTimeout(total=self.timeout)
-
-        self.session = aiohttp.ClientSession(
-            headers=headers,
-            timeout=timeout_config
+        self.session = get_session_manager().get_session(
+            "claude_code_websearch", headers=headers, timeout=self.timeout
         )
+        self._owns_session = self.session is None
+
+        if self._owns_session:
+            timeout_config = aiohttp.ClientTimeout(total=self.timeout)
+
+            self.session = aiohttp.ClientSession(
+                headers=headers,
+                timeout=timeout_config
+            )
 
         logger.info("✅ ClaudeCodeWebSearchClient сессия создана")
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Закрытие HTTP сессии при выходе из контекста"""
-        if self.session:
+        if self.session and self._owns_session:
             await self.session.close()
             logger.info("🔒 ClaudeCodeWebSearchClient сессия закрыта")
+        self.session = None
+        self._owns_session = False
 
     async def websearch(
         self,
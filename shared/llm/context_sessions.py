@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Context Sessions для GrantService
+
+Повторное использование общего контекста между вызовами LLM:
+ProductionWriter (10 секций) и AuditorAgent (4 критерия) раньше
+отправляли в каждом запросе одну и ту же большую преамбулу - роль,
+данные анкеты, текст заявки.
+
+SharedContextConversation отправляет преамбулу один раз:
+- провайдеры с сессиями (Claude Code API, session_id в /chat): первый
+  запрос = преамбула + вопрос, следующие - только вопрос в той же сессии;
+  если сессия потеряна (рестарт API, ошибка или API ответил из другой
+  сессии - session_id в ответе не совпал), вопрос повторяется с
+  преамбулой в новой сессии
+- провайдеры без сессий (GigaChat, Perplexity, Ollama): каждый запрос =
+  преамбула + вопрос, как раньше
+
+Метрики на разговор (= на заявку): входные токены, отправленные клиентом
+(включая follow-up, ушедшие в потерянную сессию), история сессии, которую
+сервер подставляет в каждый follow-up (преамбула и все прошлые вопросы и
+ответы), и входные токены без переиспользования; время первого и
+последующих вызовов. input_tokens_saved считается по токенам, которые
+обработала модель (отправленные + история), и может быть отрицательным:
+сессия экономит трафик клиента (client_tokens_not_resent) и время, но не
+входные токены модели. Follow-up, для которых API не вернул session_id,
+считаются в followups_unconfirmed.
+Экономия времени - оценка: (время первого вызова - среднее последующих)
+на каждый последующий вызов.
+
+Usage:
+    async with UnifiedLLMClient(provider="claude_code") as client:
+        conversation = client.conversation(preamble)
+        for section in sections:
+            text = await conversation.ask(section_request, max_tokens=4000)
+        logger.info(conversation.metrics())
+        await conversation.close()
+
+Author: Grant Service Architect
+Date: 2025-11-08
+Version: 1.0
+"""
+
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    from .prompt_budget import estimate_tokens
+except ImportError:  # запуск файла как скрипта
+    from prompt_budget import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Провайдеры, у которых /chat принимает session_id и хранит историю
+SESSION_PROVIDERS = {'claude_code', 'claude'}
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+# generate(prompt, session_id, **kwargs) -> str или (str, session_id из ответа API)
+GenerateFn = Callable[..., Awaitable[Union[str, Tuple[str, Optional[str]]]]]
+
+
+def supports_sessions(provider: Optional[str]) -> bool:
+    """Хранит ли провайдер контекст разговора между запросами"""
+    return (provider or '').lower() in SESSION_PROVIDERS
+
+
+class SharedContextConversation:
+    """
+    Разговор с общим контекстом (преамбулой) и последовательными вопросами
+
+    Вопросы задаются последовательно: в режиме сессии ответ на вопрос
+    становится частью истории, параллельные запросы в одну сессию не
+    поддерживаются API.
+    """
+
+    def __init__(self, generate: GenerateFn, preamble: str, use_sessions: bool,
+                 name: str = 'conversation',
+                 delete_session: Optional[Callable[[str], Awaitable[Any]]] = None):
+        """
+        Args:
+            generate: async generate(prompt, session_id=None, **kwargs) -> str или
+                (str, session_id из ответа) - по нему проверяется, что follow-up
+                попал в сессию с преамбулой
+            preamble: Общий контекст (роль, данные анкеты, заявка)
+            use_sessions: Провайдер поддерживает session_id
+            name: Имя для логов и session_id
+            delete_session: async delete_session(session_id) для close()
+        """
+        self.generate = generate
+        self.preamble = preamble
+        self.use_sessions = use_sessions
+        self.name = name
+        self.delete_session = delete_session
+        self.session_id: Optional[str] = None
+        self._context_sent = False
+        # токены истории текущей сессии на стороне API
+        self._history_tokens = 0
+
+        self.preamble_tokens = estimate_tokens(preamble)
+        # преамбула + разделитель: столько добавляет к вопросу _with_context
+        self.context_tokens = estimate_tokens(f"{preamble}{CONTEXT_SEPARATOR}") if preamble else 0
+        self.calls: List[Dict[str, Any]] = []
+        self.session_restarts = 0
+        self.followups_unconfirmed = 0
+
+    def _new_session(self) -> str:
+        self.session_id = f"{self.name}_{uuid.uuid4().hex[:12]}"
+        self._context_sent = False
+        self._history_tokens = 0
+        return self.session_id
+
+    def _with_context(self, question: str) -> str:
+        return f"{self.preamble}{CONTEXT_SEPARATOR}{question}" if self.preamble else question
+
+    async def ask(self, question: str, **kwargs) -> str:
+        """
+        Задать вопрос в контексте преамбулы
+
+        Args:
+            question: Текст запроса без общего контекста
+            **kwargs: Параметры генерации (temperature, max_tokens)
+        """
+        if not self.use_sessions:
+            response, _ = await self._call(self._with_context(question), None, question, True, **kwargs)
+            return response
+
+        if self.session_id is None:
+            self._new_session()
+
+        if not self._context_sent:
+            return await self._ask_with_context(question, **kwargs)
+
+        try:
+            response, returned = await self._call(question, self.session_id, question, False, **kwargs)
+        except Exception as e:
+            # Сессия могла пропасть на стороне API: повторяем с контекстом в новой
+            logger.warning(f"[{self.name}] follow-up в сессии {self.session_id} не удался ({e}), "
+                           f"повтор с полным контекстом")
+            return await self._restart(question, **kwargs)
+
+        if returned is None:
+            self.followups_unconfirmed += 1
+        elif returned != self.session_id:
+            # API ответил из другой (новой) сессии - без преамбулы: ответ не годится
+            logger.warning(f"[{self.name}] follow-up ушел в сессию {returned} вместо {self.session_id}, "
+                           f"повтор с полным контекстом")
+            self.calls[-1].update({'lost': True, 'full_tokens': 0})
+            return await self._restart(question, **kwargs)
+        return response
+
+    async def _ask_with_context(self, question: str, **kwargs) -> str:
+        response, returned = await self._call(self._with_context(question), self.session_id, question, True,
+                                              **kwargs)
+        if returned:
+            self.session_id = returned  # API мог назначить свой id
+        self._context_sent = True
+        return response
+
+    async def _restart(self, question: str, **kwargs) -> str:
+        self.session_restarts += 1
+        self._new_session()
+        return await self._ask_with_context(question, **kwargs)
+
+    async def _call(self, prompt: str, session_id: Optional[str], question: str,
+                    with_context: bool, **kwargs) -> Tuple[str, Optional[str]]:
+        started = time.monotonic()
+        response = await self.generate(prompt, session_id=session_id, **kwargs)
+        response, returned = response if isinstance(response, tuple) else (response, None)
+        sent_tokens = estimate_tokens(prompt)
+        self.calls.append({
+            'with_context': with_context,
+            'sent_tokens': sent_tokens,
+            # история сессии, которую API подставляет перед запросом
+            'replayed_tokens': self._history_tokens if session_id else 0,
+            'full_tokens': self.context_tokens + estimate_tokens(question),
+            'seconds': time.monotonic() - started,
+        })
+        if session_id:
+            self._history_tokens += sent_tokens + estimate_tokens(response or '')
+        return response, returned
+
+    def metrics(self) -> Dict[str, Any]:
+        """Метрики разговора: отправленные / обработанные / сэкономленные токены, время"""
+        sent = sum(call['sent_tokens'] for call in self.calls)
+        replayed = sum(call['replayed_tokens'] for call in self.calls)
+        full = sum(call['full_tokens'] for call in self.calls)
+        first = [call['seconds'] for call in self.calls if call['with_context']]
+        followups = [call['seconds'] for call in self.calls
+                     if not call['with_context'] and not call.get('lost')]
+
+        first_avg = sum(first) / len(first) if first else 0.0
+        followup_avg = sum(followups) / len(followups) if followups else 0.0
+        saved_seconds = max(0.0, first_avg - followup_avg) * len(followups) if first and followups else 0.0
+
+        return {
+            'name': self.name,
+            'mode': 'session' if self.use_sessions else 'stateless',
+            'calls': len(self.calls),
+            'preamble_tokens': self.preamble_tokens,
+            'input_tokens_sent': sent,
+            'history_tokens_replayed': replayed,
+            'input_tokens_processed': sent + replayed,
+            'input_tokens_without_reuse': full,
+            'input_tokens_saved': full - sent - replayed,
+            'client_tokens_not_resent': full - sent,
+            'context_calls_avg_seconds': round(first_avg, 3),
+            'followup_calls_avg_seconds': round(followup_avg, 3),
+            'estimated_seconds_saved': round(saved_seconds, 3),
+            'total_seconds': round(sum(call['seconds'] for call in self.calls), 3),
+            'session_restarts': self.session_restarts,
+            'followups_unconfirmed': self.followups_unconfirmed,
+        }
+
+    async def close(self):
+        """Удалить сессию на стороне API (если есть)"""
+        if self.session_id and self.delete_session:
+            try:
+                await self.delete_session(self.session_id)
+            except Exception as e:
+                logger.warning(f"[{self.name}] не удалось удалить сессию {self.session_id}: {e}")
+        self.session_id = None
+        self._context_sent = False
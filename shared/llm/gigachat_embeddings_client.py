@@ -23,6 +23,8 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
 
+from shared.llm.http_sessions import get_session_manager, make_token_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -68,6 +70,7 @@ class GigaChatEmbeddingsClient:
         # Auth state
         self.access_token: Optional[str] = None
         self.token_expires_at: float = 0
+        self._token_key = make_token_key("gigachat", self.api_key, "GIGACHAT_API_PERS")
 
         # Retry configuration
         self.max_retries = max_retries
@@ -81,14 +84,30 @@ class GigaChatEmbeddingsClient:
         """
         Get valid access token (auto-refresh if expired)
 
+        Tokens are shared process-wide via ProviderSessionManager, so
+        several clients (and UnifiedLLMClient with the same key) reuse one token.
+
         Returns:
             Access token string or None if auth fails
         """
-        try:
-            # Check if current token is still valid
-            if self.access_token and time.time() < self.token_expires_at:
-                return self.access_token
+        # Check if current token is still valid
+        if self.access_token and time.time() < self.token_expires_at:
+            return self.access_token
 
+        token = get_session_manager().get_token_sync(self._token_key, self._fetch_access_token)
+        cached = get_session_manager().peek_token(self._token_key)
+        if token and cached:
+            self.access_token, self.token_expires_at = cached
+        return token
+
+    def _fetch_access_token(self):
+        """
+        Request new access token from GigaChat OAuth
+
+        Returns:
+            (token, expires_at) or (None, 0) if auth fails
+        """
+        try:
             # Request new access token
             headers = {
                 "Content-Type": "application/x-www-form-urlencoded",
@@ -100,7 +119,7 @@ class GigaChatEmbeddingsClient:
             payload = {"scope": "GIGACHAT_API_PERS"}
 
             logger.info("[AUTH] Requesting new GigaChat access token...")
-            response = requests.post(
+            response = get_session_manager().get_sync_session("gigachat").post(
                 self.auth_url,
                 headers=headers,
                 data=payload,
@@ -109,18 +128,16 @@ class GigaChatEmbeddingsClient:
 
             if response.status_code == 200:
                 token_data = response.json()
-                self.access_token = token_data["access_token"]
-                # Token valid for 30 min, refresh 5 min early
-                self.token_expires_at = time.time() + (25 * 60)
                 logger.info("[AUTH] Access token obtained successfully")
-                return self.access_token
+                # Token valid for 30 min, refresh 5 min early
+                return token_data["access_token"], time.time() + (25 * 60)
             else:
                 logger.error(f"[AUTH ERROR] {response.status_code}: {response.text}")
-                return None
+                return None, 0
 
         except Exception as e:
             logger.error(f"[AUTH EXCEPTION] {e}")
-            return None
+            return None, 0
 
     def embed_text(self, text: str, retry_count: int = 0) -> Optional[List[float]]:
         """
@@ -153,7 +170,7 @@ class GigaChatEmbeddingsClient:
 
             # Make API call
             self.total_api_calls += 1
-            response = requests.post(
+            response = get_session_manager().get_sync_session("gigachat").post(
                 f"{self.base_url}/embeddings",
                 headers=headers,
                 json=payload,
@@ -243,6 +260,67 @@ class GigaChatEmbeddingsClient:
 
         return embeddings
 
+    def embed_texts(
+        self,
+        texts: List[str],
+        batch_size: int = 16
+    ) -> List[Optional[List[float]]]:
+        """
+        Embed texts with several inputs per API request
+
+        Unlike embed_batch (one request per text), sends up to batch_size
+        texts in one /embeddings call. Failed chunks fall back to embed_text.
+
+        Args:
+            texts: List of texts to embed
+            batch_size: Texts per API request
+
+        Returns:
+            List of embeddings in input order (None for failures)
+        """
+        embeddings: List[Optional[List[float]]] = []
+
+        for offset in range(0, len(texts), batch_size):
+            chunk = texts[offset:offset + batch_size]
+            vectors = None
+
+            token = self._get_access_token()
+            if token:
+                try:
+                    self.total_api_calls += 1
+                    response = get_session_manager().get_sync_session("gigachat").post(
+                        f"{self.base_url}/embeddings",
+                        headers={
+                            "Content-Type": "application/json",
+                            "Accept": "application/json",
+                            "Authorization": f"Bearer {token}"
+                        },
+                        json={"model": self.model, "input": chunk},
+                        verify=False
+                    )
+
+                    if response.status_code == 200:
+                        data = sorted(response.json().get("data", []), key=lambda d: d.get("index", 0))
+                        if len(data) == len(chunk):
+                            vectors = [
+                                d["embedding"] if len(d["embedding"]) == self.vector_dim else None
+                                for d in data
+                            ]
+                            self.total_tokens_embedded += sum(len(t.split()) for t in chunk)
+                    else:
+                        logger.warning(f"[EMBED BATCH] {response.status_code}: {response.text[:200]}")
+
+                except Exception as e:
+                    logger.warning(f"[EMBED BATCH EXCEPTION] {e}")
+
+            if vectors is None:
+                # Fallback: one request per text with retry logic
+                vectors = [self.embed_text(text) for text in chunk]
+
+            embeddings.extend(vectors)
+
+        return embeddings
+
     def get_statistics(self) -> Dict[str, Any]:
         """
         Get client usage statistics
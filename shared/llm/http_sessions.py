@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Provider Session Manager для GrantService
+
+Процесс-уровневый менеджер HTTP сессий для LLM/WebSearch провайдеров:
+- Общие aiohttp.ClientSession с keep-alive коннекторами (один TLS handshake
+  на хост вместо одного на каждый аудит / блок исследования / секцию)
+- Общий кэш OAuth токенов (GigaChat) с single-flight обновлением:
+  при одновременном истечении токен запрашивается ровно один раз
+- Хуки завершения для бота и воркеров
+
+Сессии aiohttp привязаны к event loop, поэтому общие сессии выдаются
+только в "активированном" loop (долгоживущий loop бота или воркера).
+В остальных случаях (sync обертки через asyncio.run) клиенты создают
+собственные сессии, как и раньше. Кэш токенов работает всегда.
+
+Usage (бот):
+    application = (
+        Application.builder().token(token)
+        .post_init(activate_shared_sessions)
+        .post_shutdown(close_shared_sessions)
+        .build()
+    )
+
+Usage (воркер):
+    async with shared_provider_sessions():
+        await orchestrator.run()
+
+Author: Grant Service Architect
+Date: 2025-11-02
+Version: 1.0
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+try:
+    from .cassettes import get_cassette_recorder
+except ImportError:
+    from cassettes import get_cassette_recorder
+
+logger = logging.getLogger(__name__)
+
+# Настройки коннекторов общих сессий
+SHARED_CONNECTION_LIMIT = int(os.getenv('PROVIDER_CONNECTION_LIMIT', '100'))
+SHARED_CONNECTION_LIMIT_PER_HOST = int(os.getenv('PROVIDER_CONNECTION_LIMIT_PER_HOST', '10'))
+SHARED_KEEPALIVE_TIMEOUT = float(os.getenv('PROVIDER_KEEPALIVE_TIMEOUT', '60'))
+
+# Запас до истечения токена, после которого токен считается просроченным
+TOKEN_REFRESH_MARGIN = 60
+
+# Тип фабрики токена: возвращает (token, expires_at_unix_timestamp)
+TokenFetcher = Callable[[], Awaitable[Tuple[str, float]]]
+SyncTokenFetcher = Callable[[], Tuple[Optional[str], float]]
+
+
+def make_token_key(provider: str, credential: str, scope: str = "") -> str:
+    """
+    Ключ кэша токенов (без хранения секрета в открытом виде)
+
+    Args:
+        provider: Имя провайдера (gigachat)
+        credential: API ключ / client secret
+        scope: OAuth scope
+
+    Returns:
+        Строка вида "gigachat:GIGACHAT_API_PERS:1a2b3c4d5e6f"
+    """
+    digest = hashlib.sha256(credential.encode('utf-8')).hexdigest()[:12]
+    return f"{provider}:{scope}:{digest}"
+
+
+class ProviderSessionManager:
+    """
+    Общие HTTP сессии и токены провайдеров на процесс
+
+    Сессии кэшируются по ключу (provider, headers, timeout, ssl) отдельно
+    для каждого активированного event loop. Токены кэшируются по ключу
+    из make_token_key() и разделяются между всеми экземплярами клиентов
+    (включая синхронные, например GigaChatEmbeddingsClient).
+    """
+
+    def __init__(self):
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, aiohttp.ClientSession]]" = weakref.WeakKeyDictionary()
+        self._token_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = weakref.WeakKeyDictionary()
+        self._active_loops: "weakref.WeakSet[asyncio.AbstractEventLoop]" = weakref.WeakSet()
+        self._tokens: Dict[str, Tuple[str, float]] = {}
+        self._sync_token_locks: Dict[str, threading.Lock] = {}
+        self._sync_sessions = threading.local()
+        self._all_sync_sessions: list = []
+        self._guard = threading.Lock()
+
+        self.stats = {
+            'sessions_created': 0,
+            'sessions_reused': 0,
+            'token_fetches': 0,
+            'token_cache_hits': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Активация / завершение
+    # ------------------------------------------------------------------
+
+    def activate(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Разрешить общие сессии в loop (по умолчанию - текущий)"""
+        loop = loop or asyncio.get_running_loop()
+        with self._guard:
+            self._active_loops.add(loop)
+        logger.info("[ProviderSessions] Shared provider sessions activated")
+
+    def is_active(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+        """Активированы ли общие сессии в loop"""
+        if os.getenv('GRANTSERVICE_SHARED_HTTP', '1') == '0':
+            return False
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return False
+        return loop in self._active_loops
+
+    async def close(self):
+        """Закрыть все общие сессии текущего loop и деактивировать его"""
+        loop = asyncio.get_running_loop()
+        with self._guard:
+            sessions = self._sessions.pop(loop, {})
+            self._token_locks.pop(loop, None)
+            self._active_loops.discard(loop)
+
+        for session in sessions.values():
+            if not session.closed:
+                await session.close()
+
+        if sessions:
+            logger.info(f"[ProviderSessions] Closed {len(sessions)} shared session(s)")
+
+        self.close_sync()
+
+    def close_sync(self):
+        """Закрыть синхронные (requests) сессии всех потоков"""
+        with self._guard:
+            sync_sessions, self._all_sync_sessions = self._all_sync_sessions, []
+            self._sync_sessions = threading.local()
+
+        for session in sync_sessions:
+            session.close()
+
+    # ------------------------------------------------------------------
+    # HTTP сессии
+    # ------------------------------------------------------------------
+
+    def get_session(
+        self,
+        provider: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 120,
+        ssl: Optional[bool] = None
+    ) -> Optional[aiohttp.ClientSession]:
+        """
+        Получить общую сессию для провайдера
+
+        Args:
+            provider: Имя провайдера (используется в ключе и логах)
+            headers: Заголовки по умолчанию (разные ключи API -> разные сессии)
+            timeout: Общий таймаут запроса в секундах
+            ssl: False чтобы отключить проверку SSL (GigaChat)
+
+        Returns:
+            aiohttp.ClientSession или None, если общие сессии не активированы
+            в текущем loop (клиент должен создать собственную сессию).
+            При включенных кассетах (LLM_CASSETTE_MODE) - CassetteSession.
+        """
+        cassettes = get_cassette_recorder()
+        if cassettes is not None:
+            return cassettes.session(provider, headers=headers, timeout=timeout, ssl=ssl)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+        if not self.is_active(loop):
+            return None
+
+        key = (provider, tuple(sorted((headers or {}).items())), timeout, ssl)
+
+        with self._guard:
+            sessions = self._sessions.setdefault(loop, {})
+            session = sessions.get(key)
+
+            if session is not None and not session.closed:
+                self.stats['sessions_reused'] += 1
+                return session
+
+            connector_kwargs: Dict[str, Any] = {
+                'limit': SHARED_CONNECTION_LIMIT,
+                'limit_per_host': SHARED_CONNECTION_LIMIT_PER_HOST,
+                'keepalive_timeout': SHARED_KEEPALIVE_TIMEOUT,
+            }
+            if ssl is not None:
+                connector_kwargs['ssl'] = ssl
+
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**connector_kwargs),
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            )
+            sessions[key] = session
+            self.stats['sessions_created'] += 1
+
+        logger.info(f"[ProviderSessions] Created shared session for {provider}")
+        return session
+
+    def get_sync_session(self, provider: str):
+        """
+        Получить keep-alive requests.Session для синхронных клиентов
+
+        Сессия своя у каждого потока (requests.Session не гарантирует
+        потокобезопасность), но переиспользуется всеми клиентами потока.
+
+        Args:
+            provider: Имя провайдера
+
+        Returns:
+            requests.Session (CassetteSyncSession при включенных кассетах)
+        """
+        cassettes = get_cassette_recorder()
+        if cassettes is not None:
+            return cassettes.sync_session(provider)
+
+        import requests
+
+        sessions = getattr(self._sync_sessions, 'by_provider', None)
+        if sessions is None:
+            sessions = self._sync_sessions.by_provider = {}
+
+        session = sessions.get(provider)
+        if session is None:
+            session = requests.Session()
+            sessions[provider] = session
+            with self._guard:
+                self._all_sync_sessions.append(session)
+            self.stats['sessions_created'] += 1
+        else:
+            self.stats['sessions_reused'] += 1
+
+        return session
+
+    # ------------------------------------------------------------------
+    # Токены
+    # ------------------------------------------------------------------
+
+    def peek_token(self, key: str) -> Optional[Tuple[str, float]]:
+        """Вернуть действующий токен из кэша (token, expires_at) или None"""
+        cached = self._tokens.get(key)
+        if cached and time.time() < cached[1] - TOKEN_REFRESH_MARGIN:
+            return cached
+        return None
+
+    async def get_token(self, key: str, fetch: TokenFetcher) -> Tuple[str, float]:
+        """
+        Получить токен с single-flight обновлением
+
+        Если токен просрочен, только одна корутина на loop выполняет fetch(),
+        остальные ждут и получают уже обновленный токен.
+
+        Args:
+            key: Ключ из make_token_key()
+            fetch: Корутина-фабрика, возвращающая (token, expires_at)
+
+        Returns:
+            (token, expires_at)
+        """
+        cached = self.peek_token(key)
+        if cached:
+            self.stats['token_cache_hits'] += 1
+            return cached
+
+        loop = asyncio.get_running_loop()
+        with self._guard:
+            lock = self._token_locks.setdefault(loop, {}).setdefault(key, asyncio.Lock())
+
+        async with lock:
+            # Токен мог обновить другой запрос, пока мы ждали lock
+            cached = self.peek_token(key)
+            if cached:
+                self.stats['token_cache_hits'] += 1
+                return cached
+
+            token, expires_at = await fetch()
+            self._tokens[key] = (token, expires_at)
+            self.stats['token_fetches'] += 1
+            return token, expires_at
+
+    def get_token_sync(self, key: str, fetch: SyncTokenFetcher) -> Optional[str]:
+        """
+        Синхронный вариант get_token() для клиентов на requests
+
+        Args:
+            key: Ключ из make_token_key()
+            fetch: Функция, возвращающая (token | None, expires_at)
+
+        Returns:
+            Токен или None при ошибке авторизации
+        """
+        cached = self.peek_token(key)
+        if cached:
+            self.stats['token_cache_hits'] += 1
+            return cached[0]
+
+        with self._guard:
+            lock = self._sync_token_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            cached = self.peek_token(key)
+            if cached:
+                self.stats['token_cache_hits'] += 1
+                return cached[0]
+
+            token, expires_at = fetch()
+            if token:
+                self._tokens[key] = (token, expires_at)
+                self.stats['token_fetches'] += 1
+            return token
+
+    def invalidate_token(self, key: str):
+        """Сбросить токен (например, после 401 от провайдера)"""
+        self._tokens.pop(key, None)
+
+
+_manager = ProviderSessionManager()
+
+
+def get_session_manager() -> ProviderSessionManager:
+    """Процесс-уровневый ProviderSessionManager"""
+    return _manager
+
+
+async def activate_shared_sessions(*_args):
+    """
+    Включить общие сессии в текущем loop
+
+    Сигнатура совместима с Application.post_init (принимает application).
+    """
+    _manager.activate()
+
+
+async def close_shared_sessions(*_args):
+    """
+    Закрыть общие сессии текущего loop
+
+    Сигнатура совместима с Application.post_shutdown (принимает application).
+    """
+    await _manager.close()
+
+
+@asynccontextmanager
+async def shared_provider_sessions():
+    """Контекст для воркеров: общие сессии на время работы"""
+    await activate_shared_sessions()
+    try:
+        yield _manager
+    finally:
+        await close_shared_sessions()
@@ -13,6 +13,7 @@ import asyncio
 
 from .unified_llm_client import UnifiedLLMClient
 from .claude_code_client import ClaudeCodeClient
+from .context_sessions import SharedContextConversation
 from .config import (
     GIGACHAT_API_KEY,
     CLAUDE_CODE_API_KEY,
@@ -289,6 +290,42 @@ class LLMRouter:
                 self.stats["errors"].append(error_msg)
                 raise Exception(f"Все провайдеры недоступны. Основной: {e}, Fallback: {fallback_error}")
 
+    def conversation(
+        self,
+        preamble: str,
+        task_type: TaskType,
+        provider: Optional[ProviderType] = None,
+        name: str = "conversation"
+    ) -> SharedContextConversation:
+        """
+        Разговор с общим контекстом для серии запросов (секции, критерии)
+
+        Claude: преамбула отправляется один раз, запросы идут в одной сессии.
+        Без сессий (GigaChat или Claude недоступен): преамбула добавляется к
+        каждому запросу. Fallback generate() на другой провайдер здесь не
+        используется - follow-up без истории сессии потерял бы контекст.
+
+        Args:
+            preamble: Общий контекст
+            task_type: Тип задачи (определяет провайдера)
+            provider: Явное указание провайдера (опционально)
+            name: Имя разговора для логов и session_id
+        """
+        target_provider = self._select_provider(task_type, provider)
+
+        if target_provider == ProviderType.CLAUDE and self.claude_client:
+            async def claude_generate(prompt: str, session_id: Optional[str] = None, **kwargs) -> str:
+                self.stats["claude_requests"] += 1
+                return await self.claude_client.chat(message=prompt, session_id=session_id, **kwargs)
+
+            return SharedContextConversation(claude_generate, preamble, use_sessions=True, name=name,
+                                             delete_session=self.claude_client.delete_session)
+
+        async def stateless_generate(prompt: str, session_id: Optional[str] = None, **kwargs) -> str:
+            return await self.generate(prompt, task_type, provider=ProviderType.GIGACHAT, **kwargs)
+
+        return SharedContextConversation(stateless_generate, preamble, use_sessions=False, name=name)
+
     async def execute_code(
         self,
         code: str,
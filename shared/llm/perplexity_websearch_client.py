@@ -20,6 +20,11 @@ from datetime import datetime
 import logging
 import os
 
+try:
+    from .http_sessions import get_session_manager
+except ImportError:  # запуск файла как скрипта
+    from http_sessions import get_session_manager
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,6 +49,7 @@ class PerplexityWebSearchClient:
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
         self.session: Optional[aiohttp.ClientSession] = None
+        self._owns_session = False
         self.debug_log = []
 
         logger.info(f"[OK] PerplexityWebSearchClient initialized: {base_url}")
@@ -54,21 +60,29 @@ class PerplexityWebSearchClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
-        timeout_config = aiohttp.ClientTimeout(total=self.timeout)
-
-        self.session = aiohttp.ClientSession(
-            headers=headers,
-            timeout=timeout_config
+        self.session = get_session_manager().get_session(
+            "perplexity", headers=headers, timeout=self.timeout
         )
+        self._owns_session = self.session is None
+
+        if self._owns_session:
+            timeout_config = aiohttp.ClientTimeout(total=self.timeout)
+
+            self.session = aiohttp.ClientSession(
+                headers=headers,
+                timeout=timeout_config
+            )
 
         logger.info("[OK] PerplexityWebSearchClient session created")
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Close HTTP session on context exit"""
-        if self.session:
+        if self.session and self._owns_session:
             await self.session.close()
             logger.info("[CLOSE] PerplexityWebSearchClient session closed")
+        self.session = None
+        self._owns_session = False
 
     async def websearch(
         self,
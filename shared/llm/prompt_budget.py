@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prompt Budget для GrantService
+
+Бюджет токенов для больших промптов Writer:
+- оценка токенов по компонентам промпта (локальная аппроксимация
+  токенизатора, без обращения к провайдеру)
+- элементы контекста (цитаты, факты, требования ФПГ) ранжируются по
+  релевантности запросу и отбираются, пока есть бюджет
+- повторы (один и тот же факт в цитатах и в блоке исследования)
+  отбрасываются через общий seen; общий контекст исследования
+  распределяется между секциями (allocate_shared_items), а не
+  повторяется в каждой
+- на каждый вызов - метрики размера промпта (лог + PROMPT_METRICS)
+
+Оценка токенов: слово кириллицей ~ 1 токен на 3 символа, латиницей -
+на 4, знак препинания - 1 токен. Для GigaChat/Claude ошибка ~10-15%,
+этого достаточно для бюджета (точный счет делает провайдер).
+
+Usage:
+    budget = PromptBudget(max_tokens=6000, query=project_problem)
+    report = budget.fit([
+        PromptPart('instructions', template, required=True),
+        PromptPart('citations', items=citation_lines, max_tokens=1500),
+        PromptPart('block1_summary', block1_summary, max_tokens=300),
+    ], call='writer_v2.stage2')
+    prompt = template.format(citations=report.text('citations'), ...)
+
+Author: Grant Service Architect
+Date: 2025-11-07
+Version: 1.0
+"""
+
+import logging
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_CYRILLIC_RE = re.compile(r"[а-яё]", re.IGNORECASE)
+_TERM_RE = re.compile(r"[^\W\d_]{4,}", re.UNICODE)
+_SENTENCE_END_RE = re.compile(r"[.!?…]\s")
+_SPACES_RE = re.compile(r"\s+")
+_LIST_MARKER_RE = re.compile(r"^(\[\d+\]|\d+[.)]|[•*-])\s*")
+
+CHARS_PER_TOKEN_CYRILLIC = 3
+CHARS_PER_TOKEN_LATIN = 4
+# Грубая основа слова: первые символы (падежи / числа в русском)
+STEM_LENGTH = 6
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Оценка числа токенов текста (локально, без токенизатора провайдера)"""
+    if not text:
+        return 0
+
+    tokens = 0
+    for piece in _TOKEN_RE.findall(text):
+        if len(piece) == 1:
+            tokens += 1
+        elif _CYRILLIC_RE.search(piece):
+            tokens += math.ceil(len(piece) / CHARS_PER_TOKEN_CYRILLIC)
+        else:
+            tokens += math.ceil(len(piece) / CHARS_PER_TOKEN_LATIN)
+    return tokens
+
+
+def terms(text: Optional[str]) -> Set[str]:
+    """Основы значимых слов (4+ букв) для оценки релевантности"""
+    return {word[:STEM_LENGTH] for word in _TERM_RE.findall((text or '').lower())}
+
+
+def relevance(text: str, query_terms: Set[str]) -> float:
+    """
+    Релевантность элемента контекста запросу
+
+    Доля слов запроса, встречающихся в элементе, плюс небольшой бонус за
+    цифры (для заявки факты с числами ценнее общих фраз).
+    """
+    score = 0.0
+    if query_terms:
+        score = len(terms(text) & query_terms) / len(query_terms)
+    if any(ch.isdigit() for ch in text):
+        score += 0.1
+    return score
+
+
+def normalize(text: str) -> str:
+    """Ключ для поиска повторов: регистр, пробелы и маркер списка ('[3]', '•') не важны"""
+    return _LIST_MARKER_RE.sub('', _SPACES_RE.sub(' ', text).strip().lower())
+
+
+def truncate_to_tokens(text: str, max_tokens: int, counter: Callable[[str], int] = estimate_tokens) -> str:
+    """
+    Обрезать текст до max_tokens, по возможности по границе предложения
+    """
+    if max_tokens <= 0:
+        return ''
+    if counter(text) <= max_tokens:
+        return text
+
+    # двоичный поиск по длине в символах
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if counter(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+
+    cut = text[:low]
+    sentence_ends = list(_SENTENCE_END_RE.finditer(cut))
+    if sentence_ends and sentence_ends[-1].end() > len(cut) // 2:
+        return cut[:sentence_ends[-1].end()].rstrip()
+    return cut.rstrip() + '…'
+
+
+@dataclass
+class PromptPart:
+    """
+    Компонент промпта
+
+    Args:
+        name: Имя компонента (ключ в отчете)
+        text: Текст (для текстовых компонентов)
+        items: Элементы списка (цитаты, факты) - ранжируются и отбираются по одному
+        required: Обязательный компонент (инструкции, данные анкеты) - не обрезается
+        max_tokens: Собственный лимит компонента (сверх общего бюджета)
+        query: Запрос релевантности для items (по умолчанию - запрос бюджета)
+        separator: Разделитель отобранных items
+    """
+    name: str
+    text: str = ''
+    items: Optional[List[str]] = None
+    required: bool = False
+    max_tokens: Optional[int] = None
+    query: Optional[str] = None
+    separator: str = '\n'
+
+
+@dataclass
+class BudgetReport:
+    """Результат распределения бюджета: тексты компонентов и метрики"""
+    call: str
+    max_tokens: int
+    texts: Dict[str, str] = field(default_factory=dict)
+    components: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def text(self, name: str) -> str:
+        return self.texts.get(name, '')
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(c['tokens'] for c in self.components.values())
+
+    @property
+    def original_tokens(self) -> int:
+        return sum(c['original_tokens'] for c in self.components.values())
+
+    @property
+    def trimmed(self) -> bool:
+        return self.total_tokens < self.original_tokens
+
+    def as_metrics(self) -> Dict:
+        """Метрики размера промпта (для логов и metadata результата)"""
+        return {
+            'call': self.call,
+            'max_tokens': self.max_tokens,
+            'total_tokens': self.total_tokens,
+            'original_tokens': self.original_tokens,
+            'saved_tokens': self.original_tokens - self.total_tokens,
+            'components': {name: dict(values) for name, values in self.components.items()},
+        }
+
+
+class PromptBudget:
+    """
+    Распределение бюджета токенов между компонентами промпта
+
+    Обязательные компоненты учитываются первыми, остальные - в порядке
+    списка (порядок = приоритет). Элементы items отбираются по
+    релевантности, но выводятся в исходном порядке (нумерация цитат не
+    прыгает).
+    """
+
+    def __init__(self, max_tokens: int, query: str = '',
+                 counter: Callable[[str], int] = estimate_tokens):
+        """
+        Args:
+            max_tokens: Бюджет на весь промпт
+            query: Текст, относительно которого ранжируются items
+                (проблема проекта, название секции)
+            counter: Оценка токенов (по умолчанию estimate_tokens)
+        """
+        self.max_tokens = max_tokens
+        self.query_terms = terms(query)
+        self.counter = counter
+
+    def fit(self, parts: Iterable[PromptPart], call: str = 'prompt',
+            seen: Optional[Set[str]] = None) -> BudgetReport:
+        """
+        Разместить компоненты в бюджете
+
+        Args:
+            parts: Компоненты промпта
+            call: Имя вызова для метрик (например 'writer_v2.stage2')
+            seen: Общее множество уже использованных элементов. Передается
+                между вызовами, чтобы не повторять один контекст в
+                нескольких секциях; дополняется отобранными items.
+        """
+        parts = list(parts)
+        seen = seen if seen is not None else set()
+        report = BudgetReport(call=call, max_tokens=self.max_tokens)
+
+        remaining = self.max_tokens
+        for part in parts:
+            if part.required:
+                tokens = self.counter(part.text)
+                report.texts[part.name] = part.text
+                report.components[part.name] = {'original_tokens': tokens, 'tokens': tokens}
+                remaining -= tokens
+
+        for part in parts:
+            if part.required:
+                continue
+            limit = max(0, remaining if part.max_tokens is None else min(remaining, part.max_tokens))
+            if part.items is not None:
+                text, metrics = self._fit_items(part, limit, seen)
+            else:
+                text = truncate_to_tokens(part.text, limit, self.counter)
+                metrics = {'original_tokens': self.counter(part.text)}
+            metrics['tokens'] = self.counter(text)
+            report.texts[part.name] = text
+            report.components[part.name] = metrics
+            remaining -= metrics['tokens']
+
+        PROMPT_METRICS.record(report)
+        logger.info(
+            f"[PromptBudget] {call}: {report.total_tokens}/{self.max_tokens} tokens "
+            f"(было {report.original_tokens}, сэкономлено {report.original_tokens - report.total_tokens})"
+        )
+        return report
+
+    def _fit_items(self, part: PromptPart, limit: int, seen: Set[str]):
+        query_terms = terms(part.query) if part.query is not None else self.query_terms
+        separator_tokens = self.counter(part.separator)
+
+        candidates = []
+        duplicates = 0
+        local_keys = set()
+        for index, item in enumerate(part.items):
+            if not item or not item.strip():
+                continue
+            key = normalize(item)
+            if key in seen or key in local_keys:
+                duplicates += 1
+                continue
+            local_keys.add(key)
+            candidates.append((index, item, key))
+
+        ranked = sorted(candidates, key=lambda c: relevance(c[1], query_terms), reverse=True)
+
+        chosen = []
+        used = 0
+        for index, item, key in ranked:
+            cost = self.counter(item) + (separator_tokens if chosen else 0)
+            if used + cost > limit:
+                continue
+            chosen.append((index, item, key))
+            used += cost
+
+        chosen.sort()
+        seen.update(key for _, _, key in chosen)
+
+        return part.separator.join(item for _, item, _ in chosen), {
+            'original_tokens': self.counter(part.separator.join(part.items)),
+            'items_total': len(part.items),
+            'items_kept': len(chosen),
+            'duplicates': duplicates,
+        }
+
+
+class PromptMetrics:
+    """Накопленные метрики размера промптов по вызовам (процесс)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, Dict[str, int]] = {}
+
+    def record(self, report: BudgetReport):
+        with self._lock:
+            stats = self.calls.setdefault(report.call, {
+                'calls': 0, 'tokens': 0, 'original_tokens': 0, 'trimmed_calls': 0, 'max_tokens_seen': 0,
+            })
+            stats['calls'] += 1
+            stats['tokens'] += report.total_tokens
+            stats['original_tokens'] += report.original_tokens
+            stats['trimmed_calls'] += int(report.trimmed)
+            stats['max_tokens_seen'] = max(stats['max_tokens_seen'], report.total_tokens)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {call: dict(stats) for call, stats in self.calls.items()}
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+
+PROMPT_METRICS = PromptMetrics()
+
+
+def allocate_shared_items(items: Iterable[str], queries: List[str], per_item: int = 2) -> List[List[str]]:
+    """
+    Распределить общий контекст между секциями без повторов во всех секциях
+
+    Один и тот же контекст исследования раньше уходил в каждую из N секций.
+    Теперь элемент попадает только в per_item секций, которым он ближе всего
+    (при равной релевантности - в более ранние). Повторы элементов
+    отбрасываются.
+
+    Args:
+        items: Элементы общего контекста
+        queries: Текст-запрос каждой секции (название + запрос к базе знаний)
+        per_item: В сколько секций максимум попадает один элемент
+
+    Returns:
+        Списки элементов по секциям (в исходном порядке элементов)
+    """
+    section_terms = [terms(query) for query in queries]
+    allocation: List[List[str]] = [[] for _ in queries]
+    seen: Set[str] = set()
+
+    for item in items:
+        if not item or not item.strip():
+            continue
+        key = normalize(item)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        scores = [relevance(item, query_terms) for query_terms in section_terms]
+        best = sorted(range(len(queries)), key=lambda index: (-scores[index], index))[:per_item]
+        for index in best:
+            allocation[index].append(item)
+
+    return allocation
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Provider Limiter для GrantService
+
+Процесс-уровневый лимитер запросов к LLM/WebSearch провайдерам:
+- Ограничение одновременных запросов (concurrency) на провайдера
+- Ограничение частоты (requests per minute) на провайдера
+
+Все массовые операции (батч-генерация анкет, батч-аудит, night tests)
+используют общий лимитер, поэтому вместе не превышают квоту провайдера.
+
+Настройка через окружение:
+    PROVIDER_CONCURRENCY_GIGACHAT=5
+    PROVIDER_RPM_GIGACHAT=60
+
+Usage:
+    limiter = get_provider_limiter("gigachat")
+    async with limiter:
+        response = await llm.generate_text(prompt)
+
+    # Каждый запрос UnifiedLLMClient внутри области - под лимитером своего
+    # провайдера (night tests: слот занят на время запроса, а не этапа)
+    with limit_requests():
+        await asyncio.gather(*cycles)
+
+Author: Grant Service Architect
+Date: 2025-11-02
+Version: 1.0
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, FrozenSet, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Значения по умолчанию (concurrency, requests per minute; 0 = без ограничения)
+DEFAULT_LIMITS = {
+    'gigachat': (5, 0),
+    'claude_code': (3, 0),
+    'perplexity': (5, 50),
+    'gigachat_embeddings': (4, 0),
+}
+FALLBACK_LIMITS = (3, 0)
+
+# Область limit_requests() и провайдеры, слот которых уже занят текущей задачей
+_request_scope: ContextVar[bool] = ContextVar('provider_request_scope', default=False)
+_held: ContextVar[FrozenSet[str]] = ContextVar('provider_limiter_held', default=frozenset())
+
+
+class ProcessSemaphore:
+    """
+    Семафор для корутин любых event loop процесса
+
+    asyncio.Semaphore привязан к одному loop, а циклы night tests и
+    research_anketa() (asyncio.run в asyncio.to_thread) работают в своих
+    loop. Счетчик здесь общий: ожидающая корутина получает future своего
+    loop, release() будит ее через call_soon_threadsafe (FIFO).
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # слот уже передан: отменена до пробуждения - вернет _grant, иначе здесь
+            if not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+                except RuntimeError:  # loop ожидающего уже закрыт
+                    continue
+            self._value += 1
+
+    def _grant(self, future: asyncio.Future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(True)
+
+
+class ProviderLimiter:
+    """
+    Лимитер одного провайдера (async context manager)
+
+    Ограничение одновременных запросов и частоты - общее для процесса,
+    в том числе для корутин в разных event loop и потоках.
+    """
+
+    def __init__(self, provider: str, max_concurrency: int, requests_per_minute: int = 0):
+        """
+        Args:
+            provider: Имя провайдера
+            max_concurrency: Максимум одновременных запросов
+            requests_per_minute: Максимум запросов в минуту (0 = без ограничения)
+        """
+        self.provider = provider
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests_per_minute = max(0, requests_per_minute)
+
+        self._semaphore = ProcessSemaphore(self.max_concurrency)
+        self._guard = threading.Lock()
+        self._next_slot = 0.0
+
+        self.stats = {
+            'acquired': 0,
+            'in_flight': 0,
+            'max_in_flight': 0,
+            'wait_seconds': 0.0,
+        }
+
+    def _reserve_rate_slot(self) -> float:
+        """Зарезервировать слот по частоте, вернуть сколько ждать (сек)"""
+        if not self.requests_per_minute:
+            return 0.0
+
+        interval = 60.0 / self.requests_per_minute
+        with self._guard:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + interval
+            return slot - now
+
+    async def __aenter__(self):
+        started = time.monotonic()
+
+        await self._semaphore.acquire()
+        _held.set(_held.get() | {self.provider})
+
+        try:
+            delay = self._reserve_rate_slot()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        except BaseException:
+            _held.set(_held.get() - {self.provider})
+            self._semaphore.release()
+            raise
+
+        with self._guard:
+            self.stats['acquired'] += 1
+            self.stats['in_flight'] += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+            self.stats['wait_seconds'] += time.monotonic() - started
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        with self._guard:
+            self.stats['in_flight'] -= 1
+        _held.set(_held.get() - {self.provider})
+        self._semaphore.release()
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_guard = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _normalize(provider: str) -> str:
+    provider = provider.lower()
+    return 'claude_code' if provider == 'claude' else provider
+
+
+def get_provider_limiter(provider: str) -> ProviderLimiter:
+    """
+    Получить общий лимитер провайдера
+
+    Args:
+        provider: gigachat, claude_code, perplexity, gigachat_embeddings, ...
+
+    Returns:
+        ProviderLimiter (один на процесс для каждого провайдера)
+    """
+    provider = _normalize(provider)
+
+    with _limiters_guard:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            concurrency, rpm = DEFAULT_LIMITS.get(provider, FALLBACK_LIMITS)
+            suffix = provider.upper()
+            limiter = ProviderLimiter(
+                provider,
+                max_concurrency=_env_int(f'PROVIDER_CONCURRENCY_{suffix}', concurrency),
+                requests_per_minute=_env_int(f'PROVIDER_RPM_{suffix}', rpm)
+            )
+            _limiters[provider] = limiter
+            logger.info(
+                f"[ProviderLimiter] {provider}: concurrency={limiter.max_concurrency}, "
+                f"rpm={limiter.requests_per_minute or 'unlimited'}"
+            )
+        return limiter
+
+
+def reset_provider_limiters(provider: Optional[str] = None):
+    """Сбросить лимитеры (например, после изменения настроек окружения)"""
+    with _limiters_guard:
+        if provider:
+            _limiters.pop(provider.lower(), None)
+        else:
+            _limiters.clear()
+
+
+@contextmanager
+def limit_requests():
+    """
+    Включить лимитер для каждого запроса UnifiedLLMClient в текущем контексте
+
+    Задачи и потоки (asyncio.to_thread), созданные внутри, наследуют область.
+    """
+    token = _request_scope.set(True)
+    try:
+        yield
+    finally:
+        _request_scope.reset(token)
+
+
+@asynccontextmanager
+async def request_limiter(provider: str):
+    """
+    Лимитер одного запроса к провайдеру
+
+    Вне limit_requests() ничего не ограничивает. Если задача уже держит слот
+    этого провайдера (вызывающий код сам обернул запрос), второй не берется.
+    """
+    provider = _normalize(provider)
+    if not _request_scope.get() or provider in _held.get():
+        yield
+        return
+    async with get_provider_limiter(provider):
+        yield
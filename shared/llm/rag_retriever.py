@@ -9,10 +9,17 @@ Iteration 51: AI Enhancement - Phase 4
 Date: 2025-10-26
 """
 
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 import logging
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue
+
+# qdrant_client - только при поиске: format_*_for_prompt нужны и без него
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
+
+try:
+    from shared.vector_replica import replicated
+except ImportError:
+    replicated = None
 
 logger = logging.getLogger(__name__)
 
@@ -30,15 +37,16 @@ class QdrantRAGRetriever:
     - fpg_requirements_gigachat: Criteria, methodologies, budget templates
     """
 
-    def __init__(self, qdrant_client: QdrantClient, embeddings_client):
+    def __init__(self, qdrant_client: 'QdrantClient', embeddings_client):
         """
         Initialize RAG retriever
 
         Args:
-            qdrant_client: Qdrant client instance
+            qdrant_client: Qdrant client instance (searches go to a local replica
+                of the small collections, see shared/vector_replica.py)
             embeddings_client: GigaChatEmbeddingsClient instance
         """
-        self.qdrant = qdrant_client
+        self.qdrant = replicated(qdrant_client) if replicated else qdrant_client
         self.embeddings = embeddings_client
 
         # Collection names
@@ -173,6 +181,7 @@ class QdrantRAGRetriever:
             query_vector = self.embeddings.embed_text(query_text)
 
             # Search with filter for specific section
+            from qdrant_client.models import FieldCondition, Filter, MatchValue
             search_results = self.qdrant.search(
                 collection_name=self.WINNERS_COLLECTION,
                 query_vector=query_vector,
@@ -246,6 +255,7 @@ class QdrantRAGRetriever:
             query_vector = self.embeddings.embed_text(query_text)
 
             # Search with filter for specific requirement type
+            from qdrant_client.models import FieldCondition, Filter, MatchValue
             search_results = self.qdrant.search(
                 collection_name=self.REQUIREMENTS_COLLECTION,
                 query_vector=query_vector,
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Research Aggregator для GrantService
+
+Сводка блока ResearcherAgentV2 (10 / 10 / 7 запросов WebSearch) по схеме
+map-reduce:
+
+- дедупликация до LLM: результаты с одним URL (без схемы, www, utm_* и
+  завершающего /) считаются одним источником; почти-дубли сниппетов
+  (Perplexity подставляет начало одного ответа во все цитаты, одни и те
+  же выдержки Росстата приходят на разные запросы) отбрасываются по
+  шинглам - crc32 окон из SHINGLE_SIZE слов, сходство Жаккара
+- map: сводка каждого запроса - параллельно (max_concurrency), вход
+  ограничен MAP_INPUT_TOKENS
+- reduce: резюме блока по сводкам запросов (повторы между сводками тоже
+  отбрасываются)
+- бюджет времени на блок: map-вызов, не успевший к дедлайну, заменяется
+  эвристической сводкой; reduce выполняется, только если осталось время.
+  Без LLM (summarize=None) - та же дедупликация и эвристика
+
+Ключевые факты берутся по кругу из запросов (не первые 10 сниппетов
+первых запросов), не более одного факта на URL.
+
+Usage:
+    async def summarize(prompt: str, max_tokens: int) -> str:
+        async with get_provider_limiter('claude_code'):
+            return await client.generate_async(prompt, max_tokens=max_tokens)
+
+    aggregator = ResearchAggregator(summarize, budget_seconds=30)
+    block = await aggregator.aggregate('block1_problem', query_results, queries)
+    block['summary'], block['key_facts'], block['aggregation']
+
+Author: Grant Service Architect
+Date: 2025-11-10
+Version: 1.0
+"""
+
+import asyncio
+import logging
+import re
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from shared.llm.prompt_budget import estimate_tokens, normalize, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 5
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+DEFAULT_BUDGET_SECONDS = 30.0
+DEFAULT_MAP_TIMEOUT = 20.0
+DEFAULT_REDUCE_TIMEOUT = 10.0
+# reduce не запускается, если до дедлайна осталось меньше
+REDUCE_MIN_SECONDS = 3.0
+
+MAP_INPUT_TOKENS = 1200
+MAP_SUMMARY_TOKENS = 200
+REDUCE_SUMMARY_TOKENS = 450
+KEY_FACT_TOKENS = 70
+MAX_KEY_FACTS = 10
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_TRACKING_PARAMS = {'yclid', 'gclid', 'fbclid', '_openstat'}
+
+BLOCK_TITLES = {
+    'block1_problem': 'Проблема и социальная значимость',
+    'block2_geography': 'География и целевая аудитория',
+    'block3_goals': 'Задачи, мероприятия и главная цель',
+}
+
+MAP_PROMPT = """Ты - аналитик грантовой заявки. Ниже - результаты веб-поиска по одному запросу.
+
+Запрос: {query}
+
+{material}
+
+Сожми результаты в 2-4 предложения: только проверяемые факты, цифры, годы и источники.
+Без вступлений, оценок и рекомендаций. Если данных нет - ответь "Нет данных"."""
+
+REDUCE_PROMPT = """Ты - аналитик грантовой заявки. Раздел исследования: {title}.
+
+Сводки по отдельным запросам раздела:
+{summaries}
+
+Объедини их в резюме раздела (до 6 предложений): сохрани цифры, годы и источники,
+убери повторы и противоречия не сглаживай. Без вступлений."""
+
+Summarize = Callable[[str, int], Awaitable[str]]
+
+
+def normalize_url(url: Optional[str]) -> str:
+    """Ключ источника: без схемы, www, фрагмента, трекинг-параметров и завершающего /"""
+    url = (url or '').strip()
+    parts = urlsplit(url if '//' in url else f'//{url}')
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if not host:
+        return url.lower()
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not key.lower().startswith('utm_') and key.lower() not in _TRACKING_PARAMS))
+    return host + parts.path.rstrip('/') + (f'?{query}' if query else '')
+
+
+def shingles(text: Optional[str], size: int = SHINGLE_SIZE) -> Set[int]:
+    """crc32 окон из size слов (короткий текст - одно окно)"""
+    words = _WORD_RE.findall(normalize(text or ''))
+    if not words:
+        return set()
+    if len(words) <= size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))}
+    return {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)}
+
+
+class NearDuplicateFilter:
+    """
+    Почти-дубли текстов: сходство Жаккара шинглов >= threshold
+
+    Кандидаты ищутся по инвертированному индексу шинглов, поэтому новый
+    текст сравнивается только с текстами, у которых есть общие окна.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD, size: int = SHINGLE_SIZE):
+        self.threshold = threshold
+        self.size = size
+        self._sets: List[Set[int]] = []
+        self._index: Dict[int, List[int]] = {}
+
+    def add(self, text: Optional[str]) -> bool:
+        """Запомнить текст; False - пустой текст или почти-дубль уже добавленного"""
+        current = shingles(text, self.size)
+        if not current:
+            return False
+
+        overlaps: Dict[int, int] = {}
+        for shingle in current:
+            for position in self._index.get(shingle, ()):
+                overlaps[position] = overlaps.get(position, 0) + 1
+        for position, common in overlaps.items():
+            if common / (len(current) + len(self._sets[position]) - common) >= self.threshold:
+                return False
+
+        position = len(self._sets)
+        self._sets.append(current)
+        for shingle in current:
+            self._index.setdefault(shingle, []).append(position)
+        return True
+
+
+@dataclass
+class QueryDigest:
+    """Результат одного запроса после дедупликации"""
+    query: str
+    content: str = ''
+    snippets: List[Dict[str, str]] = field(default_factory=list)
+    summary: str = ''
+    mode: str = 'empty'
+
+    @property
+    def has_material(self) -> bool:
+        return bool(self.content or self.snippets)
+
+
+@dataclass
+class AggregationStats:
+    """Метрики агрегации блока (сохраняются в блоке как 'aggregation')"""
+    mode: str = 'heuristic'
+    queries: int = 0
+    results: int = 0
+    unique_urls: int = 0
+    duplicate_urls: int = 0
+    duplicate_snippets: int = 0
+    map_llm: int = 0
+    map_timeouts: int = 0
+    map_errors: int = 0
+    reduce: str = 'skipped'
+    input_tokens: int = 0
+    elapsed_ms: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def heuristic_summary(digest: QueryDigest, max_tokens: int = MAP_SUMMARY_TOKENS) -> str:
+    """Сводка запроса без LLM: начало синтезированного ответа или уникальные сниппеты"""
+    text = digest.content or ' '.join(item['fact'] for item in digest.snippets)
+    return truncate_to_tokens(' '.join(text.split()), max_tokens)
+
+
+class ResearchAggregator:
+    """
+    Map-reduce сводка блока исследования
+
+    Args:
+        summarize: async (prompt, max_tokens) -> текст; None - без LLM
+        budget_seconds: Бюджет времени на блок (map + reduce)
+        map_timeout: Таймаут одного map-вызова
+        reduce_timeout: Таймаут reduce (резервируется из бюджета)
+        max_concurrency: Одновременных map-вызовов
+        max_key_facts: Сколько ключевых фактов оставить
+        clock: Источник времени (для тестов)
+    """
+
+    def __init__(
+        self,
+        summarize: Optional[Summarize] = None,
+        budget_seconds: float = DEFAULT_BUDGET_SECONDS,
+        map_timeout: float = DEFAULT_MAP_TIMEOUT,
+        reduce_timeout: float = DEFAULT_REDUCE_TIMEOUT,
+        max_concurrency: int = 5,
+        max_key_facts: int = MAX_KEY_FACTS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.summarize = summarize
+        self.budget_seconds = budget_seconds
+        self.map_timeout = map_timeout
+        self.reduce_timeout = min(reduce_timeout, budget_seconds / 2)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_key_facts = max_key_facts
+        self.clock = clock
+
+    # ---------------------------------------------------------------- дедупликация
+
+    def deduplicate(self, query_results: List[Dict[str, Any]], queries_used: List[str],
+               stats: AggregationStats) -> List[QueryDigest]:
+        """Результаты запросов -> QueryDigest без повторов URL и почти-дублей сниппетов"""
+        seen_urls: Set[str] = set()
+        snippets = NearDuplicateFilter()
+        digests = []
+
+        for index, result in enumerate(query_results):
+            query = result.get('query') or (queries_used[index] if index < len(queries_used) else '')
+            digest = QueryDigest(query=query, content=(result.get('content') or '').strip())
+
+            for item in result.get('results', []):
+                stats.results += 1
+                url = normalize_url(item.get('url'))
+                if url:
+                    # источник уже есть в материале блока - сниппет не повторяем
+                    if url in seen_urls:
+                        stats.duplicate_urls += 1
+                        continue
+                    seen_urls.add(url)
+                if not snippets.add(item.get('snippet')):
+                    if item.get('snippet'):
+                        stats.duplicate_snippets += 1
+                    continue
+                digest.snippets.append({
+                    'fact': ' '.join(item['snippet'].split()),
+                    'source': item.get('source', 'unknown'),
+                    'url': item.get('url', ''),
+                    'url_key': url,
+                    'title': item.get('title', '')
+                })
+            digests.append(digest)
+
+        stats.queries = len(digests)
+        stats.unique_urls = len(seen_urls)
+        return digests
+
+    def key_facts(self, digests: List[QueryDigest]) -> List[Dict[str, str]]:
+        """По кругу из запросов, не больше одного факта на URL"""
+        facts, used_urls = [], set()
+        queues = [list(digest.snippets) for digest in digests]
+        while len(facts) < self.max_key_facts and any(queues):
+            for queue in queues:
+                while queue:
+                    item = queue.pop(0)
+                    if item['url_key'] and item['url_key'] in used_urls:
+                        continue
+                    used_urls.add(item['url_key'])
+                    facts.append({
+                        'fact': truncate_to_tokens(item['fact'], KEY_FACT_TOKENS),
+                        'source': item['source'],
+                        'url': item['url'],
+                        'title': item['title']
+                    })
+                    break
+                if len(facts) >= self.max_key_facts:
+                    break
+        return facts
+
+    # ---------------------------------------------------------------- map / reduce
+
+    def map_prompt(self, digest: QueryDigest) -> str:
+        parts = []
+        if digest.content:
+            parts.append(f"Ответ поиска:\n{digest.content}")
+        if digest.snippets:
+            parts.append("Выдержки из источников:\n" + "\n".join(
+                f"- {item['fact']} ({item['source']})" for item in digest.snippets))
+        material = truncate_to_tokens("\n\n".join(parts), MAP_INPUT_TOKENS)
+        return MAP_PROMPT.format(query=digest.query, material=material)
+
+    async def _map(self, digests: List[QueryDigest], deadline: float, stats: AggregationStats):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(digest: QueryDigest):
+            digest.summary, digest.mode = heuristic_summary(digest), 'heuristic'
+            async with semaphore:
+                timeout = min(self.map_timeout, deadline - self.clock())
+                if timeout <= 0:
+                    stats.map_timeouts += 1
+                    return
+                prompt = self.map_prompt(digest)
+                stats.input_tokens += estimate_tokens(prompt)
+                try:
+                    text = await asyncio.wait_for(self.summarize(prompt, MAP_SUMMARY_TOKENS), timeout)
+                except asyncio.TimeoutError:
+                    stats.map_timeouts += 1
+                    return
+                except Exception as e:
+                    stats.map_errors += 1
+                    logger.warning(f"[ResearchAggregator] map '{digest.query[:60]}': {e}")
+                    return
+            text = ' '.join((text or '').split())
+            if text:
+                digest.summary, digest.mode = truncate_to_tokens(text, MAP_SUMMARY_TOKENS), 'llm'
+                stats.map_llm += 1
+
+        await asyncio.gather(*(run(digest) for digest in digests))
+
+    async def _reduce(self, block_name: str, summaries: List[str], deadline: float,
+                      stats: AggregationStats) -> str:
+        fallback = truncate_to_tokens(' '.join(summaries), REDUCE_SUMMARY_TOKENS)
+        if len(summaries) < 2:
+            return fallback
+
+        timeout = min(self.reduce_timeout, deadline - self.clock())
+        if timeout < REDUCE_MIN_SECONDS:
+            stats.reduce = 'timeout'
+            return fallback
+
+        prompt = REDUCE_PROMPT.format(
+            title=BLOCK_TITLES.get(block_name, block_name),
+            summaries="\n".join(f"{i}. {summary}" for i, summary in enumerate(summaries, 1))
+        )
+        stats.input_tokens += estimate_tokens(prompt)
+        try:
+            text = await asyncio.wait_for(self.summarize(prompt, REDUCE_SUMMARY_TOKENS), timeout)
+        except asyncio.TimeoutError:
+            stats.reduce = 'timeout'
+            return fallback
+        except Exception as e:
+            stats.reduce = 'error'
+            logger.warning(f"[ResearchAggregator] reduce {block_name}: {e}")
+            return fallback
+
+        text = ' '.join((text or '').split())
+        if not text:
+            return fallback
+        stats.reduce = 'llm'
+        return truncate_to_tokens(text, REDUCE_SUMMARY_TOKENS)
+
+    async def aggregate(self, block_name: str, query_results: List[Dict[str, Any]],
+                        queries_used: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Сводка блока
+
+        Returns:
+            {
+                'summary': 'Резюме блока',
+                'key_facts': [{'fact', 'source', 'url', 'title'}, ...],
+                'query_summaries': [{'query', 'summary', 'mode'}, ...],
+                'queries_used': [...],
+                'raw_results': query_results,
+                'aggregation': AggregationStats.as_dict()
+            }
+        """
+        started = self.clock()
+        queries_used = list(queries_used or [])
+        stats = AggregationStats()
+        digests = self.deduplicate(query_results, queries_used, stats)
+        with_material = [digest for digest in digests if digest.has_material]
+
+        if self.summarize is not None and with_material:
+            stats.mode = 'llm'
+            deadline = started + self.budget_seconds
+            await self._map(with_material, deadline - self.reduce_timeout, stats)
+            summaries = self._unique([digest.summary for digest in with_material])
+            summary = await self._reduce(block_name, summaries, deadline, stats)
+        else:
+            for digest in with_material:
+                digest.summary, digest.mode = heuristic_summary(digest), 'heuristic'
+            summary = truncate_to_tokens(' '.join(self._unique([d.summary for d in with_material])),
+                                         REDUCE_SUMMARY_TOKENS)
+
+        stats.elapsed_ms = int((self.clock() - started) * 1000)
+        logger.info(f"[ResearchAggregator] {block_name}: {stats.queries} запросов, "
+                    f"{stats.results} результатов, дублей URL {stats.duplicate_urls}, "
+                    f"сниппетов {stats.duplicate_snippets}; map llm {stats.map_llm}/{len(with_material)}, "
+                    f"reduce {stats.reduce}, {stats.elapsed_ms} ms")
+
+        return {
+            'summary': summary or 'Нет данных',
+            'key_facts': self.key_facts(digests),
+            'query_summaries': [{'query': digest.query, 'summary': digest.summary, 'mode': digest.mode}
+                                for digest in digests],
+            'queries_used': queries_used,
+            'raw_results': query_results,
+            'aggregation': stats.as_dict()
+        }
+
+    @staticmethod
+    def _unique(texts: List[str]) -> List[str]:
+        """Тексты без пустых и почти-дублей (сводки разных запросов часто совпадают)"""
+        seen = NearDuplicateFilter()
+        return [text for text in texts if seen.add(text)]
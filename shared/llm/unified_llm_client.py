@@ -15,6 +15,9 @@ from .config import (
     DEFAULT_TEMPERATURE, MAX_TOKENS, REQUEST_TIMEOUT,
     ASYNC_CONNECTION_LIMIT, ASYNC_CONNECTION_LIMIT_PER_HOST, ASYNC_REQUEST_TIMEOUT
 )
+from .http_sessions import get_session_manager, make_token_key
+from .context_sessions import SharedContextConversation, supports_sessions
+from .provider_limiter import request_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +40,7 @@ class UnifiedLLMClient:
         self.temperature = temperature
         self.prompt_config = prompt_config or {}
         self.session = None
+        self._owns_session = False
         
         # Настройки для разных провайдеров
         if self.provider == "ollama":
@@ -48,6 +52,7 @@ class UnifiedLLMClient:
             self.client_id = kwargs.get("client_id", GIGACHAT_CLIENT_ID)
             self.access_token = None
             self.token_expires_at = 0
+            self._token_key = make_token_key("gigachat", self.api_key, "GIGACHAT_API_PERS")
         elif self.provider == "perplexity":
             self.base_url = PERPLEXITY_BASE_URL
             self.api_key = kwargs.get("api_key", PERPLEXITY_API_KEY)
@@ -63,15 +68,21 @@ class UnifiedLLMClient:
         self.debug_log = []  # Детальный лог для Web Admin отладки
     
     async def __aenter__(self):
-        """Создаём aiohttp сессию при входе в контекст"""
+        """Берём общую сессию процесса или создаём собственную aiohttp сессию"""
         # Отключаем SSL проверку для GigaChat (часто проблемы с корпоративными сертификатами)
-        connector = aiohttp.TCPConnector(
-            limit=ASYNC_CONNECTION_LIMIT, 
-            limit_per_host=ASYNC_CONNECTION_LIMIT_PER_HOST,
-            ssl=False  # Отключаем SSL проверку
+        self.session = get_session_manager().get_session(
+            "llm", timeout=ASYNC_REQUEST_TIMEOUT, ssl=False
         )
-        timeout = aiohttp.ClientTimeout(total=ASYNC_REQUEST_TIMEOUT)
-        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        self._owns_session = self.session is None
+
+        if self._owns_session:
+            connector = aiohttp.TCPConnector(
+                limit=ASYNC_CONNECTION_LIMIT, 
+                limit_per_host=ASYNC_CONNECTION_LIMIT_PER_HOST,
+                ssl=False  # Отключаем SSL проверку
+            )
+            timeout = aiohttp.ClientTimeout(total=ASYNC_REQUEST_TIMEOUT)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
         
         # Для GigaChat получаем токен авторизации
         if self.provider == "gigachat":
@@ -86,7 +97,8 @@ class UnifiedLLMClient:
         Args:
             prompt: Текст промпта
             provider: Провайдер ('gigachat', 'ollama', 'perplexity') или None для автоопределения
-            **kwargs: Дополнительные параметры (temperature, max_tokens и т.д.)
+            **kwargs: Дополнительные параметры (temperature, max_tokens, session_id для Claude Code;
+                return_session=True - вернуть (текст, session_id из ответа Claude Code))
 
         Returns:
             Сгенерированный текст
@@ -103,31 +115,43 @@ class UnifiedLLMClient:
         max_tokens = kwargs.get('max_tokens', MAX_TOKENS)
 
         try:
-            if target_provider == "gigachat":
-                return await self._generate_gigachat(prompt, temperature, max_tokens)
-            elif target_provider == "ollama":
-                return await self._generate_ollama(prompt, temperature, max_tokens)
-            elif target_provider == "perplexity":
-                return await self._generate_perplexity(prompt, temperature, max_tokens)
-            elif target_provider in ["claude_code", "claude"]:
-                return await self._generate_claude_code(prompt, temperature, max_tokens)
-            else:
-                raise ValueError(f"Неподдерживаемый провайдер: {target_provider}")
-                
+            # Внутри limit_requests() (night tests) - общий лимитер провайдера на запрос
+            async with request_limiter(target_provider):
+                if target_provider == "gigachat":
+                    return await self._generate_gigachat(prompt, temperature, max_tokens)
+                elif target_provider == "ollama":
+                    return await self._generate_ollama(prompt, temperature, max_tokens)
+                elif target_provider == "perplexity":
+                    return await self._generate_perplexity(prompt, temperature, max_tokens)
+                elif target_provider in ["claude_code", "claude"]:
+                    return await self._generate_claude_code(prompt, temperature, max_tokens,
+                                                            session_id=kwargs.get('session_id'),
+                                                            return_session=kwargs.get('return_session', False))
+                else:
+                    raise ValueError(f"Неподдерживаемый провайдер: {target_provider}")
+
         except Exception as e:
             logger.error(f"Ошибка генерации через {target_provider}: {e}")
             raise
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Закрываем aiohttp сессию при выходе из контекста"""
-        if self.session:
+        """Закрываем собственную aiohttp сессию (общую закрывает менеджер)"""
+        if self.session and self._owns_session:
             await self.session.close()
+        self.session = None
+        self._owns_session = False
     
     async def _get_gigachat_token(self):
-        """Получает токен авторизации для GigaChat"""
+        """Получает токен авторизации для GigaChat (общий кэш процесса)"""
         if self.access_token and time.time() < self.token_expires_at:
             return  # Токен ещё действителен
-        
+
+        self.access_token, self.token_expires_at = await get_session_manager().get_token(
+            self._token_key, self._fetch_gigachat_token
+        )
+
+    async def _fetch_gigachat_token(self):
+        """Запрашивает новый токен GigaChat, возвращает (token, expires_at)"""
         logger.info(f"🔐 Получаем токен авторизации для GigaChat...")
         self.debug_log.append(f"🔐 Запрос токена GigaChat: {self.auth_url}")
         
@@ -145,11 +169,11 @@ class UnifiedLLMClient:
             async with self.session.post(url, headers=headers, data=data, ssl=False) as response:
                 if response.status == 200:
                     token_data = await response.json()
-                    self.access_token = token_data["access_token"]
                     # Токен действует 30 минут, обновляем за 5 минут до истечения
-                    self.token_expires_at = time.time() + token_data.get("expires_in", 1800) - 300
+                    expires_at = time.time() + token_data.get("expires_in", 1800) - 300
                     logger.info(f"✅ Токен GigaChat получен успешно")
                     self.debug_log.append(f"✅ Токен получен, срок действия: {token_data.get('expires_in', 1800)}сек")
+                    return token_data["access_token"], expires_at
                 else:
                     error_text = await response.text()
                     raise Exception(f"Ошибка получения токена: {response.status} - {error_text}")
@@ -169,6 +193,47 @@ class UnifiedLLMClient:
         """
         # Используем универсальный метод generate_async
         return await self.generate_async(prompt, temperature=self.temperature, max_tokens=max_tokens)
+
+    def conversation(self, preamble: str, provider: str = None,
+                     name: str = "conversation") -> SharedContextConversation:
+        """
+        Разговор с общим контекстом: преамбула отправляется один раз
+        (Claude Code - через session_id), вопросы - как follow-up.
+        Для провайдеров без сессий преамбула добавляется к каждому вопросу.
+
+        Args:
+            preamble: Общий контекст (роль, данные анкеты, текст заявки)
+            provider: Провайдер (по умолчанию провайдер клиента)
+            name: Имя разговора для логов, метрик и session_id
+        """
+        target_provider = provider or self.provider
+
+        use_sessions = supports_sessions(target_provider)
+
+        async def generate(prompt: str, session_id: Optional[str] = None, **kwargs):
+            if session_id:
+                kwargs['session_id'] = session_id
+            kwargs.setdefault('temperature', self.temperature)
+            if use_sessions:
+                # session_id из ответа: разговор проверяет, что follow-up попал в свою сессию
+                kwargs['return_session'] = True
+            return await self.generate_async(prompt, provider=target_provider, **kwargs)
+
+        return SharedContextConversation(
+            generate, preamble, use_sessions, name=name,
+            delete_session=self._delete_claude_session if use_sessions else None
+        )
+
+    async def _delete_claude_session(self, session_id: str) -> bool:
+        """Удалить сессию Claude Code API (DELETE /sessions/{id})"""
+        if self.session is None:
+            # вызов после выхода из async with - открываем HTTP сессию на один запрос
+            async with self:
+                return await self._delete_claude_session(session_id)
+
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        async with self.session.delete(f"{self.base_url}/sessions/{session_id}", headers=headers) as response:
+            return response.status == 200
     
     def _clean_markdown_formatting(self, text: str) -> str:
         """Очищает текст от markdown разметки и лишнего форматирования"""
@@ -271,7 +336,16 @@ class UnifiedLLMClient:
                             continue
                         else:
                             raise Exception(f"GigaChat rate limit превышен: {error_text}")
-                    
+
+                    elif response.status == 401 and attempt < max_retries - 1:
+                        # Общий токен отозван/истёк раньше срока - сбрасываем кэш и повторяем
+                        logger.warning("⚠️ GigaChat 401, обновляем токен...")
+                        get_session_manager().invalidate_token(self._token_key)
+                        self.access_token = None
+                        await self._get_gigachat_token()
+                        headers["Authorization"] = f"Bearer {self.access_token}"
+                        continue
+
                     else:
                         error_text = await response.text()
                         raise Exception(f"GigaChat HTTP {response.status}: {error_text}")
@@ -313,7 +387,8 @@ class UnifiedLLMClient:
                 error_text = await response.text()
                 raise Exception(f"Perplexity HTTP {response.status}: {error_text}")
 
-    async def _generate_claude_code(self, prompt: str, temperature: float = None, max_tokens: int = None) -> str:
+    async def _generate_claude_code(self, prompt: str, temperature: float = None, max_tokens: int = None,
+                                    session_id: Optional[str] = None, return_session: bool = False):
         """
         Генерация через Claude Code HTTP API
 
@@ -342,6 +417,9 @@ class UnifiedLLMClient:
 
         if max_tokens:
             payload["max_tokens"] = max_tokens
+        if session_id:
+            # Продолжение разговора: API хранит историю сессии
+            payload["session_id"] = session_id
 
         try:
             async with self.session.post(url, headers=headers, json=payload) as response:
@@ -364,6 +442,8 @@ class UnifiedLLMClient:
                         f"Claude API: {len(result)} chars, model={model_used}"
                     )
 
+                    if return_session:
+                        return result, session_id
                     return result
 
                 else:
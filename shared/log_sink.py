@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Log Sink - фоновая запись аудита и телеметрии в PostgreSQL пачками
+
+Раньше каждая запись (auth_logs, researcher_logs, счетчики промптов)
+открывала свое соединение и выполняла INSERT / UPDATE прямо в обработчике
+запроса. Теперь обработчик только кладет строку в ограниченную очередь:
+
+    submit_log('auth_logs', {...})  --> queue.Queue(max_queue) --> поток log-sink
+                                                                     |
+                        каждые batch_size строк или flush_interval с  v
+                                       execute_values / UPDATE ... FROM (VALUES ...)
+
+- Очередь переполнена: строка отбрасывается или уходит в spill файл
+  (JSON lines, LOG_SINK_OVERFLOW=spill|drop). Файл пишет поток log-sink:
+  submit() только добавляет строку в ограниченный буфер переполнения
+  (max_overflow, сверх него - отбрасывается со счетчиком). Spill
+  воспроизводится при следующем запуске, вместе с .replaying файлами,
+  которые не дописал упавший процесс
+- БД недоступна: пачка уходит в spill; ошибка данных в пачке - строки
+  пишутся по одной, битые отбрасываются (как раньше при одиночных INSERT)
+- Завершение процесса: atexit дописывает очередь (close)
+
+LOG_SINK=sync - синхронная запись в вызывающем потоке (скрипты, отладка).
+
+Usage:
+    from shared.log_sink import submit_log
+    submit_log('auth_logs', {'user_id': 1, 'action': 'login', 'success': True})
+
+Author: Grant Service Architect
+Date: 2025-11-10
+Version: 1.0
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from psycopg2.extras import execute_values
+except ImportError:  # writers с execute_values нужны только при записи в PostgreSQL
+    execute_values = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: .replaying файлы не блокируются (один процесс на spill)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent.parent
+DEFAULT_SPILL_PATH = ROOT_DIR / 'data' / 'cache' / 'log_sink_spill.jsonl'
+
+# writer(cursor, rows) - записать пачку строк одного потока
+Writer = Callable[[Any, List[Dict[str, Any]]], None]
+
+_STOP = object()
+
+
+# ============================================================================
+# Потоки (таблицы)
+# ============================================================================
+
+def insert_writer(table: str, columns: Tuple[str, ...], template: Optional[str] = None) -> Writer:
+    """INSERT пачки строк через execute_values"""
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s"
+
+    def write(cursor, rows: List[Dict[str, Any]]):
+        execute_values(cursor, query, [tuple(row.get(column) for column in columns) for row in rows],
+                       template=template, page_size=max(1, len(rows)))
+
+    return write
+
+
+AUTH_LOG_COLUMNS = ('user_id', 'action', 'ip_address', 'user_agent', 'success', 'error_message', 'created_at')
+
+RESEARCHER_LOG_COLUMNS = ('user_id', 'session_id', 'query_text', 'perplexity_response', 'sources',
+                          'usage_stats', 'cost', 'status', 'error_message', 'credit_balance')
+
+_insert_researcher_logs = insert_writer(
+    'researcher_logs', RESEARCHER_LOG_COLUMNS,
+    template="(%s, %s, %s, %s, %s::jsonb, %s::jsonb, %s, %s, %s, %s)"
+)
+
+
+def write_researcher_logs(cursor, rows: List[Dict[str, Any]]):
+    """
+    researcher_logs: credit_balance=None - последний известный баланс
+    (запрос выполняется здесь, в потоке записи, а не в обработчике)
+    """
+    balance = None
+    if any(row.get('credit_balance') is None for row in rows):
+        cursor.execute("""
+            SELECT credit_balance FROM researcher_logs
+            WHERE credit_balance > 0
+            ORDER BY created_at DESC
+            LIMIT 1
+        """)
+        result = cursor.fetchone()
+        balance = result[0] if result else 0.0
+
+    filled = []
+    for row in rows:
+        if row.get('credit_balance') is None:
+            row = {**row, 'credit_balance': balance}
+        elif float(row['credit_balance']) > 0:
+            balance = row['credit_balance']
+        filled.append(row)
+    _insert_researcher_logs(cursor, filled)
+
+
+def write_prompt_usage(cursor, rows: List[Dict[str, Any]]):
+    """
+    ai_agent_prompts: счетчики использования, агрегированные по prompt_key
+    (один UPDATE на пачку вместо UPDATE на каждый вызов)
+    """
+    totals: Dict[str, List[float]] = {}
+    for row in rows:
+        uses, score_sum, scored = totals.setdefault(row['prompt_key'], [0, 0.0, 0])
+        score = row.get('score')
+        totals[row['prompt_key']] = [uses + 1, score_sum + (score or 0.0), scored + (score is not None)]
+
+    execute_values(cursor, """
+        UPDATE ai_agent_prompts AS p
+        SET usage_count = p.usage_count + v.uses,
+            last_used_at = NOW(),
+            avg_score = CASE
+                WHEN v.scored = 0 THEN p.avg_score
+                ELSE COALESCE((p.avg_score * p.usage_count + v.score_sum) / (p.usage_count + v.scored),
+                              v.score_sum / v.scored)
+            END
+        FROM (VALUES %s) AS v(prompt_key, uses, score_sum, scored)
+        WHERE p.prompt_key = v.prompt_key
+    """, [(key, uses, score_sum, scored) for key, (uses, score_sum, scored) in totals.items()],
+        template="(%s, %s::int, %s::float8, %s::int)", page_size=max(1, len(totals)))
+
+
+STREAMS: Dict[str, Writer] = {
+    'auth_logs': insert_writer('auth_logs', AUTH_LOG_COLUMNS),
+    'researcher_logs': write_researcher_logs,
+    'prompt_usage': write_prompt_usage,
+}
+
+
+# ============================================================================
+# Sink
+# ============================================================================
+
+def _default_connect():
+    from data.database import get_db
+    return get_db().connect()
+
+
+class LogSink:
+    """
+    Ограниченная очередь + поток записи пачками
+
+    submit() не блокирует и не бросает исключений: обработчик запроса
+    никогда не ждет записи телеметрии.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any] = _default_connect,
+        streams: Optional[Dict[str, Writer]] = None,
+        max_queue: int = 10000,
+        max_overflow: Optional[int] = None,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        overflow: str = 'spill',
+        spill_path: Path = DEFAULT_SPILL_PATH,
+        background: bool = True
+    ):
+        """
+        Args:
+            connect: Фабрика соединения psycopg2 (держится потоком записи)
+            streams: Потоки {имя: writer(cursor, rows)} (по умолчанию STREAMS)
+            max_queue: Размер очереди
+            max_overflow: Строк в буфере переполнения до записи в spill
+                (по умолчанию max_queue)
+            batch_size: Строк в пачке (N)
+            flush_interval: Максимальная задержка записи, с (T)
+            overflow: 'spill' - в файл при переполнении, 'drop' - отбросить
+            spill_path: JSON lines файл для spill
+            background: False - запись в вызывающем потоке (LOG_SINK=sync)
+        """
+        if overflow not in ('spill', 'drop'):
+            raise ValueError(f"overflow должен быть 'spill' или 'drop': {overflow}")
+
+        self.connect = connect
+        self.streams = dict(STREAMS if streams is None else streams)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = Path(spill_path)
+        self.background = background
+
+        self.queue: queue.Queue = queue.Queue(maxsize=max(1, max_queue))
+        self.max_overflow = max(1, max_queue if max_overflow is None else max_overflow)
+        self._overflow_rows: List[Tuple[str, Dict[str, Any]]] = []
+        self._overflow_lock = threading.Lock()
+        self.stats = defaultdict(int)
+        self._conn = None
+        self._thread: Optional[threading.Thread] = None
+        self._spill_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def register(self, stream: str, writer: Writer):
+        """Добавить поток (таблицу) со своим writer"""
+        self.streams[stream] = writer
+
+    def submit(self, stream: str, row: Dict[str, Any]) -> bool:
+        """
+        Поставить строку в очередь записи
+
+        Returns:
+            False - строка отброшена или ушла в spill (очередь переполнена)
+        """
+        if stream not in self.streams:
+            logger.error(f"[LogSink] Unknown stream: {stream}")
+            return False
+
+        self.stats['submitted'] += 1
+        if not self.background:
+            self._write({stream: [row]})
+            return True
+
+        try:
+            self.queue.put_nowait((stream, row))
+            return True
+        except queue.Full:
+            self._overflow([(stream, row)])
+            return False
+
+    def start(self) -> 'LogSink':
+        """Запустить поток записи (сначала воспроизводится spill прошлого запуска)"""
+        if self.background and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name='log-sink', daemon=True)
+            self._thread.start()
+        return self
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Дождаться записи всего, что уже в очереди (тесты, завершение)"""
+        if not self.background or self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Дописать очередь и остановить поток записи"""
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.warning("[LogSink] Queue full on close, remaining rows go to spill")
+                self._drain_to_spill()
+            self._thread.join(timeout)
+        self._thread = None
+        self._flush_overflow()  # поток записи не запускался или не успел
+        self._close_connection()
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        self._flush_overflow()
+        self._replay_spill()
+
+        pending: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        count = 0
+        deadline = 0.0
+
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if count else None
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if self._overflow_rows:
+                self._flush_overflow()
+
+            if item is _STOP or isinstance(item, threading.Event):
+                if count:
+                    self._write(pending)
+                    pending, count = defaultdict(list), 0
+                if item is _STOP:
+                    return
+                item.set()
+                continue
+
+            if item is not None:
+                stream, row = item
+                pending[stream].append(row)
+                count += 1
+                if count == 1:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if count and (count >= self.batch_size or time.monotonic() >= deadline):
+                self._write(pending)
+                pending, count = defaultdict(list), 0
+
+    def _write(self, pending: Dict[str, List[Dict[str, Any]]]):
+        """Записать пачки потоков, каждая своей транзакцией"""
+        with self._write_lock:
+            for stream, rows in pending.items():
+                if rows:
+                    self._write_stream(stream, rows)
+
+    def _write_stream(self, stream: str, rows: List[Dict[str, Any]]):
+        writer = self.streams[stream]
+        try:
+            conn = self._connection()
+        except Exception as e:
+            logger.warning(f"[LogSink] DB unavailable ({e}), {len(rows)} {stream} rows go to spill")
+            self._spill([(stream, row) for row in rows])
+            return
+
+        try:
+            cursor = conn.cursor()
+            writer(cursor, rows)
+            conn.commit()
+            cursor.close()
+            self.stats['written'] += len(rows)
+            self.stats['batches'] += 1
+            return
+        except Exception as e:
+            self._rollback()
+            if len(rows) == 1 or not self._alive():
+                self._fail(stream, rows, e)
+                return
+            logger.warning(f"[LogSink] Batch of {len(rows)} {stream} rows failed ({e}), writing one by one")
+
+        for row in rows:
+            try:
+                cursor = conn.cursor()
+                writer(cursor, [row])
+                conn.commit()
+                cursor.close()
+                self.stats['written'] += 1
+            except Exception as e:
+                self._rollback()
+                self._fail(stream, [row], e)
+
+    def _fail(self, stream: str, rows: List[Dict[str, Any]], error: Exception):
+        if self._alive():
+            # Ошибка данных: строку не записать и позже
+            self.stats['failed'] += len(rows)
+            logger.error(f"[LogSink] Dropped {len(rows)} {stream} rows: {error}")
+        else:
+            self._close_connection()
+            self._spill([(stream, row) for row in rows])
+
+    def _connection(self):
+        if self._conn is None or getattr(self._conn, 'closed', False):
+            self._conn = self.connect()
+        return self._conn
+
+    def _alive(self) -> bool:
+        """Соединение живо (ошибка была в данных, а не в связи с БД)"""
+        return self._conn is not None and not getattr(self._conn, 'closed', False)
+
+    def _rollback(self):
+        try:
+            self._conn.rollback()
+        except Exception:
+            self._close_connection()
+
+    def _close_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+    # ------------------------------------------------------------------
+    # Overflow / spill
+    # ------------------------------------------------------------------
+
+    def _overflow(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Очередь переполнена (вызывающий поток): без файлового I/O"""
+        dropped = len(items)
+        if self.overflow == 'spill':
+            with self._overflow_lock:
+                accepted = items[:max(0, self.max_overflow - len(self._overflow_rows))]
+                self._overflow_rows.extend(accepted)
+            dropped -= len(accepted)
+        self.stats['dropped'] += dropped
+        if self.stats['overflows'] % 1000 == 0:
+            logger.warning(f"[LogSink] Queue full ({self.queue.maxsize}), policy={self.overflow}, "
+                           f"dropped={self.stats['dropped']}, spilled={self.stats['spilled']}")
+        self.stats['overflows'] += 1
+
+    def _flush_overflow(self):
+        """Записать буфер переполнения в spill (поток записи или close)"""
+        with self._overflow_lock:
+            items, self._overflow_rows = self._overflow_rows, []
+        if items:
+            self._spill(items)
+
+    def _spill(self, items: List[Tuple[str, Dict[str, Any]]]):
+        try:
+            with self._spill_lock:
+                self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.spill_path, 'a', encoding='utf-8') as f:
+                    for stream, row in items:
+                        f.write(json.dumps({'stream': stream, 'row': row}, ensure_ascii=False, default=str) + '\n')
+            self.stats['spilled'] += len(items)
+        except Exception as e:
+            self.stats['dropped'] += len(items)
+            logger.error(f"[LogSink] Spill failed, dropped {len(items)} rows: {e}")
+
+    def _drain_to_spill(self):
+        items = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, tuple):
+                items.append(item)
+        if items:
+            self._spill(items)
+
+    def _replay_spill(self):
+        """
+        Записать строки, ушедшие в spill в прошлый раз
+
+        Spill переименовывается в <spill>.<pid>.replaying и воспроизводится
+        под блокировкой файла. .replaying файлы без блокировки остались от
+        упавшего процесса и воспроизводятся тоже.
+        """
+        own_path = self.spill_path.with_suffix(f'.{os.getpid()}.replaying')
+        if self.spill_path.exists():
+            with self._spill_lock:
+                try:
+                    os.replace(self.spill_path, own_path)
+                except FileNotFoundError:
+                    # spill уже забрал другой процесс (между exists() и replace)
+                    pass
+
+        pattern = f"{self.spill_path.stem}.*replaying"
+        for replay_path in sorted(self.spill_path.parent.glob(pattern), key=lambda path: path != own_path):
+            self._replay_file(replay_path)
+
+    def _replay_file(self, replay_path: Path):
+        try:
+            f = open(replay_path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+
+        with f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return  # воспроизводит другой процесс
+                try:
+                    if os.stat(replay_path).st_ino != os.fstat(f.fileno()).st_ino:
+                        return
+                except FileNotFoundError:
+                    return  # другой процесс уже воспроизвел и удалил файл
+
+            pending: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('stream') in self.streams:
+                    pending[entry['stream']].append(entry['row'])
+
+            replayed = 0
+            for stream, rows in pending.items():
+                for offset in range(0, len(rows), self.batch_size):
+                    self._write({stream: rows[offset:offset + self.batch_size]})
+                replayed += len(rows)
+            self.stats['replayed'] += replayed
+            replay_path.unlink()
+        logger.info(f"[LogSink] Replayed spill {replay_path.name}: {replayed} rows")
+
+
+# ============================================================================
+# Глобальный sink процесса
+# ============================================================================
+
+_sink: Optional[LogSink] = None
+_sink_guard = threading.Lock()
+
+
+def get_log_sink() -> LogSink:
+    """
+    Общий LogSink процесса (поток записи запускается при первом вызове)
+
+    Env:
+        LOG_SINK: thread (по умолчанию) | sync
+        LOG_SINK_OVERFLOW: spill (по умолчанию) | drop
+        LOG_SINK_BATCH / LOG_SINK_FLUSH_MS / LOG_SINK_QUEUE
+    """
+    global _sink
+    if _sink is None:
+        with _sink_guard:
+            if _sink is None:
+                sink = LogSink(
+                    batch_size=int(os.getenv('LOG_SINK_BATCH', '200')),
+                    flush_interval=int(os.getenv('LOG_SINK_FLUSH_MS', '500')) / 1000,
+                    max_queue=int(os.getenv('LOG_SINK_QUEUE', '10000')),
+                    overflow=os.getenv('LOG_SINK_OVERFLOW', 'spill').lower(),
+                    background=os.getenv('LOG_SINK', 'thread').lower() != 'sync'
+                )
+                sink.start()
+                atexit.register(sink.close)
+                _sink = sink
+    return _sink
+
+
+def set_log_sink(sink: Optional[LogSink]):
+    """Подменить общий sink (тесты); предыдущий дописывается и закрывается"""
+    global _sink
+    with _sink_guard:
+        previous, _sink = _sink, sink
+    if previous is not None and previous is not sink:
+        previous.close()
+
+
+def submit_log(stream: str, row: Dict[str, Any]) -> bool:
+    """Поставить строку в очередь общего sink (не блокирует)"""
+    try:
+        return get_log_sink().submit(stream, row)
+    except Exception as e:
+        logger.error(f"[LogSink] submit failed: {e}")
+        return False
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Logging Config - неблокирующее логирование для бота, агентов и web-admin
+
+Обработчики (файл, stdout) работают в отдельном потоке QueueListener;
+в вызывающем потоке (event loop бота) остается только постановка записи
+в очередь:
+
+    logger.info(...) --> QueueHandler --> queue.SimpleQueue --> QueueListener
+                         + SamplingFilter                        |-> FileHandler
+                                                                 '-> StreamHandler
+
+- Формат: text (как раньше) или json (одна запись на строку, поля extra= попадают в JSON)
+- Уровни по модулям: LOG_LEVELS="agents.reference_points=WARNING,httpx=WARNING"
+- Семплирование горячих циклов: LOG_SAMPLE="agents.reference_points=20" -
+  из DEBUG/INFO записей этих логгеров пишется каждая 20-я (по шаблону сообщения);
+  WARNING и выше не семплируются
+
+Env:
+    LOG_LEVEL   - уровень корневого логгера (INFO)
+    LOG_FORMAT  - text | json (text)
+    LOG_LEVELS  - уровни по модулям
+    LOG_SAMPLE  - семплирование по модулям
+    LOG_QUEUE=0 - обработчики в вызывающем потоке (отладка)
+
+Usage:
+    from shared.logging_config import configure_logging
+    configure_logging(log_file='logs/telegram_bot.log')
+
+Author: Grant Service Architect
+Date: 2025-11-10
+Version: 1.0
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Union
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Атрибуты LogRecord, которые не являются extra-полями
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_installed = []
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON запись на строку: ts, level, logger, msg + extra поля"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, сохраняющий traceback отдельно от сообщения
+
+    Стандартный prepare() склеивает traceback с текстом, и JsonFormatter
+    не смог бы вынести его в поле exc.
+    """
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает каждую N-ю DEBUG/INFO запись логгеров с заданным префиксом
+
+    Счетчик ведется по (логгер, шаблон сообщения), поэтому для горячих
+    циклов лучше %-форматирование: logger.debug("RP %s", rp_id) -
+    все итерации считаются одной записью и семплируются вместе.
+    """
+
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        # длинные префиксы первыми: agents.reference_points.x важнее agents
+        self.rates = sorted(((prefix, max(1, int(rate))) for prefix, rate in rates.items()),
+                            key=lambda item: len(item[0]), reverse=True)
+        self._counters = defaultdict(int)
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def _rate(self, name: str) -> int:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + '.'):
+                return rate
+        return 1
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate == 1:
+            return True
+        key = (record.name, record.msg if isinstance(record.msg, str) else id(record.msg))
+        with self._lock:
+            count = self._counters[key]
+            self._counters[key] = count + 1
+        if count % rate:
+            self.suppressed += 1
+            return False
+        record.sampled = rate
+        return True
+
+
+def parse_mapping(value: Optional[str]) -> Dict[str, str]:
+    """"a.b=WARNING, c=DEBUG" -> {'a.b': 'WARNING', 'c': 'DEBUG'}"""
+    mapping = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            name, _, setting = item.partition('=')
+            mapping[name.strip()] = setting.strip()
+    return mapping
+
+
+def configure_logging(
+    log_file: Optional[str] = None,
+    level: Union[int, str, None] = None,
+    fmt: Optional[str] = None,
+    module_levels: Optional[Dict[str, Union[int, str]]] = None,
+    sample: Optional[Dict[str, int]] = None,
+    stream: bool = True,
+    use_queue: Optional[bool] = None,
+    handlers: Iterable[logging.Handler] = ()
+) -> logging.Logger:
+    """
+    Настроить корневой логгер (повторный вызов заменяет прежнюю настройку)
+
+    Args:
+        log_file: Файл логов (None - без файла)
+        level: Уровень корневого логгера (по умолчанию LOG_LEVEL или INFO)
+        fmt: 'text' или 'json' (по умолчанию LOG_FORMAT или text)
+        module_levels: Уровни по модулям (дополняют LOG_LEVELS)
+        sample: Семплирование по модулям {префикс: N} (дополняет LOG_SAMPLE)
+        stream: Писать в stdout
+        use_queue: Писать через QueueListener (по умолчанию да, LOG_QUEUE=0 - нет)
+        handlers: Дополнительные обработчики
+
+    Returns:
+        Корневой логгер
+    """
+    global _listener
+
+    level = level or os.getenv('LOG_LEVEL', 'INFO')
+    fmt = (fmt or os.getenv('LOG_FORMAT', 'text')).lower()
+    levels = {**parse_mapping(os.getenv('LOG_LEVELS')), **(module_levels or {})}
+    rates = {**{name: int(rate) for name, rate in parse_mapping(os.getenv('LOG_SAMPLE')).items()},
+             **(sample or {})}
+    if use_queue is None:
+        use_queue = os.getenv('LOG_QUEUE', '1') != '0'
+
+    formatter = JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT)
+    targets = list(handlers)
+    if log_file:
+        os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+        targets.append(logging.FileHandler(log_file, encoding='utf-8'))
+    if stream:
+        targets.append(logging.StreamHandler())
+    for handler in targets:
+        handler.setFormatter(formatter)
+
+    with _lock:
+        shutdown_logging()
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.setLevel(level if isinstance(level, int) else level.upper())
+        for name, module_level in levels.items():
+            logging.getLogger(name).setLevel(module_level if isinstance(module_level, int)
+                                             else module_level.upper())
+
+        if use_queue:
+            log_queue = queue.SimpleQueue()
+            entry = _QueueHandler(log_queue)
+            _listener = logging.handlers.QueueListener(log_queue, *targets, respect_handler_level=True)
+            _listener.start()
+            entries = [entry]
+        else:
+            entries = targets
+
+        sampling = SamplingFilter(rates) if rates else None
+        for handler in entries:
+            if sampling:
+                handler.addFilter(sampling)
+            root.addHandler(handler)
+        _installed[:] = targets
+
+    return root
+
+
+def shutdown_logging():
+    """Дописать очередь и закрыть обработчики (вызывается и через atexit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    for handler in _installed:
+        handler.close()
+    _installed.clear()
+
+
+def get_sampling_filter() -> Optional[SamplingFilter]:
+    """SamplingFilter корневого логгера (статистика подавленных записей)"""
+    for handler in logging.getLogger().handlers:
+        for log_filter in handler.filters:
+            if isinstance(log_filter, SamplingFilter):
+                return log_filter
+    return None
+
+
+atexit.register(shutdown_logging)
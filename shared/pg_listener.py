@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PG Listener - фоновый поток LISTEN канала PostgreSQL
+
+Общая основа PromptChangeListener (web-admin/utils/prompt_manager.py) и
+RBACChangeListener (data/database/auth.py):
+- отдельное соединение в autocommit, LISTEN <channel>
+- ожидание уведомлений через select() с таймаутом (stop() не ждет дольше
+  poll_timeout)
+- после каждого (пере)подключения вызывается on_reconnect() - подписчик
+  перечитывает состояние целиком, изменения, пропущенные пока соединения
+  не было, не теряются
+- каждое уведомление - on_notify(payload)
+- при ошибке - переподключение с экспоненциальной задержкой
+
+Usage:
+    class CacheListener(PgListenThread):
+        def on_reconnect(self):
+            cache.reload()
+
+        def on_notify(self, payload):
+            cache.invalidate(payload)
+
+    listener = CacheListener(connect, 'cache_changes', name='cache-listener')
+    listener.start()
+    listener.connected.wait(5)
+    listener.stop()
+
+Author: Grant Service Architect
+Date: 2025-11-10
+Version: 1.0
+"""
+
+import logging
+import select
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PgListenThread(threading.Thread):
+    """
+    Поток LISTEN одного канала с переподключением
+
+    Подклассы переопределяют on_reconnect() и on_notify(). Пока соединения
+    нет, connected сброшен - владелец может обновлять данные по TTL.
+    """
+
+    def __init__(self, connect: Callable[[], Any], channel: str, name: str,
+                 poll_timeout: float = 5.0, max_reconnect_delay: float = 60.0):
+        """
+        Args:
+            connect: Фабрика отдельного соединения psycopg2 (не из пула запросов)
+            channel: Канал LISTEN
+            name: Имя потока (и префикс логов)
+            poll_timeout: Таймаут select(), с
+            max_reconnect_delay: Максимальная задержка переподключения, с
+        """
+        super().__init__(name=name, daemon=True)
+        self.connect = connect
+        self.channel = channel
+        self.poll_timeout = poll_timeout
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = threading.Event()
+        self._stop_event = threading.Event()
+
+    def on_reconnect(self) -> None:
+        """Соединение (пере)установлено - перечитать состояние целиком"""
+
+    def on_notify(self, payload: str) -> None:
+        """Уведомление канала"""
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self) -> None:
+        delay = 1.0
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = self.connect()
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {self.channel}")
+                cursor.close()
+
+                self.on_reconnect()
+                self.connected.set()
+                delay = 1.0
+                logger.info(f"[{self.name}] listening on '{self.channel}'")
+
+                while not self._stop_event.is_set():
+                    if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.on_notify(conn.notifies.pop(0).payload)
+
+            except Exception as e:
+                logger.warning(f"[{self.name}] listener error: {e}; reconnect in {delay:.0f}s")
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+            finally:
+                self.connected.clear()
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Query Cache - общий между процессами кеш результатов запросов админки
+
+Заменяет per-process st.cache_data: результат тяжелого SELECT вычисляется
+один раз и доступен всем сессиям и воркерам Streamlit.
+
+Инвалидация по тегам: тег = имя таблицы. У каждого тега есть версия;
+запись кеша хранит версии своих тегов на момент вычисления и считается
+устаревшей, если версия любого тега изменилась. Версии повышаются:
+- при commit соединения GrantServiceDatabase, записавшего в таблицу
+  (InvalidatingConnection - агенты, бот, execute_update админки)
+- явно через invalidate_tables('grants', ...)
+
+Backend (ADMIN_QUERY_CACHE):
+    sqlite    файл на диске, общий для процессов одного сервера (по умолчанию)
+    postgres  UNLOGGED таблицы (Migration 019), общий для нескольких серверов
+    off       кеш отключен
+
+Usage:
+    from shared.query_cache import get_query_cache, shared_cache, invalidate_tables, tables_read
+
+    rows = get_query_cache().get_or_compute(
+        'rows', (query, params), lambda: run(query, params), tags=tables_read(query), ttl=60
+    )
+
+    @shared_cache(ttl=60, tags=('users', 'sessions'))
+    def get_users_metrics(): ...
+
+    invalidate_tables('grants', 'sent_documents')
+
+Author: Grant Service Architect Agent
+Date: 2025-11-05
+Version: 1.0
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKENDS = ('sqlite', 'postgres', 'off')
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / 'data' / 'cache' / 'admin_query_cache.sqlite'
+DEFAULT_TTL_SECONDS = 60
+
+_TABLE = r'"?([A-Za-z_][\w.]*)"?'
+_READ_RE = re.compile(r'\b(?:FROM|JOIN)\s+' + _TABLE, re.IGNORECASE)
+_WRITE_RE = re.compile(r'\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?)\s+(?:ONLY\s+)?' + _TABLE,
+                       re.IGNORECASE)
+_NOT_TABLES = {'set', 'select', 'lateral', 'only'}
+_READ_ONLY_RE = re.compile(r'^\s*(?:SELECT|WITH)\b', re.IGNORECASE)
+
+
+def _table_name(name: str) -> str:
+    return name.split('.')[-1].lower()
+
+
+def tables_read(query: str) -> List[str]:
+    """Таблицы из FROM / JOIN (теги записи кеша)"""
+    return sorted({_table_name(t) for t in _READ_RE.findall(query) if t.lower() not in _NOT_TABLES})
+
+
+def tables_written(query: str) -> List[str]:
+    """Таблицы, в которые пишет запрос (INSERT / UPDATE / DELETE / TRUNCATE)"""
+    return sorted({_table_name(t) for t in _WRITE_RE.findall(query) if t.lower() not in _NOT_TABLES})
+
+
+def is_cacheable_query(query: str) -> bool:
+    """Только чистые SELECT: без записи (в т.ч. в CTE) и блокировок"""
+    return (
+        bool(_READ_ONLY_RE.match(query))
+        and not tables_written(query)
+        and not re.search(r'\bFOR\s+(?:UPDATE|SHARE)\b', query, re.IGNORECASE)
+    )
+
+
+def cache_key(namespace: str, *parts: Any) -> str:
+    payload = json.dumps([namespace, *parts], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Backends
+# ----------------------------------------------------------------------
+
+class SQLiteCacheBackend:
+    """Файл SQLite (WAL): записи кеша и версии тегов"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, timeout: float = 5.0):
+        self.path = Path(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = self._conn()
+        conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                tag_versions TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cache_tags (
+                tag TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            );
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, int]]]:
+        row = self._conn().execute(
+            "SELECT value, tag_versions FROM cache_entries WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def set(self, key: str, value: bytes, tag_versions: Dict[str, int], expires_at: float) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, tag_versions, expires_at) VALUES (?, ?, ?, ?)",
+            (key, value, json.dumps(tag_versions), expires_at)
+        )
+
+    def tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        tags = list(tags)
+        if not tags:
+            return {}
+        placeholders = ','.join('?' * len(tags))
+        rows = self._conn().execute(
+            f"SELECT tag, version FROM cache_tags WHERE tag IN ({placeholders})", tags
+        ).fetchall()
+        versions = dict.fromkeys(tags, 0)
+        versions.update(rows)
+        return versions
+
+    def bump(self, tags: Iterable[str]) -> None:
+        self._conn().executemany(
+            "INSERT INTO cache_tags (tag, version) VALUES (?, 1) "
+            "ON CONFLICT(tag) DO UPDATE SET version = version + 1",
+            [(tag,) for tag in tags]
+        )
+
+    def purge_expired(self) -> int:
+        return self._conn().execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM cache_entries")
+
+
+class PostgresCacheBackend:
+    """UNLOGGED таблицы admin_query_cache / admin_query_cache_tags (Migration 019)"""
+
+    def __init__(self, connect: Optional[Callable[[], Any]] = None):
+        self._connect = connect or self._default_connect
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _default_connect():
+        # Обычное соединение (не InvalidatingConnection): запись в таблицы кеша
+        # не должна сама инвалидировать кеш
+        import psycopg2
+        from data.database.models import GrantServiceDatabase
+        return psycopg2.connect(**GrantServiceDatabase().connection_params)
+
+    def _execute(self, query: str, params: Any = None, fetch: bool = False, many: bool = False):
+        import psycopg2
+
+        with self._lock:
+            for attempt in (1, 2):
+                if self._conn is None or self._conn.closed:
+                    self._conn = self._connect()
+                    self._conn.autocommit = True
+                try:
+                    cursor = self._conn.cursor()
+                    if many:
+                        cursor.executemany(query, params)
+                    else:
+                        cursor.execute(query, params)
+                    result = cursor.fetchall() if fetch else cursor.rowcount
+                    cursor.close()
+                    return result
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    # Разорванное соединение - одна повторная попытка с новым
+                    self._conn = None
+                    if attempt == 2:
+                        raise
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, int]]]:
+        rows = self._execute(
+            "SELECT value, tag_versions FROM admin_query_cache WHERE key = %s AND expires_at > NOW()",
+            (key,), fetch=True
+        )
+        if not rows:
+            return None
+        value, versions = rows[0]
+        return bytes(value), versions if isinstance(versions, dict) else json.loads(versions)
+
+    def set(self, key: str, value: bytes, tag_versions: Dict[str, int], expires_at: float) -> None:
+        import psycopg2
+        self._execute("""
+            INSERT INTO admin_query_cache (key, value, tag_versions, expires_at)
+            VALUES (%s, %s, %s, to_timestamp(%s))
+            ON CONFLICT (key) DO UPDATE
+                SET value = EXCLUDED.value,
+                    tag_versions = EXCLUDED.tag_versions,
+                    expires_at = EXCLUDED.expires_at
+        """, (key, psycopg2.Binary(value), json.dumps(tag_versions), expires_at))
+
+    def tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        tags = list(tags)
+        if not tags:
+            return {}
+        rows = self._execute(
+            "SELECT tag, version FROM admin_query_cache_tags WHERE tag = ANY(%s)", (tags,), fetch=True
+        )
+        versions = dict.fromkeys(tags, 0)
+        versions.update(rows)
+        return versions
+
+    def bump(self, tags: Iterable[str]) -> None:
+        self._execute("""
+            INSERT INTO admin_query_cache_tags (tag, version) VALUES (%s, 1)
+            ON CONFLICT (tag) DO UPDATE SET version = admin_query_cache_tags.version + 1
+        """, [(tag,) for tag in tags], many=True)
+
+    def purge_expired(self) -> int:
+        return self._execute("DELETE FROM admin_query_cache WHERE expires_at <= NOW()")
+
+    def clear(self) -> None:
+        self._execute("TRUNCATE admin_query_cache")
+
+
+# ----------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------
+
+class QueryCache:
+    """
+    Кеш результатов с версиями тегов
+
+    Ошибки backend не прерывают запрос: результат вычисляется без кеша.
+    """
+
+    def __init__(self, backend, default_ttl: int = DEFAULT_TTL_SECONDS):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'errors': 0, 'invalidations': 0}
+
+    def get_or_compute(
+        self,
+        namespace: str,
+        key_parts: Tuple,
+        compute: Callable[[], Any],
+        tags: Iterable[str],
+        ttl: Optional[int] = None
+    ) -> Any:
+        """
+        Значение из кеша или compute()
+
+        Версии тегов читаются ДО вычисления: если запись в таблицу произошла
+        во время compute(), сохраненный результат сразу окажется устаревшим.
+        """
+        tags = sorted(set(tags))
+        key = cache_key(namespace, *key_parts)
+
+        try:
+            cached = self.backend.get(key)
+            if cached is not None:
+                value, stored_versions = cached
+                if self.backend.tag_versions(stored_versions) == stored_versions:
+                    self.stats['hits'] += 1
+                    return pickle.loads(value)
+                self.stats['stale'] += 1
+            versions = self.backend.tag_versions(tags)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Query cache unavailable, computing directly: {e}")
+            return compute()
+
+        self.stats['misses'] += 1
+        result = compute()
+
+        try:
+            ttl = self.default_ttl if ttl is None else ttl
+            self.backend.set(key, pickle.dumps(result), versions, time.time() + ttl)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Query cache write failed: {e}")
+
+        return result
+
+    def invalidate(self, *tags: str) -> None:
+        tags = sorted({_table_name(tag) for tag in tags if tag})
+        if not tags:
+            return
+        try:
+            self.backend.bump(tags)
+            self.stats['invalidations'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Query cache invalidation failed for {tags}: {e}")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+_cache: Optional[QueryCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> Optional[QueryCache]:
+    """
+    Глобальный кеш из переменных окружения (None, если отключен):
+        ADMIN_QUERY_CACHE       sqlite | postgres | off (default: sqlite)
+        ADMIN_QUERY_CACHE_PATH  файл для sqlite (default: data/cache/admin_query_cache.sqlite)
+        ADMIN_QUERY_CACHE_TTL   TTL по умолчанию, секунды (default: 60)
+    """
+    global _cache
+
+    mode = os.getenv('ADMIN_QUERY_CACHE', 'sqlite').lower()
+    if mode == 'off':
+        return None
+    if mode not in CACHE_BACKENDS:
+        raise ValueError(f"ADMIN_QUERY_CACHE must be one of {CACHE_BACKENDS}, got {mode!r}")
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if mode == 'postgres':
+                    backend = PostgresCacheBackend()
+                else:
+                    backend = SQLiteCacheBackend(Path(os.getenv('ADMIN_QUERY_CACHE_PATH', str(DEFAULT_CACHE_PATH))))
+                _cache = QueryCache(backend, int(os.getenv('ADMIN_QUERY_CACHE_TTL', str(DEFAULT_TTL_SECONDS))))
+    return _cache
+
+
+def set_query_cache(cache: Optional[QueryCache]) -> None:
+    """Подменить глобальный кеш (тесты, бенчмарки)"""
+    global _cache
+    _cache = cache
+
+
+def available_query_cache() -> Optional[QueryCache]:
+    """get_query_cache() без исключений: кеш недоступен (неверный режим, нет БД) - None"""
+    try:
+        return get_query_cache()
+    except Exception as e:
+        logger.warning(f"Query cache unavailable: {e}")
+        return None
+
+
+def invalidate_tables(*tables: str) -> None:
+    """Инвалидировать записи кеша, читающие из таблиц"""
+    cache = available_query_cache()
+    if cache is not None:
+        cache.invalidate(*tables)
+
+
+def shared_cache(ttl: Optional[int] = None, tags: Iterable[str] = ()):
+    """
+    Декоратор: результат функции в общем кеше (замена st.cache_data)
+
+    Как и в st.cache_data, аргументы с именем на '_' не входят в ключ.
+
+    Args:
+        ttl: Время жизни, секунды
+        tags: Таблицы, при записи в которые результат устаревает
+    """
+    tags = tuple(tags)
+
+    def decorator(func):
+        import inspect
+        signature = inspect.signature(func)
+        namespace = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = available_query_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key_parts = tuple(sorted(
+                (name, value) for name, value in bound.arguments.items() if not name.startswith('_')
+            ))
+            return cache.get_or_compute(namespace, key_parts, lambda: func(*args, **kwargs), tags, ttl)
+
+        wrapper.invalidate = lambda: invalidate_tables(*tags)
+        return wrapper
+
+    return decorator
+
+
+# ----------------------------------------------------------------------
+# Инвалидация при записи через psycopg2
+# ----------------------------------------------------------------------
+
+_connection_class = None
+
+
+def invalidating_connection_class():
+    """
+    Класс соединения psycopg2: таблицы, в которые писали курсоры, инвалидируются
+    после успешного commit (явного или при выходе из `with conn:`)
+    """
+    global _connection_class
+    if _connection_class is not None:
+        return _connection_class
+
+    import psycopg2.extensions
+
+    cursor_classes: Dict[type, type] = {}
+
+    def tracking_cursor_class(base: type) -> type:
+        cls = cursor_classes.get(base)
+        if cls is None:
+            def execute(self, query, vars=None):
+                result = base.execute(self, query, vars)
+                self.connection._track_writes(query)
+                return result
+
+            def executemany(self, query, vars_list):
+                result = base.executemany(self, query, vars_list)
+                self.connection._track_writes(query)
+                return result
+
+            cls = type(f"Invalidating{base.__name__}", (base,), {'execute': execute, 'executemany': executemany})
+            cursor_classes[base] = cls
+        return cls
+
+    class InvalidatingConnection(psycopg2.extensions.connection):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._written_tables = set()
+
+        def _track_writes(self, query):
+            if isinstance(query, bytes):
+                query = query.decode('utf-8', errors='replace')
+            self._written_tables.update(tables_written(str(query)))
+            if self.autocommit:
+                self._flush_invalidations()
+
+        def _flush_invalidations(self):
+            if self._written_tables:
+                tables, self._written_tables = self._written_tables, set()
+                invalidate_tables(*tables)
+
+        def cursor(self, *args, **kwargs):
+            base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+            kwargs['cursor_factory'] = tracking_cursor_class(base)
+            return super().cursor(*args, **kwargs)
+
+        def commit(self):
+            super().commit()
+            self._flush_invalidations()
+
+        def rollback(self):
+            super().rollback()
+            self._written_tables.clear()
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            result = super().__exit__(exc_type, exc_value, traceback)
+            if exc_type is None:
+                self._flush_invalidations()
+            else:
+                self._written_tables.clear()
+            return result
+
+    _connection_class = InvalidatingConnection
+    return _connection_class
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Фоновые задачи бота и упорядочивание обновлений по пользователю
+
+- KeyedSerializer: обработка строго по очереди внутри одного ключа
+  (чат/пользователь), параллельно между разными ключами
+- BackgroundTaskManager: долгие этапы pipeline (аудит, исследование, грант)
+  выполняются как отслеживаемые фоновые задачи с лимитом на пользователя
+  и отменой, чтобы обработчик update возвращался сразу
+
+Модуль не зависит от python-telegram-bot (используется в update_dispatcher.py).
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Coroutine, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class KeyedSerializer:
+    """
+    Per-key FIFO блокировки
+
+    asyncio.Lock отдает блокировку ожидающим в порядке FIFO, поэтому задачи
+    одного ключа выполняются в порядке поступления. Блокировки удаляются,
+    когда у ключа не остается ожидающих.
+    """
+
+    def __init__(self):
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+    async def run(self, key: Optional[Hashable], coroutine: Coroutine) -> Any:
+        """Выполнить coroutine после всех ранее поступивших задач ключа"""
+        if key is None:
+            return await coroutine
+
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+
+        try:
+            async with lock:
+                return await coroutine
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                del self._locks[key]
+
+    @property
+    def active_keys(self) -> int:
+        return len(self._locks)
+
+
+class BackgroundTaskManager:
+    """
+    Отслеживаемые фоновые задачи с лимитом на пользователя
+
+    Example:
+        task = manager.start(user_id, "grant:AN-001", run_grant())
+        if task is None:
+            # у пользователя уже max_per_user задач
+            ...
+        manager.cancel_user(user_id)
+        await manager.shutdown()
+    """
+
+    def __init__(self, max_per_user: Optional[int] = None):
+        """
+        Args:
+            max_per_user: Максимум одновременных задач пользователя
+                (по умолчанию BOT_MAX_TASKS_PER_USER или 2)
+        """
+        if max_per_user is None:
+            max_per_user = int(os.getenv('BOT_MAX_TASKS_PER_USER', '2'))
+        self.max_per_user = max(1, max_per_user)
+        self._tasks: Dict[Hashable, Dict[str, asyncio.Task]] = {}
+
+    def in_flight(self, user_id: Hashable) -> List[str]:
+        """Имена выполняющихся задач пользователя"""
+        return list(self._tasks.get(user_id, {}))
+
+    def can_start(self, user_id: Hashable) -> bool:
+        return len(self._tasks.get(user_id, {})) < self.max_per_user
+
+    def start(self, user_id: Hashable, name: str, coroutine: Coroutine) -> Optional[asyncio.Task]:
+        """
+        Запустить фоновую задачу
+
+        Returns:
+            asyncio.Task или None, если лимит пользователя исчерпан
+            либо задача с таким именем уже выполняется
+        """
+        user_tasks = self._tasks.setdefault(user_id, {})
+        if name in user_tasks or len(user_tasks) >= self.max_per_user:
+            coroutine.close()
+            if not user_tasks:
+                del self._tasks[user_id]
+            return None
+
+        task = asyncio.create_task(coroutine, name=f"{user_id}:{name}")
+        user_tasks[name] = task
+        task.add_done_callback(lambda t: self._on_done(user_id, name, t))
+
+        logger.info(f"[TASKS] Started {name} for user {user_id} ({len(user_tasks)}/{self.max_per_user})")
+        return task
+
+    def cancel_user(self, user_id: Hashable) -> int:
+        """Отменить все задачи пользователя, вернуть их количество"""
+        tasks = list(self._tasks.get(user_id, {}).values())
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    async def shutdown(self, timeout: float = 5.0):
+        """Отменить все задачи и дождаться их завершения (post_shutdown)"""
+        tasks = [task for user_tasks in self._tasks.values() for task in user_tasks.values()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+            logger.info(f"[TASKS] Cancelled {len(tasks)} background tasks on shutdown")
+
+    @property
+    def total(self) -> int:
+        return sum(len(user_tasks) for user_tasks in self._tasks.values())
+
+    def _on_done(self, user_id: Hashable, name: str, task: asyncio.Task):
+        user_tasks = self._tasks.get(user_id, {})
+        if user_tasks.get(name) is task:
+            del user_tasks[name]
+            if not user_tasks:
+                self._tasks.pop(user_id, None)
+
+        if task.cancelled():
+            logger.info(f"[TASKS] {name} for user {user_id} cancelled")
+        elif task.exception():
+            logger.error(f"[TASKS] {name} for user {user_id} failed: {task.exception()}")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Конкурентная обработка Telegram updates
+
+PerUserUpdateProcessor подключается через
+Application.builder().concurrent_updates(...): updates разных пользователей
+обрабатываются параллельно, updates одного чата - строго по порядку.
+
+Долгие этапы (агенты) не должны держать очередь чата - их обработчики
+выносят работу в BackgroundTaskManager (shared/telegram_utils/background_tasks.py).
+"""
+
+import logging
+import os
+from typing import Awaitable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from shared.telegram_utils.background_tasks import KeyedSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Параллельно между чатами, последовательно внутри чата"""
+
+    def __init__(self, max_concurrent_updates: Optional[int] = None):
+        """
+        Args:
+            max_concurrent_updates: Общий лимит одновременно обрабатываемых updates
+                (по умолчанию BOT_MAX_CONCURRENT_UPDATES или 256)
+        """
+        if max_concurrent_updates is None:
+            max_concurrent_updates = int(os.getenv('BOT_MAX_CONCURRENT_UPDATES', '256'))
+        super().__init__(max_concurrent_updates)
+        self._serializer = KeyedSerializer()
+
+    @staticmethod
+    def update_key(update: object) -> Optional[int]:
+        """Ключ упорядочивания: чат, иначе пользователь (None - без упорядочивания)"""
+        if isinstance(update, Update):
+            if update.effective_chat:
+                return update.effective_chat.id
+            if update.effective_user:
+                return update.effective_user.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable) -> None:
+        await self._serializer.run(self.update_key(update), coroutine)
+
+    async def initialize(self) -> None:
+        logger.info(f"[DISPATCHER] Concurrent updates: max {self.max_concurrent_updates}, ordered per chat")
+
+    async def shutdown(self) -> None:
+        pass
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Webhook режим бота: прием updates с ограниченной очередью и spool в PostgreSQL
+
+    Telegram --POST--> aiohttp /telegram/webhook
+                          |  очередь заполнена дольше enqueue_timeout -> 503
+                          |  (Telegram повторит доставку позже)
+                          v
+                  asyncio.Queue(maxsize) --> workers --> process_update(payload)
+                          |                                   |
+                  telegram_update_spool (pending) ------> done (пачками)
+
+Update пишется в spool до постановки в очередь, ответ 200 - только после
+обоих шагов, поэтому после перезапуска необработанные updates
+воспроизводятся, а не теряются (в отличие от
+run_polling(drop_pending_updates=True)). Отмененная на остановке обработка
+не отмечается done и тоже воспроизводится.
+
+Модуль не зависит от python-telegram-bot: обработчик - любая корутина
+process_update(payload: dict). Подключение к Application - serve_webhook().
+Локальная проверка: scripts/fake_telegram_sender.py
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import os
+import signal
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiohttp import web
+from psycopg2.extras import Json, execute_values
+
+logger = logging.getLogger(__name__)
+
+ProcessUpdate = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class UpdateSpool:
+    """
+    Durable spool необработанных updates (таблица telegram_update_spool)
+
+    Методы синхронные (psycopg2) - WebhookIntake вызывает их через asyncio.to_thread.
+    """
+
+    def __init__(self, db):
+        """
+        Args:
+            db: GrantServiceDatabase
+        """
+        self.db = db
+
+    def add(self, update_id: int, payload: Dict[str, Any]):
+        """Сохранить принятый update (повторная доставка игнорируется)"""
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO telegram_update_spool (update_id, payload)
+                VALUES (%s, %s)
+                ON CONFLICT (update_id) DO NOTHING
+            """, (update_id, Json(payload)))
+            conn.commit()
+            cursor.close()
+
+    def mark_done(self, update_ids: List[int]):
+        """
+        Отметить обработанные updates
+
+        Upsert: update может быть обработан раньше, чем завершилась его запись в spool.
+        """
+        if not update_ids:
+            return
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            execute_values(cursor, """
+                INSERT INTO telegram_update_spool (update_id, status, processed_at)
+                VALUES %s
+                ON CONFLICT (update_id) DO UPDATE
+                SET status = 'done', processed_at = EXCLUDED.processed_at
+            """, [(update_id, 'done') for update_id in update_ids],
+                template="(%s, %s, CURRENT_TIMESTAMP)", page_size=500)
+            conn.commit()
+            cursor.close()
+
+    def pending(self, limit: int = 10000) -> List[Dict[str, Any]]:
+        """Необработанные updates в порядке update_id (для replay при старте)"""
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT payload FROM telegram_update_spool
+                WHERE status = 'pending' AND payload IS NOT NULL
+                ORDER BY update_id
+                LIMIT %s
+            """, (limit,))
+            rows = cursor.fetchall()
+            cursor.close()
+        return [row[0] if isinstance(row[0], dict) else json.loads(row[0]) for row in rows]
+
+    def purge(self, older_than_hours: int = 24) -> int:
+        """Удалить обработанные updates старше older_than_hours"""
+        with self.db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                DELETE FROM telegram_update_spool
+                WHERE status = 'done'
+                    AND processed_at < NOW() - make_interval(hours => %s)
+            """, (older_than_hours,))
+            deleted = cursor.rowcount
+            conn.commit()
+            cursor.close()
+        return deleted
+
+
+class WebhookIntake:
+    """
+    aiohttp сервер приема updates с ограниченной очередью
+
+    Example:
+        intake = WebhookIntake(process_update, spool=UpdateSpool(db), secret_token="...")
+        await intake.start(host="0.0.0.0", port=8443)
+        ...
+        await intake.stop()
+    """
+
+    DONE_FLUSH_INTERVAL = 0.5   # сек между записями пачек "done" в spool
+    DONE_FLUSH_SIZE = 100       # или раньше, если накопилось столько
+    SEEN_CACHE_SIZE = 10000     # update_id для отсечения повторных доставок
+
+    def __init__(
+        self,
+        process_update: ProcessUpdate,
+        spool: Optional[UpdateSpool] = None,
+        queue_size: int = 1000,
+        workers: int = 32,
+        secret_token: Optional[str] = None,
+        path: str = "/telegram/webhook",
+        enqueue_timeout: float = 1.0
+    ):
+        """
+        Args:
+            process_update: Корутина обработки update (dict из JSON Telegram)
+            spool: UpdateSpool (None - без durability, для локальной отладки)
+            queue_size: Размер очереди (backpressure при заполнении)
+            workers: Количество обработчиков очереди
+            secret_token: Проверка заголовка X-Telegram-Bot-Api-Secret-Token
+            path: URL путь webhook
+            enqueue_timeout: Сколько ждать места в очереди до ответа 503
+        """
+        self.process_update = process_update
+        self.spool = spool
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.workers = max(1, workers)
+        self.secret_token = secret_token
+        self.path = path
+        self.enqueue_timeout = enqueue_timeout
+
+        self._seen: "OrderedDict[int, None]" = OrderedDict()
+        self._done: List[int] = []
+        self._tasks: List[asyncio.Task] = []
+        self._runner: Optional[web.AppRunner] = None
+
+        self.stats = {
+            'accepted': 0,
+            'duplicates': 0,
+            'rejected_busy': 0,
+            'replayed': 0,
+            'processed': 0,
+            'failed': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get("/health", self.handle_health)
+        return app
+
+    async def start(self, host: str = "0.0.0.0", port: int = 8443):
+        """Воспроизвести spool, запустить обработчики и HTTP сервер"""
+        await self.start_workers()
+
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"[WEBHOOK] Listening on {host}:{port}{self.path} (queue={self.queue.maxsize}, workers={self.workers})")
+
+    async def start_workers(self):
+        """Обработчики очереди + replay spool (без HTTP сервера - для тестов)"""
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._flush_loop()))
+        await self.replay()
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Остановить прием, дообработать очередь, записать done в spool"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"[WEBHOOK] {self.queue.qsize()} updates left in queue, will be replayed from spool")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        await self._flush_done()
+        logger.info(f"[WEBHOOK] Stopped: {self.stats}")
+
+    async def replay(self):
+        """Поставить в очередь необработанные updates из spool (после перезапуска)"""
+        if not self.spool:
+            return
+
+        payloads = await asyncio.to_thread(self.spool.pending)
+        for payload in payloads:
+            update_id = payload.get('update_id')
+            if self._remember(update_id):
+                await self.queue.put(payload)
+                self.stats['replayed'] += 1
+
+        if payloads:
+            logger.info(f"[WEBHOOK] Replayed {self.stats['replayed']} pending updates from spool")
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        if self.secret_token:
+            header = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+            if not hmac.compare_digest(header, self.secret_token):
+                return web.Response(status=403)
+
+        try:
+            payload = await request.json()
+            update_id = int(payload['update_id'])
+        except (ValueError, KeyError, TypeError):
+            return web.Response(status=400)
+
+        if not self._remember(update_id):
+            self.stats['duplicates'] += 1
+            return web.Response(status=200)
+
+        # Сначала spool: в очередь попадает только сохраненный update
+        if self.spool:
+            try:
+                await asyncio.to_thread(self.spool.add, update_id, payload)
+            except Exception as e:
+                logger.error(f"[WEBHOOK] Spool write failed for {update_id}: {e}")
+                self._seen.pop(update_id, None)
+                return web.Response(status=500)
+
+        # Backpressure: нет места в очереди -> 503, Telegram повторит доставку
+        # (запись в spool остается pending: повтор или replay обработают ее один раз)
+        try:
+            await asyncio.wait_for(self.queue.put(payload), timeout=self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self._seen.pop(update_id, None)
+            self.stats['rejected_busy'] += 1
+            return web.Response(status=503, headers={'Retry-After': '1'})
+
+        self.stats['accepted'] += 1
+        return web.Response(status=200)
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'queue': self.queue.qsize(),
+            'queue_max': self.queue.maxsize,
+            **self.stats
+        })
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    async def _worker(self):
+        while True:
+            payload = await self.queue.get()
+            try:
+                await self.process_update(payload)
+                self.stats['processed'] += 1
+                self._done.append(payload.get('update_id'))
+            except asyncio.CancelledError:
+                # Остановка посреди обработки: update остается pending для replay
+                raise
+            except Exception as e:
+                # Ошибка обработчика не повод повторять update бесконечно
+                self.stats['failed'] += 1
+                logger.error(f"[WEBHOOK] Update {payload.get('update_id')} failed: {e}")
+                self._done.append(payload.get('update_id'))
+            finally:
+                self.queue.task_done()
+
+            if len(self._done) >= self.DONE_FLUSH_SIZE:
+                await self._flush_done()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.DONE_FLUSH_INTERVAL)
+            await self._flush_done()
+
+    async def _flush_done(self):
+        if not self._done:
+            return
+        done, self._done = self._done, []
+        if not self.spool:
+            return
+        try:
+            await asyncio.to_thread(self.spool.mark_done, done)
+        except Exception as e:
+            logger.error(f"[WEBHOOK] Failed to mark {len(done)} updates done: {e}")
+            self._done.extend(done)
+
+    def _remember(self, update_id: Optional[int]) -> bool:
+        """Запомнить update_id, False если уже был"""
+        if update_id is None:
+            return True
+        if update_id in self._seen:
+            return False
+        self._seen[update_id] = None
+        if len(self._seen) > self.SEEN_CACHE_SIZE:
+            self._seen.popitem(last=False)
+        return True
+
+
+async def serve_webhook(
+    application,
+    spool: Optional[UpdateSpool] = None,
+    on_startup: Optional[Callable[[Any], Awaitable[None]]] = None,
+    on_shutdown: Optional[Callable[[Any], Awaitable[None]]] = None
+):
+    """
+    Запустить telegram.ext.Application в webhook режиме до SIGINT/SIGTERM
+
+    Настройка через окружение:
+        WEBHOOK_URL - публичный https адрес (без пути), setWebhook при старте
+        WEBHOOK_SECRET - секрет для X-Telegram-Bot-Api-Secret-Token
+        WEBHOOK_HOST / WEBHOOK_PORT - адрес aiohttp сервера (0.0.0.0:8443)
+        WEBHOOK_QUEUE_SIZE / WEBHOOK_WORKERS - размер очереди и число обработчиков
+    """
+    from telegram import Update
+
+    async def process(payload: Dict[str, Any]):
+        update = Update.de_json(payload, application.bot)
+        await application.update_processor.process_update(update, application.process_update(update))
+
+    secret = os.getenv('WEBHOOK_SECRET') or None
+    intake = WebhookIntake(
+        process,
+        spool=spool,
+        queue_size=int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000')),
+        workers=int(os.getenv('WEBHOOK_WORKERS', '32')),
+        secret_token=secret
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows
+
+    async with application:
+        if on_startup:
+            await on_startup(application)
+        await application.start()
+
+        await intake.start(
+            host=os.getenv('WEBHOOK_HOST', '0.0.0.0'),
+            port=int(os.getenv('WEBHOOK_PORT', '8443'))
+        )
+
+        webhook_url = os.getenv('WEBHOOK_URL')
+        if webhook_url:
+            await application.bot.set_webhook(
+                url=webhook_url.rstrip('/') + intake.path,
+                secret_token=secret,
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=False
+            )
+
+        started = time.monotonic()
+        try:
+            await stop.wait()
+        finally:
+            await intake.stop()
+            await application.stop()
+            if on_shutdown:
+                await on_shutdown(application)
+            logger.info(f"[WEBHOOK] Served {time.monotonic() - started:.0f}s")
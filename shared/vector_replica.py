@@ -0,0 +1,634 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vector Replica - локальная копия небольших коллекций Qdrant
+
+fpg_real_winners (~70 векторов), fpg_requirements_gigachat (~18) и
+knowledge_sections (сотни) раньше на каждый запрос уходили по сети в
+production Qdrant. ReplicatedQdrantClient оборачивает QdrantClient:
+- коллекция до max_points снимается в локальный снимок: матрица float32
+  (memory-mapped файл) + payload в JSON
+- search() выполняется локально: скалярные произведения NumPy по всей
+  матрице, фильтры payload - векторные маски
+- снимок обновляется инкрементально: версия точки = хеш payload, новые
+  и измененные точки докачиваются, удаленные - выбрасываются;
+  обновление идет в фоне, запросы в это время обслуживает старый снимок
+- вектор может смениться при том же payload (переэмбеддинг другой
+  моделью): точки, записанные через upsert() этого клиента, докачиваются
+  всегда, а при каждом обновлении векторы нескольких "неизмененных"
+  точек (по кругу) сверяются с Qdrant - расхождение = полная перекачка
+- если Qdrant недоступен, используется снимок с диска (интервью не
+  теряет контекст ФПГ)
+- большие коллекции, named vectors, метрики кроме Cosine/Dot и
+  неподдерживаемые условия фильтра - запрос уходит в удаленный Qdrant
+
+Остальные методы (upsert, get_collection, ...) проксируются в Qdrant;
+upsert / delete помечают снимок коллекции устаревшим.
+
+Переменные окружения:
+    QDRANT_REPLICA              on / off (по умолчанию on)
+    QDRANT_REPLICA_DIR          каталог снимков (data/cache/qdrant_replica)
+    QDRANT_REPLICA_MAX_POINTS   порог размера коллекции (5000)
+    QDRANT_REPLICA_REFRESH      период проверки обновлений, сек (300)
+
+Usage:
+    from shared.vector_replica import replicated
+
+    self.qdrant = replicated(QdrantClient(host=qdrant_host, port=qdrant_port))
+    hits = self.qdrant.search(collection_name='knowledge_sections', query_vector=vector, limit=5)
+
+Author: Grant Service Architect
+Date: 2025-11-09
+Version: 1.0
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLICA_DIR = Path(__file__).parent.parent / 'data' / 'cache' / 'qdrant_replica'
+DEFAULT_MAX_POINTS = 5000
+DEFAULT_REFRESH_SECONDS = 300
+SCROLL_BATCH = 256
+RETRIEVE_BATCH = 128
+VERIFY_SAMPLE = 8      # сколько неизмененных точек сверять по вектору при обновлении
+VERIFY_TOLERANCE = 1e-4
+
+SUPPORTED_DISTANCES = ('Cosine', 'Dot')
+
+
+class ReplicaUnsupported(Exception):
+    """Запрос нельзя выполнить по локальному снимку - нужен удаленный Qdrant"""
+
+
+@dataclass
+class LocalScoredPoint:
+    """Результат локального поиска (совместим с ScoredPoint: id, score, payload)"""
+    id: Any
+    score: float
+    payload: Dict[str, Any]
+    version: int = 0
+    vector: Optional[List[float]] = None
+
+
+def replica_enabled() -> bool:
+    return NUMPY_AVAILABLE and os.getenv('QDRANT_REPLICA', 'on').lower() not in ('off', '0', 'false')
+
+
+def payload_digest(payload: Optional[Dict[str, Any]]) -> str:
+    """Версия точки: хеш payload (порядок ключей не важен)"""
+    data = json.dumps(payload or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def _upserted_ids(args, kwargs) -> Optional[List[Any]]:
+    """id точек из аргументов upsert (None - формат не распознан)"""
+    points = kwargs.get('points', args[0] if args else None)
+    if hasattr(points, 'ids'):  # Batch
+        return list(points.ids)
+    try:
+        return [point.id for point in points]
+    except (TypeError, AttributeError):
+        return None
+
+
+def _remote_key(remote) -> Optional[str]:
+    """Имя каталога снимков для сервера Qdrant (None - клиент уже локальный)"""
+    options = getattr(remote, 'init_options', None) or {}
+    location = options.get('location')
+    if location == ':memory:' or options.get('path'):
+        return None
+    address = options.get('url') or location or f"{options.get('host') or 'localhost'}_{options.get('port') or 6333}"
+    return ''.join(ch if ch.isalnum() or ch in '._-' else '_' for ch in str(address)).strip('_')
+
+
+class CollectionReplica:
+    """
+    Снимок одной коллекции: vectors.f32 (memmap, строки нормированы для
+    Cosine) + meta.json (ids, payloads, версии точек, метрика)
+    """
+
+    def __init__(self, name: str, directory: Path):
+        self.name = name
+        self.directory = Path(directory)
+        self.ids: List[Any] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self.digests: List[str] = []
+        self.distance = 'Cosine'
+        self.dim = 0
+        self.vectors = None
+        self.synced_at = 0.0
+        self._columns: Dict[str, Any] = {}
+        self._id_array = None
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def loaded(self) -> bool:
+        return self.vectors is not None
+
+    def is_stale(self, refresh_seconds: float) -> bool:
+        return time.time() - self.synced_at >= refresh_seconds
+
+    def load(self) -> bool:
+        """Открыть снимок с диска (False - снимка нет или он поврежден)"""
+        meta_path = self.directory / 'meta.json'
+        if not meta_path.exists():
+            return False
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            self._open(meta)
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"[VectorReplica] снимок {self.name} не прочитан: {e}")
+            return False
+
+    def _open(self, meta: Dict[str, Any]):
+        count, dim = len(meta['ids']), meta['dim']
+        if count:
+            vectors = np.memmap(self.directory / meta['vectors_file'], dtype=np.float32, mode='r',
+                                shape=(count, dim))
+        else:
+            vectors = np.zeros((0, dim), dtype=np.float32)
+
+        self.ids = meta['ids']
+        self.payloads = meta['payloads']
+        self.digests = meta['digests']
+        self.distance = meta['distance']
+        self.dim = dim
+        self.synced_at = meta['synced_at']
+        self.vectors = vectors
+        self._columns = {}
+        self._id_array = None
+
+    def save(self, ids: List[Any], payloads: List[Dict[str, Any]], digests: List[str],
+             vectors, distance: str):
+        """Записать новый снимок (файл векторов - новый, старый memmap остается валидным)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        if distance == 'Cosine' and len(ids):
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1.0, norms)
+
+        vectors_file = f"vectors_{int(time.time() * 1000)}.f32"
+        vectors.tofile(self.directory / vectors_file)
+
+        meta = {
+            'collection': self.name,
+            'ids': ids,
+            'payloads': payloads,
+            'digests': digests,
+            'distance': distance,
+            'dim': self.dim,
+            'vectors_file': vectors_file,
+            'synced_at': time.time(),
+        }
+        tmp_path = self.directory / 'meta.json.tmp'
+        tmp_path.write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_path, self.directory / 'meta.json')
+
+        old_files = [path for path in self.directory.glob('vectors_*.f32') if path.name != vectors_file]
+        self._open(meta)
+        for path in old_files:
+            try:
+                path.unlink()
+            except OSError:
+                pass  # Windows: файл еще отображен в память другим процессом
+
+    def touch(self):
+        self.synced_at = time.time()
+
+    # ------------------------------------------------------------------
+    # Поиск
+    # ------------------------------------------------------------------
+
+    def search(self, query_vector, query_filter=None, limit: int = 10,
+               score_threshold: Optional[float] = None) -> List[LocalScoredPoint]:
+        query = np.asarray(query_vector, dtype=np.float32)
+        if query.shape != (self.dim,):
+            raise ReplicaUnsupported(f"размерность запроса {query.shape} != {self.dim}")
+        if not self.size or limit <= 0:
+            return []
+
+        if self.distance == 'Cosine':
+            norm = np.linalg.norm(query)
+            query = query / norm if norm else query
+
+        scores = self.vectors @ query
+        candidates = np.arange(self.size)
+        if query_filter is not None:
+            candidates = candidates[self._mask(query_filter)]
+        if score_threshold is not None:
+            candidates = candidates[scores[candidates] >= score_threshold]
+        if not len(candidates):
+            return []
+
+        if len(candidates) > limit:
+            top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        return [LocalScoredPoint(id=self.ids[i], score=float(scores[i]), payload=self.payloads[i])
+                for i in order]
+
+    def _column(self, key: str):
+        """Значения поля payload по всем точкам ('a.b' - вложенное поле)"""
+        if key not in self._columns:
+            path = key.split('.')
+            values = []
+            for payload in self.payloads:
+                value = payload
+                for part in path:
+                    value = value.get(part) if isinstance(value, dict) else None
+                values.append(value)
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+            self._columns[key] = column
+        return self._columns[key]
+
+    def _mask(self, query_filter) -> 'np.ndarray':
+        """Filter(must / should / must_not) -> булева маска точек"""
+        mask = np.ones(self.size, dtype=bool)
+        for condition in getattr(query_filter, 'must', None) or []:
+            mask &= self._condition(condition)
+        should = getattr(query_filter, 'should', None) or []
+        if should:
+            any_mask = np.zeros(self.size, dtype=bool)
+            for condition in should:
+                any_mask |= self._condition(condition)
+            mask &= any_mask
+        for condition in getattr(query_filter, 'must_not', None) or []:
+            mask &= ~self._condition(condition)
+        return mask
+
+    def _condition(self, condition) -> 'np.ndarray':
+        if any(getattr(condition, name, None) is not None for name in ('must', 'should', 'must_not')):
+            return self._mask(condition)
+
+        has_id = getattr(condition, 'has_id', None)
+        if has_id is not None:
+            if self._id_array is None:
+                self._id_array = np.array([str(point_id) for point_id in self.ids], dtype=object)
+            return np.isin(self._id_array, [str(point_id) for point_id in has_id])
+
+        key = getattr(condition, 'key', None)
+        if key is None:
+            raise ReplicaUnsupported(f"условие {type(condition).__name__}")
+        column = self._column(key)
+
+        match = getattr(condition, 'match', None)
+        if match is not None:
+            if getattr(match, 'value', None) is not None:
+                return self._matches(column, {match.value})
+            if getattr(match, 'any', None) is not None:
+                return self._matches(column, set(match.any))
+            if getattr(match, 'except_', None) is not None:
+                return ~self._matches(column, set(match.except_))
+            raise ReplicaUnsupported(f"match {type(match).__name__}")
+
+        value_range = getattr(condition, 'range', None)
+        if value_range is not None:
+            numbers = np.array([value if isinstance(value, (int, float)) and not isinstance(value, bool)
+                                else np.nan for value in column], dtype=np.float64)
+            mask = ~np.isnan(numbers)
+            for bound, compare in (('gt', np.greater), ('gte', np.greater_equal),
+                                   ('lt', np.less), ('lte', np.less_equal)):
+                limit = getattr(value_range, bound, None)
+                if limit is not None:
+                    mask &= compare(numbers, limit, where=mask, out=np.zeros_like(mask))
+            return mask
+
+        raise ReplicaUnsupported(f"условие по полю {key}")
+
+    @staticmethod
+    def _matches(column, values: set) -> 'np.ndarray':
+        """Совпадение значения (для списков в payload - любой элемент, как в Qdrant)"""
+        return np.fromiter(
+            ((bool(values.intersection(value)) if isinstance(value, list) else value in values)
+             for value in column),
+            dtype=bool, count=len(column)
+        )
+
+
+class ReplicatedQdrantClient:
+    """
+    QdrantClient с локальным снимком небольших коллекций для search()
+
+    Args:
+        remote: QdrantClient (может быть None - только снимки с диска)
+        directory: Каталог снимков этого сервера
+        max_points: Коллекции больше - только удаленный поиск
+        refresh_seconds: Как часто проверять обновления коллекции
+    """
+
+    def __init__(self, remote, directory: Optional[Path] = None, max_points: Optional[int] = None,
+                 refresh_seconds: Optional[float] = None):
+        self.remote = remote
+        base = Path(os.getenv('QDRANT_REPLICA_DIR', str(DEFAULT_REPLICA_DIR)))
+        self.directory = Path(directory) if directory else base / (_remote_key(remote) or 'default')
+        self.max_points = max_points if max_points is not None else int(
+            os.getenv('QDRANT_REPLICA_MAX_POINTS', str(DEFAULT_MAX_POINTS)))
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else float(
+            os.getenv('QDRANT_REPLICA_REFRESH', str(DEFAULT_REFRESH_SECONDS)))
+
+        self._replicas: Dict[str, CollectionReplica] = {}
+        self._remote_only: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        self._dirty: Dict[str, set] = {}      # id точек, записанных через upsert()
+        self._full_resync: set = set()        # upsert без распознанных id
+        self._verify_offset: Dict[str, int] = {}
+        self.stats = {'local_queries': 0, 'remote_queries': 0, 'syncs': 0, 'sync_errors': 0,
+                      'points_fetched': 0, 'vector_mismatches': 0}
+
+    def __getattr__(self, name):
+        # upsert / get_collection / scroll / ... - в удаленный Qdrant
+        if self.remote is None:
+            raise AttributeError(f"{name}: удаленный Qdrant не задан")
+        return getattr(self.remote, name)
+
+    # ------------------------------------------------------------------
+    # Поиск
+    # ------------------------------------------------------------------
+
+    def search(self, collection_name: str, query_vector, query_filter=None, limit: int = 10,
+               score_threshold: Optional[float] = None, **kwargs):
+        """Как QdrantClient.search; локально, если коллекция реплицирована"""
+        local_kwargs = {key: value for key, value in kwargs.items() if value not in (None, False)}
+        if not local_kwargs.keys() - {'with_payload'}:
+            replica = self.replica(collection_name)
+            if replica is not None:
+                try:
+                    started = time.perf_counter()
+                    hits = replica.search(query_vector, query_filter, limit, score_threshold)
+                    self.stats['local_queries'] += 1
+                    logger.debug(f"[VectorReplica] {collection_name}: {len(hits)} hits "
+                                 f"in {(time.perf_counter() - started) * 1e6:.0f}us")
+                    return hits
+                except ReplicaUnsupported as e:
+                    logger.info(f"[VectorReplica] {collection_name}: {e}, запрос в Qdrant")
+
+        if self.remote is None:
+            raise ConnectionError(f"Нет снимка {collection_name} и удаленный Qdrant не задан")
+        self.stats['remote_queries'] += 1
+        return self.remote.search(collection_name=collection_name, query_vector=query_vector,
+                                  query_filter=query_filter, limit=limit,
+                                  score_threshold=score_threshold, **kwargs)
+
+    def upsert(self, collection_name: str, *args, **kwargs):
+        result = self.remote.upsert(collection_name, *args, **kwargs)
+        # payload может не измениться, а вектор - да: эти точки докачиваются без сравнения версий
+        ids = _upserted_ids(args, kwargs)
+        with self._lock:
+            if ids is None:
+                self._full_resync.add(collection_name)
+            else:
+                self._dirty.setdefault(collection_name, set()).update(ids)
+        self.mark_stale(collection_name)
+        return result
+
+    def delete(self, collection_name: str, *args, **kwargs):
+        result = self.remote.delete(collection_name, *args, **kwargs)
+        self.mark_stale(collection_name)
+        return result
+
+    def mark_stale(self, collection_name: str):
+        """Следующий search() запустит обновление снимка"""
+        replica = self._replicas.get(collection_name)
+        if replica is not None:
+            replica.synced_at = 0.0
+        self._remote_only.pop(collection_name, None)
+
+    # ------------------------------------------------------------------
+    # Снимки
+    # ------------------------------------------------------------------
+
+    def replica(self, collection_name: str) -> Optional[CollectionReplica]:
+        """
+        Снимок для поиска (None - искать в удаленном Qdrant)
+
+        Нет снимка - синхронизация в текущем потоке; снимок устарел -
+        обновление в фоне, поиск по текущему снимку.
+        """
+        if collection_name in self._remote_only:
+            return None
+
+        with self._lock:
+            replica = self._replicas.get(collection_name)
+            if replica is None:
+                replica = CollectionReplica(collection_name, self.directory / collection_name)
+                if replica.load():
+                    logger.info(f"[VectorReplica] {collection_name}: снимок с диска, {replica.size} точек")
+                self._replicas[collection_name] = replica
+
+        if not replica.loaded:
+            return self.sync(collection_name)
+
+        if replica.is_stale(self.refresh_seconds) and self.remote is not None:
+            self._refresh_in_background(collection_name)
+        return replica
+
+    def _refresh_in_background(self, collection_name: str):
+        with self._lock:
+            if collection_name in self._refreshing:
+                return
+            self._refreshing.add(collection_name)
+
+        def refresh():
+            try:
+                self.sync(collection_name)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(collection_name)
+
+        threading.Thread(target=refresh, name=f"qdrant-replica-{collection_name}", daemon=True).start()
+
+    def sync(self, collection_name: str, full: bool = False) -> Optional[CollectionReplica]:
+        """
+        Обновить снимок из Qdrant
+
+        Payload всех точек читается без векторов (дешево), векторы
+        докачиваются только для новых точек, точек с измененным payload и
+        точек, записанных через upsert(). Выборка остальных сверяется по
+        вектору; расхождение (коллекцию переэмбеддили) - перекачка всех.
+        full=True - перекачать все векторы.
+
+        Returns:
+            Снимок или None (коллекция слишком большая / не поддерживается /
+            Qdrant недоступен и снимка нет)
+        """
+        replica = self._replicas.get(collection_name) or CollectionReplica(
+            collection_name, self.directory / collection_name)
+        if self.remote is None:
+            return replica if replica.loaded else None
+
+        with self._lock:
+            dirty = self._dirty.pop(collection_name, set())
+            if collection_name in self._full_resync:
+                self._full_resync.discard(collection_name)
+                full = True
+
+        try:
+            checked = self._check_collection(collection_name)
+            if checked is None:
+                return None
+            distance, dim = checked
+
+            remote_ids, remote_payloads = self._scroll_payloads(collection_name)
+            remote_digests = [payload_digest(payload) for payload in remote_payloads]
+
+            reuse = replica.loaded and not full and (replica.distance, replica.dim) == (distance, dim)
+            known = {} if not reuse else {
+                (point_id, digest): row for row, (point_id, digest) in enumerate(zip(replica.ids, replica.digests))
+            }
+            changed = [point_id for point_id, digest in zip(remote_ids, remote_digests)
+                       if (point_id, digest) not in known or point_id in dirty]
+
+            if known and not self._vectors_match(collection_name, replica, known, remote_ids, set(changed)):
+                self.stats['vector_mismatches'] += 1
+                logger.info(f"[VectorReplica] {collection_name}: векторы изменились при том же payload, "
+                            f"полная перекачка")
+                known = {}
+                changed = list(remote_ids)
+
+            if not changed and replica.loaded and len(remote_ids) == replica.size:
+                replica.touch()
+                self._replicas[collection_name] = replica
+                return replica
+
+            fetched = self._retrieve_vectors(collection_name, changed)
+            rows = []
+            for point_id, digest in zip(remote_ids, remote_digests):
+                row = None if point_id in dirty else known.get((point_id, digest))
+                rows.append(replica.vectors[row] if row is not None else fetched[point_id])
+
+            vectors = np.asarray(rows, dtype=np.float32).reshape(len(rows), dim)
+            # новый объект: поиски в других потоках дорабатывают по старому снимку
+            replica = CollectionReplica(collection_name, self.directory / collection_name)
+            replica.dim = dim
+            replica.save(remote_ids, remote_payloads, remote_digests, vectors, distance)
+
+            self._replicas[collection_name] = replica
+            self.stats['syncs'] += 1
+            self.stats['points_fetched'] += len(changed)
+            logger.info(f"[VectorReplica] {collection_name}: снимок обновлен, {replica.size} точек "
+                        f"(докачано {len(changed)})")
+            return replica
+
+        except Exception as e:
+            self.stats['sync_errors'] += 1
+            with self._lock:
+                self._dirty.setdefault(collection_name, set()).update(dirty)
+            if replica.loaded:
+                replica.touch()  # не долбить недоступный Qdrant на каждом запросе
+                logger.warning(f"[VectorReplica] {collection_name}: Qdrant недоступен ({e}), "
+                               f"используется снимок от {time.ctime(replica.synced_at)}")
+                return replica
+            logger.warning(f"[VectorReplica] {collection_name}: снимок не создан: {e}")
+            return None
+
+    def _vectors_match(self, collection_name: str, replica: CollectionReplica, known: Dict[Any, int],
+                       remote_ids: List[Any], changed: set) -> bool:
+        """Сверить с Qdrant векторы VERIFY_SAMPLE неизмененных точек (по кругу между обновлениями)"""
+        rows = {point_id: row for (point_id, _), row in known.items()}
+        unchanged = [point_id for point_id in remote_ids if point_id in rows and point_id not in changed]
+        if not unchanged or not VERIFY_SAMPLE:
+            return True
+
+        offset = self._verify_offset.get(collection_name, 0) % len(unchanged)
+        sample = (unchanged[offset:] + unchanged[:offset])[:VERIFY_SAMPLE]
+        self._verify_offset[collection_name] = offset + len(sample)
+
+        remote_vectors = self._retrieve_vectors(collection_name, sample)
+        for point_id in sample:
+            vector = np.asarray(remote_vectors[point_id], dtype=np.float32)
+            if vector.shape != (replica.dim,):
+                return False
+            if replica.distance == 'Cosine':
+                norm = np.linalg.norm(vector)
+                vector = vector / (norm if norm else 1.0)
+            if not np.allclose(vector, replica.vectors[rows[point_id]], atol=VERIFY_TOLERANCE):
+                return False
+        return True
+
+    def _check_collection(self, collection_name: str):
+        """(метрика, размерность) коллекции или None, если коллекцию не реплицируем"""
+        info = self.remote.get_collection(collection_name)
+        points_count = info.points_count or 0
+        if points_count > self.max_points:
+            self._remote_only[collection_name] = f"{points_count} точек > {self.max_points}"
+            logger.info(f"[VectorReplica] {collection_name}: {self._remote_only[collection_name]}, "
+                        f"поиск в Qdrant")
+            return None
+
+        params = info.config.params.vectors
+        distance = getattr(getattr(params, 'distance', None), 'value', getattr(params, 'distance', None))
+        if distance not in SUPPORTED_DISTANCES:
+            self._remote_only[collection_name] = f"векторы {type(params).__name__} / {distance}"
+            logger.info(f"[VectorReplica] {collection_name}: {self._remote_only[collection_name]} "
+                        f"не поддерживаются, поиск в Qdrant")
+            return None
+        return distance, int(params.size)
+
+    def _scroll_payloads(self, collection_name: str):
+        ids, payloads = [], []
+        offset = None
+        while True:
+            points, offset = self.remote.scroll(collection_name=collection_name, limit=SCROLL_BATCH,
+                                                offset=offset, with_payload=True, with_vectors=False)
+            for point in points:
+                ids.append(point.id)
+                payloads.append(point.payload or {})
+            if offset is None:
+                return ids, payloads
+
+    def _retrieve_vectors(self, collection_name: str, ids: Iterable[Any]) -> Dict[Any, List[float]]:
+        ids = list(ids)
+        vectors = {}
+        for start in range(0, len(ids), RETRIEVE_BATCH):
+            points = self.remote.retrieve(collection_name=collection_name, ids=ids[start:start + RETRIEVE_BATCH],
+                                          with_payload=False, with_vectors=True)
+            vectors.update({point.id: point.vector for point in points})
+        missing = [point_id for point_id in ids if point_id not in vectors]
+        if missing:
+            raise RuntimeError(f"точки удалены во время синхронизации: {missing[:5]}")
+        return vectors
+
+
+def replicated(client, **kwargs):
+    """
+    Обернуть QdrantClient локальной репликой
+
+    Возвращает клиента без изменений, если он None, уже обернут, сам
+    локальный (':memory:' / path), не QdrantClient или реплика выключена
+    (QDRANT_REPLICA=off, нет numpy).
+    """
+    if client is None or isinstance(client, ReplicatedQdrantClient) or not replica_enabled():
+        return client
+
+    options = getattr(client, 'init_options', None)
+    if isinstance(options, dict):
+        return client if _remote_key(client) is None else ReplicatedQdrantClient(client, **kwargs)
+
+    # старые qdrant-client без init_options; моки в тестах не оборачиваем
+    try:
+        from qdrant_client import QdrantClient
+    except ImportError:
+        return client
+    return ReplicatedQdrantClient(client, **kwargs) if isinstance(client, QdrantClient) else client
@@ -17,8 +17,8 @@ sys.path.append('/var/GrantService/shared')
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
-    from llm.unified_llm_client import UnifiedLLMClient
-    from llm.config import AGENT_CONFIGS
+    from shared.llm.unified_llm_client import UnifiedLLMClient
+    from shared.llm.config import AGENT_CONFIGS
     UNIFIED_CLIENT_AVAILABLE = True
 except ImportError as e:
     print(f"⚠️ UnifiedLLMClient недоступен: {e}")
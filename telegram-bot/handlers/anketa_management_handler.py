@@ -32,6 +32,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
+from data.database.reporting import get_corpus_stats
+
 logger = logging.getLogger(__name__)
 
 
@@ -1086,8 +1088,11 @@ class AnketaManagementHandler:
         - /generate_synthetic_anketa 1 low
 
         Args:
-            count: 1-100 (default: 10)
+            count: 1-1000 (default: 10)
             quality: low/medium/high (default: random mix)
+
+        Генерация, сохранение и индексация в Qdrant - SyntheticCorpusPipeline
+        (конкурентно, пачками, прогресс обновляется в одном сообщении).
         """
         user_id = update.effective_user.id
 
@@ -1099,14 +1104,14 @@ class AnketaManagementHandler:
         if len(args) >= 1:
             try:
                 count = int(args[0])
-                if count < 1 or count > 100:
+                if count < 1 or count > 1000:
                     await update.message.reply_text(
-                        "❌ Количество должно быть от 1 до 100"
+                        "❌ Количество должно быть от 1 до 1000"
                     )
                     return
             except ValueError:
                 await update.message.reply_text(
-                    "❌ Неверный формат количества. Используйте число от 1 до 100."
+                    "❌ Неверный формат количества. Используйте число от 1 до 1000."
                 )
                 return
 
@@ -1121,18 +1126,12 @@ class AnketaManagementHandler:
         logger.info(f"[SYNTHETIC] User {user_id} requested {count} synthetic anketas (quality: {quality_level or 'mixed'})")
 
         try:
-            # Import generator
-            from agents.anketa_synthetic_generator import AnketaSyntheticGenerator
+            # Import bulk pipeline
+            from agents.anketa_synthetic_pipeline import SyntheticCorpusPipeline
 
             # Get LLM model (use GigaChat for Lite - token economy)
             llm_model = 'GigaChat'  # Lite model, hardcoded for Iteration 38
 
-            # Initialize generator
-            generator = AnketaSyntheticGenerator(
-                db=self.db,
-                llm_model=llm_model
-            )
-
             # Get template anketas from database
             template_anketas = self.db.get_user_anketas(telegram_id=user_id, limit=5)
 
@@ -1143,75 +1142,62 @@ class AnketaManagementHandler:
                 )
                 return
 
-            # Show progress
-            await update.message.reply_text(
+            # Show progress (one message, edited as the pipeline advances)
+            progress_message = await update.message.reply_text(
                 f"🔄 Генерирую {count} синтетических анкет...\n"
-                f"💡 Используется: {llm_provider.upper()}\n"
                 f"📊 Качество: {quality_level or 'mixed (20% low, 50% medium, 30% high)'}\n\n"
                 f"⏱️ Примерное время: ~{count * 15} секунд"
             )
 
-            # Generate batch
-            if quality_level:
-                # Single quality level
-                generated = []
-                for i in range(count):
-                    anketa = await generator.generate_synthetic_anketa(
-                        template_anketas=template_anketas,
-                        quality_level=quality_level
-                    )
-                    generated.append(anketa)
+            stage_titles = {
+                'generate': '🔄 Генерация',
+                'persist': '💾 Сохранено в БД',
+                'index': '🧭 Индексация в Qdrant'
+            }
 
-                    # Progress update every 10 anketas
-                    if (i + 1) % 10 == 0:
-                        await update.message.reply_text(
-                            f"⏳ Прогресс: {i + 1}/{count} анкет сгенерировано..."
-                        )
-            else:
-                # Mixed quality distribution
-                generated = await generator.generate_batch(
-                    template_anketas=template_anketas,
-                    count=count
+            async def report_progress(stage: str, done: int, total: int):
+                await progress_message.edit_text(
+                    f"{stage_titles.get(stage, stage)}: {done}/{total}"
                 )
 
-            # Save to database
-            saved_count = 0
-            for anketa in generated:
-                # Create session for each synthetic anketa
-                session_id = self.db.create_session(telegram_id=user_id)
-
-                # Prepare anketa data
-                anketa_data = {
-                    'user_data': {
-                        'telegram_id': user_id,
-                        'username': update.effective_user.username or 'synthetic_user'
-                    },
-                    'interview_data': anketa,
-                    'session_id': session_id
-                }
+            pipeline = SyntheticCorpusPipeline(
+                db=self.db,
+                llm_model=llm_model,
+                progress_callback=report_progress,
+                progress_every=max(1, min(50, count // 10))
+            )
 
-                # Save
-                saved_anketa_id = self.db.save_anketa(anketa_data)
-                if saved_anketa_id:
-                    saved_count += 1
+            stats = await pipeline.run(
+                user_data={
+                    'telegram_id': user_id,
+                    'username': update.effective_user.username or 'synthetic_user'
+                },
+                template_anketas=template_anketas,
+                count=count,
+                quality_level=quality_level
+            )
 
-                    # TODO: Add to Qdrant (Phase 4)
-                    # await self._add_to_qdrant(saved_anketa_id, anketa)
+            saved_count = stats['saved']
 
             # Calculate token usage estimate
-            tokens_used = count * 1500  # ~1500 tokens per anketa (Lite)
+            tokens_used = stats['generated'] * 1500  # ~1500 tokens per anketa (Lite)
 
             # Success message
             await update.message.reply_text(
                 f"✅ **Синтетические анкеты созданы!**\n\n"
                 f"📊 Статистика:\n"
-                f"• Сгенерировано: {len(generated)} анкет\n"
+                f"• Сгенерировано: {stats['generated']} анкет\n"
+                f"• Ошибок генерации: {stats['failed']}\n"
                 f"• Сохранено в БД: {saved_count} анкет\n"
+                f"• Проиндексировано в Qdrant: {stats['indexed']}\n"
                 f"• Использовано токенов: ~{tokens_used:,} (GigaChat Lite)\n\n"
                 f"**Качество:**\n"
-                f"• Low: {sum(1 for a in generated if a.get('quality_target') == 'low')} анкет\n"
-                f"• Medium: {sum(1 for a in generated if a.get('quality_target') == 'medium')} анкет\n"
-                f"• High: {sum(1 for a in generated if a.get('quality_target') == 'high')} анкет\n\n"
+                f"• Low: {stats['by_quality']['low']} анкет\n"
+                f"• Medium: {stats['by_quality']['medium']} анкет\n"
+                f"• High: {stats['by_quality']['high']} анкет\n\n"
+                f"⏱️ Генерация {stats['durations']['generate']:.0f}с, "
+                f"сохранение {stats['durations']['persist']:.1f}с, "
+                f"индексация {stats['durations']['index']:.0f}с\n\n"
                 f"Используйте /corpus_stats для общей статистики",
                 parse_mode='Markdown'
             )
@@ -1232,15 +1218,19 @@ class AnketaManagementHandler:
         """
         ITERATION 38: Batch аудит анкет с использованием GigaChat Max
 
-        Usage: /batch_audit_anketas [count]
+        Usage: /batch_audit_anketas [count | resume]
 
         Examples:
         - /batch_audit_anketas 10
         - /batch_audit_anketas 100
+        - /batch_audit_anketas resume  (продолжить прерванный запуск)
 
         ВАЖНО: Использует GigaChat Max (~2000 tokens/anketa)
         Это критично для демонстрации Sber500!
 
+        Аудит выполняет BatchAuditEngine: конкурентно в рамках лимита
+        провайдера, результаты пишутся пачками, прогресс сохраняется в checkpoint.
+
         Args:
             count: 1-500 (default: 10)
         """
@@ -1249,8 +1239,11 @@ class AnketaManagementHandler:
         # Parse arguments
         args = context.args
         count = 10  # default
+        resume = False
 
-        if len(args) >= 1:
+        if len(args) >= 1 and args[0].lower() == 'resume':
+            resume = True
+        elif len(args) >= 1:
             try:
                 count = int(args[0])
                 if count < 1 or count > 500:
@@ -1260,145 +1253,98 @@ class AnketaManagementHandler:
                     return
             except ValueError:
                 await update.message.reply_text(
-                    "❌ Неверный формат количества. Используйте число от 1 до 500."
+                    "❌ Неверный формат количества. Используйте число от 1 до 500 или resume."
                 )
                 return
 
-        logger.info(f"[BATCH-AUDIT] User {user_id} requested batch audit of {count} anketas")
+        logger.info(f"[BATCH-AUDIT] User {user_id} requested batch audit of {count} anketas (resume={resume})")
 
         try:
-            # Get anketas to audit (prefer synthetic ones without audit)
-            from shared.database import GrantServiceDatabase
+            from agents.anketa_batch_auditor import BatchAuditEngine
 
-            # Query: Get anketas without audit_score, prioritize synthetic
-            anketas = self.db.get_user_anketas(telegram_id=user_id, limit=count * 2)  # Get more to filter
+            # Use GigaChat Max for quality assurance
+            llm_provider = 'gigachat'  # GigaChat Max
 
-            # Filter: No audit yet
-            unaudited = [a for a in anketas if not a.get('audit_score')]
+            progress_message = None
 
-            if len(unaudited) == 0:
-                await update.message.reply_text(
-                    "❌ Нет анкет для аудита.\n\n"
-                    "Все ваши анкеты уже проверены."
-                )
-                return
+            async def report_progress(done: int, total: int):
+                if progress_message:
+                    await progress_message.edit_text(
+                        f"⏳ Прогресс: {done}/{total} анкет проверено..."
+                    )
 
-            # Limit to requested count
-            to_audit = unaudited[:count]
+            engine = BatchAuditEngine(
+                db=self.db,
+                llm_provider=llm_provider,
+                progress_callback=report_progress
+            )
+
+            if resume:
+                checkpoint = engine.load_checkpoint(user_id)
+                if not checkpoint:
+                    await update.message.reply_text(
+                        "❌ Нет прерванного batch аудита для продолжения."
+                    )
+                    return
+                to_audit_count = len(checkpoint['anketa_ids']) - len(checkpoint['completed'])
+            else:
+                to_audit_count = count
 
             # Calculate token estimate
-            tokens_estimate = len(to_audit) * 2000  # ~2000 Max tokens per audit
+            tokens_estimate = to_audit_count * BatchAuditEngine.TOKENS_PER_AUDIT
 
             # Show progress
-            await update.message.reply_text(
-                f"🔄 Запускаю batch аудит {len(to_audit)} анкет...\n"
+            progress_message = await update.message.reply_text(
+                f"🔄 {'Продолжаю' if resume else 'Запускаю'} batch аудит до {to_audit_count} анкет...\n"
                 f"💡 Используется: **GigaChat Max** (критично для Sber500!)\n"
                 f"📊 Ожидаемое использование: ~{tokens_estimate:,} Max tokens\n\n"
-                f"⏱️ Примерное время: ~{len(to_audit) * 30} секунд",
+                f"⚡ Параллельно: {engine.limiter.max_concurrency} запросов",
                 parse_mode='Markdown'
             )
 
-            # Import validator (GATE 1 - validates JSON)
-            from agents.anketa_validator import AnketaValidator
-
-            # Use GigaChat Max for quality assurance
-            llm_provider = 'gigachat'  # GigaChat Max
-
-            validator = AnketaValidator(
-                llm_provider=llm_provider,
-                db=self.db
-            )
-
-            # Audit each anketa
-            results = []
-            audited_count = 0
-
-            for i, anketa in enumerate(to_audit, 1):
-                anketa_id = anketa.get('anketa_id')
-
-                try:
-                    # Get interview data
-                    session = self.db.get_session_by_anketa_id(anketa_id)
-                    if not session:
-                        logger.warning(f"[BATCH-AUDIT] No session for anketa {anketa_id}")
-                        continue
-
-                    interview_data = session.get('interview_data')
-                    if isinstance(interview_data, str):
-                        interview_data = json.loads(interview_data)
-
-                    # Run validation (GATE 1)
-                    validation_result = await validator.validate(interview_data)
-
-                    score = validation_result['score']
-
-                    # Determine status
-                    if validation_result['can_proceed'] and score >= 7.0:
-                        status = 'approved'
-                    elif score >= 5.0:
-                        status = 'needs_revision'
-                    else:
-                        status = 'rejected'
-
-                    # Update database
-                    self.db.update_anketa_audit(
-                        anketa_id=anketa_id,
-                        audit_score=score,
-                        audit_status=status,
-                        audit_recommendations=validation_result.get('recommendations', [])
-                    )
-
-                    results.append({
-                        'anketa_id': anketa_id,
-                        'score': score,
-                        'status': status
-                    })
-
-                    audited_count += 1
-
-                    # Progress update every 10 anketas
-                    if i % 10 == 0:
-                        await update.message.reply_text(
-                            f"⏳ Прогресс: {i}/{len(to_audit)} анкет проверено..."
-                        )
-
-                except Exception as e:
-                    logger.error(f"[BATCH-AUDIT] Error auditing {anketa_id}: {e}")
-                    continue
+            stats = await engine.run(telegram_id=user_id, count=count, resume=resume)
 
-            # Calculate actual token usage
-            actual_tokens = audited_count * 2000
-
-            # Statistics
-            approved = sum(1 for r in results if r['status'] == 'approved')
-            needs_revision = sum(1 for r in results if r['status'] == 'needs_revision')
-            rejected = sum(1 for r in results if r['status'] == 'rejected')
+            if stats['total'] == 0:
+                await update.message.reply_text(
+                    "❌ Нет анкет для аудита.\n\n"
+                    "Все ваши анкеты уже проверены."
+                )
+                return
 
-            avg_score = sum(r['score'] for r in results) / len(results) if results else 0
+            cost = stats['cost']
 
             # Success message
             await update.message.reply_text(
                 f"✅ **Batch аудит завершён!**\n\n"
                 f"📊 Результаты:\n"
-                f"• Проверено: {audited_count} анкет\n"
-                f"• Средний балл: {avg_score:.1f}/10\n\n"
+                f"• Проверено: {stats['audited']} из {stats['total']} анкет\n"
+                f"• Ошибок: {stats['failed']}\n"
+                f"• Средний балл: {stats['avg_score']:.1f}/10\n\n"
                 f"**Распределение:**\n"
-                f"• ✅ Одобрено (≥7.0): {approved}\n"
-                f"• ⚠️ Требует доработки (5.0-6.9): {needs_revision}\n"
-                f"• ❌ Отклонено (<5.0): {rejected}\n\n"
+                f"• ✅ Одобрено (≥7.0): {stats['by_status']['approved']}\n"
+                f"• ⚠️ Требует доработки (5.0-6.9): {stats['by_status']['needs_revision']}\n"
+                f"• ❌ Отклонено (<5.0): {stats['by_status']['rejected']}\n\n"
+                f"**Производительность:**\n"
+                f"• {stats['throughput_per_min']:.1f} анкет/мин за {stats['duration']:.0f}с\n"
+                f"• Среднее время аудита: {cost['avg_audit_seconds']:.1f}с "
+                f"(ожидание лимита: {cost['limiter_wait_seconds']:.0f}с)\n\n"
                 f"**Токены:**\n"
-                f"• Использовано: ~{actual_tokens:,} Max tokens\n"
-                f"• Стоимость: ~{actual_tokens / 1000:.1f} руб (из 1,987,948 доступных)\n\n"
+                f"• Использовано: ~{cost['tokens']:,} Max tokens\n"
+                f"• Стоимость: ~{cost['rub']:.1f} руб (из 1,987,948 доступных)\n\n"
                 f"💡 Отлично для демонстрации Sber500!",
                 parse_mode='Markdown'
             )
 
-            logger.info(f"[BATCH-AUDIT] Audited {audited_count} anketas using ~{actual_tokens} Max tokens")
+            logger.info(
+                f"[BATCH-AUDIT] Audited {stats['audited']} anketas using ~{cost['tokens']} Max tokens "
+                f"({stats['throughput_per_min']:.1f}/min)"
+            )
 
         except Exception as e:
             logger.error(f"[BATCH-AUDIT] Error in batch audit: {e}")
             await update.message.reply_text(
-                f"❌ Произошла ошибка при batch аудите:\n{str(e)}"
+                f"❌ Произошла ошибка при batch аудите:\n{str(e)}\n\n"
+                f"Прогресс сохранён: /batch_audit_anketas resume"
             )
 
     async def corpus_stats(
@@ -1422,10 +1368,10 @@ class AnketaManagementHandler:
         logger.info(f"[CORPUS] User {user_id} requested corpus statistics")
 
         try:
-            # Get all anketas
-            all_anketas = self.db.get_user_anketas(telegram_id=user_id, limit=1000)
+            # One aggregate query instead of per-anketa session lookups
+            stats = get_corpus_stats(user_id, db=self.db)
 
-            if not all_anketas or len(all_anketas) == 0:
+            if stats['total'] == 0:
                 await update.message.reply_text(
                     "📊 Корпус пуст.\n\n"
                     "Используйте /start для создания реальных анкет\n"
@@ -1433,51 +1379,30 @@ class AnketaManagementHandler:
                 )
                 return
 
-            # Count synthetic vs real
-            synthetic_count = 0
-            real_count = 0
-
-            for anketa in all_anketas:
-                anketa_id = anketa.get('anketa_id')
-                session = self.db.get_session_by_anketa_id(anketa_id)
-
-                if session:
-                    interview_data = session.get('interview_data')
-                    if isinstance(interview_data, str):
-                        interview_data = json.loads(interview_data)
-
-                    if interview_data and interview_data.get('synthetic'):
-                        synthetic_count += 1
-                    else:
-                        real_count += 1
-
-            # Audit statistics
-            audited = [a for a in all_anketas if a.get('audit_score')]
-            unaudited = [a for a in all_anketas if not a.get('audit_score')]
-
-            # Quality distribution (for audited)
-            approved = sum(1 for a in audited if a.get('audit_status') == 'approved')
-            needs_revision = sum(1 for a in audited if a.get('audit_status') == 'needs_revision')
-            rejected = sum(1 for a in audited if a.get('audit_status') == 'rejected')
-
-            # Average score
-            avg_score = sum(a.get('audit_score', 0) for a in audited) / len(audited) if audited else 0
+            synthetic_count = stats['synthetic']
+            real_count = stats['real']
+            approved = stats['approved']
+            needs_revision = stats['needs_revision']
+            rejected = stats['rejected']
+            avg_score = stats['avg_score']
+            by_quality = stats['synthetic_by_quality']
 
             # Token estimates
             # Synthetic generation: 1500 Lite tokens each
             # Batch audit: 2000 Max tokens each
             estimated_lite_tokens = synthetic_count * 1500
-            estimated_max_tokens = len(audited) * 2000
+            estimated_max_tokens = stats['audited'] * 2000
 
             # Build message
             message = (
                 f"📊 **Статистика корпуса анкет**\n\n"
-                f"**Общее количество:** {len(all_anketas)}\n"
+                f"**Общее количество:** {stats['total']}\n"
                 f"• Реальные: {real_count}\n"
-                f"• Синтетические: {synthetic_count}\n\n"
+                f"• Синтетические: {synthetic_count}"
+                f" (low {by_quality.get('low', 0)} / medium {by_quality.get('medium', 0)} / high {by_quality.get('high', 0)})\n\n"
                 f"**Аудит:**\n"
-                f"• Проверено: {len(audited)}\n"
-                f"• Не проверено: {len(unaudited)}\n"
+                f"• Проверено: {stats['audited']}\n"
+                f"• Не проверено: {stats['unaudited']}\n"
                 f"• Средний балл: {avg_score:.1f}/10\n\n"
                 f"**Качество (проверенные):**\n"
                 f"• ✅ Одобрено: {approved}\n"
@@ -1494,9 +1419,9 @@ class AnketaManagementHandler:
             await update.message.reply_text(message, parse_mode='Markdown')
 
             logger.info(
-                f"[CORPUS] Stats: {len(all_anketas)} total "
+                f"[CORPUS] Stats: {stats['total']} total "
                 f"({real_count} real, {synthetic_count} synthetic, "
-                f"{len(audited)} audited)"
+                f"{stats['audited']} audited)"
             )
 
         except Exception as e:
@@ -30,6 +30,7 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
 # Import file generators
+from shared.telegram_utils.background_tasks import BackgroundTaskManager
 from shared.telegram_utils.file_generators import (
     generate_anketa_txt,
     generate_audit_txt,
@@ -58,8 +59,56 @@ class InteractivePipelineHandler:
             db: Database instance (GrantServiceDatabase)
         """
         self.db = db
+
+        # Этапы pipeline (минуты работы агентов) выполняются в фоне,
+        # чтобы не блокировать очередь updates пользователя
+        self.tasks = BackgroundTaskManager()
+
         logger.info("[PIPELINE] Interactive Pipeline Handler initialized")
 
+    # ========== BACKGROUND STAGES ==========
+
+    async def handle_start_audit(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Callback "Начать аудит" - запускает _run_start_audit в фоне"""
+        await self._detach(update, 'audit', self._run_start_audit(update, context))
+
+    async def handle_start_research(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Callback "Начать исследование" - запускает _run_start_research в фоне"""
+        await self._detach(update, 'research', self._run_start_research(update, context))
+
+    async def handle_start_grant(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Callback "Начать написание гранта" - запускает _run_start_grant в фоне"""
+        await self._detach(update, 'grant', self._run_start_grant(update, context))
+
+    async def handle_start_review(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Callback "Сделать ревью" - запускает _run_start_review в фоне"""
+        await self._detach(update, 'review', self._run_start_review(update, context))
+
+    async def _detach(self, update: Update, stage: str, coroutine):
+        """
+        Запустить этап как фоновую задачу пользователя
+
+        Обработчик update возвращается сразу; ответ на нажатие кнопки (query.answer)
+        делает сам этап первым действием. При превышении лимита задач
+        пользователя этап не запускается.
+        """
+        query = update.callback_query
+        user_id = query.from_user.id
+
+        task = self.tasks.start(user_id, f"{stage}:{query.data}", coroutine)
+        if task is None:
+            running = ", ".join(self.tasks.in_flight(user_id)) or stage
+            logger.info(f"[PIPELINE] User {user_id} task limit reached, skip {stage} ({running})")
+            await query.answer(
+                f"⏳ Уже выполняется: {running}\n"
+                f"Дождитесь завершения или отмените: /cancel_pipeline",
+                show_alert=True
+            )
+
+    def cancel_user_tasks(self, user_id: int) -> int:
+        """Отменить фоновые этапы пользователя (/cancel_pipeline)"""
+        return self.tasks.cancel_user(user_id)
+
     # ========== STEP 1: ANKETA → AUDIT ==========
 
     async def on_anketa_complete(
@@ -193,7 +242,7 @@ class InteractivePipelineHandler:
 
     # ========== STEP 2: AUDIT → GRANT ==========
 
-    async def handle_start_audit(
+    async def _run_start_audit(
         self,
         update: Update,
         context: ContextTypes.DEFAULT_TYPE
@@ -361,7 +410,7 @@ class InteractivePipelineHandler:
 
     # ========== STEP 2.5: RESEARCH (Iteration 59) ==========
 
-    async def handle_start_research(
+    async def _run_start_research(
         self,
         update: Update,
         context: ContextTypes.DEFAULT_TYPE
@@ -540,7 +589,7 @@ class InteractivePipelineHandler:
 
     # ========== STEP 3: GRANT → REVIEW ==========
 
-    async def handle_start_grant(
+    async def _run_start_grant(
         self,
         update: Update,
         context: ContextTypes.DEFAULT_TYPE
@@ -719,7 +768,7 @@ class InteractivePipelineHandler:
 
     # ========== STEP 4: REVIEW → COMPLETE ==========
 
-    async def handle_start_review(
+    async def _run_start_review(
         self,
         update: Update,
         context: ContextTypes.DEFAULT_TYPE
@@ -74,6 +74,26 @@ class PlatformConfig(ABC):
     def setup_logging(self) -> logging.Logger:
         """Настроить логирование для платформы"""
         pass
+
+    def configure_logging(self) -> logging.Logger:
+        """
+        Файл логов + stdout через QueueListener (shared/logging_config.py):
+        запись в файл и консоль не блокирует event loop бота.
+        LOG_FORMAT / LOG_LEVELS / LOG_SAMPLE - см. shared/logging_config.py
+        """
+        try:
+            from shared.logging_config import configure_logging
+            configure_logging(log_file=self.log_path)
+        except ImportError:
+            logging.basicConfig(
+                format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                level=logging.INFO,
+                handlers=[
+                    logging.FileHandler(self.log_path, encoding='utf-8'),
+                    logging.StreamHandler()
+                ]
+            )
+        return logging.getLogger(__name__)
     
     def load_environment(self):
         """Загрузить переменные окружения"""
@@ -106,16 +126,7 @@ class WindowsConfig(PlatformConfig):
     def setup_logging(self) -> logging.Logger:
         """Настроить логирование для Windows"""
         self.ensure_directories()
-        
-        logging.basicConfig(
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            level=logging.INFO,
-            handlers=[
-                logging.FileHandler(self.log_path, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
-        return logging.getLogger(__name__)
+        return self.configure_logging()
 
 
 class UnixConfig(PlatformConfig):
@@ -129,16 +140,7 @@ class UnixConfig(PlatformConfig):
     def setup_logging(self) -> logging.Logger:
         """Настроить логирование для Unix"""
         self.ensure_directories()
-        
-        logging.basicConfig(
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            level=logging.INFO,
-            handlers=[
-                logging.FileHandler(self.log_path),
-                logging.StreamHandler()
-            ]
-        )
-        return logging.getLogger(__name__)
+        return self.configure_logging()
 
 
 class DockerConfig(UnixConfig):
@@ -213,6 +215,12 @@ from handlers.anketa_management_handler import AnketaManagementHandler
 # ITERATION 52: Interactive Pipeline Handler
 from handlers.interactive_pipeline_handler import InteractivePipelineHandler
 
+# Общие HTTP сессии и токены LLM/WebSearch провайдеров
+from shared.llm.http_sessions import activate_shared_sessions, close_shared_sessions
+
+# Параллельная обработка updates (порядок сохраняется внутри чата)
+from shared.telegram_utils.update_dispatcher import PerUserUpdateProcessor
+
 
 class GrantServiceBotWithMenu:
     def __init__(self):
@@ -2056,6 +2064,19 @@ PDF документ с полной анкетой прикреплен
         """Показать статистику корпуса анкет"""
         await self.anketa_handler.corpus_stats(update, context)
 
+    async def handle_cancel_pipeline(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Отменить фоновые этапы pipeline пользователя (аудит, исследование, грант, ревью)"""
+        cancelled = self.pipeline_handler.cancel_user_tasks(update.effective_user.id)
+        if cancelled:
+            await update.message.reply_text(f"🛑 Отменено задач: {cancelled}")
+        else:
+            await update.message.reply_text("Нет выполняющихся задач.")
+
+    async def post_shutdown(self, application: Application):
+        """Остановка бота: отменить фоновые этапы и закрыть сессии провайдеров"""
+        await self.pipeline_handler.tasks.shutdown()
+        await close_shared_sessions()
+
     # ========================================================================
 
     def run(self):
@@ -2069,7 +2090,16 @@ PDF документ с полной анкетой прикреплен
             return
         
         # Создаем приложение
-        application = Application.builder().token(self.token).build()
+        # post_init/post_shutdown: общие keep-alive сессии провайдеров на время работы бота
+        # concurrent_updates: пользователи обрабатываются параллельно, внутри чата - по порядку
+        application = (
+            Application.builder()
+            .token(self.token)
+            .concurrent_updates(PerUserUpdateProcessor())
+            .post_init(activate_shared_sessions)
+            .post_shutdown(self.post_shutdown)
+            .build()
+        )
         
         # Добавляем обработчики команд
         application.add_handler(CommandHandler("start", self.start_command))
@@ -2088,6 +2118,7 @@ PDF документ с полной анкетой прикреплен
         application.add_handler(CommandHandler("continue", self.handle_continue_interview))
         application.add_handler(CommandHandler("stop_interview", self.handle_stop_interview))
         application.add_handler(CommandHandler("progress", self.handle_show_progress))
+        application.add_handler(CommandHandler("cancel_pipeline", self.handle_cancel_pipeline))
 
         # NEW: Grant Commands - ProductionWriter Integration
         application.add_handler(CommandHandler("generate_grant", self.handle_generate_grant))
@@ -2142,7 +2173,19 @@ PDF документ с полной анкетой прикреплен
         logger.info("Для остановки нажмите Ctrl+C")
         
         try:
-            application.run_polling(drop_pending_updates=True)
+            if os.getenv('BOT_MODE', 'polling').lower() == 'webhook':
+                # Webhook: ограниченная очередь + spool в PostgreSQL (backlog не теряется)
+                import asyncio
+                from shared.telegram_utils.webhook_intake import UpdateSpool, serve_webhook
+
+                asyncio.run(serve_webhook(
+                    application,
+                    spool=UpdateSpool(db),
+                    on_startup=activate_shared_sessions,
+                    on_shutdown=self.post_shutdown
+                ))
+            else:
+                application.run_polling(drop_pending_updates=True)
         except Exception as e:
             logger.error(self.config.format_log_message(
                 f"Ошибка при запуске бота: {e}", "❌"
@@ -75,6 +75,26 @@ class PlatformConfig(ABC):
     def setup_logging(self) -> logging.Logger:
         """Настроить логирование для платформы"""
         pass
+
+    def configure_logging(self) -> logging.Logger:
+        """
+        Файл логов + stdout через QueueListener (shared/logging_config.py):
+        запись в файл и консоль не блокирует event loop бота.
+        LOG_FORMAT / LOG_LEVELS / LOG_SAMPLE - см. shared/logging_config.py
+        """
+        try:
+            from shared.logging_config import configure_logging
+            configure_logging(log_file=self.log_path)
+        except ImportError:
+            logging.basicConfig(
+                format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                level=logging.INFO,
+                handlers=[
+                    logging.FileHandler(self.log_path, encoding='utf-8'),
+                    logging.StreamHandler()
+                ]
+            )
+        return logging.getLogger(__name__)
     
     def load_environment(self):
         """Загрузить переменные окружения"""
@@ -107,16 +127,7 @@ class WindowsConfig(PlatformConfig):
     def setup_logging(self) -> logging.Logger:
         """Настроить логирование для Windows"""
         self.ensure_directories()
-        
-        logging.basicConfig(
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            level=logging.INFO,
-            handlers=[
-                logging.FileHandler(self.log_path, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
-        return logging.getLogger(__name__)
+        return self.configure_logging()
 
 
 class UnixConfig(PlatformConfig):
@@ -130,16 +141,7 @@ class UnixConfig(PlatformConfig):
     def setup_logging(self) -> logging.Logger:
         """Настроить логирование для Unix"""
         self.ensure_directories()
-        
-        logging.basicConfig(
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            level=logging.INFO,
-            handlers=[
-                logging.FileHandler(self.log_path),
-                logging.StreamHandler()
-            ]
-        )
-        return logging.getLogger(__name__)
+        return self.configure_logging()
 
 
 class DockerConfig(UnixConfig):
@@ -1107,7 +1109,14 @@ https://grantservice.onff.ru/payment
         logger.info("Для остановки нажмите Ctrl+C")
         
         try:
-            application.run_polling(drop_pending_updates=True)
+            if os.getenv('BOT_MODE', 'polling').lower() == 'webhook':
+                # Webhook: ограниченная очередь + spool в PostgreSQL (backlog не теряется)
+                import asyncio
+                from shared.telegram_utils.webhook_intake import UpdateSpool, serve_webhook
+
+                asyncio.run(serve_webhook(application, spool=UpdateSpool(db)))
+            else:
+                application.run_polling(drop_pending_updates=True)
         except Exception as e:
             logger.error(self.config.format_log_message(
                 f"Ошибка при запуске бота: {e}", "❌"
@@ -407,7 +407,7 @@ class PerplexityService:
     def _log_query_to_db(self, user_id: int, session_id: int, query_text: str, result: Dict, status: str = "success", error_message: str = None):
         """Логировать запрос в базу данных с модель-специфичной информацией"""
         try:
-            from data.database import add_researcher_log
+            from shared.log_sink import submit_log
             
             # Извлекаем информацию о модели из результата
             usage = result.get('usage', {})
@@ -428,25 +428,22 @@ class PerplexityService:
             # Рассчитываем стоимость
             cost = self._calculate_cost(usage)
             
-            # Получаем актуальный баланс
-            screen_data = self.get_latest_screen_data()
-            current_balance = screen_data.get('credit_balance', 0.0)
-            
-            # Логируем в базу данных
-            add_researcher_log(
-                user_id=user_id,
-                session_id=session_id,
-                query_text=query_text,
-                result=json.dumps(result),
-                sources=json.dumps(result.get('sources', [])),
-                usage_stats=json.dumps(detailed_usage),
-                cost=cost,
-                status=status,
-                error_message=error_message,
-                credit_balance=current_balance
-            )
-            
-            logging.info(f"Запрос залогирован в БД: модель={model}, качество={quality}, стоимость={cost}")
+            # Пишется в фоне пачками; credit_balance=None - последний известный
+            # баланс подставит поток записи (не читаем логи в обработчике запроса)
+            submit_log('researcher_logs', {
+                'user_id': user_id,
+                'session_id': session_id,
+                'query_text': query_text,
+                'perplexity_response': json.dumps(result),
+                'sources': json.dumps(result.get('sources', [])),
+                'usage_stats': json.dumps(detailed_usage),
+                'cost': cost,
+                'status': status,
+                'error_message': error_message,
+                'credit_balance': None
+            })
+            
+            logging.info(f"Запрос поставлен в очередь логов: модель={model}, качество={quality}, стоимость={cost}")
             
         except Exception as e:
             logging.error(f"Ошибка при логировании в БД: {e}")
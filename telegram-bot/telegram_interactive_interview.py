@@ -111,8 +111,8 @@ class TelegramInteractiveInterview:
     def _init_question_generator(self):
         """Инициализировать генератор вопросов"""
         try:
-            from llm.unified_llm_client import UnifiedLLMClient
-            from llm.config import AGENT_CONFIGS
+            from shared.llm.unified_llm_client import UnifiedLLMClient
+            from shared.llm.config import AGENT_CONFIGS
 
             config = AGENT_CONFIGS.get("interviewer", {})
 
@@ -2,6 +2,8 @@
 Embeddings Generator for Test Engineer Knowledge Base
 
 Generates embeddings for knowhow/ documents using GigaChat Embeddings API.
+
+For incremental re-ingestion (only new / changed chunks) use scripts/ingest_knowledge.py
 """
 
 import os
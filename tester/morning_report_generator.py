@@ -110,9 +110,19 @@ class MorningReportGenerator:
             "errors": [],
             "top_grants": [],
             "bottom_grants": [],
-            "repair_stats": None  # Iteration 71
+            "repair_stats": None,  # Iteration 71
+            "run_stats": None
         }
 
+        # Orchestrator checkpoint: completed cycles, durations, throughput
+        checkpoint_path = self.artifacts_dir / "checkpoint.json"
+        if checkpoint_path.exists():
+            try:
+                with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                    data["run_stats"] = json.load(f)
+            except Exception as e:
+                logger.warning(f"Failed to load checkpoint: {e}")
+
         # Iteration 71: Load repair statistics
         repair_stats_path = self.artifacts_dir / "repair_stats.json"
         if repair_stats_path.exists():
@@ -317,14 +327,31 @@ class MorningReportGenerator:
 {distribution}"""
 
     def _generate_performance_metrics(self, data: Dict) -> str:
-        """Generate performance metrics section"""
-        # Calculate durations (placeholder - would need actual data)
-        return """## Performance Metrics
-
-**Duration:** Calculated from checkpoint timestamps
-**Avg Cycle Duration:** ~5 minutes (estimated)
-**Fastest Cycle:** N/A
-**Slowest Cycle:** N/A"""
+        """Generate performance metrics section (from orchestrator checkpoint)"""
+        run_stats = data.get("run_stats")
+        if not run_stats:
+            return """## Performance Metrics
+
+**Duration:** N/A (no checkpoint.json)
+**Throughput:** N/A"""
+
+        durations = [r["duration"] for r in run_stats.get("results", []) if r.get("success") and r.get("duration")]
+        elapsed = run_stats.get("elapsed_seconds", 0)
+        completed = len(run_stats.get("completed_cycles", []))
+        overall_throughput = completed / (elapsed / 3600) if elapsed else 0
+
+        avg_duration = f"{sum(durations) / len(durations):.1f}s" if durations else "N/A"
+        fastest = f"{min(durations):.1f}s" if durations else "N/A"
+        slowest = f"{max(durations):.1f}s" if durations else "N/A"
+
+        return f"""## Performance Metrics
+
+**Duration:** {elapsed / 3600:.2f}h
+**Parallel Jobs:** {run_stats.get("parallel_jobs", 1)}
+**Throughput:** {overall_throughput:.1f} cycles/hour (last run: {run_stats.get("throughput_cycles_per_hour", 0):.1f})
+**Avg Cycle Duration:** {avg_duration}
+**Fastest Cycle:** {fastest}
+**Slowest Cycle:** {slowest}"""
 
     def _generate_quality_analysis(self, data: Dict) -> str:
         """Generate quality analysis section"""
@@ -10,6 +10,9 @@ Runs N E2E test cycles (default 100) autonomously.
 - Integrates Expert Agent evaluation
 - Handles errors with retry logic
 - Checkpoint/resume capability
+- Parallel mode: parallel_jobs cycles at once from a worker pool,
+  every LLM request (not a whole stage) gated by the process-wide
+  provider limiter (PROVIDER_CONCURRENCY_GIGACHAT, PROVIDER_CONCURRENCY_CLAUDE_CODE)
 
 Created: 2025-10-31
 Iteration: 69 - Autonomous Night Testing
@@ -27,6 +30,8 @@ from dataclasses import dataclass, asdict
 
 # Iteration 71: Repair Agent Integration
 from tester.repair_agent import RepairAgent
+from shared.llm.http_sessions import activate_shared_sessions, close_shared_sessions
+from shared.llm.provider_limiter import limit_requests
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +48,7 @@ class NightTestConfig:
     checkpoint_interval: int = 10
     retry_attempts: int = 3
     timeout_per_cycle: int = 600  # 10 minutes
+    research_provider: str = "claude_code"
 
 
 @dataclass
@@ -64,7 +70,8 @@ class NightTestOrchestrator:
     Orchestrates autonomous night testing
 
     Features:
-    - Runs N E2E cycles sequentially or parallel
+    - Runs N E2E cycles sequentially (parallel_jobs=1) or parallel
+      (worker pool; each cycle gets its own DB instance and artifacts dir)
     - Generates synthetic user profiles
     - Saves artifacts for each cycle
     - Expert Agent evaluation
@@ -84,6 +91,10 @@ class NightTestOrchestrator:
         self.results: List[CycleResult] = []
         self.start_time = None
         self.checkpoint_file = None
+        self.completed_cycles: set = set()
+        self.cycles_this_run = 0
+        self.previous_elapsed = 0.0  # seconds spent in earlier (resumed) runs
+        self._timeout_logged = False
         self.is_running = False  # Iteration 71: For RepairAgent monitoring
 
         # Setup artifacts directory
@@ -147,11 +158,13 @@ class NightTestOrchestrator:
         self.start_time = time.time()
         self.is_running = True  # Iteration 71: Enable RepairAgent monitoring
 
+        # Keep-alive provider sessions + shared GigaChat token for the whole run
+        await activate_shared_sessions()
+
         # Load checkpoint if resuming
-        start_cycle = 1
         if resume and self.checkpoint_file.exists():
-            start_cycle = self._load_checkpoint()
-            logger.info(f"Resuming from cycle {start_cycle}")
+            self._load_checkpoint()
+            logger.info(f"Resuming: {len(self.completed_cycles)} cycles already completed")
 
         logger.info("\n" + "="*80)
         logger.info("STARTING NIGHT TEST RUN")
@@ -174,53 +187,19 @@ class NightTestOrchestrator:
         if self.config.enable_expert:
             expert_agent = ExpertAgent(use_rag=True)
 
-        # Optional: Database for token tracking (не критично для тестов)
-        db = None
-        try:
-            db = GrantServiceDatabase()
-            logger.info("[Database] Connected for token tracking")
-        except Exception as e:
-            logger.warning(f"[Database] Not available: {e}. Running without DB.")
-
         # Generate all profiles upfront
         logger.info(f"Generating {self.config.num_cycles} user profiles...")
         profiles = user_generator.generate_profiles(count=self.config.num_cycles)
 
+        pending = [
+            cycle_num for cycle_num in range(1, self.config.num_cycles + 1)
+            if cycle_num not in self.completed_cycles
+        ]
+
         # Iteration 71: Wrap in try/finally for graceful Repair Agent shutdown
         try:
-            # Run cycles
-            for cycle_num in range(start_cycle, self.config.num_cycles + 1):
-                # Check timeout
-                if self._check_timeout():
-                    logger.warning("Maximum duration reached. Stopping.")
-                    break
-
-                profile = profiles[cycle_num - 1]
-
-                logger.info("\n" + "-"*80)
-                logger.info(f"CYCLE {cycle_num}/{self.config.num_cycles}: {profile.name}")
-                logger.info("-"*80)
-
-                # Run cycle with retry
-                result = await self._run_cycle_with_retry(
-                    cycle_num=cycle_num,
-                    profile=profile,
-                    db=db,
-                    expert_agent=expert_agent
-                )
-
-                self.results.append(result)
-
-                # Log result
-                if result.success:
-                    logger.info(f"✅ Cycle {cycle_num} SUCCESS - Score: {result.expert_score}/10, Duration: {result.duration:.1f}s")
-                else:
-                    logger.error(f"❌ Cycle {cycle_num} FAILED - Error: {result.error}")
-
-                # Checkpoint
-                if cycle_num % self.config.checkpoint_interval == 0:
-                    self._save_checkpoint(cycle_num)
-                    self._print_progress()
+            await self._run_pool(pending, profiles, expert_agent, GrantServiceDatabase)
+            self._save_checkpoint()
 
         except Exception as e:
             logger.error(f"Orchestrator error: {e}")
@@ -240,6 +219,8 @@ class NightTestOrchestrator:
             except Exception as e:
                 logger.warning(f"🔧 Repair Agent shutdown error: {e}")
 
+            await close_shared_sessions()
+
         # Generate summary
         summary = self._generate_summary()
 
@@ -266,6 +247,84 @@ class NightTestOrchestrator:
 
         return summary
 
+    async def _run_pool(self, cycle_nums: List[int], profiles, expert_agent, db_factory):
+        """
+        Run cycles from a shared queue with parallel_jobs workers
+
+        Each worker takes the next cycle number, opens its own database
+        instance and runs the cycle with retries. parallel_jobs=1 keeps
+        the old sequential order.
+
+        Args:
+            cycle_nums: Cycle numbers to run (not completed yet)
+            profiles: Profiles from SyntheticUserGenerator (index = cycle_num - 1)
+            expert_agent: ExpertAgent instance or None
+            db_factory: Callable creating a database instance for a cycle
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for cycle_num in cycle_nums:
+            queue.put_nowait(cycle_num)
+
+        workers_count = max(1, min(self.config.parallel_jobs, len(cycle_nums)))
+        logger.info(f"Running {len(cycle_nums)} cycles with {workers_count} worker(s)")
+
+        async def worker(worker_id: int):
+            while True:
+                if self._check_timeout():
+                    if not self._timeout_logged:
+                        self._timeout_logged = True
+                        logger.warning("Maximum duration reached. Stopping.")
+                    return
+
+                try:
+                    cycle_num = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                profile = profiles[cycle_num - 1]
+                logger.info("\n" + "-"*80)
+                logger.info(f"CYCLE {cycle_num}/{self.config.num_cycles}: {profile.name} (worker {worker_id})")
+                logger.info("-"*80)
+
+                db = await asyncio.to_thread(self._open_cycle_db, db_factory)
+                result = await self._run_cycle_with_retry(
+                    cycle_num=cycle_num,
+                    profile=profile,
+                    db=db,
+                    expert_agent=expert_agent
+                )
+                self._record_result(result)
+
+        # Слот провайдера занимается на время одного запроса UnifiedLLMClient:
+        # этап из десятков запросов не держит его между ними
+        with limit_requests():
+            await asyncio.gather(*[worker(i + 1) for i in range(workers_count)])
+
+    def _open_cycle_db(self, db_factory):
+        """Separate database instance for one cycle (None if unavailable)"""
+        try:
+            return db_factory()
+        except Exception as e:
+            logger.warning(f"[Database] Not available: {e}. Running cycle without DB.")
+            return None
+
+    def _record_result(self, result: CycleResult):
+        """Store cycle result, checkpoint it and report progress"""
+        self.results.append(result)
+        self.completed_cycles.add(result.cycle_id)
+        self.cycles_this_run += 1
+
+        if result.success:
+            logger.info(f"✅ Cycle {result.cycle_id} SUCCESS - Score: {result.expert_score}/10, Duration: {result.duration:.1f}s")
+        else:
+            logger.error(f"❌ Cycle {result.cycle_id} FAILED - Error: {result.error}")
+
+        # Checkpoint after every cycle: with parallel workers cycles finish out of order
+        self._save_checkpoint()
+
+        if self.cycles_this_run % self.config.checkpoint_interval == 0:
+            self._print_progress()
+
     async def _run_cycle_with_retry(
         self,
         cycle_num: int,
@@ -290,11 +349,14 @@ class NightTestOrchestrator:
                 if attempt > 1:
                     logger.info(f"Retry attempt {attempt}/{self.config.retry_attempts}")
 
-                result = await self._run_single_cycle(
-                    cycle_num=cycle_num,
-                    profile=profile,
-                    db=db,
-                    expert_agent=expert_agent
+                result = await asyncio.wait_for(
+                    self._run_single_cycle(
+                        cycle_num=cycle_num,
+                        profile=profile,
+                        db=db,
+                        expert_agent=expert_agent
+                    ),
+                    timeout=self.config.timeout_per_cycle
                 )
 
                 return result
@@ -393,6 +455,7 @@ class NightTestOrchestrator:
         logger.info(f"[Cycle {cycle_num}] Step 3/6: Researcher")
         research_data = await researcher.test_researcher(
             anketa_data,
+            llm_provider=self.config.research_provider,
             use_mock=self.config.mock_websearch
         )
         self._save_artifact(cycle_dir / "research.txt", research_data.get('research_text', ''))
@@ -414,7 +477,9 @@ class NightTestOrchestrator:
         expert_score = None
         if expert_agent:
             logger.info(f"[Cycle {cycle_num}] Step 6/6: Expert Agent")
-            evaluation = expert_agent.evaluate_grant(
+            # Sync (RAG + embeddings) - in a thread to keep other cycles running
+            evaluation = await asyncio.to_thread(
+                expert_agent.evaluate_grant,
                 grant_text=writer_data.get('grant_text', ''),
                 profile=profile.to_dict(),
                 research_text=research_data.get('research_text', ''),
@@ -461,35 +526,60 @@ class NightTestOrchestrator:
         max_seconds = self.config.max_duration_hours * 3600
         return elapsed > max_seconds
 
-    def _save_checkpoint(self, cycle_num: int):
-        """Save checkpoint"""
+    def _elapsed_total(self) -> float:
+        """Seconds spent on this night run, including resumed runs"""
+        current = time.time() - self.start_time if self.start_time else 0.0
+        return self.previous_elapsed + current
+
+    def _throughput(self) -> float:
+        """Cycles per hour in the current run"""
+        elapsed = time.time() - self.start_time if self.start_time else 0.0
+        return self.cycles_this_run / (elapsed / 3600) if elapsed > 0 else 0.0
+
+    def _save_checkpoint(self):
+        """Save checkpoint: set of completed cycles and their results"""
         checkpoint = {
-            "last_completed_cycle": cycle_num,
+            "completed_cycles": sorted(self.completed_cycles),
+            "results": [asdict(r) for r in self.results],
+            "parallel_jobs": self.config.parallel_jobs,
+            "elapsed_seconds": round(self._elapsed_total(), 1),
+            "throughput_cycles_per_hour": round(self._throughput(), 2),
             "timestamp": datetime.now().isoformat(),
             "results_count": len(self.results)
         }
 
         try:
-            with open(self.checkpoint_file, 'w', encoding='utf-8') as f:
+            tmp_file = self.checkpoint_file.with_suffix(".json.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+            tmp_file.replace(self.checkpoint_file)
 
-            logger.info(f"Checkpoint saved: cycle {cycle_num}")
+            logger.debug(f"Checkpoint saved: {len(self.completed_cycles)} cycles completed")
 
         except Exception as e:
             logger.error(f"Failed to save checkpoint: {e}")
 
-    def _load_checkpoint(self) -> int:
-        """Load checkpoint and return next cycle number"""
+    def _load_checkpoint(self) -> set:
+        """Load checkpoint and return the set of completed cycles"""
         try:
             with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
                 checkpoint = json.load(f)
 
-            last_cycle = checkpoint.get('last_completed_cycle', 0)
-            return last_cycle + 1
+            if "completed_cycles" in checkpoint:
+                self.completed_cycles = set(checkpoint["completed_cycles"])
+                self.results = [CycleResult(**r) for r in checkpoint.get("results", [])]
+            else:
+                # Old format: cycles ran strictly in order
+                last_cycle = checkpoint.get('last_completed_cycle', 0)
+                self.completed_cycles = set(range(1, last_cycle + 1))
+
+            self.previous_elapsed = checkpoint.get("elapsed_seconds", 0.0)
 
         except Exception as e:
             logger.error(f"Failed to load checkpoint: {e}")
-            return 1
+            self.completed_cycles = set()
+
+        return self.completed_cycles
 
     def _print_progress(self):
         """Print progress summary"""
@@ -507,6 +597,7 @@ class NightTestOrchestrator:
         logger.info(f"Success: {successful} ({100*successful/len(self.results):.1f}%)")
         logger.info(f"Failed: {failed}")
         logger.info(f"Avg duration: {avg_duration:.1f}s")
+        logger.info(f"Throughput: {self._throughput():.1f} cycles/hour ({self.config.parallel_jobs} parallel jobs)")
         logger.info("="*80)
 
     def _generate_summary(self) -> Dict:
@@ -530,6 +621,8 @@ class NightTestOrchestrator:
             "duration_hours": duration / 3600,
             "avg_cycle_duration": sum(r.duration for r in self.results) / total if total > 0 else 0,
             "avg_expert_score": avg_score,
+            "parallel_jobs": self.config.parallel_jobs,
+            "throughput_cycles_per_hour": self._throughput(),
             "expert_scores_count": len(expert_scores),
             "artifacts_dir": str(self.artifacts_dir)
         }
@@ -9,6 +9,7 @@ Critical: Validates research_anketa() with real WebSearch API
 Iteration 66: E2E Test Suite
 """
 
+import asyncio
 import logging
 from typing import Dict, Any
 from pathlib import Path
@@ -90,7 +91,9 @@ class ResearcherTestModule:
         else:
             # 4. Run research (PRODUCTION signature: research_anketa(anketa_id: str))
             self.logger.info("Calling ResearcherAgent.research_anketa()...")
-            research_result = researcher.research_anketa(anketa_id)
+            # research_anketa() is sync (requests + DB): run it in a thread
+            # so parallel night-test cycles keep running
+            research_result = await asyncio.to_thread(researcher.research_anketa, anketa_id)
 
         # ====== DEBUG LOGGING START ======
         self.logger.info("="*80)
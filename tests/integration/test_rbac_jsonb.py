@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Integration тест: снимок RBAC и триггер rbac_changes на реальном PostgreSQL
+
+users.permissions - JSONB: запрос снимка (data/database/auth.py) и
+notify_user_rbac_change (Migration 021) выполняются на настоящей схеме,
+всё внутри одной транзакции с откатом.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+TEST_TELEGRAM_ID = 999999871
+
+
+@pytest.mark.integration
+def test_rbac_snapshot_query_and_trigger_on_jsonb(test_db):
+    from data.database.auth import RBACSnapshot
+
+    migration = (PROJECT_ROOT / 'database' / 'migrations' /
+                 '021_add_rbac_change_notifications.sql').read_text(encoding='utf-8')
+
+    with test_db.connect() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(migration)
+
+            # регистрация: триггер на INSERT с permissions NULL и '[]'
+            cursor.execute("INSERT INTO users (telegram_id, username) VALUES (%s, %s)",
+                           (TEST_TELEGRAM_ID, 'rbac_jsonb_test'))
+            cursor.execute("UPDATE users SET permissions = %s::jsonb WHERE telegram_id = %s",
+                           ('["export_data"]', TEST_TELEGRAM_ID))
+
+            snapshot = RBACSnapshot.load(cursor)
+            assert snapshot.permissions(TEST_TELEGRAM_ID) == ['export_data']
+
+            cursor.execute("UPDATE users SET permissions = '[]'::jsonb, role = 'editor' WHERE telegram_id = %s",
+                           (TEST_TELEGRAM_ID,))
+            snapshot = RBACSnapshot.load(cursor)
+            assert snapshot.role(TEST_TELEGRAM_ID) == 'editor'
+            assert snapshot.permissions(TEST_TELEGRAM_ID) == []
+
+            cursor.execute("DELETE FROM users WHERE telegram_id = %s", (TEST_TELEGRAM_ID,))
+        finally:
+            conn.rollback()
+            cursor.close()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Общие заглушки для тестов LISTEN/NOTIFY (shared/pg_listener.py и его подклассы)
+"""
+
+import socket
+import time
+import types
+
+
+class FakeListenConnection:
+    """psycopg2 connection для LISTEN: fileno() на socketpair, poll() забирает notifies"""
+
+    def __init__(self, channel: str = 'test_changes'):
+        self.channel = channel
+        self.reader, self.writer = socket.socketpair()
+        self.notifies = []
+        self.pending = []
+        self.executed = []
+        self.autocommit = False
+        self.closed = False
+
+    def fileno(self):
+        return self.reader.fileno()
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def execute(self, query, params=None):
+                conn.executed.append(query)
+
+            def close(self):
+                pass
+
+        return Cursor()
+
+    def notify(self, payload):
+        self.pending.append(types.SimpleNamespace(channel=self.channel, payload=payload))
+        self.writer.send(b'x')
+
+    def poll(self):
+        self.reader.recv(1024)
+        self.notifies.extend(self.pending)
+        self.pending = []
+
+    def close(self):
+        self.closed = True
+        self.reader.close()
+        self.writer.close()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
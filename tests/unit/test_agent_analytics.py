@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для web-admin/utils/agent_analytics.py
+
+Проверяем:
+- daily_series: непрерывная ось дат, колонки по провайдерам, шаг неделя
+- avg_latency считается из сумм (а не среднее средних), деление на 0
+- summary_by / totals по строкам agent_daily_rollups
+- load_rollups: инкрементальный пересчет и фильтр по агентам
+
+Запросы к PostgreSQL заменены фейковым utils.postgres_helper.
+"""
+
+import importlib.util
+import sys
+import types
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+WEB_ADMIN_UTILS = PROJECT_ROOT / 'web-admin' / 'utils'
+sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def rollup_rows():
+    """Строки agent_daily_rollups, как их отдает psycopg2 (Decimal -> object)"""
+    return pd.DataFrame([
+        (date(2025, 11, 1), 'websearch', 'perplexity', 10, 1, 1000, '0.50', '0', 0, '0'),
+        (date(2025, 11, 1), 'researcher', 'claude_code', 2, 0, 400, '0', '100', 2, '70'),
+        (date(2025, 11, 3), 'researcher', 'claude_code', 1, 1, 0, '0', '20', 1, '20'),
+        (date(2025, 11, 3), 'writer', 'gigachat', 4, 0, 800, '0', '0', 0, '0'),
+        (date(2025, 11, 10), 'websearch', 'perplexity', 6, 0, 600, '0.30', '0', 0, '0'),
+    ], columns=['day', 'agent_type', 'provider', 'calls', 'errors', 'tokens', 'cost',
+                'latency_sum', 'latency_count', 'latency_max'])
+
+
+@pytest.fixture
+def analytics(monkeypatch):
+    """agent_analytics.py с фейковым utils.postgres_helper"""
+    calls = {'refresh': [], 'queries': []}
+
+    def execute_query_df(query, params=None):
+        calls['queries'].append(params)
+        return rollup_rows()
+
+    def execute_scalar(query, params=None):
+        calls['refresh'].append(params)
+        return 5
+
+    helper = types.ModuleType('utils.postgres_helper')
+    helper.execute_query_df = execute_query_df
+    helper.execute_scalar = execute_scalar
+    helper.invalidate_tables = lambda *tables: None
+    helper.shared_cache = lambda ttl=None, tags=(): (lambda func: func)
+    monkeypatch.setitem(sys.modules, 'utils.postgres_helper', helper)
+
+    spec = importlib.util.spec_from_file_location('utils.logger', WEB_ADMIN_UTILS / 'logger.py')
+    logger_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(logger_module)
+    monkeypatch.setitem(sys.modules, 'utils.logger', logger_module)
+
+    spec = importlib.util.spec_from_file_location('agent_analytics_under_test', WEB_ADMIN_UTILS / 'agent_analytics.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.calls = calls
+    return module
+
+
+@pytest.mark.unit
+class TestAgentAnalytics:
+    """Тесты векторных преобразований rollups"""
+
+    def test_daily_series_continuous_axis(self, analytics):
+        df = analytics.prepare_rollups(rollup_rows())
+        cost = analytics.daily_series(df, 'cost')
+
+        assert list(cost.columns) == ['claude_code', 'gigachat', 'perplexity']
+        assert len(cost) == 10  # 1..10 ноября, пропущенные дни = 0
+        assert cost.loc['2025-11-02'].sum() == 0
+        assert cost['perplexity'].sum() == pytest.approx(0.8)
+
+        weekly = analytics.daily_series(df, 'calls', by=None, freq='W')
+        assert list(weekly.columns) == ['total']
+        assert weekly['total'].sum() == 23
+
+    def test_avg_latency_from_sums(self, analytics):
+        """Тест: среднее за период = сумма / количество, дни без времени = 0"""
+        df = analytics.prepare_rollups(rollup_rows())
+        latency = analytics.daily_series(df, 'avg_latency', by='agent_type', freq='MS')
+
+        assert latency.loc['2025-11-01', 'researcher'] == pytest.approx(40.0)  # 120 / 3
+        assert latency.loc['2025-11-01', 'websearch'] == 0.0
+
+    def test_summary_and_totals(self, analytics):
+        df = analytics.prepare_rollups(rollup_rows())
+        summary = analytics.summary_by(df, 'provider')
+
+        assert list(summary.index) == ['perplexity', 'claude_code', 'gigachat']  # по расходам
+        assert summary.loc['perplexity', 'cost_per_call'] == pytest.approx(0.05)
+        assert summary.loc['claude_code', 'error_rate'] == pytest.approx(1 / 3)
+        assert summary.loc['claude_code', 'latency_max'] == 70
+
+        result = analytics.totals(df)
+        assert result['calls'] == 23
+        assert result['tokens'] == 2800
+        assert analytics.totals(df.iloc[0:0])['avg_latency'] == 0
+
+    def test_load_rollups_refreshes_and_filters(self, analytics):
+        df = analytics.load_rollups(days=30, agent_types=['websearch'])
+
+        assert analytics.calls['refresh'] == [(None,)]  # только последние дни
+        assert len(analytics.calls['queries']) == 1
+        assert set(df['agent_type'].astype(str)) == {'websearch'}
+        assert analytics.daily_series(df, 'tokens', by=None)['total'].sum() == 1600
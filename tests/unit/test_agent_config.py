@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/agent_config.py (снимок промптов и настроек агентов)
+
+Проверяем:
+- снимок загружается один раз на процесс, агенты делят его без копий
+- перезагрузка повышает версию, созданный агент остается на своей
+- устаревший по TTL снимок обновляется в фоне, при live listener - нет
+- ошибка загрузки: пустой снимок или прежний
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from agents.base_agent import BaseAgent
+from shared.agent_config import AgentConfigStore, set_agent_config_store
+
+
+class CountingLoader:
+    """agent_prompts / ai_agent_settings в памяти + счетчик загрузок"""
+
+    def __init__(self):
+        self.calls = 0
+        self.template = 'Оцени заявку {anketa}'
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("db down")
+        prompts = [
+            {'name': 'audit_main', 'agent_type': 'auditor', 'prompt_template': self.template},
+            {'name': 'audit_short', 'agent_type': 'auditor', 'prompt_template': 'Кратко {anketa}'},
+            {'name': 'plan', 'agent_type': 'writer', 'prompt_template': 'План {anketa}'},
+        ]
+        settings = {'researcher': {'mode': 'active', 'provider': 'claude_code', 'execution_mode': 'manual',
+                                   'config': {'websearch_provider': 'claude_code'}}}
+        return prompts, settings
+
+
+class Agent(BaseAgent):
+    def process(self, data):
+        return self.prepare_output(data)
+
+
+@pytest.fixture
+def loader():
+    return CountingLoader()
+
+
+@pytest.fixture
+def store(loader):
+    store = AgentConfigStore(loader=loader, ttl=300)
+    set_agent_config_store(store)
+    yield store
+    set_agent_config_store(None)
+
+
+@pytest.mark.unit
+class TestAgentConfig:
+    """Тесты снимка конфигурации агентов"""
+
+    def test_agents_share_single_load(self, store, loader):
+        agents = [Agent('auditor', db=None) for _ in range(50)]
+
+        assert loader.calls == 1
+        assert all(agent.prompts is agents[0].prompts for agent in agents)
+        assert sorted(agents[0].get_available_prompts()) == ['audit_main', 'audit_short']
+        assert agents[0].get_prompt('audit_main')['prompt_template'] == 'Оцени заявку {anketa}'
+        assert agents[0].get_settings('researcher')['config']['websearch_provider'] == 'claude_code'
+        assert Agent('planner', db=None).get_available_prompts() == []
+
+        with pytest.raises(TypeError):
+            agents[0].prompts['audit_main'] = {}
+
+    def test_reload_bumps_version_agents_keep_theirs(self, store, loader):
+        old = Agent('auditor', db=None)
+        loader.template = 'Новая версия {anketa}'
+        store.reload({'table': 'agent_prompts', 'agent_type': 'auditor'})
+        new = Agent('auditor', db=None)
+
+        assert (old.config_version, new.config_version) == (1, 2)
+        assert old.get_prompt('audit_main')['prompt_template'] == 'Оцени заявку {anketa}'
+        assert new.get_prompt('audit_main')['prompt_template'] == 'Новая версия {anketa}'
+
+    def test_ttl_refresh_in_background(self, store, loader, monkeypatch):
+        first = store.snapshot()
+        monkeypatch.setattr(store, 'ttl', 0)
+
+        store.is_live = lambda: True
+        assert store.snapshot() is first and loader.calls == 1
+
+        store.is_live = lambda: False
+        assert store.snapshot() is first  # отдается прежний, пока идет перезагрузка
+        deadline = time.monotonic() + 2
+        while store.snapshot().version == 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.snapshot().version >= 2
+
+    def test_researcher_defaults_without_settings_row(self, store, loader):
+        """Тест: нет записи researcher в ai_agent_settings - perplexity с fallback claude_code"""
+        from agents.researcher_agent_v2 import ResearcherAgentV2
+
+        assert ResearcherAgentV2(db=None).websearch_provider == 'claude_code'
+
+        store.loader = lambda: (loader()[0], {})
+        store.reload()
+        agent = ResearcherAgentV2(db=None)
+        assert (agent.websearch_provider, agent.websearch_fallback) == ('perplexity', 'claude_code')
+
+    def test_load_failures(self, store, loader):
+        loader.fail = True
+        agent = Agent('auditor', db=None)
+        assert agent.prompts == {} and not agent.config.ok
+
+        loader.fail = False
+        store.reload()
+        assert Agent('auditor', db=None).get_prompt('audit_main') is not None
+
+        loader.fail = True
+        kept = store.reload()
+        assert kept.ok and kept.version == 2 and 'auditor' in kept.prompts
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для agents/anketa_synthetic_generator.py (пакетная генерация)
+
+Проверяем:
+- конкурентность ограничена лимитером, один LLM клиент на пакет
+- результаты отдаются по мере готовности, ошибки не прерывают пакет
+- битый JSON запрашивается повторно
+- прерванная итерация отменяет незавершенные запросы
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from agents.anketa_synthetic_generator import AnketaSyntheticGenerator
+from shared.llm.provider_limiter import ProviderLimiter, reset_provider_limiters
+
+TEMPLATES = [{'project_name': 'Школа юных экологов', 'region': 'Кемерово',
+              'problem': 'Низкая экологическая грамотность', 'solution': 'Кружки и экспедиции'}]
+
+
+class FakeLLM:
+    """generate_text с задержкой по качеству и учетом входов в контекст"""
+
+    def __init__(self, responses=None, fail_on=None, delay=0.01):
+        self.responses = list(responses or [])
+        self.fail_on = fail_on
+        self.delay = delay
+        self.prompts = []
+        self.entered = 0
+        self.cancelled = 0
+
+    async def __aenter__(self):
+        self.entered += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def generate_text(self, prompt, max_tokens=None):
+        self.prompts.append(prompt)
+        number = len(self.prompts)
+        try:
+            # high дольше: порядок готовности отличается от порядка запросов
+            await asyncio.sleep(self.delay * (3 if 'HIGH' in prompt else 1))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if number == self.fail_on:
+            raise RuntimeError("GigaChat 500")
+        if self.responses:
+            return self.responses.pop(0)
+        return f"```json\n{json.dumps({'project_name': f'Проект {number}'}, ensure_ascii=False)}\n```"
+
+
+def make_generator(llm):
+    generator = AnketaSyntheticGenerator(db=None)
+    generator.llm = llm
+    return generator
+
+
+@pytest.mark.unit
+class TestGenerateStream:
+    """Тесты конкурентной генерации пакета"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_stream_under_limiter(self):
+        llm = FakeLLM(fail_on=2)
+        limiter = ProviderLimiter('test', max_concurrency=3)
+        generator = make_generator(llm)
+        qualities = ['high', 'low', 'low', 'medium', 'low', 'medium']
+
+        results = [item async for item in generator.generate_stream(TEMPLATES, qualities, limiter=limiter)]
+
+        assert len(results) == 6
+        assert sorted(index for index, _ in results) == list(range(6))
+        assert results[0][0] != 0  # high дольше: отдается не первым
+        failed = [index for index, anketa in results if anketa is None]
+        assert len(failed) == 1
+        for index, anketa in results:
+            if anketa is not None:
+                assert anketa['synthetic'] is True
+                assert anketa['quality_target'] == qualities[index]
+
+        assert llm.entered == 1
+        assert limiter.stats['max_in_flight'] == 3
+        assert limiter.stats['in_flight'] == 0
+        assert all('Школа юных экологов' in prompt for prompt in llm.prompts)
+
+    @pytest.mark.asyncio
+    async def test_broken_json_is_retried(self):
+        llm = FakeLLM(responses=['{"project_name": "Обрыв', 'нет json', '{"project_name": "Проект",}'])
+        generator = make_generator(llm)
+
+        results = [item async for item in generator.generate_stream(
+            TEMPLATES, ['medium'], limiter=ProviderLimiter('test', max_concurrency=1))]
+
+        assert len(llm.prompts) == 3
+        assert results == [(0, {'project_name': 'Проект', 'synthetic': True, 'quality_target': 'medium'})]
+
+    @pytest.mark.asyncio
+    async def test_aclose_cancels_pending_requests(self):
+        llm = FakeLLM(delay=0.05)
+        generator = make_generator(llm)
+        stream = generator.generate_stream(TEMPLATES, ['low'] + ['high'] * 3,
+                                           limiter=ProviderLimiter('test', max_concurrency=4))
+
+        index, anketa = await stream.__anext__()
+        await stream.aclose()
+
+        assert index == 0 and anketa['quality_target'] == 'low'
+        assert llm.cancelled == 3
+
+    @pytest.mark.asyncio
+    async def test_generate_batch_keeps_quality_order(self, monkeypatch):
+        monkeypatch.setenv('PROVIDER_CONCURRENCY_GIGACHAT', '4')
+        reset_provider_limiters()
+
+        generator = make_generator(FakeLLM())
+        anketas = await generator.generate_batch(TEMPLATES, count=10)
+
+        assert [a['quality_target'] for a in anketas] == ['low'] * 2 + ['medium'] * 5 + ['high'] * 3
+        reset_provider_limiters()
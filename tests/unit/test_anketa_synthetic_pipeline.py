@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для agents/anketa_synthetic_pipeline.py
+
+Проверяем:
+- план качества (20/50/30 или фиксированное качество)
+- сохранение пачками, учет ошибок генерации и прогресс
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from agents.anketa_synthetic_pipeline import SyntheticCorpusPipeline
+
+
+class FakeDB:
+    """БД, записывающая пачки bulk_save_anketas"""
+
+    def __init__(self):
+        self.batches = []
+
+    def bulk_save_anketas(self, user_data, anketas):
+        self.batches.append(len(anketas))
+        start = sum(self.batches) - len(anketas)
+        return [f"#AN-TEST-{start + i + 1:03d}" for i in range(len(anketas))]
+
+
+@pytest.mark.unit
+class TestSyntheticCorpusPipeline:
+    """Тесты пайплайна синтетических анкет (без LLM и Qdrant)"""
+
+    def test_plan_qualities_distribution(self):
+        """Тест: разбивка 20/50/30 и фиксированное качество"""
+        plan = SyntheticCorpusPipeline.plan_qualities(10)
+        assert plan.count('low') == 2
+        assert plan.count('medium') == 5
+        assert plan.count('high') == 3
+
+        assert SyntheticCorpusPipeline.plan_qualities(4, quality_level='high') == ['high'] * 4
+
+    @pytest.mark.asyncio
+    async def test_persist_in_batches(self, monkeypatch):
+        """Тест: 25 анкет сохраняются пачками по 10, ошибки генерации учитываются"""
+        db = FakeDB()
+        progress = []
+
+        async def report(stage, done, total):
+            progress.append((stage, done, total))
+
+        pipeline = SyntheticCorpusPipeline(
+            db,
+            persist_batch_size=10,
+            index_to_qdrant=False,
+            progress_callback=report,
+            progress_every=5
+        )
+
+        async def fake_generate(template_anketas, qualities):
+            for number, quality in enumerate(qualities, 1):
+                await asyncio.sleep(0)
+                if number == 3:
+                    yield number - 1, None
+                else:
+                    yield number - 1, {'project_name': f'Проект {number}', 'quality_target': quality}
+
+        monkeypatch.setattr(pipeline, '_generate', fake_generate)
+
+        stats = await pipeline.run({'telegram_id': 1, 'username': 'test'}, [], count=26)
+
+        assert stats['generated'] == 25
+        assert stats['failed'] == 1
+        assert stats['saved'] == 25
+        assert db.batches == [10, 10, 5]
+        assert sum(stats['by_quality'].values()) == 25
+        assert ('generate', 26, 26) in progress
+        assert ('persist', 25, 25) in progress
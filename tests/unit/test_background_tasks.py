@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/telegram_utils/background_tasks.py
+
+Проверяем:
+- порядок обработки внутри одного ключа и параллельность между ключами
+- лимит фоновых задач на пользователя и отмену
+- нагрузочный сценарий: PerUserUpdateProcessor и фоновые этапы
+  InteractivePipelineHandler - пока 20 грантов ждут медленный LLM, нажатия
+  тех же чатов подтверждаются сразу и обрабатываются по порядку
+"""
+
+import asyncio
+import itertools
+import sys
+import time
+import types
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'telegram-bot'))
+
+from shared.telegram_utils.background_tasks import BackgroundTaskManager, KeyedSerializer
+
+try:
+    from telegram import Update
+except ImportError:  # python-telegram-bot нужен только нагрузочному сценарию
+    Update = None
+
+_update_ids = itertools.count(1)
+
+
+@pytest.mark.unit
+class TestKeyedSerializer:
+    """Тесты упорядочивания по ключу"""
+
+    @pytest.mark.asyncio
+    async def test_ordered_within_key_parallel_across_keys(self):
+        """Тест: updates одного чата по порядку, разных чатов - параллельно"""
+        serializer = KeyedSerializer()
+        log = []
+
+        async def handle(chat_id, n, delay):
+            log.append(('start', chat_id, n))
+            await asyncio.sleep(delay)
+            log.append(('end', chat_id, n))
+
+        started = time.monotonic()
+        await asyncio.gather(
+            serializer.run(1, handle(1, 1, 0.05)),
+            serializer.run(1, handle(1, 2, 0.0)),
+            serializer.run(2, handle(2, 1, 0.05)),
+        )
+        elapsed = time.monotonic() - started
+
+        chat1 = [entry for entry in log if entry[1] == 1]
+        assert chat1 == [('start', 1, 1), ('end', 1, 1), ('start', 1, 2), ('end', 1, 2)]
+        assert elapsed < 0.09  # чаты 1 и 2 обрабатывались одновременно
+        assert serializer.active_keys == 0
+
+
+@pytest.mark.unit
+class TestBackgroundTaskManager:
+    """Тесты фоновых задач"""
+
+    @pytest.mark.asyncio
+    async def test_per_user_limit_and_cancel(self):
+        """Тест: лимит задач пользователя, повторный запуск той же задачи, отмена"""
+        manager = BackgroundTaskManager(max_per_user=2)
+
+        first = manager.start(1, "grant:A", asyncio.sleep(10))
+        assert first is not None
+        assert manager.start(1, "grant:A", asyncio.sleep(10)) is None
+        assert manager.start(1, "audit:B", asyncio.sleep(10)) is not None
+        assert manager.start(1, "research:C", asyncio.sleep(10)) is None
+        assert manager.start(2, "grant:A", asyncio.sleep(10)) is not None
+
+        assert manager.cancel_user(1) == 2
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert manager.in_flight(1) == []
+        assert manager.total == 1
+
+        await manager.shutdown()
+        assert manager.total == 0
+
+
+
+@pytest.mark.unit
+class TestConcurrentPipeline:
+    """Нагрузочный сценарий: PerUserUpdateProcessor + фоновые этапы InteractivePipelineHandler"""
+
+    @pytest.mark.asyncio
+    async def test_ack_latency_flat_while_20_grants_generate(self, monkeypatch):
+        """Тест: 20 грантов генерируются, нажатия тех же чатов подтверждаются сразу и по порядку"""
+        pytest.importorskip("telegram")
+        from shared.telegram_utils.update_dispatcher import PerUserUpdateProcessor
+        from handlers.interactive_pipeline_handler import InteractivePipelineHandler
+
+        llm_release = asyncio.Event()
+        writes_started = []
+
+        class SlowWriter:
+            """ProductionWriter с медленным LLM: пишет, пока тест не отпустит"""
+
+            def __init__(self, **kwargs):
+                pass
+
+            async def write(self, anketa_data, research_results=None):
+                writes_started.append(anketa_data['chat'])
+                await llm_release.wait()
+                return f"Грант для чата {anketa_data['chat']}"
+
+        monkeypatch.setitem(sys.modules, 'agents.production_writer',
+                            types.SimpleNamespace(ProductionWriter=SlowWriter))
+
+        class FakeDB:
+            def get_session_by_anketa_id(self, anketa_id):
+                return {'interview_data': {'chat': int(anketa_id.split('-')[1])}}
+
+        bot = FakeBot()
+        pipeline = InteractivePipelineHandler(FakeDB())
+        processor = PerUserUpdateProcessor(max_concurrent_updates=256)
+        await processor.initialize()
+
+        handled = defaultdict(list)
+
+        async def handle_click(update, context):
+            # обычный обработчик кнопки: более ранние нажатия дольше
+            n = int(update.callback_query.data.split(':')[1])
+            await asyncio.sleep(0.01 * (3 - n))
+            await update.callback_query.answer()
+            handled[update.effective_chat.id].append(n)
+
+        def dispatch(update, handler):
+            # как Application с concurrent_updates: задача на каждый update
+            return asyncio.create_task(processor.process_update(update, handler(update, None)))
+
+        chats = range(1, 21)
+        # обработчик нажатия "Начать написание гранта" возвращается сразу
+        await asyncio.wait_for(asyncio.gather(*[
+            dispatch(callback_update(bot, chat, f"start_grant:anketa:AN-{chat}"), pipeline.handle_start_grant)
+            for chat in chats
+        ]), timeout=1)
+        for _ in range(50):
+            if len(writes_started) == 20:
+                break
+            await asyncio.sleep(0.01)
+        assert len(writes_started) == 20
+        assert pipeline.tasks.total == 20
+
+        # Пока гранты генерируются - по три нажатия в каждом чате
+        sent = time.monotonic()
+        await asyncio.wait_for(asyncio.gather(*[
+            dispatch(callback_update(bot, chat, f"click:{n}"), handle_click)
+            for chat in chats for n in range(3)
+        ]), timeout=2)
+        elapsed = time.monotonic() - sent
+
+        assert pipeline.tasks.total == 20  # гранты еще выполняются
+        assert all(handled[chat] == [0, 1, 2] for chat in chats)
+        assert elapsed < 0.5  # чаты параллельно: ~0.03-0.06 с, последовательно - больше 1 с
+        assert all(bot.answered[f"{chat}:click:{n}"] - sent < 0.5 for chat in chats for n in range(3))
+
+        llm_release.set()
+        for _ in range(100):
+            if pipeline.tasks.total == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pipeline.tasks.total == 0
+        assert sorted(bot.documents) == list(chats)
+
+
+class FakeBot:
+    """Bot для Update.de_json: запоминает ответы на нажатия и отправленные файлы"""
+
+    def __init__(self):
+        self.answered = {}
+        self.documents = []
+
+    async def answer_callback_query(self, callback_query_id, **kwargs):
+        self.answered[callback_query_id] = time.monotonic()
+        return True
+
+    async def send_message(self, chat_id, text, **kwargs):
+        return True
+
+    async def send_document(self, chat_id, document, **kwargs):
+        self.documents.append(chat_id)
+        return True
+
+
+def callback_update(bot, chat_id: int, data: str):
+    """Update с нажатием кнопки в личном чате chat_id"""
+    return Update.de_json({
+        'update_id': next(_update_ids),
+        'callback_query': {
+            'id': f"{chat_id}:{data}",
+            'chat_instance': str(chat_id),
+            'data': data,
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': f"user{chat_id}"},
+            'message': {'message_id': 1, 'date': 0, 'chat': {'id': chat_id, 'type': 'private'}},
+        },
+    }, bot)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для agents/anketa_batch_auditor.py
+
+Проверяем:
+- запись результатов пачками
+- checkpoint после прерванного запуска и продолжение (resume)
+- профиль затрат и пропускную способность
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from agents.anketa_batch_auditor import BatchAuditEngine
+
+
+class FakeDB:
+    """БД с рабочим набором анкет и записью пачек результатов"""
+
+    def __init__(self, count, fail_on_batch=None):
+        self.rows = [
+            {'anketa_id': f'#AN-TEST-{i:03d}', 'session_id': i, 'interview_data': '{}'}
+            for i in range(1, count + 1)
+        ]
+        self.audited = {}
+        self.batches = []
+        self.fail_on_batch = fail_on_batch
+
+    def get_unaudited_anketas(self, telegram_id, limit=10, anketa_ids=None):
+        rows = [r for r in self.rows if r['session_id'] not in self.audited]
+        if anketa_ids is not None:
+            rows = [r for r in rows if r['anketa_id'] in anketa_ids]
+        return rows[:limit]
+
+    def bulk_save_audit_results(self, results, llm_provider='gigachat'):
+        if self.fail_on_batch is not None and len(self.batches) == self.fail_on_batch:
+            self.fail_on_batch = None
+            raise RuntimeError("connection lost")
+        self.batches.append(len(results))
+        for r in results:
+            self.audited[r['session_id']] = r['status']
+        return len(results)
+
+
+async def fake_audit(row):
+    await asyncio.sleep(0)
+    score = 8.0 if row['session_id'] % 2 else 4.0
+    return {
+        'anketa_id': row['anketa_id'],
+        'session_id': row['session_id'],
+        'score': score,
+        'status': 'approved' if score >= 7.0 else 'rejected',
+        'recommendations': [],
+        'seconds': 0.5
+    }
+
+
+@pytest.mark.unit
+class TestBatchAuditEngine:
+    """Тесты batch аудита (без LLM)"""
+
+    @pytest.mark.asyncio
+    async def test_results_written_in_batches(self, tmp_path, monkeypatch):
+        """Тест: 25 анкет -> пачки 10/10/5, статистика и затраты"""
+        db = FakeDB(25)
+        engine = BatchAuditEngine(db, write_batch_size=10, checkpoint_dir=tmp_path)
+        monkeypatch.setattr(engine, '_audit_one', fake_audit)
+
+        stats = await engine.run(telegram_id=1, count=25)
+
+        assert db.batches == [10, 10, 5]
+        assert stats['audited'] == 25
+        assert stats['by_status'] == {'approved': 13, 'needs_revision': 0, 'rejected': 12}
+        assert stats['cost']['tokens'] == 25 * BatchAuditEngine.TOKENS_PER_AUDIT
+        assert stats['cost']['avg_audit_seconds'] == 0.5
+        assert stats['throughput_per_min'] > 0
+        assert engine.load_checkpoint(1) is None
+
+    @pytest.mark.asyncio
+    async def test_resume_after_crash(self, tmp_path, monkeypatch):
+        """Тест: падение на второй пачке -> resume проверяет только остаток"""
+        db = FakeDB(25, fail_on_batch=1)
+        engine = BatchAuditEngine(db, write_batch_size=10, checkpoint_dir=tmp_path)
+        monkeypatch.setattr(engine, '_audit_one', fake_audit)
+
+        with pytest.raises(RuntimeError):
+            await engine.run(telegram_id=1, count=25)
+
+        checkpoint = engine.load_checkpoint(1)
+        assert len(checkpoint['anketa_ids']) == 25
+        assert len(checkpoint['completed']) == 10
+
+        stats = await engine.run(telegram_id=1, resume=True)
+
+        assert stats['resumed'] is True
+        assert stats['audited'] == 25
+        assert len(db.audited) == 25
+        assert engine.load_checkpoint(1) is None
+
+    def test_classify(self):
+        """Тест: пороги статусов как в /batch_audit_anketas"""
+        assert BatchAuditEngine.classify({'score': 7.5, 'can_proceed': True}) == 'approved'
+        assert BatchAuditEngine.classify({'score': 7.5, 'can_proceed': False}) == 'needs_revision'
+        assert BatchAuditEngine.classify({'score': 4.9, 'can_proceed': True}) == 'rejected'
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для benchmarks/ (метрики стадий и сравнение прогонов)
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from benchmarks.compare import compare_results
+from benchmarks.metrics import (
+    QUERY_COUNTER, StageMeter, count_db_queries, counting_connection_class, counting_cursor_class, total_of
+)
+from shared.llm.cassettes import CassetteRecorder
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, query, vars=None):
+        self.executed.append(query)
+
+    def executemany(self, query, vars_list):
+        self.executed.append(query)
+
+
+def run_result(label, **stage_metrics):
+    stages = {
+        name: {'ok': True, 'wall_seconds': 1.0, 'cpu_seconds': 0.5, 'db_queries': 10, 'llm_calls': 2, **metrics}
+        for name, metrics in stage_metrics.items()
+    }
+    return {'label': label, 'fixtures': {'sample': {'stages': stages, 'total': total_of(stages)}}}
+
+
+@pytest.mark.unit
+class TestStageMeter:
+    """Тесты замера стадий"""
+
+    def test_stage_collects_db_and_llm_deltas(self, tmp_path):
+        """Тест: стадия видит только свои запросы к БД и вызовы LLM"""
+        recorder = CassetteRecorder("replay", tmp_path)
+        recorder.stats['by_provider']['llm'] = {'calls': 3, 'request_bytes': 300, 'response_bytes': 900}
+        meter = StageMeter(recorder=recorder, query_counter=QUERY_COUNTER)
+
+        cursor_class = counting_cursor_class(FakeCursor)
+        assert counting_cursor_class(FakeCursor) is cursor_class
+
+        QUERY_COUNTER.add("SELECT before stage")
+        with meter.stage('audit'):
+            cursor = cursor_class()
+            cursor.execute("SELECT 1")
+            cursor.execute("  insert into t values (1)")
+            cursor.executemany("UPDATE t SET a = %s", [(1,), (2,)])
+            recorder.stats['by_provider']['llm']['calls'] += 2
+            recorder.stats['by_provider']['llm']['response_bytes'] += 100
+
+        stage = meter.stages['audit']
+        assert stage['ok'] is True
+        assert stage['db_queries'] == 3
+        assert stage['db_by_kind'] == {'SELECT': 1, 'INSERT': 1, 'UPDATE': 1}
+        assert stage['llm_calls'] == 2
+        assert stage['llm_response_bytes'] == 100
+        assert stage['wall_seconds'] >= 0 and stage['cpu_seconds'] >= 0
+
+    def test_failed_stage_recorded(self):
+        meter = StageMeter()
+        with pytest.raises(RuntimeError):
+            with meter.stage('write'):
+                raise RuntimeError("boom")
+
+        assert meter.stages['write']['ok'] is False
+        assert "boom" in meter.stages['write']['error']
+        assert total_of(meter.stages)['ok'] is False
+
+
+    def test_query_counting_keeps_connection_factory(self, monkeypatch):
+        """Тест: счетчик не подменяет InvalidatingConnection - записи по-прежнему инвалидируют кеш"""
+        psycopg2 = pytest.importorskip("psycopg2")
+        from shared.query_cache import invalidating_connection_class
+
+        requested = []
+        monkeypatch.setattr(psycopg2, 'connect', lambda *args, **kwargs: requested.append(kwargs) or kwargs)
+
+        with count_db_queries():
+            psycopg2.connect(dbname='grantservice', connection_factory=invalidating_connection_class())
+            psycopg2.connect(dbname='grantservice')
+
+        invalidating, plain = (kwargs['connection_factory'] for kwargs in requested)
+        assert issubclass(invalidating, invalidating_connection_class())
+        assert invalidating is counting_connection_class(invalidating_connection_class())
+        assert issubclass(plain, psycopg2.extensions.connection)
+        assert requested[0]['dbname'] == 'grantservice'
+        assert psycopg2.connect(dbname='x') == {'dbname': 'x'}  # после блока - исходный connect
+
+
+@pytest.mark.unit
+class TestCompare:
+    """Тесты сравнения прогонов"""
+
+    def test_regression_flagged_over_threshold(self):
+        base = run_result('base', audit={}, write={'wall_seconds': 10.0})
+        new = run_result('new', audit={'db_queries': 40}, write={'wall_seconds': 10.5})
+
+        rows = compare_results(base, new, threshold_percent=10)
+        regressions = {(r['stage'], r['metric']) for r in rows if r['regression']}
+
+        assert ('audit', 'db_queries') in regressions
+        assert ('total', 'db_queries') in regressions
+        assert ('write', 'wall_seconds') not in regressions  # +5% < 10%
+
+    def test_noise_and_failures(self):
+        base = run_result('base', audit={'wall_seconds': 0.01})
+        new = run_result('new', audit={'wall_seconds': 0.03, 'ok': False})
+
+        rows = compare_results(base, new)
+        regressions = {r['metric'] for r in rows if r['regression']}
+
+        assert 'ok' in regressions
+        assert 'wall_seconds' not in regressions  # +200%, но меньше 50 мс
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/llm/cassettes.py
+
+Проверяем:
+- запись ответа провайдера и воспроизведение без сети (ClaudeCodeClient)
+- потоковый ответ (NDJSON Ollama) читается через response.content
+- нормализацию запроса (порядок ключей, session_id, заголовки)
+- модели задержки и детерминированность по seed
+- синхронный путь (requests) для GigaChatEmbeddingsClient
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.llm.cassettes import (
+    CassetteMissError, CassetteRecorder, LatencyModel, normalize_request, request_key, use_cassettes
+)
+from shared.llm.claude_code_client import ClaudeCodeClient
+from shared.llm.http_sessions import get_session_manager
+
+
+async def start_fake_claude():
+    calls = []
+
+    async def chat(request):
+        payload = await request.json()
+        calls.append(payload)
+        return web.json_response({'response': f"echo: {payload['message']}", 'session_id': 'srv-1'})
+
+    app = web.Application()
+    app.router.add_post('/chat', chat)
+    server = TestServer(app)
+    await server.start_server()
+    return server, calls
+
+
+@pytest.mark.unit
+class TestRecordReplay:
+    """Тесты записи и воспроизведения"""
+
+    @pytest.mark.asyncio
+    async def test_record_then_replay_offline(self, tmp_path):
+        """Тест: записанный ответ воспроизводится после остановки сервера"""
+        server, calls = await start_fake_claude()
+        base_url = str(server.make_url('')).rstrip('/')
+
+        with use_cassettes("record", tmp_path) as recorder:
+            async with ClaudeCodeClient(api_key="key", base_url=base_url) as client:
+                recorded = await client.chat("Привет", session_id="run-1")
+        await server.close()
+
+        assert recorded == "echo: Привет"
+        assert recorder.stats['recorded'] == 1
+        assert len(calls) == 1
+
+        with use_cassettes("replay", tmp_path) as recorder:
+            async with ClaudeCodeClient(api_key="other-key", base_url=base_url) as client:
+                # другой session_id и ключ API не меняют ключ кассеты
+                replayed = await client.chat("Привет", session_id="run-2")
+                with pytest.raises(CassetteMissError):
+                    await client.chat("Другой вопрос")
+
+        assert replayed == recorded
+        assert recorder.stats['replayed'] == 1
+        assert recorder.stats['misses'] == 1
+
+    @pytest.mark.asyncio
+    async def test_ollama_stream_record_and_replay(self, tmp_path):
+        """Тест: NDJSON Ollama итерируется по строкам и в записи, и в воспроизведении"""
+        async def generate(request):
+            response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+            await response.prepare(request)
+            for chunk in ({'response': 'Грант '}, {'response': 'одобрен'}, {'response': '', 'done': True}):
+                await response.write((json.dumps(chunk, ensure_ascii=False) + '\n').encode('utf-8'))
+            await response.write_eof()
+            return response
+
+        app = web.Application()
+        app.router.add_post('/api/generate', generate)
+        server = TestServer(app)
+        await server.start_server()
+        base_url = str(server.make_url('')).rstrip('/')
+
+        async def stream(recorder):
+            # как UnifiedLLMClient._generate_ollama
+            text = ""
+            session = recorder.session("ollama")
+            async with session.post(f"{base_url}/api/generate", json={'prompt': 'Статус?', 'stream': True}) as response:
+                async for line in response.content:
+                    if line.strip():
+                        chunk = json.loads(line.decode('utf-8'))
+                        text += chunk.get('response', '')
+                        if chunk.get('done'):
+                            break
+            return text
+
+        with use_cassettes("record", tmp_path) as recorder:
+            recorded = await stream(recorder)
+        await server.close()
+
+        with use_cassettes("replay", tmp_path) as recorder:
+            replayed = await stream(recorder)
+
+        assert recorded == replayed == "Грант одобрен"
+        assert recorder.stats['replayed'] == 1
+
+    @pytest.mark.asyncio
+    async def test_replay_injects_latency(self, tmp_path):
+        """Тест: replay с fixed задержкой ждет указанное время"""
+        server, _ = await start_fake_claude()
+        base_url = str(server.make_url('')).rstrip('/')
+        with use_cassettes("record", tmp_path):
+            async with ClaudeCodeClient(api_key="key", base_url=base_url) as client:
+                await client.chat("ping")
+        await server.close()
+
+        with use_cassettes("replay", tmp_path, latency="claude_code=fixed:0.1") as recorder:
+            async with ClaudeCodeClient(api_key="key", base_url=base_url) as client:
+                started = time.monotonic()
+                await client.chat("ping")
+                elapsed = time.monotonic() - started
+
+        assert elapsed >= 0.1
+        assert recorder.stats['simulated_latency_seconds'] == pytest.approx(0.1)
+
+    def test_sync_session_replay_rotates_responses(self, tmp_path):
+        """Тест: sync путь; несколько записанных ответов выдаются по кругу"""
+        url = "https://gigachat.devices.sberbank.ru/api/v1/embeddings"
+        payload = {'model': 'Embeddings', 'input': ['текст']}
+
+        with use_cassettes("replay", tmp_path) as recorder:
+            normalized = normalize_request('POST', url, json_body=payload)
+            key = request_key(normalized)
+            for value in (0.1, 0.2):
+                recorder.store.append('gigachat', key, normalized, {
+                    'status': 200, 'headers': {}, 'body': f'{{"data": [{{"embedding": [{value}]}}]}}', 'elapsed': 0.3
+                })
+
+            session = get_session_manager().get_sync_session('gigachat')
+            first = session.post(url, headers={'Authorization': 'Bearer x'}, json=payload, verify=False)
+            second = session.post(url, json=payload)
+            third = session.post(url, json=payload)
+
+        assert first.status_code == 200
+        assert [r.json()['data'][0]['embedding'][0] for r in (first, second, third)] == [0.1, 0.2, 0.1]
+
+
+@pytest.mark.unit
+class TestNormalization:
+    """Тесты ключа кассеты"""
+
+    def test_key_stable_across_order_and_ignored_fields(self):
+        url = "https://api.example.com/chat/?b=2&a=1"
+        first = normalize_request('post', url, json_body={'model': 'sonnet', 'message': 'hi', 'session_id': 'a'})
+        second = normalize_request('POST', "https://API.example.com/chat?a=1&b=2", json_body={'message': 'hi', 'model': 'sonnet'})
+        other = normalize_request('POST', url, json_body={'message': 'bye', 'model': 'sonnet'})
+
+        assert request_key(first) == request_key(second)
+        assert request_key(first) != request_key(other)
+
+    def test_scrub_patterns(self):
+        """Тест: ID анкеты в промпте не меняет ключ при scrub"""
+        import re
+        scrub = (re.compile(r'#AN-[\w-]+'),)
+        first = normalize_request('POST', 'https://x/chat', json_body={'message': 'Анкета #AN-20251103-u1-001'}, scrub=scrub)
+        second = normalize_request('POST', 'https://x/chat', json_body={'message': 'Анкета #AN-20251104-u1-007'}, scrub=scrub)
+
+        assert request_key(first) == request_key(second)
+
+    def test_default_scrub_patterns(self, tmp_path):
+        """Тест: по умолчанию рекордер вырезает ID анкет и дату-время"""
+        recorder = CassetteRecorder("replay", tmp_path)
+        first = normalize_request('POST', 'https://x/chat', scrub=recorder.scrub,
+                                  json_body={'message': 'Анкета #AN-20251103-u1-001, запуск 2025-11-03 10:15:02'})
+        second = normalize_request('POST', 'https://x/chat', scrub=recorder.scrub,
+                                   json_body={'message': 'Анкета #AN-20251104-u1-007, запуск 2025-11-04T08:00'})
+        assert request_key(first) == request_key(second)
+        assert CassetteRecorder("replay", tmp_path, scrub_patterns=()).scrub == ()
+
+    def test_form_data_normalized(self):
+        assert normalize_request('POST', 'https://x/oauth', data={'scope': 'S'})['body'] == "scope=S"
+        assert normalize_request('POST', 'https://x/oauth', data="scope=S")['body'] == "scope=S"
+
+
+@pytest.mark.unit
+class TestLatencyModel:
+    """Тесты моделей задержки"""
+
+    def test_specs(self):
+        model = LatencyModel("recorded:0.5;llm=fixed:2;claude_code=uniform:1,3", seed=1)
+
+        assert model.delay('perplexity', recorded_elapsed=4.0) == 2.0
+        assert model.delay('llm', recorded_elapsed=4.0) == 2.0
+        assert 1.0 <= model.delay('claude_code') <= 3.0
+        assert LatencyModel().delay('llm', 5.0) == 0.0
+
+    def test_seed_deterministic(self):
+        first = LatencyModel("lognormal:2,0.5", seed=42)
+        second = LatencyModel("lognormal:2,0.5", seed=42)
+
+        assert [first.delay('llm') for _ in range(5)] == [second.delay('llm') for _ in range(5)]
+
+    def test_invalid_spec(self):
+        with pytest.raises(ValueError):
+            LatencyModel("uniform:1")
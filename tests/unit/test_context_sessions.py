@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/llm/context_sessions.py
+
+Проверяем:
+- режим сессии: преамбула отправляется один раз, follow-up без нее
+- потерянная сессия: повтор с полным контекстом в новой сессии
+- API ответил из другой сессии (session_id в ответе): повтор, без ложной экономии
+- провайдер без сессий: преамбула в каждом запросе
+- метрики сэкономленных токенов и close()
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.llm.context_sessions import CONTEXT_SEPARATOR, SharedContextConversation, supports_sessions
+
+PREAMBLE = "Ты эксперт по грантам. ДАННЫЕ ПРОЕКТА: Название: Школа юных экологов, регион Кемерово."
+
+
+class FakeProvider:
+    """generate(prompt, session_id) с записью вызовов"""
+
+    def __init__(self, fail_followups: int = 0, echo_sessions: bool = False, expired_followups: int = 0):
+        self.calls = []
+        self.deleted = []
+        self.fail_followups = fail_followups
+        self.echo_sessions = echo_sessions
+        self.expired_followups = expired_followups
+
+    async def generate(self, prompt, session_id=None, **kwargs):
+        self.calls.append({'prompt': prompt, 'session_id': session_id, **kwargs})
+        if session_id and not prompt.startswith(PREAMBLE) and self.fail_followups:
+            self.fail_followups -= 1
+            raise RuntimeError("session not found")
+        response = f"ответ {len(self.calls)}"
+        if not self.echo_sessions:
+            return response
+        if session_id and not prompt.startswith(PREAMBLE) and self.expired_followups:
+            # сессия истекла: API молча открыл новую и ответил без преамбулы
+            self.expired_followups -= 1
+            return response, f"srv_{len(self.calls)}"
+        return response, session_id
+
+    async def delete_session(self, session_id):
+        self.deleted.append(session_id)
+        return True
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.mark.unit
+class TestSharedContextConversation:
+    """Тесты разговора с общим контекстом"""
+
+    def test_session_sends_preamble_once(self):
+        provider = FakeProvider()
+        conversation = SharedContextConversation(provider.generate, PREAMBLE, use_sessions=True,
+                                                 name='writer', delete_session=provider.delete_session)
+
+        async def scenario():
+            for section in ('Резюме', 'Проблема', 'Бюджет'):
+                await conversation.ask(f"Напиши раздел {section}", max_tokens=4000)
+            metrics = conversation.metrics()
+            await conversation.close()
+            return metrics
+
+        metrics = run(scenario())
+
+        first, *followups = provider.calls
+        assert first['prompt'] == f"{PREAMBLE}{CONTEXT_SEPARATOR}Напиши раздел Резюме"
+        assert [call['prompt'] for call in followups] == ["Напиши раздел Проблема", "Напиши раздел Бюджет"]
+        assert len({call['session_id'] for call in provider.calls}) == 1
+        assert first['session_id'].startswith('writer_')
+        assert all(call['max_tokens'] == 4000 for call in provider.calls)
+
+        assert metrics['mode'] == 'session'
+        assert metrics['calls'] == 3
+        assert metrics['client_tokens_not_resent'] >= 2 * metrics['preamble_tokens']
+        # сервер подставляет историю в каждый follow-up: преамбула и прошлые вопросы/ответы
+        assert metrics['history_tokens_replayed'] >= 2 * metrics['preamble_tokens']
+        assert metrics['input_tokens_processed'] == metrics['input_tokens_sent'] + metrics['history_tokens_replayed']
+        assert metrics['input_tokens_saved'] == (metrics['input_tokens_without_reuse']
+                                                 - metrics['input_tokens_processed'])
+        assert metrics['input_tokens_saved'] < 0
+        assert provider.deleted == [first['session_id']]
+
+    def test_lost_session_restarts_with_context(self):
+        provider = FakeProvider(fail_followups=1)
+        conversation = SharedContextConversation(provider.generate, PREAMBLE, use_sessions=True)
+
+        async def scenario():
+            await conversation.ask("Критерий 1")
+            return await conversation.ask("Критерий 2")
+
+        assert run(scenario()) == "ответ 3"
+        retry = provider.calls[-1]
+        assert retry['prompt'].startswith(PREAMBLE) and retry['prompt'].endswith("Критерий 2")
+        assert retry['session_id'] != provider.calls[0]['session_id']
+        assert conversation.metrics()['session_restarts'] == 1
+
+    def test_followup_answered_from_other_session_is_retried(self):
+        provider = FakeProvider(echo_sessions=True, expired_followups=1)
+        conversation = SharedContextConversation(provider.generate, PREAMBLE, use_sessions=True)
+
+        async def scenario():
+            await conversation.ask("Критерий 1")
+            answer = await conversation.ask("Критерий 2")
+            await conversation.ask("Критерий 3")
+            return answer
+
+        assert run(scenario()) == "ответ 3"
+        prompts = [call['prompt'] for call in provider.calls]
+        assert prompts[1] == "Критерий 2" and prompts[2].startswith(PREAMBLE)
+        assert prompts[3] == "Критерий 3"
+        assert provider.calls[3]['session_id'] == provider.calls[2]['session_id'] != provider.calls[0]['session_id']
+
+        metrics = conversation.metrics()
+        assert metrics['session_restarts'] == 1 and metrics['followups_unconfirmed'] == 0
+        # два раза с преамбулой, один "потерянный" follow-up: не отправлена одна преамбула минус его стоимость
+        assert metrics['client_tokens_not_resent'] < 2 * metrics['preamble_tokens']
+        assert metrics['client_tokens_not_resent'] == (metrics['input_tokens_without_reuse']
+                                                       - metrics['input_tokens_sent'])
+
+    def test_stateless_provider_sends_context_every_time(self):
+        provider = FakeProvider()
+        conversation = SharedContextConversation(provider.generate, PREAMBLE, use_sessions=False)
+
+        async def scenario():
+            await conversation.ask("Критерий 1")
+            await conversation.ask("Критерий 2")
+            await conversation.close()
+
+        run(scenario())
+
+        assert all(call['prompt'].startswith(PREAMBLE) for call in provider.calls)
+        assert all(call['session_id'] is None for call in provider.calls)
+        metrics = conversation.metrics()
+        assert metrics['mode'] == 'stateless'
+        assert metrics['input_tokens_saved'] == 0 and metrics['history_tokens_replayed'] == 0
+        assert metrics['estimated_seconds_saved'] == 0.0
+
+    def test_supports_sessions(self):
+        assert supports_sessions('claude_code')
+        assert supports_sessions('Claude')
+        assert not supports_sessions('gigachat')
+        assert not supports_sessions(None)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/llm/http_sessions.py
+
+Проверяем:
+- single-flight обновление токена при конкурентных запросах
+- переиспользование общих сессий только в активированном loop
+- закрытие сессий при завершении
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.llm.http_sessions import ProviderSessionManager, make_token_key
+
+
+@pytest.mark.unit
+class TestTokenCache:
+    """Тесты общего кэша токенов"""
+
+    @pytest.mark.asyncio
+    async def test_single_flight_refresh(self):
+        """Тест: 20 конкурентных запросов токена -> один fetch"""
+        manager = ProviderSessionManager()
+        key = make_token_key("gigachat", "secret", "GIGACHAT_API_PERS")
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return f"token-{len(calls)}", time.time() + 1800
+
+        results = await asyncio.gather(*[manager.get_token(key, fetch) for _ in range(20)])
+
+        assert len(calls) == 1
+        assert {token for token, _ in results} == {"token-1"}
+        assert manager.stats['token_fetches'] == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_forces_refetch(self):
+        """Тест: invalidate_token сбрасывает кэш"""
+        manager = ProviderSessionManager()
+        key = make_token_key("gigachat", "secret")
+        counter = {'n': 0}
+
+        async def fetch():
+            counter['n'] += 1
+            return f"token-{counter['n']}", time.time() + 1800
+
+        first, _ = await manager.get_token(key, fetch)
+        manager.invalidate_token(key)
+        second, _ = await manager.get_token(key, fetch)
+
+        assert first == "token-1"
+        assert second == "token-2"
+
+    def test_sync_token_shared_with_async(self):
+        """Тест: синхронный клиент видит токен, полученный асинхронным"""
+        manager = ProviderSessionManager()
+        key = make_token_key("gigachat", "secret")
+
+        async def fetch():
+            return "async-token", time.time() + 1800
+
+        asyncio.run(manager.get_token(key, fetch))
+        token = manager.get_token_sync(key, lambda: ("sync-token", time.time() + 1800))
+
+        assert token == "async-token"
+
+    def test_token_key_hides_secret(self):
+        """Тест: ключ кэша не содержит API ключ"""
+        key = make_token_key("gigachat", "super-secret-key", "SCOPE")
+        assert "super-secret-key" not in key
+        assert key.startswith("gigachat:SCOPE:")
+
+
+@pytest.mark.unit
+class TestSharedSessions:
+    """Тесты общих HTTP сессий"""
+
+    @pytest.mark.asyncio
+    async def test_no_shared_session_without_activation(self):
+        """Тест: без activate() клиент создает свою сессию"""
+        manager = ProviderSessionManager()
+        assert manager.get_session("claude_code") is None
+
+    @pytest.mark.asyncio
+    async def test_session_reused_and_closed(self):
+        """Тест: одинаковые параметры -> одна сессия, close() закрывает"""
+        manager = ProviderSessionManager()
+        manager.activate()
+
+        headers = {"Authorization": "Bearer a"}
+        first = manager.get_session("claude_code", headers=headers, timeout=60)
+        second = manager.get_session("claude_code", headers=headers, timeout=60)
+        other = manager.get_session("claude_code", headers={"Authorization": "Bearer b"}, timeout=60)
+
+        assert first is second
+        assert other is not first
+
+        await manager.close()
+
+        assert first.closed and other.closed
+        assert manager.get_session("claude_code", headers=headers) is None
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_env(self, monkeypatch):
+        """Тест: GRANTSERVICE_SHARED_HTTP=0 отключает общие сессии"""
+        monkeypatch.setenv('GRANTSERVICE_SHARED_HTTP', '0')
+        manager = ProviderSessionManager()
+        manager.activate()
+
+        assert manager.get_session("llm") is None
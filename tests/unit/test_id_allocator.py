@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для атомарной выдачи ID (GrantServiceDatabase._allocate_id_numbers)
+
+Проверяем:
+- 50 параллельных задач получают 50 разных номеров (реальный PostgreSQL)
+- формат anketa/audit/research/grant/review ID не изменился
+- выделение диапазона для bulk_save_anketas
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from data.database.models import GrantServiceDatabase
+
+MIGRATION_016 = Path(__file__).parent.parent.parent / "database" / "migrations" / "016_add_id_counters.sql"
+
+
+class FakeCounterCursor:
+    """Курсор, эмулирующий INSERT ... ON CONFLICT DO UPDATE ... RETURNING"""
+
+    def __init__(self, store):
+        self.store = store
+        self.result = None
+
+    def execute(self, query, params=None):
+        assert "COUNT(*)" not in query, "ID allocation must not scan tables"
+        scope, count = params
+        with self.store['lock']:
+            self.store['counters'][scope] = self.store['counters'].get(scope, 0) + count
+            self.result = (self.store['counters'][scope],)
+
+    def fetchone(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, store):
+        self.store = store
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def cursor(self):
+        return FakeCounterCursor(self.store)
+
+    def commit(self):
+        pass
+
+
+@pytest.fixture
+def fake_db():
+    """GrantServiceDatabase без подключения, с in-memory id_counters"""
+    database = GrantServiceDatabase.__new__(GrantServiceDatabase)
+    store = {'counters': {}, 'lock': threading.Lock()}
+    database.connect = lambda: FakeConnection(store)
+    database.store = store
+    return database
+
+
+@pytest.mark.unit
+class TestIdFormat:
+    """Тесты формата ID (без PostgreSQL)"""
+
+    def test_anketa_ids_sequential(self, fake_db):
+        """Тест: #AN-YYYYMMDD-user-NNN, номера идут подряд"""
+        user_data = {'telegram_id': 1, 'username': 'ivan_petrov'}
+
+        first = fake_db.generate_anketa_id(user_data)
+        second = fake_db.generate_anketa_id(user_data)
+
+        assert first.startswith("#AN-") and first.endswith("-ivan_petrov-001")
+        assert second.endswith("-ivan_petrov-002")
+
+    def test_child_ids_per_anketa(self, fake_db):
+        """Тест: AU/RS/GR/RV считаются отдельно для каждой анкеты"""
+        anketa_id = "#AN-20251102-ivan_petrov-001"
+
+        assert fake_db.generate_audit_id(anketa_id) == f"{anketa_id}-AU-001"
+        assert fake_db.generate_audit_id(anketa_id) == f"{anketa_id}-AU-002"
+        assert fake_db.generate_research_id(anketa_id) == f"{anketa_id}-RS-001"
+        assert fake_db.generate_grant_id(anketa_id) == f"{anketa_id}-GR-001"
+        assert fake_db.generate_review_id(anketa_id) == f"{anketa_id}-RV-001"
+        assert fake_db.generate_audit_id("#AN-20251102-other-001").endswith("-AU-001")
+
+    def test_range_allocation(self, fake_db):
+        """Тест: диапазон для массового сохранения не пересекается с одиночными ID"""
+        assert fake_db._allocate_id_numbers("#AN-20251102-bulk-", count=100) == 1
+        assert fake_db._allocate_id_numbers("#AN-20251102-bulk-") == 101
+
+
+@pytest.mark.unit
+class TestIdAllocatorConcurrency:
+    """Тесты конкурентной выдачи ID на реальном PostgreSQL"""
+
+    SCOPE = "#AN-19700101-pytest_allocator-"
+
+    @pytest.fixture
+    def counters_db(self, db):
+        with db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(MIGRATION_016.read_text(encoding='utf-8').split("-- Backfill")[0])
+            cursor.execute("DELETE FROM id_counters WHERE scope = %s", (self.SCOPE,))
+            conn.commit()
+            cursor.close()
+
+        yield db
+
+        with db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM id_counters WHERE scope = %s", (self.SCOPE,))
+            conn.commit()
+            cursor.close()
+
+    @pytest.mark.asyncio
+    async def test_50_parallel_allocations_unique(self, counters_db):
+        """Тест: 50 параллельных задач -> номера 1..50 без дублей"""
+        numbers = await asyncio.gather(*[
+            asyncio.to_thread(counters_db._allocate_id_numbers, self.SCOPE)
+            for _ in range(50)
+        ])
+
+        assert sorted(numbers) == list(range(1, 51))
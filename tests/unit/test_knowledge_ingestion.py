@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/knowledge_ingestion.py
+
+Проверяем:
+- первый запуск эмбеддит все чанки, повторный - ни одного
+- правка одного раздела: эмбеддится только он, точка перезаписывается
+- изменение только payload: без эмбеддинга
+- удаленный раздел: точка удаляется из Qdrant
+- dry-run ничего не пишет
+- knowledge_sections: id точки = knowledge_sections.id (строка PostgreSQL в том же шаге)
+- разбор HTML статей ФПГ и датасетов в чанки
+"""
+
+import json
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.knowledge_ingestion import (
+    CollectionSpec, KnowledgeIngestion, load_fpg_articles, load_fpg_requirements,
+    load_fpg_winners, load_markdown_docs, pack_paragraphs, point_id
+)
+
+COLLECTION = 'test_engineer_kb'
+
+
+class CountingEmbedder:
+    """Детерминированные векторы + счетчик вызовов"""
+
+    name = 'fake:3'
+
+    def __init__(self):
+        self.calls = 0
+        self.texts = []
+
+    def embed(self, texts):
+        self.calls += 1
+        self.texts.extend(texts)
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+
+@pytest.fixture
+def qdrant():
+    qdrant_client = pytest.importorskip('qdrant_client')
+    return qdrant_client.QdrantClient(':memory:')
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / 'knowhow'
+    root.mkdir()
+    (root / 'testing.md').write_text(
+        "# Тестирование\n\nВступление.\n\n## Unit\n\nПроверяем функции.\n\n## E2E\n\nПроверяем сценарии.\n",
+        encoding='utf-8')
+    (root / 'deploy.md').write_text("# Деплой\n\nGitHub Actions.\n", encoding='utf-8')
+    return root
+
+
+class FakeSectionsDB:
+    """knowledge_sources / knowledge_sections в памяти (запросы KnowledgeSectionStore)"""
+
+    def __init__(self):
+        self.sources = []
+        self.sections = {}
+        self.next_id = 1
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def execute(self, query, params=None):
+        self.row = None
+        if 'FROM knowledge_sources' in query:
+            self.row = (self.sources[0],) if self.sources else None
+        elif 'INSERT INTO knowledge_sources' in query:
+            self.sources.append(100)
+            self.row = (100,)
+        elif 'UPDATE knowledge_sections' in query:
+            *values, source_id, key = params
+            for section_id, row in self.sections.items():
+                if json.loads(row[4])['chunk_key'] == key:
+                    self.sections[section_id] = tuple(values)
+                    self.row = (section_id,)
+        elif 'INSERT INTO knowledge_sections' in query:
+            section_id, self.next_id = self.next_id, self.next_id + 1
+            self.sections[section_id] = tuple(params[:5])
+            self.row = (section_id,)
+        elif 'DELETE FROM knowledge_sections' in query:
+            for section_id in params[0]:
+                self.sections.pop(section_id)
+
+    def fetchone(self):
+        return self.row
+
+
+def make_ingestion(docs, qdrant, tmp_path, embedder, **kwargs):
+    spec = CollectionSpec(COLLECTION, lambda: load_markdown_docs(docs), CountingEmbedder, CountingEmbedder.name)
+    return KnowledgeIngestion(spec, qdrant, tmp_path / 'manifest', embedder=embedder, **kwargs)
+
+
+@pytest.mark.unit
+class TestKnowledgeIngestion:
+    """Тесты инкрементальной загрузки"""
+
+    def test_rerun_without_changes_makes_no_embedding_calls(self, docs, qdrant, tmp_path):
+        embedder = CountingEmbedder()
+        first = make_ingestion(docs, qdrant, tmp_path, embedder).run()
+        assert first.embedded == first.upserted == 4
+        assert qdrant.count(COLLECTION).count == 4
+        assert set(first.timings) >= {'load+chunk', 'diff', 'embed', 'upsert', 'manifest'}
+
+        embedder.calls = 0
+        second = make_ingestion(docs, qdrant, tmp_path, embedder).run()
+        assert embedder.calls == 0
+        assert second.plan.is_empty and second.plan.unchanged == 4
+
+    def test_edit_reembeds_only_changed_chunk(self, docs, qdrant, tmp_path):
+        embedder = CountingEmbedder()
+        make_ingestion(docs, qdrant, tmp_path, embedder).run()
+
+        path = docs / 'testing.md'
+        path.write_text(path.read_text(encoding='utf-8').replace('Проверяем функции.', 'Проверяем функции и классы.'),
+                        encoding='utf-8')
+        embedder.texts = []
+        report = make_ingestion(docs, qdrant, tmp_path, embedder).run()
+
+        assert embedder.texts == ['Проверяем функции и классы.']
+        assert [chunk.key for chunk in report.plan.changed] == ['testing.md#1.0']
+        assert qdrant.count(COLLECTION).count == 4
+        point = qdrant.retrieve(COLLECTION, [point_id(COLLECTION, 'testing.md#1.0')])[0]
+        assert point.payload['text'] == 'Проверяем функции и классы.'
+
+    def test_payload_only_change_and_orphans(self, docs, qdrant, tmp_path):
+        embedder = CountingEmbedder()
+        make_ingestion(docs, qdrant, tmp_path, embedder).run()
+
+        # заголовок раздела только в payload, удаленный файл - сироты
+        path = docs / 'testing.md'
+        path.write_text(path.read_text(encoding='utf-8').replace('## E2E', '## End-to-end'), encoding='utf-8')
+        (docs / 'deploy.md').unlink()
+        embedder.calls = 0
+        report = make_ingestion(docs, qdrant, tmp_path, embedder).run()
+
+        assert embedder.calls == 0
+        assert report.payload_updated == 1 and report.deleted == 1
+        assert qdrant.count(COLLECTION).count == 3
+        point = qdrant.retrieve(COLLECTION, [point_id(COLLECTION, 'testing.md#2.0')])[0]
+        assert point.payload['heading'] == 'End-to-end'
+
+        assert make_ingestion(docs, qdrant, tmp_path, embedder).run().plan.is_empty
+
+    def test_dry_run_and_missing_collection(self, docs, qdrant, tmp_path):
+        embedder = CountingEmbedder()
+        make_ingestion(docs, qdrant, tmp_path, embedder).run()
+        (docs / 'new.md').write_text("# Новое\n\nТекст.\n", encoding='utf-8')
+
+        embedder.calls = 0
+        report = make_ingestion(docs, qdrant, tmp_path, embedder).run(dry_run=True)
+        assert [chunk.key for chunk in report.plan.new] == ['new.md#0.0']
+        assert '+ new.md#0.0' in report.details()
+        assert embedder.calls == 0 and qdrant.count(COLLECTION).count == 4
+
+        # коллекцию удалили вручную: манифест не доверяем, загружаем все
+        qdrant.delete_collection(COLLECTION)
+        report = make_ingestion(docs, qdrant, tmp_path, embedder).run()
+        assert report.upserted == 5 and qdrant.count(COLLECTION).count == 5
+
+    def test_failed_embeddings_retried_next_run(self, docs, qdrant, tmp_path):
+        class FlakyEmbedder(CountingEmbedder):
+            def embed(self, texts):
+                vectors = super().embed(texts)
+                return [None if text == 'GitHub Actions.' else vector for text, vector in zip(texts, vectors)]
+
+        report = make_ingestion(docs, qdrant, tmp_path, FlakyEmbedder()).run()
+        assert report.embed_failures == 1 and report.upserted == 3
+
+        embedder = CountingEmbedder()
+        retry = make_ingestion(docs, qdrant, tmp_path, embedder).run()
+        assert embedder.texts == ['GitHub Actions.'] and retry.upserted == 1
+
+    def test_model_switch_with_failures_keeps_stale_chunks_changed(self, docs, qdrant, tmp_path):
+        make_ingestion(docs, qdrant, tmp_path, CountingEmbedder()).run()
+
+        class NewModel(CountingEmbedder):
+            name = 'fake:v2'
+
+        class FlakyNewModel(NewModel):
+            def embed(self, texts):
+                vectors = super().embed(texts)
+                return [None if text == 'GitHub Actions.' else vector for text, vector in zip(texts, vectors)]
+
+        report = make_ingestion(docs, qdrant, tmp_path, FlakyNewModel()).run()
+        assert report.embed_failures == 1 and report.upserted == 3
+
+        # вектор старой модели не считается актуальным для новой
+        embedder = NewModel()
+        retry = make_ingestion(docs, qdrant, tmp_path, embedder).run()
+        assert embedder.texts == ['GitHub Actions.'] and retry.upserted == 1
+
+        embedder = NewModel()
+        assert make_ingestion(docs, qdrant, tmp_path, embedder).run().plan.is_empty
+        assert embedder.calls == 0
+
+    def test_existing_collection_without_manifest_is_adopted(self, docs, qdrant, tmp_path):
+        from qdrant_client.models import Distance, PointStruct, VectorParams
+
+        # коллекция старого загрузчика: точки без chunk_key
+        qdrant.create_collection(COLLECTION, vectors_config=VectorParams(size=3, distance=Distance.COSINE))
+        qdrant.upsert(COLLECTION, points=[PointStruct(id=i, vector=[1.0, 0.0, float(i)], payload={'text': 'старое'})
+                                          for i in (1, 2)])
+
+        report = make_ingestion(docs, qdrant, tmp_path, CountingEmbedder()).run()
+        assert report.upserted == 4 and report.deleted == 2
+        assert qdrant.count(COLLECTION).count == 4
+
+        # манифест потерян: точки конвейера узнаются по chunk_key, дублей нет
+        (tmp_path / 'manifest' / f'{COLLECTION}.json').unlink()
+        embedder = CountingEmbedder()
+        report = make_ingestion(docs, qdrant, tmp_path, embedder).run()
+        assert report.plan.is_empty and embedder.calls == 0
+        assert qdrant.count(COLLECTION).count == 4
+
+    def test_knowledge_sections_points_use_postgres_ids(self, tmp_path, qdrant):
+        docs_dir = tmp_path / 'fpg'
+        docs_dir.mkdir()
+        article = ('<html><head><title>Бюджет</title></head><body><div class="content-article">'
+                   '<p>Бюджет состоит из статей расходов.</p><h2>Оплата труда</h2><p>{}</p></div></body></html>')
+        (docs_dir / 'art200_budget.html').write_text(article.format('Фонд оплаты труда.'), encoding='utf-8')
+        db = FakeSectionsDB()
+        spec = CollectionSpec('knowledge_sections', lambda: load_fpg_articles(docs_dir), CountingEmbedder,
+                              CountingEmbedder.name, postgres_sections=True)
+
+        with pytest.raises(ValueError):
+            KnowledgeIngestion(spec, qdrant, tmp_path / 'manifest', embedder=CountingEmbedder()).run()
+
+        KnowledgeIngestion(spec, qdrant, tmp_path / 'manifest', embedder=CountingEmbedder(), db=db).run()
+        assert sorted(db.sections) == [1, 2]
+        points = {point.id: point for point in qdrant.scroll('knowledge_sections', with_payload=True)[0]}
+        # ExpertAgent.query_knowledge: WHERE ks.id = ANY(<id точек>)
+        assert sorted(points) == [1, 2]
+        assert points[2].payload['section_id'] == 2
+        assert db.sections[2][1] == 'Бюджет: Оплата труда'
+
+        # правка раздела обновляет ту же строку и ту же точку
+        (docs_dir / 'art200_budget.html').write_text(article.format('Фонд оплаты труда и взносы.'), encoding='utf-8')
+        report = KnowledgeIngestion(spec, qdrant, tmp_path / 'manifest', embedder=CountingEmbedder(), db=db).run()
+        assert len(report.plan.changed) == 1
+        assert sorted(db.sections) == [1, 2] and db.sections[2][2] == 'Фонд оплаты труда и взносы.'
+        assert sorted(point.id for point in qdrant.scroll('knowledge_sections')[0]) == [1, 2]
+
+        # удаленная статья: точки и строки удаляются
+        (docs_dir / 'art200_budget.html').unlink()
+        report = KnowledgeIngestion(spec, qdrant, tmp_path / 'manifest', embedder=CountingEmbedder(), db=db).run()
+        assert report.deleted == 2 and db.sections == {}
+        assert qdrant.count('knowledge_sections').count == 0
+
+
+@pytest.mark.unit
+class TestSources:
+    """Тесты разбора источников"""
+
+    def test_fpg_article_sections(self, tmp_path):
+        html = """<html><head><title>Бюджет проекта</title></head><body>
+        <div class="menu"><p>Меню сайта не индексируется</p></div>
+        <div class="content-article"><div><p>Бюджет состоит из статей расходов.</p></div>
+        <h2>Оплата труда</h2><p>Фонд оплаты труда &amp; взносы.</p><ul><li>штатные сотрудники</li></ul>
+        </div></body></html>"""
+        (tmp_path / 'art200_budget.html').write_text(html, encoding='utf-8')
+        (tmp_path / 'knowledge_metadata.json').write_text(json.dumps({'categories': {'Бюджет': [
+            {'title': 'Бюджет проекта', 'url': 'https://example.test/200', 'filename': 'art200_budget.html'}
+        ]}}, ensure_ascii=False), encoding='utf-8')
+
+        chunks = load_fpg_articles(tmp_path)
+        assert [chunk.key for chunk in chunks] == ['art200_budget.html#0.0', 'art200_budget.html#1.0']
+        assert chunks[0].payload['content'] == 'Бюджет состоит из статей расходов.'
+        assert chunks[1].payload['section_name'] == 'Бюджет проекта: Оплата труда'
+        assert chunks[1].payload['content'] == 'Фонд оплаты труда & взносы.\n\n- штатные сотрудники'
+        assert chunks[1].payload['category'] == 'Бюджет'
+        assert all('Меню' not in chunk.text for chunk in chunks)
+
+    def test_pack_paragraphs(self):
+        parts = pack_paragraphs(['а' * 40, 'б' * 40, 'в' * 90], max_chars=100)
+        assert parts == ['а' * 40 + '\n\n' + 'б' * 40, 'в' * 90]
+        assert all(len(part) <= 50 for part in pack_paragraphs(['Раз. ' * 30], max_chars=50))
+
+    def test_repository_datasets_have_unique_keys(self):
+        winners = load_fpg_winners()
+        requirements = load_fpg_requirements()
+        assert winners and requirements
+        assert len({chunk.key for chunk in winners}) == len(winners)
+        assert len({chunk.key for chunk in requirements}) == len(requirements)
+        assert all(chunk.payload['text'] for chunk in winners)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/log_sink.py
+
+Проверяем:
+- запись пачками по размеру (N) и по времени (T)
+- submit не ждет записи
+- переполнение очереди: drop / spill и воспроизведение spill
+- ошибка в пачке: запись по одной, битая строка отбрасывается
+- БД недоступна: строки уходят в spill
+- close дописывает очередь
+- агрегация счетчиков промптов и подстановка баланса researcher_logs
+
+Запись в PostgreSQL заменена writer'ами, пишущими в список.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared import log_sink
+from shared.log_sink import LogSink
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.executed = []
+        self.result = None
+
+    def execute(self, query, params=None):
+        self.executed.append(query)
+        self.result = self.conn.fetch_result
+
+    def fetchone(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.commits = 0
+        self.rollbacks = 0
+        self.fetch_result = None
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class RecordingWriter:
+    """writer(cursor, rows): пачки в список, опционально блокирует или падает"""
+
+    def __init__(self, fail_if=None, gate=None):
+        self.batches = []
+        self.fail_if = fail_if
+        self.gate = gate
+
+    def __call__(self, cursor, rows):
+        if self.gate is not None:
+            self.gate.wait(2)
+        if self.fail_if and any(self.fail_if(row) for row in rows):
+            raise ValueError("invalid input syntax")
+        self.batches.append([row['n'] for row in rows])
+
+    @property
+    def rows(self):
+        return [n for batch in self.batches for n in batch]
+
+
+def make_sink(tmp_path, writer, connect=None, **kwargs):
+    connection = FakeConnection()
+    sink = LogSink(connect=connect or (lambda: connection), streams={'events': writer},
+                   spill_path=tmp_path / 'spill.jsonl', **kwargs)
+    return sink, connection
+
+
+@pytest.mark.unit
+class TestLogSink:
+    """Тесты фоновой записи"""
+
+    def test_batches_by_size_and_interval(self, tmp_path):
+        writer = RecordingWriter()
+        sink, connection = make_sink(tmp_path, writer, batch_size=5, flush_interval=0.2)
+        sink.start()
+        try:
+            for n in range(12):
+                assert sink.submit('events', {'n': n})
+
+            # две полные пачки сразу, остаток - по таймеру
+            deadline = time.monotonic() + 2
+            while len(writer.batches) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert writer.batches == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9], [10, 11]]
+            assert connection.commits == 3
+            assert sink.stats['written'] == 12 and sink.stats['batches'] == 3
+        finally:
+            sink.close()
+
+    def test_submit_does_not_wait_for_writes(self, tmp_path):
+        gate = threading.Event()
+        writer = RecordingWriter(gate=gate)
+        sink, _ = make_sink(tmp_path, writer, batch_size=1)
+        sink.start()
+        try:
+            started = time.perf_counter()
+            for n in range(100):
+                sink.submit('events', {'n': n})
+            assert time.perf_counter() - started < 0.5
+            assert writer.rows == []
+        finally:
+            gate.set()
+            sink.close()
+        assert writer.rows == list(range(100))
+
+    def test_overflow_drop(self, tmp_path):
+        writer = RecordingWriter()
+        sink, _ = make_sink(tmp_path, writer, max_queue=3, overflow='drop')
+
+        results = [sink.submit('events', {'n': n}) for n in range(5)]
+        assert results == [True, True, True, False, False]
+        assert sink.stats['dropped'] == 2
+        assert not (tmp_path / 'spill.jsonl').exists()
+
+        sink.start().close()
+        assert writer.rows == [0, 1, 2]
+
+    def test_overflow_spill_is_replayed_on_start(self, tmp_path):
+        first = RecordingWriter()
+        sink, _ = make_sink(tmp_path, first, max_queue=2)
+        for n in range(4):
+            sink.submit('events', {'n': n})
+        # submit не пишет файл: переполнение в spill сбрасывает поток записи
+        assert sink.stats['overflows'] == 2 and sink.stats['spilled'] == 0
+        assert not (tmp_path / 'spill.jsonl').exists()
+        sink.start().close()
+        assert first.rows == [2, 3, 0, 1]  # spill воспроизводится до очереди
+        assert sink.stats['spilled'] == 2
+        assert not (tmp_path / 'spill.jsonl').exists()
+
+        second = RecordingWriter()
+        sink, _ = make_sink(tmp_path, second)
+        sink.start().close()
+        assert second.rows == []
+
+    def test_overflow_buffer_is_bounded(self, tmp_path):
+        """Тест: буфер переполнения ограничен, лишнее отбрасывается со счетчиком"""
+        writer = RecordingWriter()
+        sink, _ = make_sink(tmp_path, writer, max_queue=1, max_overflow=2)
+        for n in range(5):
+            sink.submit('events', {'n': n})
+        assert sink.stats['dropped'] == 2
+        assert not (tmp_path / 'spill.jsonl').exists()
+        sink.close()  # поток записи не запускался: буфер уходит в spill при close
+        assert sink.stats['spilled'] == 2
+
+    def test_stale_replaying_files_are_replayed(self, tmp_path):
+        """Тест: .replaying, брошенный упавшим процессом, воспроизводится при старте"""
+        (tmp_path / 'spill.99999.replaying').write_text(
+            '{"stream": "events", "row": {"n": 7}}\n', encoding='utf-8')
+        (tmp_path / 'spill.jsonl').write_text('{"stream": "events", "row": {"n": 0}}\n', encoding='utf-8')
+        locked = tmp_path / 'spill.88888.replaying'
+        locked.write_text('{"stream": "events", "row": {"n": 9}}\n', encoding='utf-8')
+
+        with open(locked) as held:
+            if log_sink.fcntl is not None:
+                # другой живой процесс еще воспроизводит свой файл
+                log_sink.fcntl.flock(held.fileno(), log_sink.fcntl.LOCK_EX)
+            writer = RecordingWriter()
+            sink, _ = make_sink(tmp_path, writer)
+            sink.start().close()
+
+        assert not (tmp_path / 'spill.99999.replaying').exists()
+        if log_sink.fcntl is not None:
+            assert writer.rows == [0, 7] and locked.exists()
+        else:
+            assert sorted(writer.rows) == [0, 7, 9]
+
+    def test_spill_claimed_by_other_process(self, tmp_path, monkeypatch):
+        """Тест: spill забрал другой процесс - поток записи продолжает работу"""
+        (tmp_path / 'spill.jsonl').write_text('{"stream": "events", "row": {"n": 0}}\n', encoding='utf-8')
+
+        def claimed(src, dst):
+            Path(src).unlink()
+            raise FileNotFoundError(src)
+
+        monkeypatch.setattr(log_sink.os, 'replace', claimed)
+        writer = RecordingWriter()
+        sink, _ = make_sink(tmp_path, writer)
+        sink.start()
+        sink.submit('events', {'n': 1})
+        sink.close()
+        assert writer.rows == [1] and sink.stats['replayed'] == 0
+
+    def test_bad_row_does_not_lose_batch(self, tmp_path):
+        writer = RecordingWriter(fail_if=lambda row: row['n'] == 2)
+        sink, connection = make_sink(tmp_path, writer, batch_size=4, flush_interval=5)
+        sink.start()
+        for n in range(4):
+            sink.submit('events', {'n': n})
+        assert sink.flush()
+        sink.close()
+
+        assert writer.rows == [0, 1, 3]
+        assert sink.stats['failed'] == 1 and sink.stats['written'] == 3
+        assert connection.rollbacks == 2
+
+    def test_unavailable_db_spills(self, tmp_path):
+        def broken_connect():
+            raise ConnectionError("could not connect to server")
+
+        sink, _ = make_sink(tmp_path, RecordingWriter(), connect=broken_connect, flush_interval=5)
+        sink.start()
+        for n in range(3):
+            sink.submit('events', {'n': n})
+        sink.close()
+        assert sink.stats['spilled'] == 3
+
+        writer = RecordingWriter()
+        sink, _ = make_sink(tmp_path, writer)
+        sink.start().close()
+        assert writer.rows == [0, 1, 2] and sink.stats['replayed'] == 3
+
+    def test_sync_mode_and_unknown_stream(self, tmp_path):
+        writer = RecordingWriter()
+        sink, _ = make_sink(tmp_path, writer, background=False)
+        assert sink.submit('events', {'n': 1})
+        assert writer.rows == [1]
+        assert not sink.submit('missing', {'n': 2})
+
+
+@pytest.mark.unit
+class TestStreams:
+    """Тесты writer'ов встроенных потоков"""
+
+    def test_prompt_usage_aggregated(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(log_sink, 'execute_values',
+                            lambda cursor, query, values, **kwargs: calls.append((query, values)))
+
+        log_sink.write_prompt_usage(None, [
+            {'prompt_key': 'writer.main', 'score': 8.0},
+            {'prompt_key': 'writer.main', 'score': None},
+            {'prompt_key': 'auditor.main', 'score': None},
+            {'prompt_key': 'writer.main', 'score': 6.0},
+        ])
+
+        assert len(calls) == 1
+        assert calls[0][1] == [('writer.main', 3, 14.0, 2), ('auditor.main', 1, 0.0, 0)]
+
+    def test_researcher_logs_fill_balance(self, monkeypatch):
+        inserted = []
+        monkeypatch.setattr(log_sink, '_insert_researcher_logs', lambda cursor, rows: inserted.extend(rows))
+        connection = FakeConnection()
+        connection.fetch_result = (42.5,)
+
+        log_sink.write_researcher_logs(connection.cursor(), [
+            {'query_text': 'a', 'credit_balance': None},
+            {'query_text': 'b', 'credit_balance': 30.0},
+            {'query_text': 'c', 'credit_balance': None},
+        ])
+
+        assert [row['credit_balance'] for row in inserted] == [42.5, 30.0, 30.0]
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/logging_config.py
+
+Проверяем:
+- запись через QueueListener: файл дописывается при остановке
+- JSON формат: extra поля и traceback отдельным полем
+- уровни по модулям (аргумент и LOG_LEVELS)
+- семплирование: каждая N-я DEBUG/INFO запись, WARNING всегда
+- ReferencePointManager.get_next_reference_point на INFO пишет одну запись
+"""
+
+import io
+import json
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.logging_config import JsonFormatter, SamplingFilter, configure_logging, get_sampling_filter, shutdown_logging
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def make_record(name='agents.test', level=logging.INFO, msg='RP %s', args=('rp_01',)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+@pytest.mark.unit
+class TestConfigureLogging:
+    """Тесты настройки корневого логгера"""
+
+    def test_queue_writes_file_off_thread(self, tmp_path):
+        log_file = tmp_path / 'logs' / 'bot.log'
+        root = configure_logging(log_file=str(log_file), level='INFO', fmt='text', stream=False, use_queue=True)
+
+        assert [type(handler).__name__ for handler in root.handlers] == ['_QueueHandler']
+        logging.getLogger('agents.test').info("Next RP: %s", 'rp_01_project_essence')
+        logging.getLogger('agents.test').debug("не пишется")
+        shutdown_logging()
+
+        lines = log_file.read_text(encoding='utf-8').splitlines()
+        assert len(lines) == 1
+        assert lines[0].endswith('agents.test - INFO - Next RP: rp_01_project_essence')
+
+    def test_json_format_with_extra_and_exception(self, tmp_path):
+        stream = io.StringIO()
+        configure_logging(level='INFO', fmt='json', stream=False, use_queue=True,
+                          handlers=[logging.StreamHandler(stream)])
+
+        logger = logging.getLogger('telegram.handlers')
+        logger.info("turn %d", 3, extra={'session_id': 42})
+        try:
+            raise ValueError("bad answer")
+        except ValueError:
+            logger.exception("failed")
+        shutdown_logging()
+
+        first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert first['msg'] == 'turn 3' and first['session_id'] == 42
+        assert first['level'] == 'INFO' and first['logger'] == 'telegram.handlers'
+        assert second['msg'] == 'failed'
+        assert 'ValueError: bad answer' in second['exc']
+
+    def test_module_levels(self, monkeypatch):
+        monkeypatch.setenv('LOG_LEVELS', 'httpx=WARNING')
+        stream = io.StringIO()
+        configure_logging(level='DEBUG', module_levels={'agents.noisy': 'ERROR'}, stream=False,
+                          use_queue=False, handlers=[logging.StreamHandler(stream)])
+
+        logging.getLogger('agents.noisy.child').warning("скрыто")
+        logging.getLogger('httpx').info("скрыто")
+        logging.getLogger('agents.other').debug("видно")
+
+        assert stream.getvalue().strip().endswith('видно')
+        assert 'скрыто' not in stream.getvalue()
+        logging.getLogger('agents.noisy').setLevel(logging.NOTSET)
+        logging.getLogger('httpx').setLevel(logging.NOTSET)
+
+    def test_sampling_from_env(self, monkeypatch):
+        monkeypatch.setenv('LOG_SAMPLE', 'agents.hot=5')
+        stream = io.StringIO()
+        configure_logging(level='DEBUG', stream=False, use_queue=False, handlers=[logging.StreamHandler(stream)])
+
+        for index in range(20):
+            logging.getLogger('agents.hot.loop').debug("candidate %d", index)
+        logging.getLogger('agents.hot.loop').warning("no candidates")
+
+        lines = stream.getvalue().splitlines()
+        assert [line.rsplit(' - ', 1)[1] for line in lines] == [
+            'candidate 0', 'candidate 5', 'candidate 10', 'candidate 15', 'no candidates']
+        assert get_sampling_filter().suppressed == 16
+
+
+@pytest.mark.unit
+class TestFilters:
+    """Тесты фильтра и форматтера"""
+
+    def test_sampling_prefixes_and_templates(self):
+        sampling = SamplingFilter({'agents': 10, 'agents.reference_points': 2})
+
+        passed = [sampling.filter(make_record('agents.reference_points.manager')) for _ in range(4)]
+        assert passed == [True, False, True, False]
+
+        # разные шаблоны считаются отдельно, чужие логгеры не семплируются
+        assert sampling.filter(make_record('agents.reference_points.manager', msg='other %s'))
+        assert all(sampling.filter(make_record('telegram.handlers')) for _ in range(3))
+        assert sampling.filter(make_record('agents.reference_points.manager', level=logging.ERROR))
+
+    def test_json_formatter_plain_record(self):
+        entry = json.loads(JsonFormatter().format(make_record()))
+        assert entry['msg'] == 'RP rp_01' and entry['level'] == 'INFO'
+        assert 'exc' not in entry and entry['ts'].endswith('+00:00')
+
+
+@pytest.mark.unit
+def test_reference_point_manager_logs_once_per_call():
+    from agents.reference_points.reference_point_manager import ReferencePointManager
+
+    manager = ReferencePointManager()
+    manager.load_fpg_reference_points()
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger('agents.reference_points.reference_point_manager')
+    logger.addHandler(handler)
+    previous = logger.level
+    logger.setLevel(logging.INFO)
+    try:
+        rp = manager.get_next_reference_point()
+        assert rp is not None
+        assert len(records) == 1
+        assert records[0].getMessage().startswith(f"Next RP: {rp.id}")
+
+        logger.setLevel(logging.DEBUG)
+        records.clear()
+        manager.get_next_reference_point()
+        assert len(records) == len(manager.reference_points) + 2
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(previous)
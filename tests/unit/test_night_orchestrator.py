@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для tester/night_orchestrator.py (параллельный режим)
+
+Проверяем:
+- N циклов одновременно из пула воркеров, отдельная БД на цикл
+- checkpoint хранит множество завершенных циклов, resume их пропускает
+- старый формат checkpoint (last_completed_cycle)
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from tester.night_orchestrator import CycleResult, NightTestConfig, NightTestOrchestrator
+
+
+@pytest.fixture
+def make_orchestrator(tmp_path, monkeypatch):
+    root_handlers = list(logging.getLogger().handlers)
+
+    def factory(**config):
+        config.setdefault('artifacts_dir', str(tmp_path))
+        config.setdefault('checkpoint_interval', 100)
+        orchestrator = NightTestOrchestrator(NightTestConfig(**config))
+        orchestrator.start_time = time.time()
+        orchestrator.running = 0
+        orchestrator.max_running = 0
+        orchestrator.dbs = []
+
+        async def fake_cycle(cycle_num, profile, db, expert_agent):
+            orchestrator.dbs.append(db)
+            orchestrator.running += 1
+            orchestrator.max_running = max(orchestrator.max_running, orchestrator.running)
+            await asyncio.sleep(0.05)
+            orchestrator.running -= 1
+            return CycleResult(cycle_id=cycle_num, success=cycle_num != 3, duration=0.05,
+                               error=None if cycle_num != 3 else "boom")
+
+        monkeypatch.setattr(orchestrator, '_run_single_cycle', fake_cycle)
+        return orchestrator
+
+    yield factory
+
+    # _setup_logging добавляет обработчики в root logger
+    logging.getLogger().handlers = root_handlers
+
+
+def profiles(count):
+    return [SimpleNamespace(name=f"profile_{i}") for i in range(1, count + 1)]
+
+
+@pytest.mark.unit
+class TestParallelPool:
+    """Тесты пула воркеров"""
+
+    @pytest.mark.asyncio
+    async def test_parallel_cycles_and_checkpoint(self, make_orchestrator):
+        """Тест: 8 циклов, 4 воркера -> 4 одновременно, checkpoint с множеством циклов"""
+        orchestrator = make_orchestrator(num_cycles=8, parallel_jobs=4, retry_attempts=1)
+        db_counter = iter(range(100))
+
+        started = time.monotonic()
+        await orchestrator._run_pool(list(range(1, 9)), profiles(8), None, lambda: next(db_counter))
+        elapsed = time.monotonic() - started
+
+        assert orchestrator.max_running == 4
+        assert elapsed < 0.3  # 2 волны по 0.05s, а не 8 последовательно
+        assert sorted(orchestrator.dbs) == list(range(8))  # своя БД у каждого цикла
+
+        checkpoint = json.loads(orchestrator.checkpoint_file.read_text(encoding='utf-8'))
+        assert checkpoint['completed_cycles'] == list(range(1, 9))
+        assert len(checkpoint['results']) == 8
+        assert checkpoint['parallel_jobs'] == 4
+        assert checkpoint['throughput_cycles_per_hour'] > 0
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_completed_cycles(self, make_orchestrator):
+        """Тест: после перезапуска выполняются только незавершенные циклы"""
+        first = make_orchestrator(num_cycles=6, parallel_jobs=3, retry_attempts=1)
+        await first._run_pool([1, 2, 5], profiles(6), None, lambda: None)
+
+        second = make_orchestrator(num_cycles=6, parallel_jobs=3, retry_attempts=1)
+        completed = second._load_checkpoint()
+        pending = [n for n in range(1, 7) if n not in completed]
+        await second._run_pool(pending, profiles(6), None, lambda: None)
+
+        assert pending == [3, 4, 6]
+        assert sorted(r.cycle_id for r in second.results) == list(range(1, 7))
+        summary = second._generate_summary()
+        assert summary['failed'] == 1  # цикл 3
+        assert summary['parallel_jobs'] == 3
+
+    def test_legacy_checkpoint_format(self, make_orchestrator):
+        orchestrator = make_orchestrator(num_cycles=10)
+        orchestrator.checkpoint_file.write_text(json.dumps({'last_completed_cycle': 4}), encoding='utf-8')
+
+        assert orchestrator._load_checkpoint() == {1, 2, 3, 4}
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты импорта пакетов (agents, shared.llm, web-admin utils)
+
+Каждая проверка - в отдельном процессе: результат зависит от sys.path
+и sys.modules, которые в процессе pytest уже заполнены другими тестами.
+
+Проверяем:
+- агенты загружаются под одним именем (agents.base_agent, shared.llm.*),
+  без дублей base_agent / auditor_agent / llm.*
+- импорт агентов не тянет тяжелые зависимости (pandas, qdrant_client, ...)
+- `import utils` (web-admin) не загружает auth/database/charts до обращения
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+HEAVY = ['pandas', 'streamlit', 'plotly', 'qdrant_client', 'sentence_transformers', 'torch',
+         'weasyprint', 'reportlab']
+
+
+def run_isolated(paths, code):
+    """Выполнить code в новом интерпретаторе, вернуть JSON из последней строки stdout"""
+    script = f"import sys, json\nsys.path[:0] = {[str(PROJECT_ROOT / path) for path in paths]!r}\n{code}"
+    result = subprocess.run([sys.executable, '-c', script], cwd=str(PROJECT_ROOT),
+                            capture_output=True, text=True, encoding='utf-8', errors='replace')
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.unit
+def test_agents_load_under_package_names_only():
+    modules = run_isolated(['.'], (
+        "import agents.auditor_agent, agents.interactive_interviewer_agent_v2, agents.writer_agent_v2\n"
+        "print(json.dumps(sorted(sys.modules)))"
+    ))
+
+    assert 'agents.base_agent' in modules and 'agents.auditor_agent' in modules
+    duplicates = [name for name in modules
+                  if name in ('base_agent', 'auditor_agent', 'reference_points', 'llm')
+                  or name.startswith('llm.')]
+    assert duplicates == []
+
+
+@pytest.mark.unit
+def test_agent_imports_skip_heavy_dependencies():
+    modules = run_isolated(['.'], (
+        "import agents.interactive_interviewer_agent_v2, agents.reviewer_agent, agents.anketa_synthetic_pipeline\n"
+        "import shared.llm.rag_retriever\n"
+        f"print(json.dumps([name for name in {HEAVY!r} if name in sys.modules]))"
+    ))
+    assert modules == []
+
+    # utils/ корня проекта - отдельно: агенты ставят web-admin (свой utils) первым в sys.path
+    modules = run_isolated(['.'], (
+        "import utils.artifact_saver\n"
+        f"print(json.dumps([name for name in {HEAVY!r} if name in sys.modules]))"
+    ))
+    assert modules == []
+
+
+@pytest.mark.unit
+def test_web_admin_utils_exports_are_lazy():
+    state = run_isolated(['web-admin', '.'], (
+        "import utils\n"
+        "before = [name for name in ('utils.auth', 'utils.database', 'utils.charts') if name in sys.modules]\n"
+        "logger = utils.setup_logger('lazy-test')\n"
+        "print(json.dumps({'before': before, 'logger': type(logger).__name__,\n"
+        "                  'loaded': 'utils.logger' in sys.modules, 'all': sorted(utils.__all__)}))"
+    ))
+
+    assert state['before'] == []
+    assert state['logger'] == 'Logger' and state['loaded']
+    assert 'AdminDatabase' in state['all'] and 'create_daily_chart' in state['all']
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/pg_listener.py
+
+Проверяем:
+- LISTEN канала, on_reconnect() до приема уведомлений, on_notify() по порядку
+- переподключение после ошибки соединения
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.pg_listener import PgListenThread
+from tests.unit.pg_listen_helpers import FakeListenConnection, wait_for
+
+
+class RecordingListener(PgListenThread):
+    def __init__(self, connect):
+        super().__init__(connect, 'test_changes', name='test-listener', poll_timeout=0.05,
+                         max_reconnect_delay=0.05)
+        self.events = []
+
+    def on_reconnect(self):
+        self.events.append('reconnect')
+
+    def on_notify(self, payload):
+        self.events.append(payload)
+
+
+@pytest.mark.unit
+def test_listen_notify_and_reconnect():
+    connections = []
+
+    def connect():
+        if len(connections) == 1:
+            connections.append(None)
+            raise ConnectionError("server closed the connection")
+        conn = FakeListenConnection()
+        connections.append(conn)
+        return conn
+
+    listener = RecordingListener(connect)
+    listener._stop_event.wait = lambda delay: None  # без задержки переподключения
+    listener.start()
+    try:
+        assert listener.connected.wait(2)
+        first = connections[0]
+        assert first.executed == ['LISTEN test_changes'] and first.autocommit
+
+        first.notify('a')
+        first.notify('b')
+        assert wait_for(lambda: listener.events == ['reconnect', 'a', 'b'])
+
+        # соединение оборвалось: ошибка переподключения, затем новое соединение и on_reconnect
+        first.poll = lambda: (_ for _ in ()).throw(ConnectionError("connection lost"))
+        first.notify('lost')
+        assert wait_for(lambda: len(connections) == 3 and listener.connected.is_set())
+        assert first.closed
+        connections[2].notify('c')
+        assert wait_for(lambda: listener.events == ['reconnect', 'a', 'b', 'reconnect', 'c'])
+    finally:
+        listener.stop(timeout=2)
+    assert not listener.is_alive() and not listener.connected.is_set()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/llm/prompt_budget.py
+
+Проверяем:
+- оценку токенов (кириллица / латиница / пунктуация)
+- отбор элементов по релевантности в бюджете, исходный порядок вывода
+- дедупликацию между компонентами (цитаты vs ключевые факты)
+- распределение общего контекста между секциями
+- промпт Stage 2 WriterAgentV2 укладывается в бюджет и несет метрики
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.llm.prompt_budget import (
+    PROMPT_METRICS, PromptBudget, PromptPart, allocate_shared_items, estimate_tokens, truncate_to_tokens
+)
+
+
+@pytest.mark.unit
+class TestPromptBudget:
+    """Тесты бюджета токенов"""
+
+    def test_estimate_tokens(self):
+        assert estimate_tokens('') == 0
+        assert estimate_tokens('грант') == 2          # 5 / 3
+        assert estimate_tokens('grant') == 2          # 5 / 4
+        assert estimate_tokens('Грант, ФПГ!') == 5    # 2 + 1 + 1 + 1
+        assert estimate_tokens('а' * 300) == 100
+
+    def test_items_ranked_and_trimmed(self):
+        budget = PromptBudget(max_tokens=60, query='физическая активность школьников')
+        items = [
+            '[1] Погода в регионе обычно мягкая',
+            '[2] Физическая активность школьников снизилась на 12%',
+            '[3] Доля школьников с низкой активностью 40%',
+        ]
+        report = budget.fit([
+            PromptPart('instructions', 'Напиши раздел', required=True),
+            PromptPart('citations', items=items, max_tokens=40),
+        ], call='test.ranked')
+
+        assert report.text('citations') == items[1] + '\n' + items[2]  # исходный порядок
+        assert report.components['citations']['items_kept'] == 2
+        assert report.total_tokens <= 60
+        assert report.trimmed
+        assert PROMPT_METRICS.snapshot()['test.ranked']['trimmed_calls'] >= 1
+
+    def test_duplicates_across_parts(self):
+        budget = PromptBudget(max_tokens=1000)
+        report = budget.fit([
+            PromptPart('citations', items=['[1] По данным ВОЗ 98 место (Источник: ВОЗ, 2024)']),
+            PromptPart('facts', items=['  • По данным ВОЗ 98 место (Источник: ВОЗ, 2024)',
+                                       '  • Новый факт (Источник: Росстат, 2023)']),
+        ])
+
+        assert report.text('facts') == '  • Новый факт (Источник: Росстат, 2023)'
+        assert report.components['facts']['duplicates'] == 1
+
+    def test_text_truncated_at_sentence(self):
+        text = 'Первое предложение о проблеме. Второе предложение о решении. ' * 20
+        cut = truncate_to_tokens(text, 30)
+        assert estimate_tokens(cut) <= 30
+        assert cut.endswith('.')
+
+    def test_allocate_shared_items(self):
+        items = ['Статистика по проблеме бедности', 'Партнеры: администрация района',
+                 'Статистика по проблеме бедности', 'Ссылка без ключевых слов']
+        allocation = allocate_shared_items(items, ['Описание проблемы', 'Партнёры проекта партнеры',
+                                                   'Заключение'], per_item=1)
+
+        assert allocation[0] == ['Статистика по проблеме бедности', 'Ссылка без ключевых слов']
+        assert allocation[1] == ['Партнеры: администрация района']
+        assert allocation[2] == []
+
+
+@pytest.mark.unit
+def test_writer_v2_stage2_prompt_fits_budget(monkeypatch):
+    """Тест: контекст Stage 2 обрезается под WRITER_PROMPT_MAX_TOKENS"""
+    from agents.writer_agent_v2 import WriterAgentV2
+
+    monkeypatch.setenv('WRITER_PROMPT_MAX_TOKENS', '2500')
+    agent = WriterAgentV2.__new__(WriterAgentV2)
+    facts = [{'fact': f'Факт номер {i} о спорте молодежи ' + 'подробно ' * 40, 'source': 'Росстат', 'date': '2024'}
+             for i in range(5)]
+    research_results = {
+        'block1_problem': {'summary': 'Проблема. ' * 400, 'key_facts': facts},
+        'block2_geography': {'summary': 'Регион', 'key_facts': facts[:2]},
+        'block3_goals': {'summary': 'Цели', 'main_goal_variants': [{'text': 'Цель'}]},
+    }
+    citations = agent._format_citations(research_results)
+    user_answers = {'project_name': 'Спорт', 'problem': 'Низкая активность молодежи'}
+
+    report = agent._fit_stage2_context(user_answers, research_results, citations, [])
+    prompt = agent._stage2_prompt(user_answers, report.texts)
+
+    assert report.total_tokens <= 2500
+    assert estimate_tokens(prompt) <= 2500 + 50  # разделители шаблона
+    assert report.components['block1_facts']['duplicates'] > 0  # факты уже в цитатах
+    assert report.as_metrics()['saved_tokens'] > 0
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для DatabasePromptManager (web-admin/utils/prompt_manager.py)
+
+Проверяем:
+- get_prompt / get_prompt_version после загрузки не обращаются к БД
+- NOTIFY prompt_changes перезагружает только измененный ключ
+- фоновый listener: LISTEN, переподключение, обработка уведомлений
+- устаревший кеш без listener обновляется в фоне
+- prompt_version в результатах агентов (BaseAgent.prepare_output)
+
+Запросы к PostgreSQL заменены FakePromptDB (utils.postgres_helper).
+"""
+
+import importlib.util
+import json
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+WEB_ADMIN_UTILS = PROJECT_ROOT / 'web-admin' / 'utils'
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from tests.unit.pg_listen_helpers import FakeListenConnection, wait_for
+
+
+class FakePromptDB:
+    """agent_prompts / agent_prompt_versions / ai_agent_settings в памяти"""
+
+    def __init__(self):
+        self.queries = []
+        self.versions = {'auditor': 10, 'writer_v2': 20}
+        self.settings = {'researcher': {'agent_name': 'researcher', 'mode': 'active', 'provider': 'claude_code',
+                                        'execution_mode': 'manual', 'config': {'websearch_provider': 'perplexity'}}}
+        self.prompts = [
+            self.row(1, 'auditor', 'goal', 'Оценить заявку'),
+            self.row(2, 'auditor', 'backstory', 'Эксперт ФПГ'),
+            self.row(3, 'writer_v2', 'goal', 'Написать заявку'),
+            self.row(4, 'auditor', 'completeness', 'Полнота: {text}'),
+        ]
+
+    @staticmethod
+    def row(row_id, agent_type, prompt_type, template, order_index=0):
+        return {'id': row_id, 'agent_type': agent_type, 'prompt_type': prompt_type,
+                'prompt_template': template, 'order_index': order_index, 'is_active': True}
+
+    def execute_query(self, query, params=None):
+        self.queries.append((query, params))
+        params = list(params or ())
+
+        if 'FROM agent_prompts ap' in query:
+            rows = self.prompts
+            if 'ap.agent_type = %s' in query:
+                agent_type = params.pop(0)
+                rows = [r for r in rows if r['agent_type'] == agent_type]
+            if 'ap.prompt_type = %s' in query:
+                prompt_type = params.pop(0)
+                rows = [r for r in rows if r['prompt_type'] == prompt_type]
+            return [dict(r) for r in rows]
+
+        if 'FROM agent_prompt_versions' in query:
+            return [{'agent_type': a, 'version': v} for a, v in self.versions.items()
+                    if not params or a == params[0]]
+
+        if 'FROM ai_agent_settings' in query:
+            return [dict(s) for a, s in self.settings.items() if not params or a == params[0]]
+
+        raise AssertionError(f"unexpected query: {query}")
+
+    def update_prompt(self, agent_type, prompt_type, template, version):
+        """UPDATE agent_prompts + триггер миграции 018"""
+        for row in self.prompts:
+            if row['agent_type'] == agent_type and row['prompt_type'] == prompt_type:
+                row['prompt_template'] = template
+        self.versions[agent_type] = version
+        return json.dumps({'table': 'agent_prompts', 'op': 'UPDATE', 'agent_type': agent_type,
+                           'prompt_type': prompt_type, 'version': version})
+
+
+@pytest.fixture
+def fake_db():
+    return FakePromptDB()
+
+
+@pytest.fixture
+def prompt_manager_module(fake_db, monkeypatch):
+    """prompt_manager.py с FakePromptDB вместо utils.postgres_helper"""
+    helper = types.ModuleType('utils.postgres_helper')
+    helper.execute_query = fake_db.execute_query
+    helper.execute_update = lambda query, params=None: 0
+    monkeypatch.setitem(sys.modules, 'utils.postgres_helper', helper)
+
+    spec = importlib.util.spec_from_file_location('utils.logger', WEB_ADMIN_UTILS / 'logger.py')
+    logger_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(logger_module)
+    monkeypatch.setitem(sys.modules, 'utils.logger', logger_module)
+
+    spec = importlib.util.spec_from_file_location('prompt_manager_under_test', WEB_ADMIN_UTILS / 'prompt_manager.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.unit
+class TestPromptCache:
+    """Тесты кеша и точечной перезагрузки"""
+
+    def test_hot_path_without_db_queries(self, prompt_manager_module, fake_db):
+        """Тест: после первой загрузки чтение идет только из памяти"""
+        manager = prompt_manager_module.DatabasePromptManager()
+        assert manager.get_prompt('auditor', 'goal') == 'Оценить заявку'
+        loaded_queries = len(fake_db.queries)
+
+        for _ in range(100):
+            manager.get_prompt('auditor', 'completeness', variables={'text': 'x'})
+            manager.get_prompt_version('auditor')
+            manager.get_agent_settings('researcher')
+
+        assert len(fake_db.queries) == loaded_queries
+        assert manager.get_prompt_version('writer_v2') == 20
+        assert manager.get_agent_settings('researcher')['config']['websearch_provider'] == 'perplexity'
+
+    def test_notification_reloads_single_key(self, prompt_manager_module, fake_db):
+        """Тест: NOTIFY по auditor/goal перечитывает только этот ключ"""
+        manager = prompt_manager_module.DatabasePromptManager()
+        manager.reload_cache()
+        backstory = manager._cache['auditor']['backstory']
+        writer = manager._cache['writer_v2']
+        fake_db.queries.clear()
+
+        manager.handle_notification(fake_db.update_prompt('auditor', 'goal', 'Новая цель', version=11))
+
+        assert len(fake_db.queries) == 1
+        query, params = fake_db.queries[0]
+        assert params == ('auditor', 'goal')
+        assert manager.get_prompt('auditor', 'goal') == 'Новая цель'
+        assert manager.get_prompt_version('auditor') == 11
+        assert manager._cache['auditor']['backstory'] is backstory
+        assert manager._cache['writer_v2'] is writer
+
+        # подписчики (снимок конфигурации агентов) получают событие после перезагрузки
+        events = []
+        manager.subscribe(events.append)
+        manager.handle_notification(json.dumps({'table': 'ai_agent_settings', 'agent_name': 'researcher'}))
+        manager.handle_notification(json.dumps({'table': 'unknown'}))
+        assert events == [{'table': 'ai_agent_settings', 'agent_name': 'researcher'}]
+
+        # запоздавшее уведомление со старой версией не откатывает версию
+        manager.handle_notification(json.dumps({'table': 'agent_prompts', 'agent_type': 'auditor',
+                                                'prompt_type': 'backstory', 'version': 5}))
+        assert manager.get_prompt_version('auditor') == 11
+
+    def test_deleted_prompt_and_settings_notification(self, prompt_manager_module, fake_db):
+        manager = prompt_manager_module.DatabasePromptManager()
+        manager.reload_cache()
+
+        fake_db.prompts = [r for r in fake_db.prompts if r['agent_type'] != 'writer_v2']
+        manager.handle_notification(json.dumps({'table': 'agent_prompts', 'op': 'DELETE',
+                                                'agent_type': 'writer_v2', 'prompt_type': 'goal', 'version': 21}))
+        fake_db.settings['researcher']['config'] = {'websearch_provider': 'claude_code'}
+        manager.handle_notification(json.dumps({'table': 'ai_agent_settings', 'agent_name': 'researcher'}))
+        manager.handle_notification('not json')
+
+        assert manager.get_prompt('writer_v2', 'goal') is None
+        assert 'writer_v2' not in manager._cache
+        assert manager.get_agent_settings('researcher')['config'] == {'websearch_provider': 'claude_code'}
+        assert manager.get_stats()['notifications'] == 2
+
+    def test_full_reload_does_not_overwrite_newer_key(self, prompt_manager_module, fake_db):
+        """Тест: полная загрузка со старым снимком не откатывает ключ, перечитанный по NOTIFY"""
+        manager = prompt_manager_module.DatabasePromptManager()
+        manager.reload_cache()
+
+        snapshot_taken, release = threading.Event(), threading.Event()
+        original = fake_db.execute_query
+
+        def slow_full_reload(query, params=None):
+            rows = original(query, params)
+            if 'FROM agent_prompts ap' in query and not params:
+                snapshot_taken.set()
+                release.wait(2)
+            return rows
+
+        prompt_manager_module.execute_query = slow_full_reload
+        reload = threading.Thread(target=manager.reload_cache)
+        reload.start()
+        assert snapshot_taken.wait(2)
+
+        # пока полная загрузка держит старый снимок, приходит NOTIFY
+        manager.handle_notification(fake_db.update_prompt('auditor', 'goal', 'Новая цель', version=11))
+        assert manager.get_prompt('auditor', 'goal') == 'Новая цель'
+
+        release.set()
+        reload.join(2)
+        assert manager.get_prompt('auditor', 'goal') == 'Новая цель'
+        assert manager.get_prompt_version('auditor') == 11
+        assert manager.get_prompt('writer_v2', 'goal') == 'Написать заявку'
+
+        # и наоборот: запоздавшая точечная загрузка не перекрывает более позднюю полную
+        generation = manager._next_generation()
+        manager.reload_cache()
+        with manager._write_lock:
+            assert manager._is_newer('auditor', 'goal', generation)
+
+    def test_stale_cache_refreshed_in_background(self, prompt_manager_module, fake_db):
+        """Тест: без listener устаревший кеш не блокирует запрос"""
+        manager = prompt_manager_module.DatabasePromptManager(cache_ttl_seconds=0)
+        manager.reload_cache()
+        fake_db.update_prompt('auditor', 'goal', 'Обновлено', version=12)
+
+        release = threading.Event()
+        original = fake_db.execute_query
+
+        def slow_query(query, params=None):
+            release.wait(2)
+            return original(query, params)
+
+        fake_db.execute_query = slow_query
+        prompt_manager_module.execute_query = slow_query
+
+        started = time.monotonic()
+        assert manager.get_prompt('auditor', 'goal') == 'Оценить заявку'
+        assert time.monotonic() - started < 0.5
+
+        release.set()
+        assert wait_for(lambda: manager.get_prompt('auditor', 'goal') == 'Обновлено')
+
+
+@pytest.mark.unit
+class TestPromptChangeListener:
+    """Тесты фонового LISTEN"""
+
+    def test_listen_and_reconnect(self, prompt_manager_module, fake_db):
+        """Тест: LISTEN, уведомление, переподключение с полной перезагрузкой"""
+        manager = prompt_manager_module.DatabasePromptManager()
+        connections = []
+
+        def connect():
+            if len(connections) == 1:
+                # вторая попытка неудачна, третья - успешна
+                connections.append(None)
+                raise ConnectionError("db restarting")
+            conn = FakeListenConnection('prompt_changes')
+            connections.append(conn)
+            return conn
+
+        listener = manager.start_listener(connect=connect, poll_timeout=0.05, max_reconnect_delay=0.1)
+        try:
+            assert listener.connected.wait(2)
+            first = connections[0]
+            assert first.autocommit is True
+            assert first.executed == ['LISTEN prompt_changes']
+            assert manager.listener_active
+            assert manager.get_stats()['cache_valid']
+
+            first.notify(fake_db.update_prompt('auditor', 'goal', 'Через NOTIFY', version=30))
+            assert wait_for(lambda: manager.get_prompt_version('auditor') == 30)
+            assert manager.get_prompt('auditor', 'goal') == 'Через NOTIFY'
+
+            # обрыв соединения: изменение без уведомления подхватывается полной перезагрузкой
+            fake_db.update_prompt('writer_v2', 'goal', 'Пропущено', version=31)
+            first.notifies = None  # следующий poll() упадет
+            first.notify('{}')
+            assert wait_for(lambda: len(connections) == 3 and listener.connected.is_set(), timeout=3)
+            assert first.closed
+            assert manager.get_prompt('writer_v2', 'goal') == 'Пропущено'
+            assert manager.get_prompt_version('writer_v2') == 31
+        finally:
+            manager.stop_listener()
+
+        assert not listener.is_alive()
+        assert not manager.listener_active
+
+
+@pytest.mark.unit
+def test_agent_output_has_prompt_version():
+    """Тест: prepare_output / handle_error содержат версию промптов агента"""
+    from agents.base_agent import BaseAgent
+
+    class Agent(BaseAgent):
+        prompt_agent_type = 'writer_v2'
+
+        def _load_prompts(self):
+            pass
+
+        def process(self, data):
+            return self.prepare_output(data)
+
+    agent = Agent('writer', db=None)
+    assert agent.process({'x': 1})['prompt_version'] is None
+
+    agent.prompt_manager = types.SimpleNamespace(get_prompt_version=lambda agent_type: {'writer_v2': 7}[agent_type])
+    assert agent.process({'x': 1})['prompt_version'] == 7
+    assert agent.handle_error(ValueError("boom"))['prompt_version'] == 7
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/llm/provider_limiter.py
+
+Проверяем:
+- лимит одновременных запросов к провайдеру
+- общий лимитер на процесс и настройку через окружение
+- лимит на запрос в области limit_requests() без повторного захвата слота
+- общий лимит для корутин в разных event loop (asyncio.run в потоках)
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.llm.provider_limiter import (
+    ProviderLimiter,
+    get_provider_limiter,
+    limit_requests,
+    request_limiter,
+    reset_provider_limiters
+)
+
+
+@pytest.mark.unit
+class TestProviderLimiter:
+    """Тесты лимитера провайдера"""
+
+    @pytest.mark.asyncio
+    async def test_max_concurrency_respected(self):
+        """Тест: не больше max_concurrency запросов одновременно"""
+        limiter = ProviderLimiter("test", max_concurrency=3)
+
+        async def call():
+            async with limiter:
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[call() for _ in range(20)])
+
+        assert limiter.stats['acquired'] == 20
+        assert limiter.stats['max_in_flight'] == 3
+        assert limiter.stats['in_flight'] == 0
+
+    def test_registry_returns_same_instance(self):
+        """Тест: один лимитер на провайдера, 'claude' = 'claude_code'"""
+        reset_provider_limiters()
+        assert get_provider_limiter("gigachat") is get_provider_limiter("GigaChat")
+        assert get_provider_limiter("claude") is get_provider_limiter("claude_code")
+        reset_provider_limiters()
+
+    def test_env_override(self, monkeypatch):
+        """Тест: PROVIDER_CONCURRENCY_<NAME> / PROVIDER_RPM_<NAME>"""
+        monkeypatch.setenv("PROVIDER_CONCURRENCY_PERPLEXITY", "7")
+        monkeypatch.setenv("PROVIDER_RPM_PERPLEXITY", "120")
+        reset_provider_limiters()
+
+        limiter = get_provider_limiter("perplexity")
+        assert limiter.max_concurrency == 7
+        assert limiter.requests_per_minute == 120
+        reset_provider_limiters()
+
+    @pytest.mark.asyncio
+    async def test_request_limiter_scope(self, monkeypatch):
+        """Тест: слот только внутри limit_requests(), вложенный запрос того же провайдера не ждет"""
+        monkeypatch.setenv("PROVIDER_CONCURRENCY_GIGACHAT", "1")
+        reset_provider_limiters()
+        limiter = get_provider_limiter("gigachat")
+
+        async with request_limiter("gigachat"):
+            assert limiter.stats['acquired'] == 0
+
+        async def stage():
+            # этап: несколько запросов подряд, слот занят только на время запроса
+            for _ in range(3):
+                async with request_limiter("GigaChat"):
+                    assert limiter.stats['in_flight'] == 1
+                    await asyncio.sleep(0.01)
+
+        async def wrapped():
+            # вызывающий код уже держит слот (researcher_agent_v2): без дедлока
+            async with limiter:
+                async with request_limiter("gigachat"):
+                    await asyncio.sleep(0.01)
+
+        with limit_requests():
+            await asyncio.wait_for(asyncio.gather(stage(), stage(), wrapped()), timeout=2)
+
+        assert limiter.stats['acquired'] == 7
+        assert limiter.stats['max_in_flight'] == 1
+        reset_provider_limiters()
+
+    @pytest.mark.asyncio
+    async def test_limit_shared_across_event_loops(self, monkeypatch):
+        """Тест: параллельные циклы с asyncio.run в потоках (research_anketa) делят один лимит"""
+        monkeypatch.setenv("PROVIDER_CONCURRENCY_CLAUDE_CODE", "2")
+        reset_provider_limiters()
+        limiter = get_provider_limiter("claude_code")
+        lock = threading.Lock()
+        in_flight = [0, 0]  # текущее, пик
+
+        async def provider_call():
+            async with request_limiter("claude_code"):
+                with lock:
+                    in_flight[0] += 1
+                    in_flight[1] = max(in_flight[1], in_flight[0])
+                await asyncio.sleep(0.01)
+                with lock:
+                    in_flight[0] -= 1
+
+        async def research():
+            await asyncio.gather(*[provider_call() for _ in range(5)])
+
+        def research_anketa():
+            # как ResearcherAgentV2.research_anketa: свой event loop
+            asyncio.run(research())
+
+        with limit_requests():
+            await asyncio.wait_for(
+                asyncio.gather(*[asyncio.to_thread(research_anketa) for _ in range(6)]), timeout=5)
+
+        assert in_flight[1] == 2
+        assert limiter.stats['acquired'] == 30
+        assert limiter.stats['max_in_flight'] == 2 and limiter.stats['in_flight'] == 0
+        reset_provider_limiters()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_frees_slot(self):
+        """Тест: отмененная ожидающая задача не уносит слот"""
+        limiter = ProviderLimiter("test", max_concurrency=1)
+        release = asyncio.Event()
+
+        async def holder():
+            async with limiter:
+                await release.wait()
+
+        first = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(limiter.__aenter__())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        release.set()
+        await first
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        async with limiter:
+            assert limiter.stats['in_flight'] == 1
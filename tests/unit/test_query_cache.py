@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/query_cache.py
+
+Проверяем:
+- общий SQLite кеш: значение, вычисленное одним процессом, видно другому
+- инвалидация по тегу (таблице) вместо полной очистки
+- запись в таблицу во время вычисления не оставляет устаревший результат
+- декоратор shared_cache (аргументы '_db' не входят в ключ)
+- разбор таблиц из SQL
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.query_cache import (
+    QueryCache, SQLiteCacheBackend, is_cacheable_query, set_query_cache, shared_cache,
+    tables_read, tables_written
+)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / 'cache.sqlite'
+
+
+@pytest.fixture
+def global_cache(cache_path, monkeypatch):
+    monkeypatch.setenv('ADMIN_QUERY_CACHE', 'sqlite')
+    cache = QueryCache(SQLiteCacheBackend(cache_path))
+    set_query_cache(cache)
+    yield cache
+    set_query_cache(None)
+
+
+class Counter:
+    def __init__(self, value='rows'):
+        self.calls = 0
+        self.value = value
+
+    def __call__(self):
+        self.calls += 1
+        return {'value': self.value, 'call': self.calls}
+
+
+@pytest.mark.unit
+class TestQueryCache:
+    """Тесты кеша и тегов"""
+
+    def test_shared_between_processes_and_tag_invalidation(self, cache_path):
+        """Тест: два экземпляра (как два процесса Streamlit) на одном файле"""
+        admin_a = QueryCache(SQLiteCacheBackend(cache_path))
+        admin_b = QueryCache(SQLiteCacheBackend(cache_path))
+        bot = QueryCache(SQLiteCacheBackend(cache_path))
+        grants = Counter('grants')
+        users = Counter('users')
+
+        first = admin_a.get_or_compute('rows', ('SELECT * FROM grants',), grants, ['grants'], ttl=60)
+        second = admin_b.get_or_compute('rows', ('SELECT * FROM grants',), grants, ['grants'], ttl=60)
+        admin_a.get_or_compute('rows', ('SELECT * FROM users',), users, ['users'], ttl=60)
+
+        assert first == second and grants.calls == 1
+        assert admin_b.stats['hits'] == 1
+
+        # агент записал в grants: устаревает только запись с тегом grants
+        bot.invalidate('grants')
+        admin_b.get_or_compute('rows', ('SELECT * FROM grants',), grants, ['grants'], ttl=60)
+        admin_b.get_or_compute('rows', ('SELECT * FROM users',), users, ['users'], ttl=60)
+
+        assert grants.calls == 2
+        assert users.calls == 1
+        assert admin_b.stats['stale'] == 1
+
+    def test_ttl_expiry(self, cache_path):
+        cache = QueryCache(SQLiteCacheBackend(cache_path))
+        compute = Counter()
+
+        cache.get_or_compute('rows', ('q',), compute, ['t'], ttl=0)
+        cache.get_or_compute('rows', ('q',), compute, ['t'], ttl=0)
+
+        assert compute.calls == 2
+
+    def test_write_during_compute_not_cached_as_fresh(self, cache_path):
+        """Тест: версии тегов читаются до вычисления"""
+        cache = QueryCache(SQLiteCacheBackend(cache_path))
+        writer = QueryCache(SQLiteCacheBackend(cache_path))
+        calls = []
+
+        def slow_compute():
+            calls.append(1)
+            if len(calls) == 1:
+                # запись агента между SELECT и сохранением результата
+                thread = threading.Thread(target=writer.invalidate, args=('grants',))
+                thread.start()
+                thread.join()
+            return len(calls)
+
+        assert cache.get_or_compute('rows', ('q',), slow_compute, ['grants'], ttl=60) == 1
+        assert cache.get_or_compute('rows', ('q',), slow_compute, ['grants'], ttl=60) == 2
+        assert cache.get_or_compute('rows', ('q',), slow_compute, ['grants'], ttl=60) == 2
+
+    def test_backend_error_falls_back_to_compute(self, cache_path):
+        class BrokenBackend:
+            def get(self, key):
+                raise OSError("disk full")
+
+        cache = QueryCache(BrokenBackend())
+        assert cache.get_or_compute('rows', ('q',), Counter(), ['t'])['call'] == 1
+        assert cache.stats['errors'] == 1
+
+
+@pytest.mark.unit
+class TestSharedCacheDecorator:
+    """Тесты декоратора shared_cache"""
+
+    def test_underscore_args_excluded_from_key(self, global_cache):
+        calls = []
+
+        @shared_cache(ttl=60, tags=('grants', 'sessions'))
+        def get_statistics(agent_type, _db, days=30):
+            calls.append((agent_type, days))
+            return {'agent_type': agent_type, 'total': len(calls)}
+
+        assert get_statistics('writer', object()) == get_statistics('writer', object(), days=30)
+        get_statistics('auditor', object())
+        assert calls == [('writer', 30), ('auditor', 30)]
+
+        get_statistics.invalidate()
+        get_statistics('writer', object())
+        assert len(calls) == 3
+
+    def test_disabled_cache(self, monkeypatch):
+        monkeypatch.setenv('ADMIN_QUERY_CACHE', 'off')
+        calls = []
+
+        @shared_cache(ttl=60, tags=('t',))
+        def compute():
+            calls.append(1)
+
+        compute()
+        compute()
+        assert len(calls) == 2
+
+    def test_unavailable_cache_falls_through(self, monkeypatch):
+        """Тест: ошибка get_query_cache() (неверный режим, нет БД) - вызов без кеша"""
+        monkeypatch.setenv('ADMIN_QUERY_CACHE', 'redis')
+        set_query_cache(None)
+        calls = []
+
+        @shared_cache(ttl=60, tags=('t',))
+        def compute(value):
+            calls.append(value)
+            return value * 2
+
+        assert compute(2) == 4 and compute(2) == 4
+        assert calls == [2, 2]
+        compute.invalidate()
+
+
+@pytest.mark.unit
+class TestSqlParsing:
+    """Тесты разбора таблиц"""
+
+    def test_tables_read(self):
+        query = """
+            SELECT g.*, (SELECT COUNT(*) FROM user_answers ua WHERE ua.session_id = s.id)
+            FROM public.grants g
+            LEFT JOIN sessions s ON g.anketa_id = s.anketa_id
+            CROSS JOIN LATERAL jsonb_each(s.interview_data)
+        """
+        assert tables_read(query) == ['grants', 'sessions', 'user_answers']
+
+    def test_tables_written(self):
+        assert tables_written("INSERT INTO sent_documents (grant_id) VALUES (%s)") == ['sent_documents']
+        assert tables_written("UPDATE grants SET status = 'delivered'") == ['grants']
+        assert tables_written("""
+            INSERT INTO id_counters (scope, last_value) VALUES (%s, 1)
+            ON CONFLICT (scope) DO UPDATE SET last_value = id_counters.last_value + 1
+        """) == ['id_counters']
+        assert tables_written("DELETE FROM sessions WHERE id = %s") == ['sessions']
+        assert tables_written("SELECT * FROM grants") == []
+
+    def test_is_cacheable(self):
+        assert is_cacheable_query("  select * from grants")
+        assert is_cacheable_query("WITH x AS (SELECT 1 FROM grants) SELECT * FROM x")
+        assert not is_cacheable_query("WITH moved AS (DELETE FROM queue RETURNING *) SELECT * FROM moved")
+        assert not is_cacheable_query("UPDATE grants SET status = 'x' RETURNING id")
+        assert not is_cacheable_query("SELECT * FROM grants FOR UPDATE")
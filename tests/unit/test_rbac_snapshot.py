@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для снимка RBAC в AuthManager (data/database/auth.py)
+
+Проверяем:
+- проверки доступа после загрузки снимка не обращаются к БД
+- правила страниц: иерархия ролей, разрешения, админ, ненастроенные страницы
+- запись через AuthManager и NOTIFY rbac_changes сбрасывают снимок
+- без listener снимок обновляется по TTL
+
+Запросы к PostgreSQL заменены FakeAuthDB.
+"""
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from tests.unit.pg_listen_helpers import FakeListenConnection, wait_for
+
+# Модуль грузится по пути: пакет data.database при импорте подключается к PostgreSQL
+spec = importlib.util.spec_from_file_location('auth_under_test', PROJECT_ROOT / 'data' / 'database' / 'auth.py')
+auth = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(auth)
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+        self.description = None
+
+    def execute(self, query, params=None):
+        self.db.queries.append(query)
+        if 'information_schema.columns' in query:
+            self.rows = [('role',), ('permissions',), ('token_expires_at',)]
+        elif 'FROM users' in query and 'SELECT telegram_id, role, permissions' in query:
+            self.rows = [(tid, role, perms) for tid, (role, perms) in self.db.users.items()
+                         if (role and role != 'user') or perms not in (None, [], '[]')]
+        elif 'FROM page_permissions' in query:
+            self.rows = [(name, role, perms) for name, (role, perms) in self.db.pages.items()]
+        elif query.strip().startswith('UPDATE users SET role'):
+            role, telegram_id = params
+            self.db.users[telegram_id] = (role, self.db.users.get(telegram_id, (None, None))[1])
+        elif query.strip().startswith('UPDATE users SET permissions'):
+            permissions, telegram_id = params
+            self.db.users[telegram_id] = (self.db.users.get(telegram_id, ('user', None))[0], permissions)
+        elif 'INSERT INTO page_permissions' in query:
+            name, role, perms, _ = params
+            self.db.pages[name] = (role, perms)
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.connections += 1
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        pass
+
+
+class FakeAuthDB:
+    """users.role/permissions и page_permissions в памяти"""
+
+    def __init__(self):
+        self.connections = 0
+        self.queries = []
+        self.users = {
+            1: ('admin', None),
+            2: ('editor', None),
+            # JSONB: psycopg2 отдает разобранный список, старые TEXT-записи - строку
+            3: ('viewer', ['export_data']),
+            4: ('user', None),
+        }
+        self.pages = {
+            'analytics': ('viewer', None),
+            'prompts': ('editor', ['edit_prompts']),
+            'export': (None, json.dumps(['export_data'])),
+        }
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+@pytest.fixture
+def db():
+    return FakeAuthDB()
+
+
+@pytest.fixture
+def manager(db):
+    manager = auth.AuthManager(db, snapshot_ttl=300)
+    db.connections = 0
+    return manager
+
+
+@pytest.mark.unit
+class TestRBACSnapshot:
+    """Тесты снимка RBAC"""
+
+    def test_checks_use_single_snapshot_load(self, manager, db):
+        assert manager.get_accessible_pages(1) == ['analytics', 'prompts', 'export']
+        assert manager.get_accessible_pages(2) == ['analytics']
+        assert manager.get_accessible_pages(3) == ['analytics', 'export']
+        assert manager.get_accessible_pages(4) == []
+        assert manager.get_accessible_pages(999) == []
+
+        assert manager.can_access_page(4, 'not_configured')
+        assert manager.get_user_role(3) == 'viewer'
+        assert manager.get_user_role(999) == 'user'
+        assert manager.get_user_permissions(3) == ['export_data']
+        assert manager.is_admin(1) and manager.can_edit_content(2) and not manager.can_view_analytics(4)
+
+        assert db.connections == 1
+
+    def test_writes_invalidate_snapshot(self, manager, db):
+        assert not manager.can_access_page(4, 'analytics')
+
+        assert manager.set_user_role(4, 'viewer')
+        assert manager.can_access_page(4, 'analytics')
+
+        assert manager.set_user_permissions(2, ['edit_prompts'])
+        assert manager.can_access_page(2, 'prompts')
+
+        assert manager.set_page_permissions('analytics', required_role='editor')
+        assert not manager.can_access_page(4, 'analytics')
+
+        # 1 загрузка + (запись + перезагрузка) x 3
+        assert db.connections == 7
+
+    def test_notification_from_other_process(self, manager, db):
+        connection = FakeListenConnection('rbac_changes')
+        manager.start_listener(connect=lambda: connection, poll_timeout=0.05)
+        try:
+            assert manager._listener.connected.wait(2)
+            assert connection.executed == ['LISTEN rbac_changes']
+            assert manager.get_user_role(4) == 'user'
+            assert manager.listener_active
+
+            # другой процесс повысил роль: снимок сбрасывается по NOTIFY
+            db.users[4] = ('editor', None)
+            assert manager.get_user_role(4) == 'user'
+            connection.notify(json.dumps({'table': 'users', 'op': 'UPDATE', 'telegram_id': 4}))
+            assert wait_for(lambda: manager._snapshot is None)
+            assert manager.get_user_role(4) == 'editor'
+        finally:
+            manager.stop_listener(timeout=2)
+
+    def test_ttl_without_listener(self, manager, db, monkeypatch):
+        manager.get_user_role(1)
+        db.users[4] = ('admin', None)
+        assert manager.get_user_role(4) == 'user'
+
+        monkeypatch.setattr(manager, 'snapshot_ttl', 0)
+        assert manager.get_user_role(4) == 'admin'
+        assert db.connections == 2
+
+    def test_jsonb_permissions_never_compared_with_empty_string(self):
+        # users.permissions / page_permissions.required_permissions - JSONB: '' не приводится к jsonb
+        migration = (PROJECT_ROOT / 'database' / 'migrations' /
+                     '021_add_rbac_change_notifications.sql').read_text(encoding='utf-8')
+        for sql in (auth.RBACSnapshot.USERS_QUERY, auth.RBACSnapshot.PAGES_QUERY, migration):
+            code = '\n'.join(line.split('--')[0] for line in sql.splitlines())
+            assert "''" not in code
+        assert "'[]'::jsonb" in auth.RBACSnapshot.USERS_QUERY
+
+        assert auth._parse_permissions(['a', 'b']) == ['a', 'b']
+        assert auth._parse_permissions('["a"]') == ['a']
+        assert auth._parse_permissions('{"a": 1}') == []
+        assert auth._parse_permissions(None) == []
+
+    def test_load_failure_falls_back_to_defaults(self, db):
+        manager = auth.AuthManager(db)
+
+        def broken_connect():
+            raise ConnectionError("db down")
+
+        db.connect = broken_connect
+        assert manager.get_user_role(1) == 'user'
+        assert not manager.can_access_page(1, 'analytics')
+        assert manager.get_accessible_pages(1) == []
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для data/database/reporting.py
+
+Проверяем, что отчеты выполняются одним запросом и корректно
+собирают результат из агрегированных строк.
+"""
+
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from data.database import reporting
+
+
+class FakeCursor:
+    """Курсор, возвращающий заранее заданные строки"""
+
+    def __init__(self, columns, rows, log):
+        self.description = [(name,) for name in columns]
+        self._rows = rows
+        self._log = log
+
+    def execute(self, query, params=None):
+        self._log.append((query, params))
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeDB:
+    """Минимальная замена GrantServiceDatabase"""
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+        self.queries = []
+
+    @contextmanager
+    def connect(self):
+        class Conn:
+            def cursor(inner):
+                return FakeCursor(self.columns, self.rows, self.queries)
+        yield Conn()
+
+    def _dict_rows(self, cursor, rows):
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+
+@pytest.mark.unit
+class TestCorpusStats:
+    """Тесты get_corpus_stats"""
+
+    def test_single_query_and_mapping(self):
+        """Тест: статистика корпуса - один запрос"""
+        columns = ['total', 'synthetic', 'real', 'audited', 'avg_score',
+                   'approved', 'needs_revision', 'rejected', 'synthetic_by_quality']
+        db = FakeDB(columns, [(10, 7, 3, 4, 6.5, 2, 1, 1, {'low': 2, 'high': 5})])
+
+        stats = reporting.get_corpus_stats(123, db=db)
+
+        assert len(db.queries) == 1
+        assert db.queries[0][1] == (123,)
+        assert stats['total'] == 10
+        assert stats['synthetic'] == 7
+        assert stats['unaudited'] == 6
+        assert stats['avg_score'] == 6.5
+        assert stats['synthetic_by_quality'] == {'low': 2, 'high': 5}
+
+    def test_empty_corpus(self):
+        """Тест: пустой корпус"""
+        columns = ['total', 'synthetic', 'real', 'audited', 'avg_score',
+                   'approved', 'needs_revision', 'rejected', 'synthetic_by_quality']
+        db = FakeDB(columns, [(0, 0, 0, 0, 0, 0, 0, 0, None)])
+
+        stats = reporting.get_corpus_stats(123, db=db)
+
+        assert stats['total'] == 0
+        assert stats['synthetic_by_quality'] == {}
+
+
+@pytest.mark.unit
+class TestAllUsersProgress:
+    """Тесты get_all_users_progress"""
+
+    COLUMNS = ['telegram_id', 'username', 'first_name', 'last_name', 'registration_date',
+               'last_active', 'last_activity', 'latest_status', 'sessions_count',
+               'total_questions', 'answered_questions', 'current_question',
+               'question_text', 'field_name', 'question_type', 'hint_text']
+
+    def test_progress_rows(self):
+        """Тест: прогресс всех пользователей - один запрос, формат как раньше"""
+        rows = [
+            (1, 'anna', 'Анна', None, '2025-10-01', '2025-10-02', '2025-10-03', 'active', 2,
+             10, 4, 5, 'Бюджет?', 'budget', 'text', None),
+            (2, 'new', None, None, '2025-10-01', '2025-10-02', None, None, 0,
+             10, 0, 1, 'Имя?', 'name', 'text', 'Подсказка'),
+            (3, 'done', None, None, '2025-10-01', '2025-10-02', '2025-10-05', 'completed', 1,
+             10, 10, 10, None, None, None, None),
+        ]
+        db = FakeDB(self.COLUMNS, rows)
+
+        result = reporting.get_all_users_progress(db=db)
+
+        assert len(db.queries) == 1
+        assert [r['telegram_id'] for r in result] == [1, 2, 3]
+
+        anna = result[0]
+        assert anna['progress']['progress_percent'] == 40.0
+        assert anna['progress']['status'] == 'in_progress'
+        assert anna['progress']['latest_session_status'] == 'active'
+        assert anna['current_question_info']['field_name'] == 'budget'
+        assert anna['last_activity'] == '2025-10-03'
+
+        new_user = result[1]
+        assert new_user['progress']['status'] == 'not_started'
+        assert 'latest_session_status' not in new_user['progress']
+        assert new_user['last_activity'] == '2025-10-02'
+
+        done = result[2]
+        assert done['progress']['status'] == 'completed'
+        assert done['current_question_info']['question_text'] == 'Анкета завершена'
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/llm/research_aggregator.py
+
+Проверяем:
+- нормализация URL и почти-дубли сниппетов (шинглы) до вызова LLM
+- map-вызовы идут параллельно, reduce получает сводки запросов
+- бюджет времени: медленные map-вызовы заменяются эвристикой, блок
+  укладывается в budget_seconds
+- без LLM - та же структура блока (summary, key_facts, raw_results)
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.llm.research_aggregator import (
+    NearDuplicateFilter,
+    ResearchAggregator,
+    normalize_url
+)
+
+ROSSTAT = ("По данным Росстата за 2023 год численность детей с ограниченными возможностями "
+           "здоровья в Кемеровской области составила 12 400 человек, рост на 4 процента")
+
+
+def make_results():
+    """3 запроса: одинаковые URL в разной записи и почти одинаковые сниппеты"""
+    return [
+        {'query': 'статистика ОВЗ', 'content': 'Ответ 1: ' + ROSSTAT, 'results': [
+            {'url': 'https://www.rosstat.gov.ru/folder/13877/', 'snippet': ROSSTAT, 'source': 'rosstat.gov.ru'},
+            {'url': 'https://minzdrav.gov.ru/news?id=5', 'snippet': 'Минздрав утвердил программу реабилитации детей',
+             'source': 'minzdrav.gov.ru'},
+        ]},
+        {'query': 'динамика ОВЗ', 'content': 'Ответ 2: программы поддержки', 'results': [
+            {'url': 'http://rosstat.gov.ru/folder/13877?utm_source=x', 'snippet': ROSSTAT + '.',
+             'source': 'rosstat.gov.ru'},
+            {'url': 'https://government.ru/docs/1', 'snippet': 'Национальный проект Демография до 2030 года',
+             'source': 'government.ru'},
+            # перепечатка Росстата на другом сайте: новый URL, почти тот же текст
+            {'url': 'https://regnum.ru/news/1', 'snippet': 'По данным Росстата: ' + ROSSTAT[len('По данным Росстата '):],
+             'source': 'regnum.ru'},
+            # тот же URL, другой сниппет - источник уже учтен
+            {'url': 'https://minzdrav.gov.ru/news?id=5', 'snippet': 'Другая выдержка со страницы Минздрава о реабилитации',
+             'source': 'minzdrav.gov.ru'},
+        ]},
+        {'query': 'пустой запрос', 'status': 'error', 'results': [], 'sources': []},
+    ]
+
+
+@pytest.mark.unit
+def test_normalize_url_and_near_duplicates():
+    assert normalize_url('https://www.rosstat.gov.ru/folder/13877/') == \
+        normalize_url('http://rosstat.gov.ru/folder/13877?utm_source=x#top')
+    assert normalize_url('https://site.ru/page?b=2&a=1') == normalize_url('site.ru/page?a=1&b=2')
+    assert normalize_url('https://site.ru/page?id=1') != normalize_url('https://site.ru/page?id=2')
+
+    seen = NearDuplicateFilter()
+    assert seen.add(ROSSTAT)
+    assert not seen.add('  ' + ROSSTAT.upper() + '.')
+    assert seen.add('Минздрав утвердил программу реабилитации детей')
+    assert not seen.add('')
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_map_reduce_on_deduplicated_material():
+    prompts = []
+    active, peak = 0, 0
+
+    async def summarize(prompt, max_tokens):
+        nonlocal active, peak
+        prompts.append(prompt)
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        if 'Сводки по отдельным запросам' in prompt:
+            return 'РЕЗЮМЕ БЛОКА'
+        return 'Сводка: ' + prompt.split('Запрос: ')[1].split('\n')[0]
+
+    results = make_results()
+    block = await ResearchAggregator(summarize, max_concurrency=2).aggregate(
+        'block1_problem', results, ['статистика ОВЗ', 'динамика ОВЗ', 'пустой запрос'])
+
+    stats = block['aggregation']
+    assert stats['duplicate_urls'] == 2 and stats['duplicate_snippets'] == 1
+    assert stats['unique_urls'] == 4
+    assert stats['map_llm'] == 2 and stats['reduce'] == 'llm'
+    assert peak == 2
+
+    map_prompts = [prompt for prompt in prompts if 'Запрос:' in prompt]
+    # сниппет Росстата попадает только в первый запрос
+    assert ROSSTAT in map_prompts[0] and 'Ответ 2' in map_prompts[1]
+    assert 'rosstat.gov.ru)' not in map_prompts[1] and 'regnum.ru' not in map_prompts[1]
+    assert 'Другая выдержка' not in map_prompts[1]
+
+    assert block['summary'] == 'РЕЗЮМЕ БЛОКА'
+    reduce_prompt = prompts[-1]
+    assert 'Сводка: статистика ОВЗ' in reduce_prompt and 'Сводка: динамика ОВЗ' in reduce_prompt
+    assert [item['mode'] for item in block['query_summaries']] == ['llm', 'llm', 'empty']
+    # ключевые факты по кругу из запросов: Росстат, government.ru, Минздрав
+    assert [fact['source'] for fact in block['key_facts']] == ['rosstat.gov.ru', 'government.ru', 'minzdrav.gov.ru']
+    assert block['raw_results'] is results
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_slow_llm_stays_within_budget():
+    async def summarize(prompt, max_tokens):
+        await asyncio.sleep(5)
+        return 'не успеет'
+
+    started = time.monotonic()
+    block = await ResearchAggregator(summarize, budget_seconds=0.3, map_timeout=5).aggregate(
+        'block2_geography', make_results(), [])
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0
+    stats = block['aggregation']
+    assert stats['map_llm'] == 0 and stats['map_timeouts'] == 2
+    assert stats['reduce'] == 'timeout'
+    assert block['summary'].startswith('Ответ 1')
+    assert [item['mode'] for item in block['query_summaries']] == ['heuristic', 'heuristic', 'empty']
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_llm_errors_and_no_llm_fall_back_to_heuristic():
+    async def failing(prompt, max_tokens):
+        raise RuntimeError('provider down')
+
+    block = await ResearchAggregator(failing).aggregate('block3_goals', make_results(), [])
+    assert block['aggregation']['map_errors'] == 2
+    assert 'Ответ 1' in block['summary'] and 'Ответ 2' in block['summary']
+
+    block = await ResearchAggregator().aggregate('block3_goals', make_results(), [])
+    assert block['aggregation']['mode'] == 'heuristic'
+    assert block['aggregation']['input_tokens'] == 0
+    assert len(block['key_facts']) == 3
+    assert set(block) >= {'summary', 'key_facts', 'queries_used', 'raw_results'}
+
+    empty = await ResearchAggregator().aggregate('block3_goals', [], [])
+    assert empty['summary'] == 'Нет данных' and empty['key_facts'] == []
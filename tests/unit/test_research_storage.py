@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для ResearchStorage (data/database/research_storage.py)
+
+Проверяем:
+- split_block / split_results: raw_results уходят в холодную часть, сводка их не содержит
+- pack_payload / unpack_payload: zlib(JSON) туда и обратно
+- save_block: payload + jsonb_set только своего блока
+- save_results: не перезаписывает payloads блоков, сохраненных через save_block
+- get_raw: payload, для старых записей - research_results
+- проекция сводки отрезает raw_results в SQL
+
+Запросы к PostgreSQL заменены FakeResearchDB.
+"""
+
+import importlib.util
+import json
+import sys
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# Модуль грузится по пути: пакет data.database при импорте подключается к PostgreSQL
+spec = importlib.util.spec_from_file_location(
+    'research_storage_under_test', PROJECT_ROOT / 'data' / 'database' / 'research_storage.py')
+research_storage = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(research_storage)
+
+ResearchStorage = research_storage.ResearchStorage
+
+
+def make_block(queries=9):
+    return {
+        'summary': 'Проблема подтверждена статистикой',
+        'key_facts': ['факт 1', 'факт 2'],
+        'sources': ['rosstat.gov.ru', 'minzdrav.gov.ru'],
+        'total_queries': queries,
+        'raw_results': [{'query': f'запрос {i}', 'answer': 'Длинный ответ WebSearch ' * 50,
+                         'sources': ['rosstat.gov.ru']} for i in range(queries)],
+    }
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.row = None
+
+    def execute(self, query, params=None):
+        self.db.queries.append((query, params))
+        if 'INSERT INTO researcher_research_payloads' in query:
+            research_id, block_name, codec, payload, raw_size, stored_size = params
+            self.db.payloads[(research_id, block_name)] = (codec, payload)
+        elif 'FROM researcher_research_payloads' in query:
+            self.row = self.db.payloads.get(tuple(params))
+        elif "-> 'raw_results'" in query:
+            block_name, research_id = params
+            block = self.db.legacy.get(research_id, {}).get(block_name) or {}
+            self.row = (block.get('raw_results'),)
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        self.db.commits += 1
+
+
+class FakeResearchDB:
+    def __init__(self):
+        self.queries = []
+        self.payloads = {}
+        self.legacy = {}
+        self.commits = 0
+
+    @contextmanager
+    def connect(self):
+        yield FakeConnection(self)
+
+    def updates(self):
+        return [(query, params) for query, params in self.queries if 'UPDATE researcher_research' in query]
+
+
+@pytest.mark.unit
+def test_split_results_moves_raw_results_to_payloads():
+    results = {
+        'block1_problem': make_block(9),
+        'block2_geography': {'summary': 'без raw'},
+        'metadata': {'total_queries': 27},
+        'status': 'completed',
+    }
+
+    summary, payloads = research_storage.split_results(results)
+
+    assert list(payloads) == ['block1_problem']
+    assert len(payloads['block1_problem']['raw_results']) == 9
+    assert 'raw_results' not in summary['block1_problem']
+    assert summary['block1_problem']['raw_queries'] == 9
+    assert summary['block1_problem']['key_facts'] == ['факт 1', 'факт 2']
+    assert summary['block2_geography'] == {'summary': 'без raw'}
+    assert summary['status'] == 'completed'
+    # входные данные не меняются: отчет MD/PDF строится из полного блока
+    assert 'raw_results' in results['block1_problem']
+
+
+@pytest.mark.unit
+def test_payload_roundtrip_is_compressed():
+    cold = {'raw_results': make_block(9)['raw_results']}
+
+    packed = research_storage.pack_payload(cold)
+
+    assert research_storage.unpack_payload(packed) == cold
+    assert len(packed) < len(json.dumps(cold, ensure_ascii=False).encode('utf-8')) / 5
+    # codec отличный от zlib - несжатый JSON
+    assert research_storage.unpack_payload(json.dumps(cold).encode('utf-8'), 'json') == cold
+
+
+@pytest.mark.unit
+def test_save_block_updates_only_its_key():
+    db = FakeResearchDB()
+
+    hot = ResearchStorage(db).save_block('R1', 'block1_problem', make_block(9))
+
+    assert 'raw_results' not in hot and hot['raw_queries'] == 9
+    codec, payload = db.payloads[('R1', 'block1_problem')]
+    assert codec == 'zlib'
+    assert len(json.loads(zlib.decompress(payload))['raw_results']) == 9
+
+    [(query, params)] = db.updates()
+    assert 'jsonb_set' in query
+    assert params[0] == ['block1_problem']
+    assert 'raw_results' not in json.loads(params[1])
+    assert db.commits == 1
+
+
+@pytest.mark.unit
+def test_save_results_skips_blocks_stored_by_save_block():
+    db = FakeResearchDB()
+    results = {'block1_problem': make_block(3), 'block2_geography': make_block(4), 'metadata': {}}
+
+    summary = ResearchStorage(db).save_results('R1', results, status='completed',
+                                               stored_blocks=['block1_problem'])
+
+    assert list(db.payloads) == [('R1', 'block2_geography')]
+    [(query, params)] = db.updates()
+    stored = json.loads(params[0])
+    assert stored == summary
+    assert all('raw_results' not in block for block in stored.values())
+    assert params[1] == 'completed' and params[2] is None
+
+
+@pytest.mark.unit
+def test_get_raw_reads_payload_then_legacy_jsonb():
+    db = FakeResearchDB()
+    storage = ResearchStorage(db)
+    storage.save_block('R1', 'block1_problem', make_block(2))
+    db.legacy['R0'] = {'block3_goals': make_block(5)}
+
+    assert len(storage.get_raw('R1', 'block1_problem')) == 2
+    assert len(storage.get_raw('R0', 'block3_goals')) == 5
+    assert storage.get_raw('R0', 'block1_problem') == []
+
+
+@pytest.mark.unit
+def test_summary_projection_strips_raw_results():
+    sql = research_storage.summary_projection('rr.research_results')
+
+    assert "- 'raw_results'" in sql
+    assert "COALESCE(rr.research_results, '{}'::jsonb)" in sql
+
+    with pytest.raises(ValueError):
+        ResearchStorage(FakeResearchDB()).get_summary()
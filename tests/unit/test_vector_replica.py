@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/vector_replica.py
+
+Проверяем:
+- локальный поиск совпадает с порядком cosine / фильтрами payload
+- инкрементальное обновление: докачиваются только новые и измененные точки
+- смена векторов при том же payload (upsert / переэмбеддинг коллекции)
+- Qdrant недоступен: поиск по снимку с диска
+- большие коллекции и неподдерживаемые условия уходят в удаленный Qdrant
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+np = pytest.importorskip('numpy')
+
+from shared.vector_replica import ReplicatedQdrantClient, replicated
+
+
+def match(key, value=None, any_=None):
+    return SimpleNamespace(key=key, match=SimpleNamespace(value=value, any=any_, except_=None), range=None)
+
+
+def points_filter(must=None, should=None, must_not=None):
+    return SimpleNamespace(must=must, should=should, must_not=must_not)
+
+
+class FakeQdrant:
+    """scroll / retrieve / get_collection / search как у QdrantClient"""
+
+    def __init__(self, points, distance='Cosine'):
+        self.points = dict(points)  # id -> (vector, payload)
+        self.distance = distance
+        self.available = True
+        self.retrieved = []
+        self.remote_searches = 0
+        self.init_options = {'host': 'qdrant.test', 'port': 6333}
+
+    def _check(self):
+        if not self.available:
+            raise ConnectionError("Qdrant unreachable")
+
+    def get_collection(self, collection_name):
+        self._check()
+        vectors = SimpleNamespace(size=len(next(iter(self.points.values()))[0]),
+                                  distance=SimpleNamespace(value=self.distance))
+        return SimpleNamespace(points_count=len(self.points),
+                               config=SimpleNamespace(params=SimpleNamespace(vectors=vectors)))
+
+    def scroll(self, collection_name, limit, offset=None, with_payload=True, with_vectors=False):
+        self._check()
+        ids = sorted(self.points)
+        start = offset or 0
+        batch = [SimpleNamespace(id=i, payload=self.points[i][1]) for i in ids[start:start + limit]]
+        return batch, (start + limit if start + limit < len(ids) else None)
+
+    def retrieve(self, collection_name, ids, with_payload=False, with_vectors=True):
+        self._check()
+        self.retrieved.extend(ids)
+        return [SimpleNamespace(id=i, vector=self.points[i][0]) for i in ids if i in self.points]
+
+    def search(self, **kwargs):
+        self._check()
+        self.remote_searches += 1
+        return ['remote']
+
+    def upsert(self, collection_name, points):
+        self._check()
+        for point in points:
+            self.points[point.id] = (point.vector, point.payload)
+
+
+@pytest.fixture
+def remote():
+    return FakeQdrant({
+        1: ([1.0, 0.0, 0.0], {'section': 'problem', 'grant_id': 'g1', 'year': 2023}),
+        2: ([0.8, 0.6, 0.0], {'section': 'solution', 'grant_id': 'g1', 'year': 2023}),
+        3: ([0.0, 1.0, 0.0], {'section': 'problem', 'grant_id': 'g2', 'year': 2024}),
+        4: ([0.0, 0.0, 2.0], {'section': 'kpi', 'grant_id': 'g3', 'tags': ['budget', 'kpi']}),
+    })
+
+
+@pytest.mark.unit
+class TestReplicatedQdrantClient:
+    """Тесты локальной реплики коллекций"""
+
+    def test_local_search_and_filters(self, remote, tmp_path):
+        client = ReplicatedQdrantClient(remote, directory=tmp_path)
+
+        hits = client.search(collection_name='fpg_real_winners', query_vector=[1.0, 0.2, 0.0], limit=3)
+        assert [hit.id for hit in hits] == [1, 2, 3]
+        assert hits[0].score == pytest.approx(1 / np.linalg.norm([1.0, 0.2]), rel=1e-5)
+
+        problems = client.search(collection_name='fpg_real_winners', query_vector=[0.1, 1.0, 0.0],
+                                 query_filter=points_filter(must=[match('section', 'problem')]), limit=5)
+        assert [hit.id for hit in problems] == [3, 1]
+        assert problems[0].payload['grant_id'] == 'g2'
+
+        tagged = client.search(collection_name='fpg_real_winners', query_vector=[0.0, 0.0, 1.0],
+                               query_filter=points_filter(should=[match('tags', any_=['budget'])],
+                                                          must_not=[match('grant_id', 'g1')]),
+                               limit=5, score_threshold=0.5)
+        assert [hit.id for hit in tagged] == [4]
+
+        assert remote.remote_searches == 0
+        assert client.stats['local_queries'] == 3
+
+    def test_incremental_refresh(self, remote, tmp_path):
+        client = ReplicatedQdrantClient(remote, directory=tmp_path)
+        client.sync('fpg_real_winners')
+        assert sorted(remote.retrieved) == [1, 2, 3, 4]
+
+        remote.retrieved.clear()
+        remote.points[5] = ([0.0, 0.6, 0.8], {'section': 'budget', 'grant_id': 'g4'})
+        remote.points[2] = ([0.0, 0.6, 0.8], {'section': 'solution', 'grant_id': 'g1', 'year': 2025})
+        del remote.points[3]
+
+        replica = client.sync('fpg_real_winners')
+        # векторы докачаны только для 2 и 5 (остальные запросы - выборочная сверка)
+        assert {2, 5} <= set(remote.retrieved)
+        assert client.stats['points_fetched'] == 6 and client.stats['vector_mismatches'] == 0
+        assert replica.ids == [1, 2, 4, 5]
+
+        hits = client.search(collection_name='fpg_real_winners', query_vector=[0.0, 0.6, 0.8], limit=2)
+        assert [hit.id for hit in hits] == [2, 5]
+
+    def test_vector_change_with_same_payload(self, remote, tmp_path):
+        client = ReplicatedQdrantClient(remote, directory=tmp_path)
+        client.sync('fpg_real_winners')
+
+        # upsert через клиент: payload тот же, вектор новый
+        payload = remote.points[1][1]
+        client.upsert('fpg_real_winners', points=[SimpleNamespace(id=1, vector=[0.0, 0.0, 1.0], payload=payload)])
+        client.sync('fpg_real_winners')
+        hits = client.search(collection_name='fpg_real_winners', query_vector=[0.0, 0.0, 1.0], limit=2)
+        assert sorted(hit.id for hit in hits) == [1, 4]
+        assert client.stats['vector_mismatches'] == 0 and client.stats['points_fetched'] == 5
+
+        # коллекцию переэмбеддили другим процессом: сверка выборки -> полная перекачка
+        for point_id, (vector, payload) in list(remote.points.items()):
+            remote.points[point_id] = (list(reversed(vector)), payload)
+        fetched = client.stats['points_fetched']
+        client.sync('fpg_real_winners')
+        assert client.stats['vector_mismatches'] == 1
+        assert client.stats['points_fetched'] - fetched == 4
+        hits = client.search(collection_name='fpg_real_winners', query_vector=[1.0, 0.0, 0.0], limit=1)
+        assert hits[0].id == 1
+
+    def test_snapshot_used_when_qdrant_unreachable(self, remote, tmp_path):
+        ReplicatedQdrantClient(remote, directory=tmp_path).sync('knowledge_sections')
+        remote.available = False
+
+        # новый процесс: снимок с диска, обновление в фоне не ломает поиск
+        client = ReplicatedQdrantClient(remote, directory=tmp_path, refresh_seconds=0)
+        hits = client.search(collection_name='knowledge_sections', query_vector=[0.0, 1.0, 0.0], limit=1)
+        assert hits[0].id == 3
+
+    def test_large_collection_and_unsupported_filter_go_remote(self, remote, tmp_path):
+        client = ReplicatedQdrantClient(remote, directory=tmp_path, max_points=2)
+        assert client.search(collection_name='big', query_vector=[1.0, 0.0, 0.0]) == ['remote']
+
+        client = ReplicatedQdrantClient(remote, directory=tmp_path / 'other')
+        is_empty = SimpleNamespace(is_empty=SimpleNamespace(key='tags'))
+        result = client.search(collection_name='fpg', query_vector=[1.0, 0.0, 0.0],
+                               query_filter=points_filter(must=[is_empty]))
+        assert result == ['remote']
+        assert remote.remote_searches == 2
+
+    def test_replicated_skips_local_clients(self, remote):
+        memory_client = SimpleNamespace(init_options={'location': ':memory:'})
+        assert replicated(memory_client) is memory_client
+        assert replicated(None) is None
+        wrapped = replicated(remote)
+        assert isinstance(wrapped, ReplicatedQdrantClient)
+        assert replicated(wrapped) is wrapped
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit тесты для shared/telegram_utils/webhook_intake.py
+
+Проверяем:
+- принятые updates обрабатываются и отмечаются в spool
+- backpressure: переполненная очередь отвечает 503
+- update в очереди только после записи в spool
+- отмененная на остановке обработка не отмечается done
+- повторная доставка и секрет webhook
+- replay необработанных updates после перезапуска
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.telegram_utils.webhook_intake import WebhookIntake
+
+
+class FakeSpool:
+    """In-memory spool с интерфейсом UpdateSpool"""
+
+    def __init__(self, pending=None):
+        self.rows = {p['update_id']: {'payload': p, 'status': 'pending'} for p in (pending or [])}
+        self.fail_add = False
+
+    def add(self, update_id, payload):
+        if self.fail_add:
+            raise ConnectionError('database unavailable')
+        self.rows.setdefault(update_id, {'payload': payload, 'status': 'pending'})
+
+    def mark_done(self, update_ids):
+        for update_id in update_ids:
+            self.rows.setdefault(update_id, {'payload': None})['status'] = 'done'
+
+    def pending(self, limit=10000):
+        return [
+            row['payload'] for _, row in sorted(self.rows.items())
+            if row['status'] == 'pending' and row['payload']
+        ][:limit]
+
+
+def update(update_id):
+    return {'update_id': update_id, 'message': {'message_id': update_id, 'text': 'hi'}}
+
+
+async def start_client(intake):
+    await intake.start_workers()
+    client = TestClient(TestServer(intake.build_app()))
+    await client.start_server()
+    return client
+
+
+@pytest.mark.unit
+class TestWebhookIntake:
+    """Тесты приема updates"""
+
+    @pytest.mark.asyncio
+    async def test_accepted_updates_processed_and_marked_done(self):
+        """Тест: 200 -> update в spool, после обработки - done"""
+        spool = FakeSpool()
+        processed = []
+
+        async def process(payload):
+            processed.append(payload['update_id'])
+
+        intake = WebhookIntake(process, spool=spool, workers=2)
+        client = await start_client(intake)
+        try:
+            for update_id in range(1, 11):
+                response = await client.post(intake.path, json=update(update_id))
+                assert response.status == 200
+            # повторная доставка того же update
+            response = await client.post(intake.path, json=update(5))
+            assert response.status == 200
+        finally:
+            await client.close()
+            await intake.stop()
+
+        assert sorted(processed) == list(range(1, 11))
+        assert intake.stats['duplicates'] == 1
+        assert spool.pending() == []
+        assert all(row['status'] == 'done' for row in spool.rows.values())
+
+    @pytest.mark.asyncio
+    async def test_backpressure_returns_503(self):
+        """Тест: очередь заполнена дольше enqueue_timeout -> 503, повтор обрабатывается один раз"""
+        spool = FakeSpool()
+        release = asyncio.Event()
+
+        async def blocked(payload):
+            await release.wait()
+
+        intake = WebhookIntake(blocked, spool=spool, queue_size=2, workers=1, enqueue_timeout=0.05)
+        client = await start_client(intake)
+        try:
+            statuses = []
+            for update_id in range(1, 6):
+                response = await client.post(intake.path, json=update(update_id))
+                statuses.append(response.status)
+
+            # 1 в обработке + 2 в очереди, остальные отклонены
+            assert statuses == [200, 200, 200, 503, 503]
+            assert spool.rows[4]['status'] == 'pending'
+
+            # после освобождения места повторная доставка принимается
+            release.set()
+            await intake.queue.join()
+            response = await client.post(intake.path, json=update(4))
+            assert response.status == 200
+        finally:
+            release.set()
+            await client.close()
+            await intake.stop()
+
+        assert intake.stats['rejected_busy'] == 2
+        assert spool.rows[4]['status'] == 'done'
+
+    @pytest.mark.asyncio
+    async def test_spool_failure_does_not_enqueue(self):
+        """Тест: ошибка записи в spool -> 500, update не в очереди, повтор принимается"""
+        spool = FakeSpool()
+        processed = []
+
+        async def process(payload):
+            processed.append(payload['update_id'])
+
+        intake = WebhookIntake(process, spool=spool, workers=1)
+        client = await start_client(intake)
+        try:
+            spool.fail_add = True
+            response = await client.post(intake.path, json=update(1))
+            assert response.status == 500
+            assert intake.queue.qsize() == 0
+
+            spool.fail_add = False
+            response = await client.post(intake.path, json=update(1))
+            assert response.status == 200
+            await intake.queue.join()
+        finally:
+            await client.close()
+            await intake.stop()
+
+        assert processed == [1]
+        assert spool.rows[1]['status'] == 'done'
+
+    @pytest.mark.asyncio
+    async def test_cancelled_processing_stays_pending(self):
+        """Тест: обработка, прерванная остановкой, не отмечается done"""
+        spool = FakeSpool()
+        started = asyncio.Event()
+
+        async def hangs(payload):
+            started.set()
+            await asyncio.sleep(60)
+
+        intake = WebhookIntake(hangs, spool=spool, workers=1)
+        client = await start_client(intake)
+        try:
+            response = await client.post(intake.path, json=update(1))
+            assert response.status == 200
+            await started.wait()
+        finally:
+            await client.close()
+            await intake.stop(drain_timeout=0.05)
+
+        assert spool.pending() == [update(1)]
+        assert intake.stats['processed'] == 0 and intake.stats['failed'] == 0
+
+    @pytest.mark.asyncio
+    async def test_secret_token_required(self):
+        """Тест: неверный X-Telegram-Bot-Api-Secret-Token -> 403"""
+        async def process(payload):
+            pass
+
+        intake = WebhookIntake(process, secret_token="s3cret")
+        client = await start_client(intake)
+        try:
+            response = await client.post(intake.path, json=update(1))
+            assert response.status == 403
+            response = await client.post(
+                intake.path, json=update(1),
+                headers={'X-Telegram-Bot-Api-Secret-Token': 's3cret'}
+            )
+            assert response.status == 200
+        finally:
+            await client.close()
+            await intake.stop()
+
+    @pytest.mark.asyncio
+    async def test_replay_pending_on_start(self):
+        """Тест: pending updates из spool обрабатываются после перезапуска по порядку"""
+        spool = FakeSpool(pending=[update(3), update(1), update(2)])
+        processed = []
+
+        async def process(payload):
+            processed.append(payload['update_id'])
+
+        intake = WebhookIntake(process, spool=spool, workers=1)
+        await intake.start_workers()
+        await intake.queue.join()
+        await intake.stop()
+
+        assert processed == [1, 2, 3]
+        assert intake.stats['replayed'] == 3
+        assert spool.pending() == []
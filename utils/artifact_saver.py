@@ -18,6 +18,7 @@ Created: 2025-10-12
 Version: 1.0
 """
 
+import importlib.util
 import sys
 import os
 from pathlib import Path
@@ -26,21 +27,11 @@ import logging
 from datetime import datetime
 import json
 
-# Для генерации PDF
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import cm
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib import colors
-    from reportlab.lib.enums import TA_LEFT, TA_CENTER
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    REPORTLAB_AVAILABLE = True
-except ImportError:
+# Для генерации PDF (reportlab импортируется при генерации, здесь - только проверка)
+REPORTLAB_AVAILABLE = importlib.util.find_spec('reportlab') is not None
+if not REPORTLAB_AVAILABLE:
     print("[WARN] reportlab не установлен, PDF генерация недоступна")
     print("      Установите: pip install reportlab")
-    REPORTLAB_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
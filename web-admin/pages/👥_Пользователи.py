@@ -22,6 +22,7 @@ try:
     from utils.database import AdminDatabase
     from utils.ui_helpers import render_page_header, render_metric_cards, render_tabs, show_error_message
     from utils.logger import setup_logger
+    from utils.postgres_helper import shared_cache
     from data.database import (
         get_all_users_progress,
         get_questions_with_answers,
@@ -56,7 +57,7 @@ db = get_database()
 grant_db = get_grant_database()
 
 # DATA FUNCTIONS
-@st.cache_data(ttl=60)
+@shared_cache(ttl=60, tags=('users', 'sessions', 'interview_questions'))
 def get_users_metrics():
     """Получить метрики пользователей"""
     try:
@@ -83,7 +84,7 @@ def get_users_metrics():
             'users_progress': []
         }
 
-@st.cache_data(ttl=60)
+@shared_cache(ttl=60, tags=('sessions', 'users', 'interview_questions'))
 def get_all_questionnaires():
     """Получить все анкеты из сессий"""
     try:
@@ -42,7 +42,9 @@ try:
         execute_query,
         execute_query_df,
         execute_scalar,
-        execute_update
+        execute_update,
+        shared_cache,
+        invalidate_tables
     )
     from utils.logger import setup_logger
     # from utils.grant_lifecycle_manager import GrantLifecycleManager, get_lifecycle_summary
@@ -79,8 +81,16 @@ db = get_database()
 # =============================================================================
 # DATA FETCHING FUNCTIONS
 # =============================================================================
+# Общий кеш (shared/query_cache.py): результат доступен всем сессиям админки
+# и инвалидируется при записи в перечисленные таблицы (агенты, execute_update)
 
-@st.cache_data(ttl=60)
+UNIFIED_GRANTS_TAGS = (
+    'grants', 'grant_applications', 'sessions', 'users', 'user_answers',
+    'auditor_results', 'researcher_research', 'planner_structures'
+)
+GRANTS_PAGE_TAGS = UNIFIED_GRANTS_TAGS + ('sent_documents',)
+
+@shared_cache(ttl=60, tags=('grant_applications', 'grants', 'sent_documents'))
 def get_grants_statistics(_db):
     """Get grants statistics for header metrics - USING POSTGRESQL"""
     from utils.postgres_helper import execute_query
@@ -118,7 +128,7 @@ def get_grants_statistics(_db):
         logger.error(f"Error fetching statistics from PostgreSQL: {e}", exc_info=True)
         return {'total': 0, 'in_progress': 0, 'ready': 0, 'sent': 0}
 
-@st.cache_data(ttl=60)
+@shared_cache(ttl=60, tags=('grant_applications', 'users', 'sessions'))
 def get_all_applications(_db, status_filter='all', period_days=None, hide_legacy=True):
     """Get all grant applications with filters - USING POSTGRESQL"""
     from utils.postgres_helper import execute_query
@@ -182,7 +192,7 @@ def get_all_applications(_db, status_filter='all', period_days=None, hide_legacy
         logger.error(f"Error fetching applications from PostgreSQL: {e}", exc_info=True)
         return pd.DataFrame()
 
-@st.cache_data(ttl=60)
+@shared_cache(ttl=60, tags=('grants',))
 def get_ready_grants():
     """Get grants ready for delivery (status='completed')"""
     query = """
@@ -217,7 +227,7 @@ def get_ready_grants():
         logger.error(f"Error fetching ready grants: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=60)
+@shared_cache(ttl=60, tags=('grants',))
 def get_grant_details(grant_id):
     """Get full grant details including content"""
     from utils.postgres_helper import execute_query
@@ -276,7 +286,7 @@ def get_grant_details(grant_id):
         logger.error(f"Error fetching grant details: {e}")
         return None
 
-@st.cache_data(ttl=60)
+@shared_cache(ttl=60, tags=UNIFIED_GRANTS_TAGS)
 def get_all_grants_unified(status_filter='all', search_query=''):
     """
     Get unified list of grants from BOTH tables: grants + grant_applications
@@ -383,7 +393,7 @@ def get_all_grants_unified(status_filter='all', search_query=''):
         logger.error(f"Error fetching unified grants: {e}", exc_info=True)
         return pd.DataFrame()
 
-@st.cache_data(ttl=60)
+@shared_cache(ttl=60, tags=('grant_applications', 'users'))
 def get_application_details(_db, app_id):
     """Get detailed application info from grant_applications"""
     from utils.postgres_helper import execute_query
@@ -421,7 +431,7 @@ def get_application_details(_db, app_id):
         logger.error(f"Error fetching application details: {e}")
         return None
 
-@st.cache_data(ttl=60)
+@shared_cache(ttl=60, tags=('sent_documents', 'users', 'grants'))
 def get_sent_documents(_db):
     """Get all sent documents history"""
     from utils.postgres_helper import execute_query
@@ -900,7 +910,6 @@ def render_grant_card(row):
                         success = send_grant_to_telegram(db, row['grant_id'], row['user_id'])
                         if success:
                             st.success("✅ Грант отправлен!")
-                            st.cache_data.clear()
                             st.rerun()
                         else:
                             st.error("❌ Ошибка отправки")
@@ -1252,7 +1261,6 @@ LLM провайдер: {grant['llm_provider']} ({grant['model'] or 'N/A'})
                         if success:
                             st.success("✅ Грант успешно отправлен!")
                             st.balloons()
-                            st.cache_data.clear()
                             st.rerun()
                         else:
                             st.error("❌ Ошибка отправки")
@@ -1746,7 +1754,7 @@ def render_tab_view():
     with col3:
         refresh_emoji = "🔄"
         if st.button(f"{refresh_emoji} Обновить", use_container_width=True):
-            st.cache_data.clear()
+            invalidate_tables(*GRANTS_PAGE_TAGS)
             st.rerun()
 
     with col4:
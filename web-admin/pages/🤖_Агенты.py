@@ -54,6 +54,7 @@ render_agent_stats = None
 create_researcher_metrics = None
 create_cost_chart = None
 create_popular_queries_chart = None
+create_series_chart = None
 GrantServiceDatabase = None
 get_interview_questions = None
 insert_interview_question = None
@@ -66,11 +67,12 @@ except ImportError as e:
     st.warning(f"⚠️ AdminDatabase not available: {e}")
 
 try:
-    from utils.postgres_helper import execute_query, execute_update
+    from utils.postgres_helper import execute_query, execute_update, shared_cache
 except ImportError as e:
     st.warning(f"⚠️ postgres_helper not available: {e}")
     execute_query = None
     execute_update = None
+    shared_cache = lambda ttl=None, tags=(): st.cache_data(ttl=ttl)
 
 try:
     from utils.ui_helpers import render_page_header, render_metric_cards, render_tabs
@@ -83,16 +85,30 @@ except ImportError as e:
     st.warning(f"⚠️ Agent components not available: {e}")
 
 try:
-    from utils.charts import create_researcher_metrics, create_cost_chart, create_popular_queries_chart
+    from utils.charts import create_researcher_metrics, create_cost_chart, create_popular_queries_chart, create_series_chart
 except ImportError:
     pass  # Charts are optional
 
+# Daily rollups for cost / latency charts (migration 020)
+try:
+    from utils.agent_analytics import load_rollups, daily_series, summary_by, totals, refresh_rollups
+    ANALYTICS_AVAILABLE = True
+except ImportError:
+    ANALYTICS_AVAILABLE = False
+
 try:
     from data.database import GrantServiceDatabase
 except ImportError:
     # Fallback to AdminDatabase
     pass
 
+try:
+    # research_results без raw_results (ответы WebSearch - в researcher_research_payloads)
+    from data.database.research_storage import summary_projection
+except ImportError:
+    def summary_projection(column: str = 'research_results') -> str:
+        return column
+
 try:
     from data.database import get_interview_questions, insert_interview_question, update_interview_question, delete_interview_question
 except ImportError as e:
@@ -354,7 +370,10 @@ def delete_interview_question(question_id):
         logger.error(f"Error deleting question {question_id}: {e}")
         raise
 
-@st.cache_data(ttl=300)
+# Таблицы результатов агентов: запись любого агента инвалидирует статистику
+AGENT_STATISTICS_TAGS = ('sessions', 'auditor_results', 'planner_structures', 'researcher_research', 'grants')
+
+@shared_cache(ttl=300, tags=AGENT_STATISTICS_TAGS)
 def get_agent_statistics(agent_type: str, _db, days: int = 30):
     """Get statistics for specific agent"""
     try:
@@ -455,16 +474,16 @@ def get_agent_statistics(agent_type: str, _db, days: int = 30):
         logger.error(f"Error getting stats for {agent_type}: {e}")
         return {}
 
-@st.cache_data(ttl=60)
+@shared_cache(ttl=60, tags=('researcher_research', 'sessions', 'users'))
 def get_researcher_investigations(_db, filters: dict = None):
-    """Get list of researcher investigations - USES POSTGRESQL"""
+    """Get list of researcher investigations - USES POSTGRESQL (summary only, no raw_results)"""
     try:
-        query = """
+        query = f"""
             SELECT
                 rr.id,
                 rr.research_id,
                 rr.anketa_id,
-                rr.research_results,
+                {summary_projection('rr.research_results')} AS research_results,
                 rr.status,
                 rr.llm_provider,
                 rr.model,
@@ -485,7 +504,7 @@ def get_researcher_investigations(_db, filters: dict = None):
         logger.error(f"Error getting investigations: {e}")
         return []
 
-@st.cache_data(ttl=60)
+@shared_cache(ttl=60, tags=('grants',))
 def get_writer_generated_texts(_db, filters: dict = None):
     """Get list of writer generated texts"""
     try:
@@ -1614,20 +1633,95 @@ def render_researcher_cost_analytics():
             - **sonar-pro:** {screen_data.get('sonar_pro_input_tokens', 0):,}
             """)
 
-        st.markdown("---")
+    except Exception as e:
+        logger.error(f"Error in cost analytics: {e}")
+        st.warning(f"⚠️ Ошибка загрузки аналитики: {e}")
+        st.info("Аналитика расходов временно недоступна")
+
+    st.markdown("---")
 
-        # Cost chart (placeholder - needs actual data)
-        st.markdown("### 📈 Динамика расходов")
-        st.info("График расходов по дням (интеграция в процессе)")
+    # Cost chart
+    st.markdown("### 📈 Динамика расходов")
+    days, freq = render_rollup_analytics(['websearch', 'researcher'], 'researcher_costs')
 
-        # Provider comparison
-        st.markdown("### 🔄 Сравнение провайдеров")
-        st.info("Сравнение стоимости GigaChat vs GPT vs Perplexity (интеграция в процессе)")
+    # Provider comparison (all agents)
+    st.markdown("### 🔄 Сравнение провайдеров")
+    if ANALYTICS_AVAILABLE:
+        try:
+            summary = summary_by(load_rollups(days=days), 'provider')
+            st.dataframe(
+                summary[['calls', 'errors', 'tokens', 'cost', 'cost_per_call', 'avg_latency', 'error_rate']].rename(columns={
+                    'calls': 'Вызовы', 'errors': 'Ошибки', 'tokens': 'Токены', 'cost': 'Расходы',
+                    'cost_per_call': 'Цена вызова', 'avg_latency': 'Ср. время, с', 'error_rate': 'Доля ошибок'
+                }),
+                use_container_width=True
+            )
+        except Exception as e:
+            logger.error(f"Error in provider comparison: {e}")
+            st.warning(f"⚠️ Ошибка загрузки сравнения провайдеров: {e}")
+
+
+ROLLUP_PERIODS = {"30 дней": 30, "90 дней": 90, "Год": 365}
+ROLLUP_FREQUENCIES = {"День": "D", "Неделя": "W", "Месяц": "MS"}
+
+
+def render_rollup_analytics(agent_types: list, key_prefix: str, show_cost: bool = True):
+    """
+    Графики по agent_daily_rollups (вызовы, токены, расходы, время ответа)
 
+    Returns:
+        (days, freq) - выбранные период и шаг
+    """
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        period = st.selectbox("Период", list(ROLLUP_PERIODS), key=f"{key_prefix}_period")
+    with col2:
+        step = st.selectbox("Шаг", list(ROLLUP_FREQUENCIES), key=f"{key_prefix}_freq")
+    with col3:
+        refresh_clicked = st.button("🔄 Пересчитать", key=f"{key_prefix}_refresh")
+
+    days, freq = ROLLUP_PERIODS[period], ROLLUP_FREQUENCIES[step]
+
+    if not ANALYTICS_AVAILABLE or create_series_chart is None:
+        st.info("Аналитика по дням недоступна (utils.agent_analytics)")
+        return days, freq
+
+    try:
+        if refresh_clicked:
+            refresh_rollups(datetime.now().date() - timedelta(days=days))
+
+        df = load_rollups(days=days, agent_types=agent_types)
+        summary = totals(df)
+        start, end = datetime.now().date() - timedelta(days=days), datetime.now().date()
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Вызовы", f"{int(summary['calls']):,}")
+        with col2:
+            st.metric("Токены", f"{int(summary['tokens']):,}")
+        with col3:
+            st.metric("Ср. время ответа", f"{summary['avg_latency']:.1f} с")
+        with col4:
+            if show_cost:
+                st.metric("Расходы", f"{summary['cost']:.2f}")
+            else:
+                st.metric("Доля ошибок", f"{summary['error_rate'] * 100:.1f}%")
+
+        if show_cost:
+            create_series_chart(daily_series(df, 'cost', freq=freq, start=start, end=end),
+                                "Расходы по провайдерам", "Расходы")
+        else:
+            create_series_chart(daily_series(df, 'calls', freq=freq, start=start, end=end),
+                                "Вызовы по провайдерам", "Вызовы")
+        create_series_chart(daily_series(df, 'tokens', freq=freq, start=start, end=end),
+                            "Токены", "Токены")
+        create_series_chart(daily_series(df, 'avg_latency', freq=freq, start=start, end=end),
+                            "Среднее время ответа", "Секунды", kind="line")
     except Exception as e:
-        logger.error(f"Error in cost analytics: {e}")
+        logger.error(f"Error loading agent rollups for {agent_types}: {e}")
         st.warning(f"⚠️ Ошибка загрузки аналитики: {e}")
-        st.info("Аналитика расходов временно недоступна")
+
+    return days, freq
 
 
 def render_writer_tab():
@@ -1669,6 +1763,11 @@ def render_writer_statistics():
 
     st.markdown("---")
 
+    st.markdown("#### 📈 Генерации, токены и время ответа")
+    render_rollup_analytics(['writer'], 'writer_stats', show_cost=False)
+
+    st.markdown("---")
+
     # Prompt management
     if PROMPT_MANAGER_AVAILABLE:
         render_agent_prompts('writer', 'Writer Agent')
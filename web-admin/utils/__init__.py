@@ -2,10 +2,15 @@
 # -*- coding: utf-8 -*-
 """
 Инициализация модуля utils для web-admin
+
+Экспорты загружаются лениво (PEP 562): `from utils.prompt_manager import ...`
+в боте и воркерах не тянет streamlit, pandas и plotly через auth/database/charts.
+Страницы web-admin используют `from utils import ...` как раньше.
 """
 
 import sys
 import os
+import importlib
 
 # Добавляем пути для корректной работы импортов
 current_dir = os.path.dirname(os.path.abspath(__file__))  # utils
@@ -18,76 +23,57 @@ if grandparent_dir not in sys.path:
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-# Экспортируем функции из auth
-try:
-    from .auth import (
-        is_user_authorized,
-        get_current_user,
-        logout,
-        require_auth,
-        require_admin,
-        validate_login_token,
-        check_user_access,
-        is_admin
-    )
-except ImportError as e:
-    print(f"Warning: Could not import auth functions: {e}")
-    # Создаем заглушки для функций
-    def is_user_authorized():
-        return False
-    def get_current_user():
-        return None
-    def logout():
-        pass
-    def require_auth(func):
-        return func
-    def require_admin(func):
-        return func
-    def validate_login_token(token):
-        return None
-    def check_user_access(user_id):
-        return False
-    def is_admin(user_id):
-        return False
+# имя -> подмодуль, из которого оно экспортируется
+_EXPORTS = {
+    'is_user_authorized': 'auth',
+    'get_current_user': 'auth',
+    'logout': 'auth',
+    'require_auth': 'auth',
+    'require_admin': 'auth',
+    'validate_login_token': 'auth',
+    'check_user_access': 'auth',
+    'is_admin': 'auth',
+    'AdminDatabase': 'database',
+    'setup_logger': 'logger',
+    'create_metrics_cards': 'charts',
+    'create_daily_chart': 'charts',
+}
+
+
+# Заглушки на случай, если подмодуль не импортируется
+def _setup_logger_fallback(name):
+    import logging
+    return logging.getLogger(name)
+
+
+_FALLBACKS = {
+    'is_user_authorized': lambda: False,
+    'get_current_user': lambda: None,
+    'logout': lambda: None,
+    'require_auth': lambda func: func,
+    'require_admin': lambda func: func,
+    'validate_login_token': lambda token: None,
+    'check_user_access': lambda user_id: False,
+    'is_admin': lambda user_id: False,
+    'AdminDatabase': None,
+    'setup_logger': _setup_logger_fallback,
+    'create_metrics_cards': lambda stats: None,
+    'create_daily_chart': lambda daily_stats, title: None,
+}
 
-# Экспортируем функции из database
-try:
-    from .database import AdminDatabase
-except ImportError as e:
-    print(f"Warning: Could not import AdminDatabase: {e}")
-    AdminDatabase = None
 
-# Экспортируем функции из logger
-try:
-    from .logger import setup_logger
-except ImportError as e:
-    print(f"Warning: Could not import logger: {e}")
-    def setup_logger(name):
-        import logging
-        return logging.getLogger(name)
+def __getattr__(name):
+    submodule = _EXPORTS.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        value = getattr(importlib.import_module(f'.{submodule}', __name__), name)
+    except ImportError as e:
+        print(f"Warning: Could not import {name} from utils.{submodule}: {e}")
+        value = _FALLBACKS[name]
+    globals()[name] = value
+    return value
 
-# Экспортируем функции из charts
-try:
-    from .charts import create_metrics_cards, create_daily_chart
-except ImportError as e:
-    print(f"Warning: Could not import charts: {e}")
-    def create_metrics_cards(stats):
-        pass
-    def create_daily_chart(daily_stats, title):
-        pass
 
 # Список экспортируемых имен
-__all__ = [
-    'is_user_authorized',
-    'get_current_user',
-    'logout',
-    'require_auth',
-    'require_admin',
-    'validate_login_token',
-    'check_user_access',
-    'is_admin',
-    'AdminDatabase',
-    'setup_logger',
-    'create_metrics_cards',
-    'create_daily_chart'
-]
\ No newline at end of file
+__all__ = list(_EXPORTS)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agent Analytics - daily rollups for the admin charts
+=====================================================
+Графики расходов / задержек агентов строятся по agent_daily_rollups
+(миграция 020): одна строка на день / агента / провайдера. Сырые
+researcher_logs, researcher_research, grants и т.д. не сканируются.
+
+Преобразования векторные (pivot / resample / деление массивов NumPy),
+без циклов по строкам. Если установлен pyarrow - колонки DataFrame
+хранятся в Arrow (pandas dtype_backend='pyarrow').
+
+Usage:
+    from utils.agent_analytics import load_rollups, daily_series, summary_by
+
+    df = load_rollups(days=365, agent_types=['websearch', 'researcher'])
+    cost = daily_series(df, 'cost', freq='W')      # день x провайдер
+    table = summary_by(df, 'provider')
+
+Author: Grant Service Architect Agent
+Date: 2025-11-06
+Version: 1.0.0
+"""
+
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.postgres_helper import execute_query_df, execute_scalar, invalidate_tables, shared_cache
+from utils.logger import setup_logger
+
+logger = setup_logger('agent_analytics')
+
+try:
+    import pyarrow  # noqa: F401
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+ROLLUP_TABLE = 'agent_daily_rollups'
+ROLLUP_TAGS = (ROLLUP_TABLE,)
+
+# Счетчики суммируются при любой группировке, средние считаются из них
+SUM_METRICS = ['calls', 'errors', 'tokens', 'cost', 'latency_sum', 'latency_count']
+# metric -> (числитель, знаменатель)
+RATIO_METRICS = {
+    'avg_latency': ('latency_sum', 'latency_count'),
+    'error_rate': ('errors', 'calls'),
+    'cost_per_call': ('cost', 'calls'),
+    'tokens_per_call': ('tokens', 'calls'),
+}
+
+ROLLUPS_QUERY = """
+    SELECT day, agent_type, provider, calls, errors, tokens, cost,
+           latency_sum, latency_count, latency_max
+    FROM agent_daily_rollups
+    WHERE day >= %s
+"""
+
+
+def refresh_rollups(since: Optional[date] = None) -> int:
+    """
+    Пересчитать дни >= since (None - последний посчитанный день и предыдущий)
+
+    Returns:
+        Число строк agent_daily_rollups, записанных заново
+    """
+    rows = execute_scalar("SELECT refresh_agent_daily_rollups(%s)", (since,))
+    invalidate_tables(ROLLUP_TABLE)
+    logger.info(f"agent_daily_rollups refreshed from {since or 'last day'}: {rows} rows")
+    return rows or 0
+
+
+@shared_cache(ttl=600)
+def ensure_fresh_rollups() -> int:
+    """Инкрементальный пересчет не чаще раза в 10 минут на все процессы админки"""
+    try:
+        return refresh_rollups()
+    except Exception as e:
+        logger.error(f"Error refreshing agent_daily_rollups: {e}")
+        return 0
+
+
+def to_arrow(df: pd.DataFrame) -> pd.DataFrame:
+    """Колонки в Arrow (если есть pyarrow), иначе DataFrame без изменений"""
+    if ARROW_AVAILABLE:
+        return df.convert_dtypes(dtype_backend='pyarrow')
+    return df
+
+
+def prepare_rollups(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Строки agent_daily_rollups -> DataFrame для векторных преобразований
+
+    day - datetime64, счетчики - int64/float64 (psycopg2 отдает Decimal /
+    object), agent_type / provider - category.
+    """
+    df = df.copy()
+    df['day'] = pd.to_datetime(df['day'])
+    for column in ('calls', 'errors', 'tokens', 'latency_count'):
+        df[column] = pd.to_numeric(df[column]).fillna(0).astype('int64')
+    for column in ('cost', 'latency_sum', 'latency_max'):
+        df[column] = pd.to_numeric(df[column]).fillna(0).astype('float64')
+    df['agent_type'] = df['agent_type'].astype('category')
+    df['provider'] = df['provider'].astype('category')
+    return df.sort_values('day', kind='stable').reset_index(drop=True)
+
+
+@shared_cache(ttl=300, tags=ROLLUP_TAGS)
+def _load_rollups_frame(since: date) -> pd.DataFrame:
+    return prepare_rollups(execute_query_df(ROLLUPS_QUERY, (since,)))
+
+
+def load_rollups(days: int = 365, agent_types: Optional[Iterable[str]] = None,
+                 refresh: bool = True) -> pd.DataFrame:
+    """
+    Загрузить rollups за последние days дней
+
+    Args:
+        days: Глубина истории
+        agent_types: Фильтр по агентам (None - все)
+        refresh: Сначала дописать свежие дни (ensure_fresh_rollups)
+    """
+    if refresh:
+        ensure_fresh_rollups()
+
+    df = _load_rollups_frame(date.today() - timedelta(days=days))
+    if agent_types is not None:
+        df = df[df['agent_type'].isin(list(agent_types))]
+    return to_arrow(df)
+
+
+def _ratio(numerator, denominator) -> np.ndarray:
+    """numerator / denominator поэлементно, 0 там, где знаменатель 0"""
+    numerator = np.asarray(numerator, dtype='float64')
+    denominator = np.asarray(denominator, dtype='float64')
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+
+def daily_series(df: pd.DataFrame, metric: str, by: Optional[str] = 'provider',
+                 freq: str = 'D', start=None, end=None) -> pd.DataFrame:
+    """
+    Временной ряд метрики: индекс - период, колонки - значения by
+
+    Args:
+        df: Результат load_rollups / prepare_rollups
+        metric: Колонка из SUM_METRICS, 'latency_max' или ключ RATIO_METRICS
+        by: 'provider', 'agent_type' или None (одна колонка 'total')
+        freq: 'D', 'W', 'MS' - шаг ряда
+        start, end: Границы оси (по умолчанию min / max day); пропущенные
+            дни заполняются нулями, чтобы ось была непрерывной
+
+    Returns:
+        DataFrame float64 (для графиков)
+    """
+    if metric in RATIO_METRICS:
+        numerator, denominator = RATIO_METRICS[metric]
+        num = daily_series(df, numerator, by, freq, start, end)
+        den = daily_series(df, denominator, by, freq, start, end)
+        return pd.DataFrame(_ratio(num.to_numpy(), den.to_numpy()), index=num.index, columns=num.columns)
+
+    aggfunc = 'max' if metric == 'latency_max' else 'sum'
+    if df.empty:
+        index = pd.date_range(start, end, freq=freq, name='day') if start is not None and end is not None \
+            else pd.DatetimeIndex([], name='day')
+        return pd.DataFrame(index=index, dtype='float64')
+
+    values = pd.to_numeric(df[metric]).astype('float64')
+    group = df[by].astype(str) if by is not None else pd.Series('total', index=df.index)
+    table = values.groupby([df['day'].astype('datetime64[ns]'), group]).agg(aggfunc)
+    table = table.unstack(fill_value=0.0)
+
+    full_range = pd.date_range(start if start is not None else table.index.min(),
+                               end if end is not None else table.index.max(), freq='D', name='day')
+    table = table.reindex(full_range, fill_value=0.0)
+    if freq != 'D':
+        table = table.resample(freq).agg(aggfunc)
+    return table.astype('float64')
+
+
+def summary_by(df: pd.DataFrame, by: str = 'provider') -> pd.DataFrame:
+    """
+    Итоги по группам (провайдер / агент): суммы и средние за весь период
+
+    Returns:
+        DataFrame с колонками SUM_METRICS, latency_max и RATIO_METRICS,
+        отсортированный по cost
+    """
+    columns: List[str] = SUM_METRICS + ['latency_max'] + list(RATIO_METRICS)
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    numeric = df[SUM_METRICS + ['latency_max']].apply(pd.to_numeric).astype('float64')
+    grouped = numeric.groupby(df[by].astype(str))
+    result = grouped[SUM_METRICS].sum()
+    result['latency_max'] = grouped['latency_max'].max()
+    for name, (numerator, denominator) in RATIO_METRICS.items():
+        result[name] = _ratio(result[numerator], result[denominator])
+    return result.sort_values('cost', ascending=False)[columns]
+
+
+def totals(df: pd.DataFrame) -> dict:
+    """Итоги за период одним словарем (для st.metric)"""
+    if df.empty:
+        return {name: 0 for name in SUM_METRICS + list(RATIO_METRICS)}
+
+    sums = df[SUM_METRICS].apply(pd.to_numeric).astype('float64').sum()
+    result = {name: float(sums[name]) for name in SUM_METRICS}
+    for name, (numerator, denominator) in RATIO_METRICS.items():
+        result[name] = float(_ratio(sums[numerator], sums[denominator]))
+    return result
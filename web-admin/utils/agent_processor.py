@@ -18,13 +18,12 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 import json
 
-# Добавляем пути к модулям
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'agents'))
+# Корень проекта: агенты и БД импортируются как пакеты (agents.*, data.database.*)
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
 
 from utils.postgres_helper import execute_query, execute_update
 from data.database.models import GrantServiceDatabase
+from data.database.research_storage import summary_projection
 
 logger = logging.getLogger(__name__)
 
@@ -252,13 +251,10 @@ async def process_auditor_queue(limit: int = 10) -> QueueProcessingStats:
     stats = QueueProcessingStats('auditor')
 
     try:
-        print(f"\n{'='*60}")
-        print(f"🔍 ЗАПУСК ОБРАБОТКИ ОЧЕРЕДИ AUDITOR (limit={limit})")
-        print(f"{'='*60}")
         logger.info(f"🔍 Начинаем обработку очереди Auditor (limit={limit})...")
 
         # Получить элементы из очереди
-        print(f"📋 Запрос элементов из очереди...")
+        logger.info(f"📋 Запрос элементов из очереди...")
         queue_items = execute_query("""
             SELECT
                 s.id as session_id,
@@ -279,42 +275,38 @@ async def process_auditor_queue(limit: int = 10) -> QueueProcessingStats:
         """, (limit,))
 
         stats.total_items = len(queue_items)
-        print(f"📊 Найдено элементов в очереди: {stats.total_items}")
         logger.info(f"📋 Найдено элементов в очереди: {stats.total_items}")
 
         if stats.total_items == 0:
-            print("✅ Очередь Auditor пуста")
             logger.info("✅ Очередь Auditor пуста")
             stats.finish()
             return stats
 
         # Импортируем агента
         try:
-            print(f"📦 Импорт AuditorAgent...")
+            logger.info(f"📦 Импорт AuditorAgent...")
             from agents.auditor_agent import AuditorAgent
         except ImportError as e:
-            print(f"❌ ОШИБКА: Не удалось импортировать AuditorAgent: {e}")
             logger.error(f"❌ Не удалось импортировать AuditorAgent: {e}")
             stats.finish()
             return stats
 
         # Обработать каждый элемент
-        print(f"🔌 Подключение к БД...")
+        logger.info(f"🔌 Подключение к БД...")
         db = GrantServiceDatabase()
-        print(f"🤖 Инициализация AuditorAgent (provider=claude_code)...")
+        logger.info(f"🤖 Инициализация AuditorAgent (provider=claude_code)...")
         auditor = AuditorAgent(db=db, llm_provider='claude_code')
-        print(f"✅ Агент готов к работе\n")
+        logger.info(f"✅ Агент готов к работе")
 
         for idx, item in enumerate(queue_items, 1):
                 session_id = item['session_id']
                 anketa_id = item['anketa_id']
 
                 try:
-                    print(f"⏳ [{idx}/{stats.total_items}] Обработка сессии {session_id} (anketa: {anketa_id})...")
                     logger.info(f"🔄 Обработка сессии {session_id} (anketa: {anketa_id})...")
 
                     # Загрузить данные сессии
-                    print(f"   📥 Загрузка данных сессии {session_id}...")
+                    logger.debug(f"📥 Загрузка данных сессии {session_id}...")
                     session_data = db.get_session_by_id(session_id)
                     if not session_data:
                         result = AgentProcessingResult(
@@ -336,12 +328,12 @@ async def process_auditor_queue(limit: int = 10) -> QueueProcessingStats:
                     }
 
                     # Вызвать агента
-                    print(f"   🤖 Запуск Auditor агента для сессии {session_id}...")
+                    logger.debug(f"🤖 Запуск Auditor агента для сессии {session_id}...")
                     start_audit = time.time()
                     audit_result = auditor.process(input_data)
                     audit_time = time.time() - start_audit
-                    print(f"   ✅ Auditor завершил работу за {audit_time:.1f}s")
-                    print(f"   📊 Результат: overall_score={audit_result.get('overall_score', 0):.2f}, status={audit_result.get('status')}")
+                    logger.debug(f"✅ Auditor завершил работу за {audit_time:.1f}s")
+                    logger.debug(f"📊 Результат: overall_score={audit_result.get('overall_score', 0):.2f}, status={audit_result.get('status')}")
 
                     if audit_result.get('status') == 'success':
                         # Сохранить результаты в auditor_results
@@ -376,7 +368,7 @@ async def process_auditor_queue(limit: int = 10) -> QueueProcessingStats:
                             'needs_revision'
                         )
 
-                        print(f"   💾 Сохранение результатов в БД (avg_score={average_score}, status={approval_status})...")
+                        logger.debug(f"💾 Сохранение результатов в БД (avg_score={average_score}, status={approval_status})...")
                         start_db = time.time()
 
                         execute_update("""
@@ -402,11 +394,11 @@ async def process_auditor_queue(limit: int = 10) -> QueueProcessingStats:
                         ))
 
                         db_time = time.time() - start_db
-                        print(f"   ✅ Результаты сохранены в БД за {db_time:.2f}s")
+                        logger.debug(f"✅ Результаты сохранены в БД за {db_time:.2f}s")
 
                         # 📄 ОТПРАВКА PDF АУДИТА В АДМИНСКИЙ ЧАТ
                         try:
-                            print(f"   📄 Отправка audit PDF в админский чат...")
+                            logger.debug(f"📄 Отправка audit PDF в админский чат...")
                             await _send_audit_pdf_to_admin(
                                 session_id=session_id,
                                 anketa_id=anketa_id,
@@ -414,9 +406,8 @@ async def process_auditor_queue(limit: int = 10) -> QueueProcessingStats:
                                 average_score=average_score,
                                 approval_status=approval_status
                             )
-                            print(f"   ✅ Audit PDF отправлен в админский чат")
+                            logger.debug(f"✅ Audit PDF отправлен в админский чат")
                         except Exception as pdf_error:
-                            print(f"   ⚠️  Ошибка отправки audit PDF: {pdf_error}")
                             logger.error(f"❌ Ошибка отправки audit PDF для сессии {session_id}: {pdf_error}")
                             # Не прерываем выполнение - это не критично
 
@@ -438,7 +429,6 @@ async def process_auditor_queue(limit: int = 10) -> QueueProcessingStats:
                     stats.add_result(result)
 
                 except Exception as e:
-                    print(f"   ❌ ОШИБКА обработки сессии {session_id}: {e}")
                     logger.error(f"❌ Ошибка обработки сессии {session_id}: {e}")
                     logger.error(traceback.format_exc())
                     result = AgentProcessingResult(
@@ -449,10 +439,8 @@ async def process_auditor_queue(limit: int = 10) -> QueueProcessingStats:
                     stats.add_result(result)
 
         stats.finish()
-        print(f"\n{'='*60}")
-        print(f"✅ ОБРАБОТКА ЗАВЕРШЕНА: {stats.succeeded}/{stats.total_items} успешно")
-        print(f"⏱️  Время: {stats.get_duration():.1f}s")
-        print(f"{'='*60}\n")
+        logger.info(f"✅ ОБРАБОТКА ЗАВЕРШЕНА: {stats.succeeded}/{stats.total_items} успешно")
+        logger.info(f"⏱️  Время: {stats.get_duration():.1f}s")
         logger.info(f"✅ Обработка Auditor завершена: {stats.succeeded}/{stats.total_items} успешно")
 
     except Exception as e:
@@ -770,9 +758,9 @@ async def process_reviewer_queue(limit: int = 10) -> QueueProcessingStats:
                         stats.add_result(result)
                         continue
 
-                    # Загрузить research results
-                    research_data = execute_query("""
-                        SELECT research_results
+                    # Загрузить research results (сводка без raw_results)
+                    research_data = execute_query(f"""
+                        SELECT {summary_projection()} AS research_results
                         FROM researcher_research
                         WHERE anketa_id = %s AND status = 'completed'
                         ORDER BY created_at DESC
@@ -144,4 +144,35 @@ def create_popular_queries_chart(queries_data):
         height=400
     )
     
-    st.plotly_chart(fig, use_container_width=True) 
\ No newline at end of file
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def create_series_chart(series, title, yaxis_title, kind="bar"):
+    """
+    График временного ряда из DataFrame (индекс - дата, колонки - серии)
+
+    Используется с utils.agent_analytics.daily_series: данные уже
+    агрегированы, в plotly передаются массивы без перестройки DataFrame.
+    """
+    if series is None or series.empty or not series.to_numpy().any():
+        st.info("Нет данных за выбранный период")
+        return
+
+    x = series.index.to_numpy()
+    fig = go.Figure()
+    for column in series.columns:
+        values = series[column].to_numpy()
+        if kind == "bar":
+            fig.add_trace(go.Bar(x=x, y=values, name=str(column)))
+        else:
+            fig.add_trace(go.Scatter(x=x, y=values, name=str(column), mode="lines"))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title="Дата",
+        yaxis_title=yaxis_title,
+        barmode="stack",
+        hovermode='x unified'
+    )
+
+    st.plotly_chart(fig, use_container_width=True)
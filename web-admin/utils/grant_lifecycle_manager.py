@@ -15,6 +15,7 @@ import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from utils.postgres_helper import execute_query
+from data.database.research_storage import summary_projection
 
 logger = logging.getLogger(__name__)
 
@@ -178,9 +179,10 @@ class GrantLifecycleManager:
 
     def _get_researcher_data(self) -> Optional[Dict]:
         """Получить данные исследования"""
-        query = """
+        # Сводка без raw_results: ответы WebSearch остаются в researcher_research_payloads
+        query = f"""
         SELECT
-            research_results,
+            {summary_projection()} AS research_results,
             metadata,
             status,
             created_at,
@@ -9,11 +9,13 @@ Author: Database Manager Agent
 Created: 2025-10-04
 """
 
-import streamlit as st
-import pandas as pd
-from typing import List, Dict, Any, Optional
+import functools
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 from contextlib import contextmanager
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 # Import PostgreSQL database
 import sys
 from pathlib import Path
@@ -24,12 +26,16 @@ if str(web_admin_dir.parent) not in sys.path:
     sys.path.insert(0, str(web_admin_dir.parent))
 
 from data.database import GrantServiceDatabase
+from shared.query_cache import available_query_cache, invalidate_tables, is_cacheable_query, shared_cache, tables_read
 
 
-@st.cache_resource
+@functools.lru_cache(maxsize=None)
 def get_postgres_db():
     """
-    Get cached PostgreSQL database instance
+    Get cached PostgreSQL database instance (one per process)
+
+    Process-wide like st.cache_resource, but without importing streamlit:
+    agents, workers and the bot reach this module via utils.prompt_manager.
 
     Returns:
         GrantServiceDatabase: PostgreSQL database instance
@@ -60,13 +66,28 @@ def get_postgres_connection():
         conn.close()
 
 
-def execute_query(query: str, params: Optional[tuple] = None) -> List[Dict]:
+def _cached(kind: str, query: str, params: Optional[tuple], compute,
+            cache_ttl: Optional[int], cache_tags: Optional[List[str]]):
+    """Результат через общий кеш (shared/query_cache.py), если запрос кешируемый"""
+    cache = available_query_cache() if cache_ttl is not None else None
+    if cache is None or not is_cacheable_query(query):
+        return compute()
+
+    tags = list(cache_tags) if cache_tags is not None else tables_read(query)
+    return cache.get_or_compute(kind, (query, params), compute, tags, cache_ttl)
+
+
+def execute_query(query: str, params: Optional[tuple] = None,
+                  cache_ttl: Optional[int] = None, cache_tags: Optional[List[str]] = None) -> List[Dict]:
     """
     Execute SELECT query and return results as list of dictionaries
 
     Args:
         query: SQL SELECT query (use %s for parameters)
         params: Query parameters tuple
+        cache_ttl: Cache result in the shared cache for N seconds (None - no cache).
+            Invalidated on writes to the tables read by the query.
+        cache_tags: Override invalidation tags (default: tables from FROM / JOIN)
 
     Returns:
         List of dictionaries with results (column_name: value)
@@ -77,24 +98,30 @@ def execute_query(query: str, params: Optional[tuple] = None) -> List[Dict]:
     """
     import psycopg2.extras
 
-    db = get_postgres_db()
+    def run():
+        db = get_postgres_db()
 
-    with db.connect() as conn:
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        cursor.close()
+        with db.connect() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+            cursor.close()
+
+        return [dict(row) for row in results] if cache_ttl is not None else results
 
-    return results
+    return _cached('rows', query, params, run, cache_ttl, cache_tags)
 
 
-def execute_query_df(query: str, params: Optional[tuple] = None) -> pd.DataFrame:
+def execute_query_df(query: str, params: Optional[tuple] = None,
+                     cache_ttl: Optional[int] = None, cache_tags: Optional[List[str]] = None) -> 'pd.DataFrame':
     """
     Execute SELECT query and return DataFrame
 
     Args:
         query: SQL SELECT query (use %s for parameters)
         params: Query parameters tuple
+        cache_ttl: Cache result in the shared cache for N seconds (None - no cache)
+        cache_tags: Override invalidation tags (default: tables from FROM / JOIN)
 
     Returns:
         pandas.DataFrame with results
@@ -102,23 +129,26 @@ def execute_query_df(query: str, params: Optional[tuple] = None) -> pd.DataFrame
     Example:
         df = execute_query_df("SELECT * FROM grant_applications LIMIT 10")
     """
-    db = get_postgres_db()
+    def run():
+        db = get_postgres_db()
 
-    with db.connect() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
+        with db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
 
-        # Fetch all rows
-        rows = cursor.fetchall()
+            # Fetch all rows
+            rows = cursor.fetchall()
 
-        # Get column names
-        columns = [desc[0] for desc in cursor.description]
+            # Get column names
+            columns = [desc[0] for desc in cursor.description]
 
-        cursor.close()
+            cursor.close()
+
+        # Convert to DataFrame (pandas - only for pages that need DataFrames)
+        import pandas as pd
+        return pd.DataFrame(rows, columns=columns)
 
-    # Convert to DataFrame
-    df = pd.DataFrame(rows, columns=columns)
-    return df
+    return _cached('df', query, params, run, cache_ttl, cache_tags)
 
 
 def execute_scalar(query: str, params: Optional[tuple] = None) -> Any:
@@ -187,4 +217,6 @@ __all__ = [
     'execute_query_df',
     'execute_scalar',
     'execute_update',
+    'shared_cache',
+    'invalidate_tables',
 ]
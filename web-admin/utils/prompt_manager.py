@@ -9,14 +9,23 @@ Prompt Manager - система управления промптами для A
 - Сохранение промптов
 - Версионирование
 - Статистика использования
+- DatabasePromptManager: кеш agent_prompts с инвалидацией через LISTEN/NOTIFY
 """
 
 import json
-from typing import Dict, List, Optional, Any
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
 from utils.postgres_helper import execute_query, execute_update
 from utils.logger import setup_logger
+from shared.pg_listener import PgListenThread
+
+try:
+    from shared.log_sink import submit_log
+except ImportError:
+    submit_log = None
 
 logger = setup_logger('prompt_manager')
 
@@ -255,10 +264,17 @@ def increment_usage(prompt_key: str, score: Optional[float] = None) -> None:
     """
     Увеличить счетчик использования промпта
 
+    Счетчики пишутся в фоне через LogSink (один UPDATE на пачку вызовов);
+    без shared.log_sink - сразу в БД.
+
     Args:
         prompt_key: Ключ промпта
         score: Оценка результата (опционально)
     """
+    if submit_log is not None:
+        submit_log('prompt_usage', {'prompt_key': prompt_key, 'score': score})
+        return
+
     update_score = ""
     params = [prompt_key]
 
@@ -361,15 +377,81 @@ def validate_prompt_variables(prompt_text: str, expected_vars: List[str]) -> Lis
 # DatabasePromptManager - новый менеджер для agent_prompts (Migration 010)
 # =============================================================================
 
+# Канал NOTIFY (Migration 018: триггеры на agent_prompts и ai_agent_settings)
+PROMPT_CHANGES_CHANNEL = 'prompt_changes'
+
+PROMPTS_QUERY = """
+    SELECT
+        ap.id,
+        ap.name,
+        ap.description,
+        ap.prompt_template,
+        ap.agent_type,
+        ap.prompt_type,
+        ap.category_id,
+        ap.variables,
+        ap.max_tokens,
+        ap.temperature,
+        ap.order_index,
+        ap.is_active,
+        ap.priority,
+        pc.name as category_name
+    FROM agent_prompts ap
+    LEFT JOIN prompt_categories pc ON ap.category_id = pc.id
+    WHERE ap.is_active = true
+"""
+
+SETTINGS_QUERY = "SELECT agent_name, mode, provider, execution_mode, config FROM ai_agent_settings"
+
+
+def _default_listen_connect():
+    """Отдельное соединение для LISTEN (не из пула запросов)"""
+    from utils.postgres_helper import get_postgres_db
+    return get_postgres_db().connect()
+
+
+class PromptChangeListener(PgListenThread):
+    """
+    Фоновый поток: LISTEN prompt_changes и точечная перезагрузка кеша
+
+    После (пере)подключения выполняет полную перезагрузку - изменения,
+    пропущенные пока соединения не было, не теряются. При ошибке
+    переподключается с экспоненциальной задержкой; пока соединения нет,
+    менеджер обновляет кеш по TTL.
+    """
+
+    def __init__(
+        self,
+        manager: 'DatabasePromptManager',
+        connect: Optional[Callable[[], Any]] = None,
+        channel: str = PROMPT_CHANGES_CHANNEL,
+        poll_timeout: float = 5.0,
+        max_reconnect_delay: float = 60.0
+    ):
+        super().__init__(connect or _default_listen_connect, channel, name='prompt-change-listener',
+                         poll_timeout=poll_timeout, max_reconnect_delay=max_reconnect_delay)
+        self.manager = manager
+
+    def on_reconnect(self) -> None:
+        self.manager.reload_cache()
+        self.manager.notify_subscribers({'table': '*', 'op': 'RELOAD'})
+
+    def on_notify(self, payload: str) -> None:
+        self.manager.handle_notification(payload)
+
+
 class DatabasePromptManager:
     """
     Менеджер промптов для работы с новой таблицей agent_prompts
 
     Особенности:
     - Работает с agent_prompts (после миграции 010)
-    - Кеширование в памяти (TTL 5 минут)
-    - Поддержка всех 5 агентов
-    - Форматирование с переменными
+    - Кеширование в памяти: get_prompt() не обращается к БД
+    - Инвалидация по событиям (Migration 018): LISTEN prompt_changes,
+      перезагружается только измененный ключ (agent_type, prompt_type)
+    - Версия промптов агента (get_prompt_version) для результатов агентов
+    - Кеш ai_agent_settings (get_agent_settings)
+    - Без listener - обновление по TTL в фоне (запрос не ждет перезагрузки)
     """
 
     def __init__(self, cache_ttl_seconds: int = 300):
@@ -377,22 +459,150 @@ class DatabasePromptManager:
         Инициализация менеджера
 
         Args:
-            cache_ttl_seconds: Время жизни кеша в секундах (по умолчанию 5 минут)
+            cache_ttl_seconds: Время жизни кеша в секундах, если listener не запущен
+                (по умолчанию 5 минут)
         """
-        self._cache: Dict[str, Any] = {}
+        self._cache: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self._versions: Dict[str, int] = {}
+        self._settings: Dict[str, Dict[str, Any]] = {}
         self._cache_timestamp: Optional[datetime] = None
         self._cache_ttl_seconds = cache_ttl_seconds
 
+        # Запись в кеш - только под блокировкой; чтение без блокировки
+        # (вложенные словари заменяются целиком, а не изменяются на месте)
+        self._write_lock = threading.RLock()
+        self._refreshing = threading.Event()
+
+        # Поколения загрузок: номер выдается до запроса к БД, поэтому больший
+        # номер видел более свежие данные. Загрузка не перезаписывает ключ,
+        # уже обновленный более поздней (reload_cache vs reload_key).
+        self._generation = 0
+        self._full_generation = 0
+        self._applied: Dict[Tuple[str, Optional[str]], int] = {}   # (agent_type, prompt_type | None)
+        self._settings_applied: Dict[str, int] = {}
+        self._listener: Optional[PromptChangeListener] = None
+        self._notifications = 0
+        self._subscribers: List[Callable[[Dict[str, Any]], Any]] = []
+
         logger.info("DatabasePromptManager initialized")
 
+    # -------------------------------------------------------------------------
+    # Listener
+    # -------------------------------------------------------------------------
+
+    def start_listener(self, connect: Optional[Callable[[], Any]] = None, **kwargs) -> PromptChangeListener:
+        """
+        Запустить фоновый LISTEN prompt_changes
+
+        Args:
+            connect: Фабрика соединения psycopg2 (по умолчанию - GrantServiceDatabase)
+            **kwargs: Параметры PromptChangeListener (poll_timeout, max_reconnect_delay)
+        """
+        if self._listener is None or not self._listener.is_alive():
+            self._listener = PromptChangeListener(self, connect=connect, **kwargs)
+            self._listener.start()
+        return self._listener
+
+    def stop_listener(self, timeout: Optional[float] = 5.0) -> None:
+        if self._listener is not None:
+            self._listener.stop(timeout)
+            self._listener = None
+
+    @property
+    def listener_active(self) -> bool:
+        return self._listener is not None and self._listener.connected.is_set()
+
+    def handle_notification(self, payload: str) -> None:
+        """
+        Обработать NOTIFY prompt_changes
+
+        Payload (JSON):
+            {"table": "agent_prompts", "agent_type", "prompt_type", "version"}
+            {"table": "ai_agent_settings", "agent_name"}
+        """
+        try:
+            event = json.loads(payload)
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid prompt_changes payload: {payload!r}")
+            return
+
+        self._notifications += 1
+        table = event.get('table')
+
+        if table == 'agent_prompts' and event.get('agent_type'):
+            self.reload_key(event['agent_type'], event.get('prompt_type'), event.get('version'))
+        elif table == 'ai_agent_settings' and event.get('agent_name'):
+            self.reload_agent_settings(event['agent_name'])
+        else:
+            logger.warning(f"Unknown prompt_changes event: {event}")
+            return
+
+        self.notify_subscribers(event)
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        """
+        Вызывать callback(event) на каждое изменение из prompt_changes
+        и после переподключения listener (event с table='*')
+
+        Callback выполняется в потоке listener (снимок конфигурации
+        агентов shared/agent_config.py перезагружается здесь же).
+        """
+        self._subscribers.append(callback)
+
+    def notify_subscribers(self, event: Dict[str, Any]) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Prompt change subscriber failed: {e}")
+
+    # -------------------------------------------------------------------------
+    # Загрузка из БД
+    # -------------------------------------------------------------------------
+
     def _is_cache_valid(self) -> bool:
         """Проверить актуальность кеша"""
         if not self._cache_timestamp:
             return False
 
+        if self.listener_active:
+            return True
+
         age = (datetime.now() - self._cache_timestamp).total_seconds()
         return age < self._cache_ttl_seconds
 
+    def _ensure_cache(self) -> None:
+        """
+        Горячий путь: без обращений к БД, если кеш загружен
+
+        Первая загрузка - синхронно. Устаревший кеш (TTL, listener не запущен)
+        обновляется в фоновом потоке, до его завершения отдаются старые значения.
+        """
+        if self._cache_timestamp is None:
+            self.reload_cache()
+        elif not self._is_cache_valid() and not self._refreshing.is_set():
+            self._refreshing.set()
+            threading.Thread(target=self._background_reload, name='prompt-cache-refresh', daemon=True).start()
+
+    def _background_reload(self) -> None:
+        try:
+            self.reload_cache()
+        finally:
+            self._refreshing.clear()
+
+    def _query_prompts(self, agent_type: Optional[str] = None, prompt_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = PROMPTS_QUERY
+        params: List[Any] = []
+        if agent_type is not None:
+            query += " AND ap.agent_type = %s"
+            params.append(agent_type)
+        if prompt_type is not None:
+            query += " AND ap.prompt_type = %s"
+            params.append(prompt_type)
+        query += " ORDER BY ap.agent_type, ap.prompt_type, ap.order_index"
+
+        return execute_query(query, tuple(params) if params else None) or []
+
     def _load_prompts_from_db(self) -> List[Dict[str, Any]]:
         """
         Загрузить все активные промпты из БД
@@ -400,61 +610,197 @@ class DatabasePromptManager:
         Returns:
             List[Dict]: Список промптов
         """
-        query = """
-            SELECT
-                ap.id,
-                ap.name,
-                ap.description,
-                ap.prompt_template,
-                ap.agent_type,
-                ap.prompt_type,
-                ap.category_id,
-                ap.variables,
-                ap.max_tokens,
-                ap.temperature,
-                ap.order_index,
-                ap.is_active,
-                ap.priority,
-                pc.name as category_name
-            FROM agent_prompts ap
-            LEFT JOIN prompt_categories pc ON ap.category_id = pc.id
-            WHERE ap.is_active = true
-            ORDER BY ap.agent_type, ap.prompt_type, ap.order_index
-        """
-
         try:
-            prompts = execute_query(query)
+            prompts = self._query_prompts()
             logger.info(f"Loaded {len(prompts)} prompts from agent_prompts table")
-            return prompts if prompts else []
+            return prompts
         except Exception as e:
             logger.error(f"Error loading prompts from DB: {e}")
             return []
 
+    def _load_versions_from_db(self, agent_type: Optional[str] = None) -> Dict[str, int]:
+        """Версии из agent_prompt_versions (пусто, если миграция 018 не применена)"""
+        query = "SELECT agent_type, version FROM agent_prompt_versions"
+        params = None
+        if agent_type is not None:
+            query += " WHERE agent_type = %s"
+            params = (agent_type,)
+
+        try:
+            return {row['agent_type']: row['version'] for row in execute_query(query, params) or []}
+        except Exception as e:
+            logger.warning(f"Prompt versions unavailable (migration 018?): {e}")
+            return {}
+
+    def _load_settings_from_db(self, agent_name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        query = SETTINGS_QUERY
+        params = None
+        if agent_name is not None:
+            query += " WHERE agent_name = %s"
+            params = (agent_name,)
+
+        settings = {}
+        for row in execute_query(query, params) or []:
+            config = row.get('config') or {}
+            if isinstance(config, str):
+                config = json.loads(config)
+            settings[row['agent_name']] = {
+                'mode': row.get('mode'),
+                'provider': row.get('provider'),
+                'execution_mode': row.get('execution_mode', 'manual'),
+                'config': config
+            }
+        return settings
+
+    def _next_generation(self) -> int:
+        with self._write_lock:
+            self._generation += 1
+            return self._generation
+
+    def _is_newer(self, agent_type: str, prompt_type: Optional[str], generation: int) -> bool:
+        """Ключ уже обновлен загрузкой новее generation (вызывать под _write_lock)"""
+        applied = max(self._applied.get((agent_type, prompt_type), 0),
+                      self._applied.get((agent_type, None), 0),
+                      self._full_generation)
+        return applied > generation
+
+    def _merge_agent_prompts(
+        self,
+        agent_type: str,
+        fresh: Dict[str, List[Dict[str, Any]]],
+        generation: int,
+        prompt_type: Optional[str] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Промпты агента из загрузки generation, кроме ключей, обновленных позже"""
+        agent_prompts = dict(self._cache.get(agent_type, {}))
+        prompt_types = set(fresh) | set(agent_prompts) if prompt_type is None else {prompt_type}
+
+        for key in prompt_types:
+            if self._is_newer(agent_type, key, generation):
+                continue
+            if key in fresh:
+                agent_prompts[key] = fresh[key]
+            else:
+                agent_prompts.pop(key, None)
+            self._applied[(agent_type, key)] = generation
+
+        if prompt_type is None:
+            self._applied[(agent_type, None)] = max(self._applied.get((agent_type, None), 0), generation)
+        return agent_prompts
+
     def reload_cache(self) -> None:
-        """Принудительная перезагрузка кеша из БД"""
+        """Полная перезагрузка кеша из БД (старт, переподключение listener, TTL)"""
         logger.info("Reloading prompts cache...")
 
+        generation = self._next_generation()
         prompts = self._load_prompts_from_db()
-
-        # Очищаем старый кеш
-        self._cache = {}
+        versions = self._load_versions_from_db()
+        try:
+            settings = self._load_settings_from_db()
+        except Exception as e:
+            logger.error(f"Error loading agent settings from DB: {e}")
+            settings = self._settings
 
         # Строим индекс: agent_type -> prompt_type -> List[prompt]
+        cache: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
         for prompt in prompts:
             agent_type = prompt.get('agent_type', 'unknown')
             prompt_type = prompt.get('prompt_type', 'unknown')
+            cache.setdefault(agent_type, {}).setdefault(prompt_type, []).append(prompt)
+
+        with self._write_lock:
+            if generation < self._full_generation:
+                logger.info("Prompt cache: skipped full reload, a newer one already applied")
+                return
+
+            # ключи, перечитанные по NOTIFY во время этой загрузки, не откатываются
+            newer_agents = {agent for (agent, _), applied in self._applied.items() if applied > generation}
+            merged = {}
+            for agent_type in set(cache) | set(self._cache):
+                agent_prompts = self._merge_agent_prompts(agent_type, cache.get(agent_type, {}), generation)
+                if agent_prompts:
+                    merged[agent_type] = agent_prompts
+
+            merged_versions = dict(versions)
+            for agent_type in newer_agents:
+                current = self._versions.get(agent_type)
+                if current is not None and current > merged_versions.get(agent_type, 0):
+                    merged_versions[agent_type] = current
+
+            merged_settings = dict(settings)
+            for agent_name, applied in self._settings_applied.items():
+                if applied > generation:
+                    if agent_name in self._settings:
+                        merged_settings[agent_name] = self._settings[agent_name]
+                    else:
+                        merged_settings.pop(agent_name, None)
+
+            self._cache = merged
+            self._versions = merged_versions
+            self._settings = merged_settings
+            self._full_generation = generation
+            self._applied = {key: applied for key, applied in self._applied.items() if applied > generation}
+            self._settings_applied = {name: applied for name, applied in self._settings_applied.items()
+                                      if applied > generation}
+            self._cache_timestamp = datetime.now()
+
+        logger.info(f"Cache reloaded: {len(cache)} agent types, {len(prompts)} total prompts")
+
+    def reload_key(self, agent_type: str, prompt_type: Optional[str] = None, version: Optional[int] = None) -> None:
+        """
+        Перезагрузить промпты одного ключа (agent_type, prompt_type)
 
-            if agent_type not in self._cache:
-                self._cache[agent_type] = {}
-
-            if prompt_type not in self._cache[agent_type]:
-                self._cache[agent_type][prompt_type] = []
-
-            self._cache[agent_type][prompt_type].append(prompt)
-
-        self._cache_timestamp = datetime.now()
+        Args:
+            agent_type: Тип агента
+            prompt_type: Тип промпта (None - все промпты агента)
+            version: Версия из NOTIFY (иначе читается из agent_prompt_versions)
+        """
+        generation = self._next_generation()
+        prompts = self._query_prompts(agent_type, prompt_type)
+        if version is None:
+            version = self._load_versions_from_db(agent_type).get(agent_type)
 
-        logger.info(f"Cache reloaded: {len(self._cache)} agent types, {len(prompts)} total prompts")
+        fresh: Dict[str, List[Dict[str, Any]]] = {}
+        for prompt in prompts:
+            fresh.setdefault(prompt.get('prompt_type', 'unknown'), []).append(prompt)
+
+        with self._write_lock:
+            agent_prompts = self._merge_agent_prompts(agent_type, fresh, generation, prompt_type)
+
+            cache = dict(self._cache)
+            if agent_prompts:
+                cache[agent_type] = agent_prompts
+            else:
+                cache.pop(agent_type, None)
+            self._cache = cache
+
+            if version is not None and version > self._versions.get(agent_type, 0):
+                self._versions = {**self._versions, agent_type: version}
+
+        logger.info(f"Prompt cache: reloaded {agent_type}/{prompt_type or '*'} "
+                    f"({len(prompts)} prompts, version {self._versions.get(agent_type)})")
+
+    def reload_agent_settings(self, agent_name: str) -> None:
+        """Перезагрузить настройки одного агента из ai_agent_settings"""
+        generation = self._next_generation()
+        fresh = self._load_settings_from_db(agent_name)
+
+        with self._write_lock:
+            if max(self._settings_applied.get(agent_name, 0), self._full_generation) > generation:
+                return
+            self._settings_applied[agent_name] = generation
+            settings = dict(self._settings)
+            if agent_name in fresh:
+                settings[agent_name] = fresh[agent_name]
+            else:
+                settings.pop(agent_name, None)
+            self._settings = settings
+
+        logger.info(f"Prompt cache: reloaded settings for {agent_name}")
+
+    # -------------------------------------------------------------------------
+    # Чтение (только память)
+    # -------------------------------------------------------------------------
 
     def get_prompt(
         self,
@@ -480,9 +826,7 @@ class DatabasePromptManager:
             >>> goal = pm.get_prompt('interviewer', 'goal')
             >>> question_5 = pm.get_prompt('interviewer', 'fallback_question', order_index=5)
         """
-        # Проверяем кеш
-        if not self._is_cache_valid():
-            self.reload_cache()
+        self._ensure_cache()
 
         # Получаем промпты
         prompts = self._cache.get(agent_type, {}).get(prompt_type, [])
@@ -529,12 +873,31 @@ class DatabasePromptManager:
         Returns:
             List[Dict]: Список промптов с метаданными
         """
-        if not self._is_cache_valid():
-            self.reload_cache()
+        self._ensure_cache()
 
         prompts = self._cache.get(agent_type, {}).get(prompt_type, [])
         return sorted(prompts, key=lambda p: p.get('order_index', 0))
 
+    def get_prompt_version(self, agent_type: str) -> Optional[int]:
+        """
+        Версия набора промптов агента (agent_prompt_versions, Migration 018)
+
+        Returns:
+            int или None, если версия неизвестна
+        """
+        self._ensure_cache()
+        return self._versions.get(agent_type)
+
+    def get_agent_settings(self, agent_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Настройки агента из ai_agent_settings (из кеша)
+
+        Returns:
+            Dict {'mode', 'provider', 'execution_mode', 'config'} или None
+        """
+        self._ensure_cache()
+        return self._settings.get(agent_name)
+
     def get_researcher_queries(self, block: int) -> List[str]:
         """
         Получить запросы Researcher V2 для блока
@@ -592,26 +955,29 @@ class DatabasePromptManager:
         Returns:
             Dict: Статистика кеша
         """
-        if not self._is_cache_valid():
-            self.reload_cache()
+        self._ensure_cache()
 
+        cache = self._cache
         total_prompts = sum(
             len(prompts)
-            for agent_prompts in self._cache.values()
+            for agent_prompts in cache.values()
             for prompts in agent_prompts.values()
         )
 
         agent_counts = {
             agent_type: sum(len(p) for p in prompts.values())
-            for agent_type, prompts in self._cache.items()
+            for agent_type, prompts in cache.items()
         }
 
         return {
             'total_prompts': total_prompts,
-            'agent_types': len(self._cache),
+            'agent_types': len(cache),
             'agent_counts': agent_counts,
+            'versions': dict(self._versions),
             'cache_age_seconds': (datetime.now() - self._cache_timestamp).total_seconds() if self._cache_timestamp else 0,
-            'cache_valid': self._is_cache_valid()
+            'cache_valid': self._is_cache_valid(),
+            'listener_active': self.listener_active,
+            'notifications': self._notifications
         }
 
 
@@ -623,6 +989,8 @@ def get_database_prompt_manager(force_new: bool = False) -> DatabasePromptManage
     """
     Получить глобальный экземпляр DatabasePromptManager (singleton)
 
+    Запускает LISTEN prompt_changes в фоне (отключается PROMPT_CACHE_LISTEN=0).
+
     Args:
         force_new: Создать новый экземпляр
 
@@ -632,6 +1000,10 @@ def get_database_prompt_manager(force_new: bool = False) -> DatabasePromptManage
     global _global_db_manager
 
     if force_new or _global_db_manager is None:
+        if _global_db_manager is not None:
+            _global_db_manager.stop_listener(timeout=0)
         _global_db_manager = DatabasePromptManager()
+        if os.getenv('PROMPT_CACHE_LISTEN', '1').lower() not in ('0', 'false', 'no'):
+            _global_db_manager.start_listener()
 
     return _global_db_manager
@@ -7,17 +7,19 @@
 import os
 import asyncio
 import json
-import traceback
+import logging
 from pathlib import Path
 from typing import Dict, Any, Tuple, Optional
 import requests
 import time
 
+logger = logging.getLogger(__name__)
+
 # Получаем токен бота из переменных окружения или конфига
 def get_bot_token() -> Optional[str]:
     """Получить токен Telegram бота"""
     try:
-        print("🔍 Поиск токена Telegram бота...")
+        logger.info("🔍 Поиск токена Telegram бота...")
         
         # Сначала проверяем файлы конфигурации (приоритет над переменными окружения)
         current_dir = Path(__file__).parent
@@ -27,29 +29,29 @@ def get_bot_token() -> Optional[str]:
             current_dir.parent.parent / ".env"
         ]
         
-        print(f"🔍 Проверяю файлы конфигурации (приоритет):")
+        logger.debug(f"🔍 Проверяю файлы конфигурации (приоритет):")
         for config_path in config_paths:
-            print(f"   - {config_path}: {'✅' if config_path.exists() else '❌'}")
+            logger.debug(f"- {config_path}: {'✅' if config_path.exists() else '❌'}")
             if config_path.exists():
                 with open(config_path, 'r', encoding='utf-8') as f:
                     for line in f:
                         if line.startswith('TELEGRAM_BOT_TOKEN='):
                             found_token = line.split('=', 1)[1].strip().strip('"\'')
-                            print(f"✅ Токен найден в файле {config_path}")
-                            print(f"   Токен: {found_token[:20]}...{found_token[-10:]}")
+                            logger.info(f"✅ Токен найден в файле {config_path}")
+                            logger.debug(f"Токен: {found_token[:20]}...{found_token[-10:]}")
                             return found_token
         
         # Пробуем получить из переменных окружения (второй приоритет)
         token = os.getenv('TELEGRAM_BOT_TOKEN')
         if token:
-            print(f"✅ Токен найден в переменных окружения: {token[:20]}...{token[-10:]}")
+            logger.info(f"✅ Токен найден в переменных окружения: {token[:20]}...{token[-10:]}")
             return token
         else:
-            print("❌ Токен не найден в переменных окружения")
+            logger.error("❌ Токен не найден в переменных окружения")
         
         # Если не найден в файлах, используем токен из main.py
         main_py_path = current_dir.parent.parent / "telegram-bot" / "main.py"
-        print(f"🔍 Проверяю main.py: {main_py_path} ({'✅' if main_py_path.exists() else '❌'})")
+        logger.debug(f"🔍 Проверяю main.py: {main_py_path} ({'✅' if main_py_path.exists() else '❌'})")
         if main_py_path.exists():
             with open(main_py_path, 'r', encoding='utf-8') as f:
                 content = f.read()
@@ -60,13 +62,13 @@ def get_bot_token() -> Optional[str]:
                         # Извлекаем токен из строки вида: TOKEN = "7685915842:AAG..."
                         token_part = line.split('"')[1] if '"' in line else line.split("'")[1]
                         if token_part and ':' in token_part:
-                            print(f"✅ Токен найден в main.py: {token_part[:20]}...{token_part[-10:]}")
+                            logger.info(f"✅ Токен найден в main.py: {token_part[:20]}...{token_part[-10:]}")
                             return token_part
         
-        print("❌ Токен не найден во всех источниках!")
+        logger.error("❌ Токен не найден во всех источниках!")
         return None
     except Exception as e:
-        print(f"❌ Ошибка получения токена: {e}")
+        logger.error(f"❌ Ошибка получения токена: {e}")
         return None
 
 def send_document_to_telegram(user_id: int, file_path: str, caption: str = "",
@@ -84,49 +86,49 @@ def send_document_to_telegram(user_id: int, file_path: str, caption: str = "",
         Tuple[bool, Dict]: (успех, данные ответа или ошибка)
     """
     try:
-        print(f"📤 === НАЧИНАЕМ ОТПРАВКУ ДОКУМЕНТА ===")
-        print(f"   Пользователь: {user_id}")
-        print(f"   Файл: {file_path}")
-        print(f"   Подпись: {caption}")
-        print(f"   ID заявки: {grant_application_id}")
+        logger.info(f"📤 === НАЧИНАЕМ ОТПРАВКУ ДОКУМЕНТА ===")
+        logger.debug(f"Пользователь: {user_id}")
+        logger.debug(f"Файл: {file_path}")
+        logger.debug(f"Подпись: {caption}")
+        logger.debug(f"ID заявки: {grant_application_id}")
         
         # Получаем токен бота
-        print(f"🔑 Получаем токен бота...")
+        logger.info(f"🔑 Получаем токен бота...")
         bot_token = get_bot_token()
         if not bot_token:
-            print(f"❌ Токен Telegram бота не найден!")
+            logger.error(f"❌ Токен Telegram бота не найден!")
             return False, {"error": "Токен Telegram бота не найден"}
         
-        print(f"✅ Токен получен: {bot_token[:20]}...{bot_token[-10:]}")
+        logger.info(f"✅ Токен получен: {bot_token[:20]}...{bot_token[-10:]}")
         
         # Проверяем существование файла
-        print(f"📁 Проверяем файл: {file_path}")
+        logger.info(f"📁 Проверяем файл: {file_path}")
         if not os.path.exists(file_path):
-            print(f"❌ Файл не найден: {file_path}")
+            logger.error(f"❌ Файл не найден: {file_path}")
             return False, {"error": f"Файл не найден: {file_path}"}
         
         file_size = os.path.getsize(file_path)
-        print(f"✅ Файл найден, размер: {file_size} байт")
+        logger.info(f"✅ Файл найден, размер: {file_size} байт")
         
         # Если файл - это заявка, экспортируем её в PDF
         if grant_application_id and not file_path:
-            print(f"📋 Экспортируем заявку {grant_application_id} в PDF...")
+            logger.info(f"📋 Экспортируем заявку {grant_application_id} в PDF...")
             file_path = export_application_to_pdf(grant_application_id)
             if not file_path:
-                print(f"❌ Ошибка экспорта заявки в PDF")
+                logger.error(f"❌ Ошибка экспорта заявки в PDF")
                 return False, {"error": "Ошибка экспорта заявки в PDF"}
         
         # Подготавливаем URL для API
         api_url = f"https://api.telegram.org/bot{bot_token}/sendDocument"
-        print(f"🔗 URL API: {api_url[:50]}...{api_url[-20:]}")
+        logger.info(f"🔗 URL API: {api_url[:50]}...{api_url[-20:]}")
         
         # Подготавливаем файл для отправки
         file_name = os.path.basename(file_path)
         mime_type = get_mime_type(file_path)
-        print(f"📄 Имя файла: {file_name}")
-        print(f"📄 MIME тип: {mime_type}")
+        logger.info(f"📄 Имя файла: {file_name}")
+        logger.info(f"📄 MIME тип: {mime_type}")
         
-        print(f"🚀 Отправляем HTTP запрос...")
+        logger.info(f"🚀 Отправляем HTTP запрос...")
         
         with open(file_path, 'rb') as file:
             files = {
@@ -138,48 +140,46 @@ def send_document_to_telegram(user_id: int, file_path: str, caption: str = "",
                 'caption': caption[:1024] if caption else ""  # Telegram лимит 1024 символа
             }
             
-            print(f"📊 Данные запроса:")
-            print(f"   chat_id: {data['chat_id']}")
-            print(f"   caption: '{data['caption']}'")
-            print(f"   document: {file_name}")
+            logger.debug(f"📊 Данные запроса:")
+            logger.debug(f"chat_id: {data['chat_id']}")
+            logger.debug(f"caption: '{data['caption']}'")
+            logger.debug(f"document: {file_name}")
             
             # Отправляем запрос
-            print(f"📤 Отправляем документ {file_name} пользователю {user_id}")
+            logger.info(f"📤 Отправляем документ {file_name} пользователю {user_id}")
             response = requests.post(api_url, data=data, files=files, timeout=30)
             
-            print(f"📥 Получен ответ:")
-            print(f"   Статус код: {response.status_code}")
-            print(f"   Заголовки: {dict(response.headers)}")
+            logger.debug(f"📥 Получен ответ:")
+            logger.debug(f"Статус код: {response.status_code}")
+            logger.debug(f"Заголовки: {dict(response.headers)}")
             
             # Проверяем ответ
             if response.status_code == 200:
                 result = response.json()
-                print(f"📄 Содержимое ответа: {result}")
+                logger.debug(f"📄 Содержимое ответа: {result}")
                 if result.get('ok'):
-                    print(f"✅ Документ успешно отправлен: {file_name}")
+                    logger.info(f"✅ Документ успешно отправлен: {file_name}")
                     return True, result.get('result', {})
                 else:
                     error_msg = result.get('description', 'Неизвестная ошибка')
                     error_code = result.get('error_code', 'Неизвестный код')
-                    print(f"❌ Ошибка API:")
-                    print(f"   Код: {error_code}")
-                    print(f"   Описание: {error_msg}")
+                    logger.error(f"❌ Ошибка API:")
+                    logger.error(f"Код: {error_code}")
+                    logger.error(f"Описание: {error_msg}")
                     return False, {"error": error_msg}
             else:
-                print(f"❌ HTTP ошибка: {response.status_code}")
+                logger.error(f"❌ HTTP ошибка: {response.status_code}")
                 try:
                     response_text = response.text
-                    print(f"   Текст ответа: {response_text}")
+                    logger.debug(f"Текст ответа: {response_text}")
                 except:
-                    print(f"   Текст ответа не доступен")
+                    logger.debug(f"Текст ответа не доступен")
                 error_msg = f"HTTP ошибка: {response.status_code}"
                 return False, {"error": error_msg}
                 
     except Exception as e:
         error_msg = f"Ошибка отправки: {str(e)}"
-        print(f"❌ {error_msg}")
-        print(f"📋 Трассировка ошибки:")
-        print(traceback.format_exc())
+        logger.error(f"❌ {error_msg}", exc_info=True)
         return False, {"error": error_msg}
 
 def get_mime_type(file_path: str) -> str:
@@ -223,7 +223,7 @@ def export_application_to_pdf(grant_application_id: str) -> Optional[str]:
         # Получаем данные заявки
         application = db.get_application_by_number(grant_application_id)
         if not application:
-            print(f"Заявка {grant_application_id} не найдена")
+            logger.warning(f"Заявка {grant_application_id} не найдена")
             return None
         
         # Создаем простой текстовый файл (в будущем можно заменить на PDF)
@@ -262,69 +262,66 @@ def export_application_to_pdf(grant_application_id: str) -> Optional[str]:
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write('\n'.join(content_lines))
         
-        print(f"✅ Заявка экспортирована: {output_file}")
+        logger.info(f"✅ Заявка экспортирована: {output_file}")
         return str(output_file)
         
     except Exception as e:
-        print(f"❌ Ошибка экспорта заявки в PDF: {e}")
-        print(traceback.format_exc())
+        logger.error(f"❌ Ошибка экспорта заявки в PDF: {e}", exc_info=True)
         return None
 
 def test_telegram_connection() -> Tuple[bool, str]:
     """Тестировать соединение с Telegram Bot API"""
     try:
-        print(f"🧪 === ТЕСТИРОВАНИЕ ПОДКЛЮЧЕНИЯ К TELEGRAM ===" )
+        logger.info(f"🧪 === ТЕСТИРОВАНИЕ ПОДКЛЮЧЕНИЯ К TELEGRAM ===" )
         
-        print(f"🔑 Получаем токен бота...")
+        logger.info(f"🔑 Получаем токен бота...")
         bot_token = get_bot_token()
         if not bot_token:
-            print(f"❌ Токен бота не найден!")
+            logger.error(f"❌ Токен бота не найден!")
             return False, "Токен бота не найден"
         
-        print(f"✅ Токен получен: {bot_token[:20]}...{bot_token[-10:]}")
+        logger.info(f"✅ Токен получен: {bot_token[:20]}...{bot_token[-10:]}")
         
         # Тестируем соединение через getMe
         api_url = f"https://api.telegram.org/bot{bot_token}/getMe"
-        print(f"🔗 URL для тестирования: {api_url[:50]}...getMe")
+        logger.info(f"🔗 URL для тестирования: {api_url[:50]}...getMe")
         
-        print(f"🚀 Отправляем тестовый запрос...")
+        logger.info(f"🚀 Отправляем тестовый запрос...")
         response = requests.get(api_url, timeout=10)
         
-        print(f"📥 Получен ответ:")
-        print(f"   Статус код: {response.status_code}")
-        print(f"   Заголовки: {dict(response.headers)}")
+        logger.debug(f"📥 Получен ответ:")
+        logger.debug(f"Статус код: {response.status_code}")
+        logger.debug(f"Заголовки: {dict(response.headers)}")
         
         if response.status_code == 200:
             result = response.json()
-            print(f"📄 Содержимое ответа: {result}")
+            logger.debug(f"📄 Содержимое ответа: {result}")
             if result.get('ok'):
                 bot_info = result.get('result', {})
                 bot_name = bot_info.get('first_name', 'Unknown')
                 bot_username = bot_info.get('username', 'Unknown')
                 bot_id = bot_info.get('id', 'Unknown')
                 success_msg = f"✅ Бот подключен: {bot_name} (@{bot_username}), ID: {bot_id}"
-                print(success_msg)
+                logger.info(success_msg)
                 return True, success_msg
             else:
                 error_msg = result.get('description', 'Unknown')
                 error_code = result.get('error_code', 'Unknown')
-                print(f"❌ API ошибка:")
-                print(f"   Код: {error_code}")
-                print(f"   Описание: {error_msg}")
+                logger.error(f"❌ API ошибка:")
+                logger.error(f"Код: {error_code}")
+                logger.error(f"Описание: {error_msg}")
                 return False, f"❌ API ошибка: {error_msg}"
         else:
-            print(f"❌ HTTP ошибка: {response.status_code}")
+            logger.error(f"❌ HTTP ошибка: {response.status_code}")
             try:
                 response_text = response.text
-                print(f"   Текст ответа: {response_text}")
+                logger.debug(f"Текст ответа: {response_text}")
             except:
-                print(f"   Текст ответа не доступен")
+                logger.debug(f"Текст ответа не доступен")
             return False, f"❌ HTTP ошибка: {response.status_code}"
             
     except Exception as e:
-        print(f"❌ Ошибка соединения: {str(e)}")
-        print(f"📋 Трассировка ошибки:")
-        print(traceback.format_exc())
+        logger.error(f"❌ Ошибка соединения: {str(e)}", exc_info=True)
         return False, f"❌ Ошибка соединения: {str(e)}"
 
 def send_message_to_telegram(user_id: int, text: str) -> Tuple[bool, Dict[str, Any]]: